@@ -0,0 +1,4 @@
+"""
+Benchmarks de rendimiento del backend (scripts; no forman parte de la API).
+Ejecutar desde backend/: python -m src.benchmarks.<modulo>
+"""
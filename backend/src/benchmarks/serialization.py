@@ -0,0 +1,114 @@
+"""
+Benchmark de serialización de partículas: filas de BD → bytes JSON.
+
+Compara el camino anterior (ParticleResponse validado en from_row, FastAPI revalida contra response_model y
+serializa con jsonable_encoder + json.dumps) con el camino rápido (trusted_model + orjson_response).
+Usa filas sintéticas con los mismos tipos que devuelve asyncpg, así que no necesita base de datos.
+
+Uso (desde backend/): python -m src.benchmarks.serialization [cantidad_filas]
+"""
+import json
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal
+from typing import Callable, List
+from uuid import uuid4
+
+from asyncpg.pgproto.pgproto import UUID
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from src.domains.particles.schemas import ParticleResponse, ParticlesResponse, ParticleViewportQuery
+from src.domains.shared.orjson_response import orjson_dumps
+from src.domains.shared.schemas import parse_jsonb_field
+
+
+def _uuid() -> UUID:
+    """UUID con el tipo que devuelve asyncpg (subclase de uuid.UUID)."""
+    return UUID(str(uuid4()))
+
+
+def _rows(n: int) -> List[dict]:
+    """Filas con la forma y tipos de _VIEWPORT_SQL (UUID, Decimal, datetime, JSONB como str)."""
+    bloque_id, tipo_id, estado_id = _uuid(), _uuid(), _uuid()
+    now = datetime.now()
+    return [
+        {
+            "id": _uuid(), "bloque_id": bloque_id,
+            "celda_x": i % 160, "celda_y": (i // 160) % 160, "celda_z": i // 25600 - 10,
+            "tipo_particula_id": tipo_id, "estado_materia_id": estado_id,
+            "cantidad": Decimal("1.0000"), "temperatura": Decimal("18.5000"), "energia": Decimal("0.0000"),
+            "extraida": False, "agrupacion_id": None, "es_nucleo": False, "propiedades": "{}",
+            "creado_por": None, "creado_en": now, "modificado_en": now,
+            "tipo_nombre": "tierra", "estado_nombre": "solido",
+        }
+        for i in range(n)
+    ]
+
+
+def _validated_from_row(row) -> ParticleResponse:
+    """from_row anterior: construye el modelo validando cada campo."""
+    return ParticleResponse(
+        id=row["id"], bloque_id=row["bloque_id"],
+        celda_x=row["celda_x"], celda_y=row["celda_y"], celda_z=row["celda_z"],
+        tipo=row["tipo_nombre"], estado=row["estado_nombre"],
+        cantidad=float(row["cantidad"]), temperatura=float(row["temperatura"]), energia=float(row["energia"]),
+        extraida=row["extraida"], agrupacion_id=row.get("agrupacion_id"), es_nucleo=row["es_nucleo"],
+        propiedades=parse_jsonb_field(row.get("propiedades")),
+        tipo_particula_id=row["tipo_particula_id"], estado_materia_id=row["estado_materia_id"],
+        tipo_nombre=row["tipo_nombre"], estado_nombre=row["estado_nombre"],
+        creado_en=row["creado_en"], modificado_en=row["modificado_en"], creado_por=row.get("creado_por"),
+    )
+
+
+async def _fastapi_default(result: ParticlesResponse) -> bytes:
+    """Serialización por defecto de FastAPI para un endpoint con response_model=ParticlesResponse."""
+    field = create_response_field(name="response", type_=ParticlesResponse)
+    content = await serialize_response(field=field, response_content=result)
+    return JSONResponse(content).body
+
+
+def _timed(fn: Callable, *args):
+    start = time.perf_counter()
+    value = fn(*args)
+    return value, time.perf_counter() - start
+
+
+async def run(n: int) -> None:
+    rows = _rows(n)
+    viewport = ParticleViewportQuery(x_min=0, x_max=159, y_min=0, y_max=159, z_min=-10, z_max=10)
+
+    def build(from_row):
+        particles = [from_row(row) for row in rows]
+        return ParticlesResponse(bloque_id=rows[0]["bloque_id"], particles=particles, total=n, viewport=viewport)
+
+    before_model, t_before_model = _timed(build, _validated_from_row)
+    start = time.perf_counter()
+    before_body = await _fastapi_default(before_model)
+    t_before_json = time.perf_counter() - start
+
+    after_model, t_after_model = _timed(build, ParticleResponse.from_row)
+    after_body, t_after_json = _timed(orjson_dumps, after_model)
+
+    if json.loads(before_body) != json.loads(after_body):
+        raise SystemExit("Los dos caminos producen JSON distinto")
+
+    print(f"{n} filas ({len(after_body) / 1e6:.1f} MB de JSON)")
+    print(f"{'':28}{'filas→modelos':>16}{'modelos→JSON':>16}{'total':>16}")
+    for label, t_model, t_json in (
+        ("antes (validado + FastAPI)", t_before_model, t_before_json),
+        ("después (trusted + orjson)", t_after_model, t_after_json),
+    ):
+        print(
+            f"{label:28}{n / t_model:>12,.0f} f/s{n / t_json:>12,.0f} f/s"
+            f"{n / (t_model + t_json):>12,.0f} f/s"
+        )
+    print(f"aceleración total: {(t_before_model + t_before_json) / (t_after_model + t_after_json):.1f}x")
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000))
@@ -0,0 +1,26 @@
+"""
+Caché compartida entre workers (Redis)
+
+Interface BaseCache con implementación en Redis y un sustituto en memoria, y la fachada SharedCache
+(claves versionadas, versiones por espacio de nombres e invalidación por pub/sub).
+"""
+from .cache_interface import BaseCache
+from .memory_cache import MemoryBroker, MemoryCache
+from .shared_cache import (
+    SharedCache,
+    bump_namespace,
+    close_shared_cache,
+    get_shared_cache,
+    start_shared_cache,
+)
+
+__all__ = [
+    'BaseCache',
+    'MemoryBroker',
+    'MemoryCache',
+    'SharedCache',
+    'bump_namespace',
+    'close_shared_cache',
+    'get_shared_cache',
+    'start_shared_cache',
+]
@@ -0,0 +1,57 @@
+"""
+Interface para la caché compartida entre workers
+
+Usa Strategy pattern (como src/storage): Redis en producción y un sustituto en memoria para desarrollo
+y pruebas, sin cambiar el código que la usa. Los valores son bytes (cada consumidor elige su serialización).
+"""
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional
+
+
+class BaseCache(ABC):
+    """Interface de la caché compartida: claves con TTL, contadores y pub/sub."""
+
+    @abstractmethod
+    async def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        """
+        Leer varias claves en un viaje
+
+        Returns:
+            Valor de cada clave en el mismo orden (None si falta o expiró)
+        """
+        pass
+
+    @abstractmethod
+    async def set_many(self, items: Dict[str, bytes], ttl_seconds: int) -> None:
+        """Guardar varias claves con el mismo TTL en un viaje."""
+        pass
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None:
+        """Borrar claves (las que no existen se ignoran)."""
+        pass
+
+    @abstractmethod
+    async def incr(self, key: str) -> int:
+        """Incrementar un contador (sin TTL) y devolver el valor nuevo; arranca en 0."""
+        pass
+
+    @abstractmethod
+    async def get_counter(self, key: str) -> int:
+        """Valor de un contador (0 si no existe)."""
+        pass
+
+    @abstractmethod
+    async def publish(self, channel: str, message: bytes) -> None:
+        """Publicar un mensaje en el canal (lo reciben todos los suscriptores, incluido el propio proceso)."""
+        pass
+
+    @abstractmethod
+    async def subscribe(self, channel: str, handler: Callable[[bytes], None]) -> None:
+        """Registrar handler para los mensajes del canal; se llama en el event loop, un mensaje por vez."""
+        pass
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Cancelar suscripciones y cerrar conexiones."""
+        pass
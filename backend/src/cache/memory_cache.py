@@ -0,0 +1,78 @@
+"""
+Sustituto en memoria de la caché compartida
+
+Implementación de BaseCache sin Redis, con la misma semántica (TTL, contadores, pub/sub asíncrono).
+Varias instancias que comparten un MemoryBroker se comportan como workers conectados al mismo Redis,
+lo que permite probar la invalidación entre workers en un solo proceso.
+"""
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .cache_interface import BaseCache
+
+
+class MemoryBroker:
+    """Estado compartido entre instancias de MemoryCache (el 'servidor')."""
+
+    def __init__(self):
+        self.values: Dict[str, Tuple[bytes, float]] = {}
+        self.counters: Dict[str, int] = {}
+        self.handlers: Dict[str, List[Callable[[bytes], None]]] = {}
+
+
+class MemoryCache(BaseCache):
+    """Caché en memoria; sin broker propio, todas las instancias del proceso comparten el mismo."""
+
+    def __init__(self, broker: Optional[MemoryBroker] = None):
+        self._broker = broker if broker is not None else _default_broker
+        self._subscriptions: List[Tuple[str, Callable[[bytes], None]]] = []
+
+    async def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        now = time.monotonic()
+        result: List[Optional[bytes]] = []
+        for key in keys:
+            entry = self._broker.values.get(key)
+            if entry is not None and entry[1] <= now:
+                del self._broker.values[key]
+                entry = None
+            result.append(entry[0] if entry is not None else None)
+        return result
+
+    async def set_many(self, items: Dict[str, bytes], ttl_seconds: int) -> None:
+        expires_at = time.monotonic() + ttl_seconds
+        for key, value in items.items():
+            self._broker.values[key] = (value, expires_at)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._broker.values.pop(key, None)
+            self._broker.counters.pop(key, None)
+
+    async def incr(self, key: str) -> int:
+        value = self._broker.counters.get(key, 0) + 1
+        self._broker.counters[key] = value
+        return value
+
+    async def get_counter(self, key: str) -> int:
+        return self._broker.counters.get(key, 0)
+
+    async def publish(self, channel: str, message: bytes) -> None:
+        # Entrega asíncrona como Redis: el handler corre después de que publish devuelve
+        loop = asyncio.get_running_loop()
+        for handler in list(self._broker.handlers.get(channel, [])):
+            loop.call_soon(handler, message)
+
+    async def subscribe(self, channel: str, handler: Callable[[bytes], None]) -> None:
+        self._broker.handlers.setdefault(channel, []).append(handler)
+        self._subscriptions.append((channel, handler))
+
+    async def close(self) -> None:
+        for channel, handler in self._subscriptions:
+            handlers = self._broker.handlers.get(channel, [])
+            if handler in handlers:
+                handlers.remove(handler)
+        self._subscriptions.clear()
+
+
+_default_broker = MemoryBroker()
@@ -0,0 +1,96 @@
+"""
+Caché compartida en Redis
+
+Implementación de BaseCache con redis.asyncio (usa hiredis para parsear si está instalado).
+Las suscripciones se atienden en una tarea de fondo por instancia; los errores de conexión se propagan
+y los maneja SharedCache (la caché compartida nunca debe tirar un request).
+"""
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional
+
+import redis.asyncio as redis
+
+from .cache_interface import BaseCache
+
+logger = logging.getLogger(__name__)
+
+
+class RedisCache(BaseCache):
+    """Caché en Redis: claves con SET EX, contadores con INCR y pub/sub para invalidaciones."""
+
+    def __init__(self, host: str, port: int, db: int = 0):
+        self._client = redis.Redis(host=host, port=port, db=db)
+        self._pubsub = None
+        self._handlers: Dict[str, Callable[[bytes], None]] = {}
+        self._listener: Optional[asyncio.Task] = None
+
+    async def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        if not keys:
+            return []
+        return await self._client.mget(keys)
+
+    async def set_many(self, items: Dict[str, bytes], ttl_seconds: int) -> None:
+        if not items:
+            return
+        async with self._client.pipeline(transaction=False) as pipe:
+            for key, value in items.items():
+                pipe.set(key, value, ex=ttl_seconds)
+            await pipe.execute()
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self._client.delete(*keys)
+
+    async def incr(self, key: str) -> int:
+        return await self._client.incr(key)
+
+    async def get_counter(self, key: str) -> int:
+        value = await self._client.get(key)
+        return int(value) if value is not None else 0
+
+    async def publish(self, channel: str, message: bytes) -> None:
+        await self._client.publish(channel, message)
+
+    async def subscribe(self, channel: str, handler: Callable[[bytes], None]) -> None:
+        if self._pubsub is None:
+            self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(channel)
+        self._handlers[channel] = handler
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        await self._client.aclose()
+
+    async def _listen(self) -> None:
+        """Lee mensajes de las suscripciones; ante un corte reintenta (redis-py vuelve a suscribir al reconectar)."""
+        while True:
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Suscripción a Redis interrumpida: {e}")
+                await asyncio.sleep(1.0)
+                continue
+            if message is None or message.get("type") != "message":
+                continue
+            channel = message["channel"]
+            handler = self._handlers.get(channel.decode() if isinstance(channel, bytes) else channel)
+            if handler is None:
+                continue
+            try:
+                handler(message["data"])
+            except Exception as e:
+                logger.error(f"Error procesando mensaje de {channel!r}: {e}")
@@ -0,0 +1,210 @@
+"""
+Caché compartida entre workers: claves versionadas e invalidación por pub/sub.
+
+Dos formas de versionar una clave:
+- Con la versión del propio dato (p. ej. chunk_versiones.version): la clave cambia cuando cambia el dato y las
+  entradas viejas expiran por TTL; no hace falta invalidar nada.
+- Por espacio de nombres (p. ej. "bloques"): un contador en la caché; bump() lo incrementa y avisa por el canal
+  a los demás workers, que actualizan su copia local del número (leer no cuesta un viaje extra).
+Los mensajes del canal son JSON {"origen", "tipo", ...}; cada consumidor registra un handler por tipo con on().
+Los errores del backend se registran y cuentan como fallo de caché: el llamador sigue contra la BD.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import orjson
+
+from src.config import CACHE_CONFIG
+
+from .cache_interface import BaseCache
+from .memory_cache import MemoryCache
+
+logger = logging.getLogger(__name__)
+
+
+class SharedCache:
+    """Fachada sobre un BaseCache: prefijo y TTL de claves, versiones por espacio de nombres y mensajes tipados."""
+
+    def __init__(
+        self,
+        backend: BaseCache,
+        prefix: str = CACHE_CONFIG["KEY_PREFIX"],
+        ttl_seconds: int = CACHE_CONFIG["TTL_SECONDS"],
+        channel: str = CACHE_CONFIG["CHANNEL"],
+        version_refresh_seconds: float = CACHE_CONFIG["VERSION_REFRESH_SECONDS"],
+    ):
+        self.backend = backend
+        self.prefix = prefix
+        self.ttl_seconds = ttl_seconds
+        self.channel = f"{prefix}:{channel}"
+        self.version_refresh_seconds = version_refresh_seconds
+        # espacio de nombres -> (versión, momento en que se leyó o se recibió)
+        self._versions: Dict[str, Tuple[int, float]] = {}
+        self._handlers: Dict[str, List[Callable[[dict], None]]] = {}
+        self._pending: Set[asyncio.Task] = set()
+        # Identifica a esta instancia (una por worker) en los mensajes del canal: sus propios avisos se ignoran al
+        # recibirlos. Por instancia y no por proceso, así varias sobre un MemoryBroker se comportan como workers.
+        self.origen = uuid.uuid4().hex
+
+    # --- Claves y valores ---
+
+    def key(self, *parts, version: int) -> str:
+        """Clave versionada: {prefix}:{parte}:...:v{version}."""
+        return f"{self.prefix}:{':'.join(str(part) for part in parts)}:v{version}"
+
+    async def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        """Valores de las claves (None si faltan); si el backend falla, todo cuenta como fallo de caché."""
+        try:
+            return await self.backend.get_many(keys)
+        except Exception as e:
+            logger.warning(f"Caché compartida no disponible (lectura): {e}")
+            return [None] * len(keys)
+
+    async def set_many(self, items: Dict[str, bytes]) -> None:
+        """Guarda las claves con el TTL configurado; los errores solo se registran."""
+        try:
+            await self.backend.set_many(items, self.ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Caché compartida no disponible (escritura): {e}")
+
+    # --- Versiones por espacio de nombres ---
+
+    async def namespace_version(self, namespace: str) -> int:
+        """Versión actual del espacio de nombres (copia local; se relee del backend si venció)."""
+        cached = self._versions.get(namespace)
+        if cached is not None and time.monotonic() - cached[1] < self.version_refresh_seconds:
+            return cached[0]
+        try:
+            version = await self.backend.get_counter(self._namespace_key(namespace))
+        except Exception as e:
+            logger.warning(f"Caché compartida no disponible (versión de {namespace}): {e}")
+            # Sin backend no se puede saber si cambió: -1 no coincide con ninguna entrada guardada
+            return -1
+        self._versions[namespace] = (version, time.monotonic())
+        return version
+
+    async def bump(self, namespace: str) -> None:
+        """Invalida todas las claves del espacio de nombres (nueva versión) y avisa a los demás workers."""
+        try:
+            version = await self.backend.incr(self._namespace_key(namespace))
+        except Exception as e:
+            logger.warning(f"Caché compartida no disponible (bump de {namespace}): {e}")
+            self._versions.pop(namespace, None)
+            return
+        message = {"tipo": "namespace", "namespace": namespace, "version": version}
+        self._handle(message)
+        await self.publish(message)
+
+    # --- Mensajes ---
+
+    def on(self, tipo: str, handler: Callable[[dict], None]) -> None:
+        """Registra handler para los mensajes de ese tipo recibidos de otros workers (y los bump locales)."""
+        self._handlers.setdefault(tipo, []).append(handler)
+
+    async def publish(self, message: dict) -> None:
+        """Publica el mensaje en el canal (con el origen de esta instancia)."""
+        try:
+            await self.backend.publish(self.channel, orjson.dumps({**message, "origen": self.origen}))
+        except Exception as e:
+            logger.warning(f"Caché compartida no disponible (publicación): {e}")
+
+    def publish_soon(self, message: dict) -> None:
+        """Publica desde código síncrono: agenda publish() en el event loop (sin loop corriendo no hace nada)."""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = loop.create_task(self.publish(message))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def start(self) -> None:
+        """Se suscribe al canal de invalidaciones."""
+        try:
+            await self.backend.subscribe(self.channel, self._dispatch)
+        except Exception as e:
+            logger.warning(f"Caché compartida: no se pudo suscribir a {self.channel}: {e}")
+
+    async def close(self) -> None:
+        """Espera las publicaciones pendientes y cierra el backend."""
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        await self.backend.close()
+
+    # --- Internos ---
+
+    def _namespace_key(self, namespace: str) -> str:
+        return f"{self.prefix}:version:{namespace}"
+
+    def _dispatch(self, raw: bytes) -> None:
+        try:
+            message = orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            logger.warning("Caché compartida: mensaje inválido en el canal")
+            return
+        if message.get("origen") == self.origen:
+            return
+        self._handle(message)
+
+    def _handle(self, message: dict) -> None:
+        if message.get("tipo") == "namespace":
+            namespace = message["namespace"]
+            current = self._versions.get(namespace)
+            if current is None or message["version"] >= current[0]:
+                self._versions[namespace] = (message["version"], time.monotonic())
+        for handler in self._handlers.get(message.get("tipo"), []):
+            try:
+                handler(message)
+            except Exception as e:
+                logger.error(f"Error aplicando mensaje de caché compartida {message.get('tipo')}: {e}")
+
+
+_shared_cache: Optional[SharedCache] = None
+
+
+def _create_backend() -> Optional[BaseCache]:
+    backend = CACHE_CONFIG["BACKEND"]
+    if backend == "redis":
+        from .redis_cache import RedisCache
+        return RedisCache(CACHE_CONFIG["REDIS_HOST"], CACHE_CONFIG["REDIS_PORT"], CACHE_CONFIG["REDIS_DB"])
+    if backend == "memory":
+        return MemoryCache()
+    if backend != "none":
+        logger.warning(f"SHARED_CACHE_BACKEND desconocido: {backend!r}; caché compartida deshabilitada")
+    return None
+
+
+def get_shared_cache() -> Optional[SharedCache]:
+    """Instancia del proceso según CACHE_CONFIG['BACKEND']; None si la caché compartida está deshabilitada."""
+    global _shared_cache
+    if _shared_cache is None:
+        backend = _create_backend()
+        if backend is not None:
+            _shared_cache = SharedCache(backend)
+    return _shared_cache
+
+
+async def start_shared_cache() -> Optional[SharedCache]:
+    """Crea la instancia del proceso y la suscribe al canal (lifespan de la app)."""
+    shared = get_shared_cache()
+    if shared is not None:
+        await shared.start()
+    return shared
+
+
+async def close_shared_cache() -> None:
+    """Cierra la instancia del proceso, si existe."""
+    global _shared_cache
+    if _shared_cache is not None:
+        await _shared_cache.close()
+        _shared_cache = None
+
+
+async def bump_namespace(namespace: str) -> None:
+    """Invalida un espacio de nombres de la caché compartida; no hace nada si está deshabilitada."""
+    shared = get_shared_cache()
+    if shared is not None:
+        await shared.bump(namespace)
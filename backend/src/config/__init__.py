@@ -7,6 +7,8 @@ y facilitar cambios futuros.
 
 from .celestial_config import CELESTIAL_CONFIG
 from .performance_config import PERFORMANCE_CONFIG
+from .particles_config import PARTICLES_CONFIG
+from .cache_config import CACHE_CONFIG
 
-__all__ = ['CELESTIAL_CONFIG', 'PERFORMANCE_CONFIG']
+__all__ = ['CELESTIAL_CONFIG', 'PERFORMANCE_CONFIG', 'PARTICLES_CONFIG', 'CACHE_CONFIG']
 
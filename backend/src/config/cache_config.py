@@ -0,0 +1,37 @@
+"""
+Configuración de la caché compartida entre workers (Redis)
+"""
+import os
+
+# Backend de la caché compartida: "none" (deshabilitada), "redis" o "memory" (sustituto en proceso, para desarrollo)
+SHARED_CACHE_BACKEND = os.getenv("SHARED_CACHE_BACKEND", "none").lower()
+
+# Conexión a Redis (mismas variables que docker-compose)
+REDIS_HOST = os.getenv("REDIS_HOST", "redis")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+REDIS_DB = int(os.getenv("REDIS_DB", "0"))
+
+# Prefijo de todas las claves y canales (permite compartir un Redis entre entornos)
+SHARED_CACHE_KEY_PREFIX = os.getenv("SHARED_CACHE_KEY_PREFIX", "jdd")
+
+# Segundos de vida de cada entrada; las claves son versionadas, así que el TTL solo limpia versiones viejas
+SHARED_CACHE_TTL_SECONDS = int(os.getenv("SHARED_CACHE_TTL_SECONDS", "600"))
+
+# Segundos que un worker confía en su copia local de la versión de un espacio de nombres sin releerla
+# (red de seguridad si se perdió un mensaje del canal)
+SHARED_CACHE_VERSION_REFRESH_SECONDS = float(os.getenv("SHARED_CACHE_VERSION_REFRESH_SECONDS", "30.0"))
+
+# Canal pub/sub por el que los workers se avisan invalidaciones
+SHARED_CACHE_CHANNEL = os.getenv("SHARED_CACHE_CHANNEL", "invalidaciones")
+
+# Diccionario de configuración
+CACHE_CONFIG = {
+    'BACKEND': SHARED_CACHE_BACKEND,
+    'REDIS_HOST': REDIS_HOST,
+    'REDIS_PORT': REDIS_PORT,
+    'REDIS_DB': REDIS_DB,
+    'KEY_PREFIX': SHARED_CACHE_KEY_PREFIX,
+    'TTL_SECONDS': SHARED_CACHE_TTL_SECONDS,
+    'VERSION_REFRESH_SECONDS': SHARED_CACHE_VERSION_REFRESH_SECONDS,
+    'CHANNEL': SHARED_CACHE_CHANNEL,
+}
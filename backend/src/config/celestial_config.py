@@ -100,6 +100,30 @@ ANGULO_DIA_UMBRAL = math.pi / 2  # 90 grados
 # El background task actualiza la temperatura de partículas con inercia_termica cada este intervalo
 PARTICLE_TEMPERATURE_UPDATE_INTERVAL = 300  # 5 minutos = 300 segundos
 
+# Tramos de intensidad solar (0..1) por región: la temperatura ambiente de una región (WorldBloque) sin cambios
+# se reutiliza mientras su intensidad solar no cambie de tramo
+TEMPERATURE_SOL_TRAMOS = 20  # tramos de 0.05 (hasta 1.25 °C de término solar)
+
+# Conducción entre partículas vecinas en cada tick (celestial/heat_diffusion.py): fracción de la diferencia de
+# temperatura que pasa entre dos vecinas con conductividad 1 e inercia 1. 0 desactiva la conducción
+TEMPERATURE_DIFUSION_COEFICIENTE = 0.1
+
+# Máximo de subpasos de conducción por tick (con conductividades altas o inercias bajas el paso se parte para ser
+# estable; más allá de este máximo esas celdas conducen más lento)
+TEMPERATURE_DIFUSION_MAX_SUBPASOS = 16
+
+# ===== Configuración de Temperatura por Lotes (POST /celestial/temperature/batch) =====
+
+# Máximo de celdas por consulta (lista de puntos o grilla)
+TEMPERATURE_BATCH_MAX_CELDAS = 262144  # 64³
+
+# Tramo de tiempo de juego que comparte resultados en caché (en segundos de juego)
+# Con VELOCIDAD_TIEMPO = 60.0 es un tick del tiempo celestial (1 segundo real)
+TEMPERATURE_BATCH_TRAMO_SEGUNDOS = 60.0
+
+# Consultas distintas guardadas en la caché de temperatura por lotes
+TEMPERATURE_BATCH_CACHE_ENTRADAS = 64
+
 # ===== Diccionario de Configuración Completa =====
 
 CELESTIAL_CONFIG = {
@@ -137,5 +161,13 @@ CELESTIAL_CONFIG = {
     
     # Temperatura de partículas
     'PARTICLE_TEMPERATURE_UPDATE_INTERVAL': PARTICLE_TEMPERATURE_UPDATE_INTERVAL,
+    'TEMPERATURE_SOL_TRAMOS': TEMPERATURE_SOL_TRAMOS,
+    'TEMPERATURE_DIFUSION_COEFICIENTE': TEMPERATURE_DIFUSION_COEFICIENTE,
+    'TEMPERATURE_DIFUSION_MAX_SUBPASOS': TEMPERATURE_DIFUSION_MAX_SUBPASOS,
+
+    # Temperatura por lotes
+    'TEMPERATURE_BATCH_MAX_CELDAS': TEMPERATURE_BATCH_MAX_CELDAS,
+    'TEMPERATURE_BATCH_TRAMO_SEGUNDOS': TEMPERATURE_BATCH_TRAMO_SEGUNDOS,
+    'TEMPERATURE_BATCH_CACHE_ENTRADAS': TEMPERATURE_BATCH_CACHE_ENTRADAS,
 }
 
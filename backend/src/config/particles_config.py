@@ -0,0 +1,129 @@
+"""
+Configuración de lectura de partículas (caché de chunks del viewport)
+"""
+import os
+
+# Habilitar/deshabilitar la caché en proceso de chunks de partículas
+PARTICLES_CACHE_ENABLED = os.getenv("PARTICLES_CACHE_ENABLED", "true").lower() == "true"
+
+# Lado del chunk en celdas (mismo tamaño que WorldBloque.tamano_bloque)
+PARTICLES_CHUNK_SIZE = int(os.getenv("PARTICLES_CHUNK_SIZE", "40"))
+
+# Máximo de chunks en caché (evicción LRU)
+PARTICLES_CACHE_MAX_CHUNKS = int(os.getenv("PARTICLES_CACHE_MAX_CHUNKS", "2048"))
+
+# Máximo de partículas sumadas entre todos los chunks en caché (evicción LRU por tamaño)
+PARTICLES_CACHE_MAX_PARTICLES = int(os.getenv("PARTICLES_CACHE_MAX_PARTICLES", "2000000"))
+
+# Segundos de vida de un chunk en caché; red de seguridad para escrituras hechas fuera de este proceso (0 = sin expiración)
+PARTICLES_CACHE_TTL_SECONDS = float(os.getenv("PARTICLES_CACHE_TTL_SECONDS", "300.0"))
+
+# Filas por lote al leer un viewport en streaming (cursor de asyncpg)
+PARTICLES_STREAM_BATCH_SIZE = int(os.getenv("PARTICLES_STREAM_BATCH_SIZE", "5000"))
+
+# Opacidad mínima (tipos_particulas.opacidad) para que un vecino tape una cara en visibility=surface
+PARTICLES_SURFACE_OPACITY_THRESHOLD = float(os.getenv("PARTICLES_SURFACE_OPACITY_THRESHOLD", "1.0"))
+
+# Nivel máximo de detalle reducido (lod=N agrupa cubos de 2^N); 2^N debe dividir a PARTICLES_CHUNK_SIZE
+PARTICLES_LOD_MAX_LEVEL = int(os.getenv("PARTICLES_LOD_MAX_LEVEL", "3"))
+
+# Máximo de representativos sumados entre todas las pirámides LOD por chunk en caché (evicción LRU)
+PARTICLES_LOD_CACHE_MAX_PARTICLES = int(os.getenv("PARTICLES_LOD_CACHE_MAX_PARTICLES", "1000000"))
+
+# Máximo de regiones (AABB + chunks) por pedido a POST /bloques/{id}/particles/batch
+PARTICLES_BATCH_MAX_REGIONS = int(os.getenv("PARTICLES_BATCH_MAX_REGIONS", "64"))
+
+# Máximo de celdas sumadas entre todas las regiones de un batch
+PARTICLES_BATCH_MAX_CELLS = int(os.getenv("PARTICLES_BATCH_MAX_CELLS", "4000000"))
+
+# Máximo de celdas de un viewport (GET particles, particle-types, changes); el costo real lo acota VIEWPORT_MAX_PARTICLES
+PARTICLES_VIEWPORT_MAX_CELLS = int(os.getenv("PARTICLES_VIEWPORT_MAX_CELLS", "64000000"))
+
+# Máximo de partículas estimadas (chunk_resumen) en un viewport sin lod; por encima se pide lod o un viewport menor
+PARTICLES_VIEWPORT_MAX_PARTICLES = int(os.getenv("PARTICLES_VIEWPORT_MAX_PARTICLES", "1000000"))
+
+# Segundos entre comprobaciones de catalogo_version en el catálogo en memoria; red de seguridad si se pierde un NOTIFY
+PARTICLES_CATALOGUE_REFRESH_SECONDS = float(os.getenv("PARTICLES_CATALOGUE_REFRESH_SECONDS", "30.0"))
+
+# Cache-Control max-age (segundos) de GET /particle-types/catalogue; después el cliente revalida con el ETag
+PARTICLES_CATALOGUE_MAX_AGE = int(os.getenv("PARTICLES_CATALOGUE_MAX_AGE", "300"))
+
+# Estado del mundo en memoria (VoxelStore): chunks densos para vecinos, temperatura y conteos sin ir a Postgres.
+# Desactivado por defecto (las temperaturas se escriben con retraso hasta el flush); se activa en docker-compose
+PARTICLES_VOXEL_STORE_ENABLED = os.getenv("PARTICLES_VOXEL_STORE_ENABLED", "false").lower() == "true"
+
+# Memoria máxima de los chunks del VoxelStore en MB (evicción LRU; un chunk con partículas ocupa ~0.6 MB)
+PARTICLES_VOXEL_STORE_MAX_MB = int(os.getenv("PARTICLES_VOXEL_STORE_MAX_MB", "512"))
+
+# Filas por sentencia en las escrituras de temperatura en lote (tarea de temperatura y flush del VoxelStore)
+PARTICLES_TEMPERATURE_WRITE_BATCH = int(os.getenv("PARTICLES_TEMPERATURE_WRITE_BATCH", "20000"))
+
+# Cambio mínimo de temperatura (°C) para escribirla en las escrituras en lote; los menores se descartan
+PARTICLES_TEMPERATURE_EPSILON = float(os.getenv("PARTICLES_TEMPERATURE_EPSILON", "0.01"))
+
+# Habilitar/deshabilitar la tarea de flujo de líquidos (autómata celular sobre los chunks activos)
+PARTICLES_LIQUID_ENABLED = os.getenv("PARTICLES_LIQUID_ENABLED", "false").lower() == "true"
+
+# Segundos entre ticks de la tarea de flujo de líquidos
+PARTICLES_LIQUID_TICK_SECONDS = float(os.getenv("PARTICLES_LIQUID_TICK_SECONDS", "1.0"))
+
+# Tiempo máximo de simulación por bloque y tick (segundos); lo que no se asentó sigue en el próximo tick
+PARTICLES_LIQUID_BUDGET_SECONDS = float(os.getenv("PARTICLES_LIQUID_BUDGET_SECONDS", "0.5"))
+
+# Máximo de pasos del autómata por bloque y tick
+PARTICLES_LIQUID_MAX_STEPS = int(os.getenv("PARTICLES_LIQUID_MAX_STEPS", "500"))
+
+# Máximo de chunks con líquido activos simulados por bloque y tick; el resto espera al próximo
+PARTICLES_LIQUID_MAX_CHUNKS = int(os.getenv("PARTICLES_LIQUID_MAX_CHUNKS", "64"))
+
+# Celdas alrededor (y debajo) del líquido que se leen y simulan por tick; más allá el líquido se frena hasta el próximo
+PARTICLES_LIQUID_MARGIN = int(os.getenv("PARTICLES_LIQUID_MARGIN", "16"))
+
+# Diferencia de cantidad entre vecinas por debajo de la cual no hay flujo lateral (una capa fina deja de extenderse)
+PARTICLES_LIQUID_MIN_DIFFERENCE = float(os.getenv("PARTICLES_LIQUID_MIN_DIFFERENCE", "0.01"))
+
+# Viscosidad de los líquidos con tipos_particulas.viscosidad NULL (0 = la más fluida)
+PARTICLES_LIQUID_DEFAULT_VISCOSITY = float(os.getenv("PARTICLES_LIQUID_DEFAULT_VISCOSITY", "0.0"))
+
+# Habilitar/deshabilitar la tarea de propagación de fuego y energía (frentes desde el feed de cambios)
+PARTICLES_PROPAGATION_ENABLED = os.getenv("PARTICLES_PROPAGATION_ENABLED", "false").lower() == "true"
+
+# Segundos entre ticks de la tarea de propagación (la fuente avanza propagacion celdas por tick)
+PARTICLES_PROPAGATION_TICK_SECONDS = float(os.getenv("PARTICLES_PROPAGATION_TICK_SECONDS", "1.0"))
+
+# Máximo de celdas del frente procesadas por bloque y tick; el resto espera al próximo
+PARTICLES_PROPAGATION_MAX_FRONT = int(os.getenv("PARTICLES_PROPAGATION_MAX_FRONT", "20000"))
+
+# Diccionario de configuración
+PARTICLES_CONFIG = {
+    'CACHE_ENABLED': PARTICLES_CACHE_ENABLED,
+    'CHUNK_SIZE': PARTICLES_CHUNK_SIZE,
+    'CACHE_MAX_CHUNKS': PARTICLES_CACHE_MAX_CHUNKS,
+    'CACHE_MAX_PARTICLES': PARTICLES_CACHE_MAX_PARTICLES,
+    'CACHE_TTL_SECONDS': PARTICLES_CACHE_TTL_SECONDS,
+    'STREAM_BATCH_SIZE': PARTICLES_STREAM_BATCH_SIZE,
+    'SURFACE_OPACITY_THRESHOLD': PARTICLES_SURFACE_OPACITY_THRESHOLD,
+    'LOD_MAX_LEVEL': PARTICLES_LOD_MAX_LEVEL,
+    'LOD_CACHE_MAX_PARTICLES': PARTICLES_LOD_CACHE_MAX_PARTICLES,
+    'BATCH_MAX_REGIONS': PARTICLES_BATCH_MAX_REGIONS,
+    'BATCH_MAX_CELLS': PARTICLES_BATCH_MAX_CELLS,
+    'VIEWPORT_MAX_CELLS': PARTICLES_VIEWPORT_MAX_CELLS,
+    'VIEWPORT_MAX_PARTICLES': PARTICLES_VIEWPORT_MAX_PARTICLES,
+    'CATALOGUE_REFRESH_SECONDS': PARTICLES_CATALOGUE_REFRESH_SECONDS,
+    'CATALOGUE_MAX_AGE': PARTICLES_CATALOGUE_MAX_AGE,
+    'VOXEL_STORE_ENABLED': PARTICLES_VOXEL_STORE_ENABLED,
+    'VOXEL_STORE_MAX_MB': PARTICLES_VOXEL_STORE_MAX_MB,
+    'TEMPERATURE_WRITE_BATCH': PARTICLES_TEMPERATURE_WRITE_BATCH,
+    'TEMPERATURE_EPSILON': PARTICLES_TEMPERATURE_EPSILON,
+    'LIQUID_ENABLED': PARTICLES_LIQUID_ENABLED,
+    'LIQUID_TICK_SECONDS': PARTICLES_LIQUID_TICK_SECONDS,
+    'LIQUID_BUDGET_SECONDS': PARTICLES_LIQUID_BUDGET_SECONDS,
+    'LIQUID_MAX_STEPS': PARTICLES_LIQUID_MAX_STEPS,
+    'LIQUID_MAX_CHUNKS': PARTICLES_LIQUID_MAX_CHUNKS,
+    'LIQUID_MARGIN': PARTICLES_LIQUID_MARGIN,
+    'LIQUID_MIN_DIFFERENCE': PARTICLES_LIQUID_MIN_DIFFERENCE,
+    'LIQUID_DEFAULT_VISCOSITY': PARTICLES_LIQUID_DEFAULT_VISCOSITY,
+    'PROPAGATION_ENABLED': PARTICLES_PROPAGATION_ENABLED,
+    'PROPAGATION_TICK_SECONDS': PARTICLES_PROPAGATION_TICK_SECONDS,
+    'PROPAGATION_MAX_FRONT': PARTICLES_PROPAGATION_MAX_FRONT,
+}
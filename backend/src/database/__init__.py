@@ -1,7 +1,7 @@
 """
 Módulo de base de datos
 """
-from .connection import get_connection, get_pool, health_check, create_pool, close_pool
+from .connection import get_connection, get_pool, health_check, create_pool, close_pool, connect_dedicated
 
-__all__ = ["get_connection", "get_pool", "health_check", "create_pool", "close_pool"]
+__all__ = ["get_connection", "get_pool", "health_check", "create_pool", "close_pool", "connect_dedicated"]
 
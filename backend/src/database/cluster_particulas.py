@@ -0,0 +1,40 @@
+"""
+Script de mantenimiento: agrupa físicamente particulas por clave Morton (CLUSTER ON idx_particulas_morton).
+
+Los viewports leen la tabla por rangos de morton (ver src/domains/particles/morton.py); con la tabla agrupada esos
+rangos son páginas contiguas. Las escrituras posteriores no mantienen el orden, así que conviene volver a ejecutarlo
+después de los seeds o de cambios grandes en el terreno.
+
+CLUSTER toma un lock ACCESS EXCLUSIVE sobre particulas mientras reescribe la tabla: ejecutarlo con el backend detenido
+(o en una ventana de mantenimiento), nunca desde el servidor.
+
+    python -m src.database.cluster_particulas
+"""
+import asyncio
+from pathlib import Path
+import sys
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.database.connection import connect_dedicated
+
+
+async def cluster_particulas():
+    """Reescribir particulas en orden de idx_particulas_morton y actualizar estadísticas"""
+    # Conexión fuera del pool: sin el command_timeout del pool, que CLUSTER supera en bloques grandes
+    conn = await connect_dedicated()
+    try:
+        print("Agrupando particulas por clave Morton (CLUSTER)...")
+        await conn.execute("CLUSTER juego_dioses.particulas")
+        await conn.execute("ANALYZE juego_dioses.particulas")
+        print("✓ particulas agrupada y analizada")
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    print("Mantenimiento: CLUSTER de juego_dioses.particulas por clave Morton")
+    print("="*60)
+    print("Bloquea la tabla mientras se ejecuta: detener el backend antes.")
+    print("="*60)
+    asyncio.run(cluster_particulas())
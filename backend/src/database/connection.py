@@ -61,6 +61,20 @@ async def get_pool() -> asyncpg.Pool:
     return _pool
 
 
+async def connect_dedicated() -> asyncpg.Connection:
+    """
+    Conexión propia, fuera del pool (para LISTEN: queda abierta mientras viva el proceso).
+    Quien la abre la cierra.
+    """
+    return await asyncpg.connect(
+        host=POSTGRES_HOST,
+        port=POSTGRES_PORT,
+        user=POSTGRES_USER,
+        password=POSTGRES_PASSWORD,
+        database=POSTGRES_DB,
+    )
+
+
 @asynccontextmanager
 async def get_connection():
     """
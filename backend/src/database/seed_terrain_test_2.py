@@ -8,6 +8,8 @@ import random
 from dotenv import load_dotenv
 from uuid import UUID
 from src.world_creation_engine.terrain_builder import create_boundary_layer
+from src.cache import bump_namespace
+from src.domains.particles.infrastructure.particle_chunk_cache import particle_chunk_cache
 from src.world_creation_engine.templates.trees.registry import get_random_tree_template
 from src.world_creation_engine.templates.bipedos.registry import get_biped_template
 from src.world_creation_engine.creators.entity_creator import EntityCreator
@@ -63,6 +65,7 @@ async def seed_terrain_test_2():
                 WHERE bloque_id = $1
             """, existing_dim_id)
             print(f"  Partículas eliminadas: {particulas_borradas.split()[-1]}")
+            particle_chunk_cache.invalidate_bloque(existing_dim_id)
             
             # Borrar dimensión
             await conn.execute("""
@@ -472,6 +475,11 @@ async def seed_terrain_test_2():
         
         # 10. Verificar y mostrar estadísticas
         print("\n" + "="*60)
+        # Descartar chunks leídos mientras el seed todavía insertaba
+        particle_chunk_cache.invalidate_bloque(dimension_id)
+        # Metadatos de bloques en la caché compartida (se creó y quizás se borró un bloque)
+        await bump_namespace("bloques")
+
         print("Verificando creación del terreno...")
         
         # Contar total de partículas
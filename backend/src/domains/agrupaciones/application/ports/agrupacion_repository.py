@@ -15,6 +15,11 @@ class IAgrupacionRepository(ABC):
         """Indica si existe un bloque con el ID dado (juego_dioses.bloques)."""
         pass
 
+    @abstractmethod
+    async def get_bloque_version(self, bloque_id: UUID) -> Optional[int]:
+        """Versión del bloque (cambia con cualquier escritura del bloque); None si el bloque no existe."""
+        pass
+
     @abstractmethod
     async def list_by_bloque(self, bloque_id: UUID) -> List[AgrupacionResponse]:
         """Devuelve todas las agrupaciones del bloque con particulas_count; orden por creado_en DESC."""
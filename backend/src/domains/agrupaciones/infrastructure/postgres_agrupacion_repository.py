@@ -1,6 +1,7 @@
 """
 Adaptador de persistencia: implementa IAgrupacionRepository contra Postgres.
 Las llamadas del caso de uso (get_agrupaciones, get_agrupacion_with_particles) terminan aquí.
+Las filas son confiables: los DTOs se arman con model_construct o trusted_model (sin validar) y las rutas los serializan con orjson.
 """
 from typing import List, Optional
 from uuid import UUID
@@ -23,6 +24,17 @@ class PostgresAgrupacionRepository(IAgrupacionRepository):
                 bloque_id
             )
 
+    async def get_bloque_version(self, bloque_id: UUID) -> Optional[int]:
+        """bloque_versiones.version del bloque (0 si todavía no tiene); None si el bloque no existe."""
+        async with get_connection() as conn:
+            row = await conn.fetchrow("""
+                SELECT COALESCE(bv.version, 0) AS version
+                FROM juego_dioses.bloques b
+                LEFT JOIN juego_dioses.bloque_versiones bv ON bv.bloque_id = b.id
+                WHERE b.id = $1
+            """, bloque_id)
+            return row["version"] if row else None
+
     async def list_by_bloque(self, bloque_id: UUID) -> List[AgrupacionResponse]:
         """SELECT agrupaciones del bloque con JOIN a partículas para count; GROUP BY y ORDER BY creado_en DESC."""
         async with get_connection() as conn:
@@ -40,7 +52,7 @@ class PostgresAgrupacionRepository(IAgrupacionRepository):
                 ORDER BY a.creado_en DESC
             """, bloque_id)
             return [
-                AgrupacionResponse(
+                AgrupacionResponse.model_construct(
                     id=row["id"],
                     bloque_id=row["bloque_id"],
                     nombre=row["nombre"],
@@ -91,7 +103,7 @@ class PostgresAgrupacionRepository(IAgrupacionRepository):
                 ORDER BY p.celda_z, p.celda_y, p.celda_x
             """, agrupacion_id)
             particulas = [ParticleResponse.from_row(row) for row in particulas_rows]
-            return AgrupacionWithParticles(
+            return AgrupacionWithParticles.model_construct(
                 id=agrupacion_row["id"],
                 bloque_id=agrupacion_row["bloque_id"],
                 nombre=agrupacion_row["nombre"],
@@ -4,17 +4,21 @@ Puerta de entrada HTTP para Agrupaciones.
 Flujo (Arquitectura Hexagonal):
   routes → casos de uso (get_agrupaciones, get_agrupacion_with_particles) → puerto IAgrupacionRepository → PostgresAgrupacionRepository.
 No usa get_connection ni SQL; solo inyecta el adaptador y delega.
+Los GET responden con orjson_response y llevan ETag (versión del bloque) y responden 304 a If-None-Match sin correr las consultas.
 """
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException
 
 from src.domains.agrupaciones.application.get_agrupaciones import get_agrupaciones
 from src.domains.agrupaciones.application.get_agrupacion_with_particles import get_agrupacion_with_particles
+from src.domains.agrupaciones.application.get_bloque_version import get_bloque_version
 from src.domains.agrupaciones.application.ports.agrupacion_repository import IAgrupacionRepository
 from src.domains.agrupaciones.infrastructure.postgres_agrupacion_repository import PostgresAgrupacionRepository
 from src.domains.agrupaciones.schemas import AgrupacionResponse, AgrupacionWithParticles
+from src.domains.shared.etag import build_etag, etag_matches, not_modified
+from src.domains.shared.orjson_response import orjson_response
 
 router = APIRouter(prefix="/bloques", tags=["agrupaciones"])
 
@@ -34,11 +38,16 @@ def _handle_value_error(e: ValueError) -> None:
 @router.get("/{bloque_id}/agrupaciones", response_model=List[AgrupacionResponse])
 async def list_agrupaciones(
     bloque_id: UUID,
+    if_none_match: Optional[str] = Header(None),
     repository: IAgrupacionRepository = Depends(get_agrupacion_repository),
 ):
     """GET /bloques/{bloque_id}/agrupaciones — Lista agrupaciones del bloque."""
     try:
-        return await get_agrupaciones(repository, bloque_id)
+        version = await get_bloque_version(repository, bloque_id)
+        etag = build_etag("agrupaciones", bloque_id, version)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        return orjson_response(await get_agrupaciones(repository, bloque_id), headers={"ETag": etag})
     except ValueError as e:
         _handle_value_error(e)
 
@@ -47,10 +56,17 @@ async def list_agrupaciones(
 async def get_agrupacion(
     bloque_id: UUID,
     agrupacion_id: UUID,
+    if_none_match: Optional[str] = Header(None),
     repository: IAgrupacionRepository = Depends(get_agrupacion_repository),
 ):
     """GET /bloques/{bloque_id}/agrupaciones/{agrupacion_id} — Agrupación con sus partículas."""
     try:
-        return await get_agrupacion_with_particles(repository, bloque_id, agrupacion_id)
+        version = await get_bloque_version(repository, bloque_id)
+        etag = build_etag("agrupacion", bloque_id, agrupacion_id, version)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        return orjson_response(
+            await get_agrupacion_with_particles(repository, bloque_id, agrupacion_id), headers={"ETag": etag}
+        )
     except ValueError as e:
         _handle_value_error(e)
@@ -0,0 +1,33 @@
+"""
+Caso de uso: mapa de alturas de un bloque (GET /bloques/{bloque_id}/heightmap).
+Recibe el puerto IBloqueRepository; en runtime lee alturas_terreno con PostgresBloqueRepository.
+"""
+from uuid import UUID
+
+from src.domains.bloques.application.ports.bloque_repository import IBloqueRepository
+from src.domains.bloques.heightmap import encode_heightmap
+
+
+async def get_heightmap_version(repository: IBloqueRepository, bloque_id: UUID) -> int:
+    """
+    Versión del mapa de alturas (ETag), leída antes de armar el mapa.
+    Lanza ValueError si el bloque no existe.
+    """
+    version = await repository.get_heightmap_version(bloque_id)
+    if version is None:
+        raise ValueError("Bloque no encontrado")
+    return version
+
+
+async def get_heightmap(repository: IBloqueRepository, bloque_id: UUID, version: int) -> bytes:
+    """Mapa de alturas del bloque en el formato binario de heightmap.py."""
+    columns = await repository.get_heightmap_columns(bloque_id)
+    return encode_heightmap(
+        bloque_id,
+        version,
+        columns["celda_x"],
+        columns["celda_y"],
+        columns["altura_z"],
+        columns["tipo"],
+        columns["palette"],
+    )
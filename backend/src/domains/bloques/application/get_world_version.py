@@ -0,0 +1,10 @@
+"""
+Caso de uso: versión de la tabla de bloques para ETag / If-None-Match de GET /bloques/world/size.
+"""
+from src.domains.bloques.application.ports.bloque_repository import IBloqueRepository
+
+
+async def get_world_version(repository: IBloqueRepository) -> str:
+    """Firma de las versiones de los bloques; cambia al crear, modificar o borrar un bloque."""
+    # get_world_version en runtime es PostgresBloqueRepository.get_world_version
+    return await repository.get_world_version()
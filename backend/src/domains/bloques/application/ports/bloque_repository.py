@@ -28,6 +28,24 @@ class IBloqueRepository(ABC):
         """
         pass
 
+    @abstractmethod
+    async def get_world_version(self) -> str:
+        """Firma de (id, version) de todos los bloques; cambia al crear, modificar o borrar un bloque."""
+        pass
+
+    @abstractmethod
+    async def get_heightmap_version(self, bloque_id: UUID) -> Optional[int]:
+        """Versión del mapa de alturas del bloque (alturas_versiones; 0 si nunca tuvo partículas). None si no existe."""
+        pass
+
+    @abstractmethod
+    async def get_heightmap_columns(self, bloque_id: UUID) -> dict:
+        """
+        Columnas del mapa de alturas: celda_x, celda_y, altura_z y tipo (listas paralelas; tipo = índice en
+        palette) y palette (lista de {tipo_particula_id, tipo}).
+        """
+        pass
+
     @abstractmethod
     async def get_config(self, bloque_id: str) -> Optional[dict]:
         """
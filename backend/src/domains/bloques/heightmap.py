@@ -0,0 +1,117 @@
+"""
+Formato binario del mapa de alturas de un bloque (application/x-jdd-heightmap).
+
+Grilla densa de width x height columnas que cubre las columnas con partículas (x_min..x_max, y_min..y_max);
+la columna (x, y) está en el índice (y - y_min) * width + (x - x_min). Misma estructura que el formato columnar
+de partículas (particles/columnar.py), lista para subir como textura o buscar alturas en O(1) en el cliente.
+
+Layout del buffer (little-endian):
+  [0:4]   magic b"JDHM"
+  [4:8]   uint32 longitud N del header JSON (UTF-8)
+  [8:8+N] header JSON: version, bloque_id, heightmap_version, x_min, y_min, width, height, count, empty,
+          palette, columns
+  padding hasta múltiplo de 8 (inicio de la sección de datos)
+  columnas: cada una alineada a 8 bytes; header.columns[i] = {name, dtype, offset, length}
+            con offset relativo al inicio de la sección de datos.
+
+Columnas: altura (int16, o int32 si algún valor no cabe; header.empty en columnas sin partículas) y
+tipo (uint16, índice en header.palette; 0xFFFF en columnas sin partículas).
+"""
+import json
+import struct
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+HEIGHTMAP_MEDIA_TYPE = "application/x-jdd-heightmap"
+HEIGHTMAP_MAGIC = b"JDHM"
+HEIGHTMAP_FORMAT_VERSION = 1
+
+HEIGHTMAP_EMPTY_TIPO = 0xFFFF
+
+_ALIGNMENT = 8
+
+
+def _pad(size: int) -> int:
+    """Bytes de relleno para alinear size a _ALIGNMENT."""
+    return (-size) % _ALIGNMENT
+
+
+def encode_heightmap(
+    bloque_id,
+    version: int,
+    celda_x: Sequence[int],
+    celda_y: Sequence[int],
+    altura_z: Sequence[int],
+    tipo: Sequence[int],
+    palette: List[Dict[str, str]],
+) -> bytes:
+    """
+    Serializa las columnas del mapa de alturas a la grilla densa.
+
+    Args:
+        bloque_id: ID del bloque (se incluye en el header)
+        version: Versión del mapa (alturas_versiones)
+        celda_x, celda_y, altura_z: Columnas con partículas y su celda_z más alta
+        tipo: Índice en palette del tipo de la partícula más alta
+        palette: Tipos presentes ({tipo_particula_id, tipo})
+
+    Returns:
+        Buffer binario listo para enviar con media type HEIGHTMAP_MEDIA_TYPE
+    """
+    if len(palette) >= HEIGHTMAP_EMPTY_TIPO:
+        raise ValueError("Demasiados tipos distintos para el mapa de alturas")
+    xs = np.asarray(celda_x, dtype=np.int64)
+    ys = np.asarray(celda_y, dtype=np.int64)
+    zs = np.asarray(altura_z, dtype=np.int64)
+    x_min = int(xs.min()) if xs.size else 0
+    y_min = int(ys.min()) if ys.size else 0
+    width = int(xs.max()) - x_min + 1 if xs.size else 0
+    height = int(ys.max()) - y_min + 1 if ys.size else 0
+
+    int16 = np.iinfo(np.int16)
+    # El mínimo del tipo queda reservado para las columnas vacías
+    if not zs.size or (zs.min() > int16.min and zs.max() <= int16.max):
+        altura_dtype = np.dtype("<i2")
+    else:
+        altura_dtype = np.dtype("<i4")
+    empty = int(np.iinfo(altura_dtype).min)
+    cells = (ys - y_min) * width + (xs - x_min)
+    altura = np.full(width * height, empty, dtype=altura_dtype)
+    altura[cells] = zs
+    tipos = np.full(width * height, HEIGHTMAP_EMPTY_TIPO, dtype="<u2")
+    tipos[cells] = np.asarray(tipo, dtype=np.int64)
+
+    columns = [("altura", altura), ("tipo", tipos)]
+    column_specs = []
+    offset = 0
+    for name, data in columns:
+        column_specs.append({
+            "name": name,
+            "dtype": data.dtype.str.lstrip("<|="),
+            "offset": offset,
+            "length": int(data.size),
+        })
+        offset += data.nbytes + _pad(data.nbytes)
+
+    header = json.dumps({
+        "version": HEIGHTMAP_FORMAT_VERSION,
+        "bloque_id": str(bloque_id),
+        "heightmap_version": int(version),
+        "x_min": x_min,
+        "y_min": y_min,
+        "width": width,
+        "height": height,
+        "count": int(xs.size),
+        "empty": empty,
+        "palette": palette,
+        "columns": column_specs,
+    }, separators=(",", ":")).encode("utf-8")
+
+    prefix = HEIGHTMAP_MAGIC + struct.pack("<I", len(header))
+    parts = [prefix, header, b"\x00" * _pad(len(prefix) + len(header))]
+    for _, data in columns:
+        parts.append(data.tobytes())
+        parts.append(b"\x00" * _pad(data.nbytes))
+    return b"".join(parts)
+
@@ -1,3 +1,4 @@
 from .postgres_bloque_repository import PostgresBloqueRepository
+from .cached_bloque_repository import CachedBloqueRepository
 
-__all__ = ["PostgresBloqueRepository"]
+__all__ = ["PostgresBloqueRepository", "CachedBloqueRepository"]
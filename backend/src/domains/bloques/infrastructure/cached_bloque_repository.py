@@ -0,0 +1,89 @@
+"""
+Decorador de IBloqueRepository con la caché compartida entre workers (src/cache).
+
+list_all, get_by_id y get_world_size_rows se guardan bajo el espacio de nombres "bloques"; quien crea, modifica
+o borra bloques llama a bump_namespace("bloques") y todos los workers pasan a la versión nueva.
+get_world_version (ETag), get_config (WorldBloqueManager ya la guarda en proceso) y el mapa de alturas (cambia con
+las partículas, no con el espacio de nombres; la ruta responde 304 por su versión) delegan siempre.
+"""
+from typing import List, Optional
+from uuid import UUID
+
+import orjson
+from pydantic import TypeAdapter
+
+from src.cache import SharedCache
+from src.domains.bloques.application.ports.bloque_repository import IBloqueRepository
+from src.domains.bloques.schemas import DimensionResponse
+from src.domains.shared.orjson_response import orjson_dumps
+
+BLOQUES_NAMESPACE = "bloques"
+
+_dimension_list = TypeAdapter(List[DimensionResponse])
+
+
+class CachedBloqueRepository(IBloqueRepository):
+    """Envuelve otro IBloqueRepository (Postgres) y lee los metadatos de bloques desde la caché compartida."""
+
+    def __init__(self, inner: IBloqueRepository, shared: SharedCache):
+        self._inner = inner
+        self._shared = shared
+
+    async def list_all(self) -> List[DimensionResponse]:
+        key = await self._key("lista")
+        cached = await self._get(key)
+        if cached is not None:
+            return _dimension_list.validate_json(cached)
+        bloques = await self._inner.list_all()
+        await self._put(key, orjson_dumps(bloques))
+        return bloques
+
+    async def get_by_id(self, bloque_id: UUID) -> Optional[DimensionResponse]:
+        """Los bloques inexistentes no se guardan (None siempre consulta)."""
+        key = await self._key("bloque", bloque_id)
+        cached = await self._get(key)
+        if cached is not None:
+            return DimensionResponse.model_validate_json(cached)
+        bloque = await self._inner.get_by_id(bloque_id)
+        if bloque is not None:
+            await self._put(key, orjson_dumps(bloque))
+        return bloque
+
+    async def get_world_size_rows(self) -> List[dict]:
+        key = await self._key("world_size_rows")
+        cached = await self._get(key)
+        if cached is not None:
+            return orjson.loads(cached)
+        rows = await self._inner.get_world_size_rows()
+        await self._put(key, orjson.dumps(rows))
+        return rows
+
+    async def get_world_version(self) -> str:
+        return await self._inner.get_world_version()
+
+    async def get_heightmap_version(self, bloque_id: UUID) -> Optional[int]:
+        return await self._inner.get_heightmap_version(bloque_id)
+
+    async def get_heightmap_columns(self, bloque_id: UUID) -> dict:
+        return await self._inner.get_heightmap_columns(bloque_id)
+
+    async def get_config(self, bloque_id: str) -> Optional[dict]:
+        return await self._inner.get_config(bloque_id)
+
+    # --- Internos ---
+
+    async def _key(self, *parts) -> Optional[str]:
+        """Clave en la versión actual del espacio de nombres; None si la caché no responde."""
+        version = await self._shared.namespace_version(BLOQUES_NAMESPACE)
+        if version < 0:
+            return None
+        return self._shared.key(BLOQUES_NAMESPACE, *parts, version=version)
+
+    async def _get(self, key: Optional[str]) -> Optional[bytes]:
+        if key is None:
+            return None
+        return (await self._shared.get_many([key]))[0]
+
+    async def _put(self, key: Optional[str], value: bytes) -> None:
+        if key is not None:
+            await self._shared.set_many({key: value})
@@ -1,6 +1,7 @@
 """
 Adaptador de persistencia: implementa IBloqueRepository contra Postgres.
 Las llamadas del caso de uso (get_bloques, get_bloque_by_id, get_world_size) terminan aquí.
+Las filas son confiables: los DTOs se arman con model_construct (sin validar) y las rutas los serializan con orjson.
 """
 from typing import List, Optional
 from uuid import UUID
@@ -36,7 +37,7 @@ class PostgresBloqueRepository(IBloqueRepository):
             if not rows:
                 return []
             return [
-                DimensionResponse(
+                DimensionResponse.model_construct(
                     id=row["id"],
                     nombre=row["nombre"],
                     ancho_metros=float(row["ancho_metros"]),
@@ -75,7 +76,7 @@ class PostgresBloqueRepository(IBloqueRepository):
             """, bloque_id)
             if not row:
                 return None
-            return DimensionResponse(
+            return DimensionResponse.model_construct(
                 id=row["id"],
                 nombre=row["nombre"],
                 ancho_metros=float(row["ancho_metros"]),
@@ -110,6 +111,49 @@ class PostgresBloqueRepository(IBloqueRepository):
                 for r in rows
             ]
 
+    async def get_world_version(self) -> str:
+        """md5 de los pares (id, version) de juego_dioses.bloques (tabla chica: un bloque por mundo/dimensión)."""
+        async with get_connection() as conn:
+            return await conn.fetchval(
+                "SELECT md5(COALESCE(string_agg(id || ':' || version, ';' ORDER BY id), '')) FROM juego_dioses.bloques"
+            )
+
+    async def get_heightmap_version(self, bloque_id: UUID) -> Optional[int]:
+        async with get_connection() as conn:
+            return await conn.fetchval("""
+                SELECT COALESCE(v.version, 0)
+                FROM juego_dioses.bloques b
+                LEFT JOIN juego_dioses.alturas_versiones v ON v.bloque_id = b.id
+                WHERE b.id = $1
+            """, bloque_id)
+
+    async def get_heightmap_columns(self, bloque_id: UUID) -> dict:
+        """Una fila con las columnas agregadas en arrays (sin un Record por columna del mapa)."""
+        async with get_connection() as conn:
+            async with conn.transaction(isolation="repeatable_read", readonly=True):
+                palette = await conn.fetch("""
+                    SELECT t.id, t.nombre
+                    FROM juego_dioses.tipos_particulas t
+                    WHERE t.id IN (
+                        SELECT DISTINCT tipo_particula_id FROM juego_dioses.alturas_terreno WHERE bloque_id = $1
+                    )
+                    ORDER BY t.nombre
+                """, bloque_id)
+                row = await conn.fetchrow("""
+                    SELECT array_agg(celda_x) AS celda_x, array_agg(celda_y) AS celda_y,
+                           array_agg(altura_z) AS altura_z, array_agg(tipo_particula_id) AS tipo
+                    FROM juego_dioses.alturas_terreno
+                    WHERE bloque_id = $1
+                """, bloque_id)
+        index = {r["id"]: i for i, r in enumerate(palette)}
+        return {
+            "celda_x": row["celda_x"] or [],
+            "celda_y": row["celda_y"] or [],
+            "altura_z": row["altura_z"] or [],
+            "tipo": [index[tipo_id] for tipo_id in row["tipo"] or []],
+            "palette": [{"tipo_particula_id": str(r["id"]), "tipo": r["nombre"]} for r in palette],
+        }
+
     async def get_config(self, bloque_id: str) -> Optional[dict]:
         """SELECT * del bloque por id; devuelve fila como dict para WorldBloqueManager (cache de config)."""
         async with get_connection() as conn:
@@ -2,26 +2,39 @@
 Puerta de entrada HTTP para Bloques (dimensiones).
 
 Flujo (Arquitectura Hexagonal):
-  routes → casos de uso (get_bloques, get_bloque_by_id, get_world_size) → puerto IBloqueRepository → PostgresBloqueRepository.
+  routes → casos de uso (get_bloques, get_bloque_by_id, get_world_size, get_world_version, get_heightmap)
+  → puerto IBloqueRepository
+  → CachedBloqueRepository (caché compartida, si está habilitada) → PostgresBloqueRepository.
 No usa get_connection ni SQL; solo inyecta el adaptador y delega.
+Las respuestas de bloques se serializan con orjson_response (DTOs armados con model_construct).
 """
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
 
+from src.cache import get_shared_cache
 from src.domains.bloques.application.get_bloques import get_bloques
 from src.domains.bloques.application.get_bloque_by_id import get_bloque_by_id
+from src.domains.bloques.application.get_heightmap import get_heightmap, get_heightmap_version
 from src.domains.bloques.application.get_world_size import get_world_size
+from src.domains.bloques.application.get_world_version import get_world_version
 from src.domains.bloques.application.ports.bloque_repository import IBloqueRepository
+from src.domains.bloques.heightmap import HEIGHTMAP_MEDIA_TYPE
+from src.domains.bloques.infrastructure.cached_bloque_repository import CachedBloqueRepository
 from src.domains.bloques.infrastructure.postgres_bloque_repository import PostgresBloqueRepository
 from src.domains.bloques.schemas import DimensionResponse, WorldSizeResponse
+from src.domains.shared.etag import build_etag, etag_matches, not_modified
+from src.domains.shared.orjson_response import orjson_response
 
 router = APIRouter(prefix="/bloques", tags=["bloques"])
 
 
 def get_bloque_repository() -> IBloqueRepository:
-    """Factory para inyección de dependencias: devuelve el adaptador concreto (Postgres)."""
+    """Factory para inyección de dependencias: adaptador Postgres, envuelto en la caché compartida si está habilitada."""
+    shared = get_shared_cache()
+    if shared is not None:
+        return CachedBloqueRepository(PostgresBloqueRepository(), shared)
     return PostgresBloqueRepository()
 
 
@@ -30,7 +43,7 @@ async def list_dimensions(
     repository: IBloqueRepository = Depends(get_bloque_repository),
 ):
     """GET /bloques — Lista todos los bloques (dimensiones)."""
-    return await get_bloques(repository)
+    return orjson_response(await get_bloques(repository))
 
 
 @router.get("/{bloque_id}", response_model=DimensionResponse)
@@ -40,16 +53,50 @@ async def get_dimension(
 ):
     """GET /bloques/{bloque_id} — Obtener un bloque por ID."""
     try:
-        return await get_bloque_by_id(repository, bloque_id)
+        return orjson_response(await get_bloque_by_id(repository, bloque_id))
     except ValueError as e:
         if "no encontrado" in str(e).lower():
             raise HTTPException(status_code=404, detail=str(e))
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.get("/{bloque_id}/heightmap", response_class=Response)
+async def get_heightmap_route(
+    bloque_id: UUID,
+    if_none_match: Optional[str] = Header(None),
+    repository: IBloqueRepository = Depends(get_bloque_repository),
+):
+    """
+    GET /bloques/{bloque_id}/heightmap — Mapa de alturas del bloque en binario (application/x-jdd-heightmap,
+    ver heightmap.py): celda_z más alta no extraída y su tipo por columna (x, y).
+    Lleva ETag (alturas_versiones: no cambia con escrituras de temperatura); responde 304 a If-None-Match.
+    """
+    try:
+        version = await get_heightmap_version(repository, bloque_id)
+    except ValueError as e:
+        if "no encontrado" in str(e).lower():
+            raise HTTPException(status_code=404, detail=str(e))
+        raise HTTPException(status_code=400, detail=str(e))
+    etag = build_etag("heightmap", bloque_id, version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    content = await get_heightmap(repository, bloque_id, version)
+    return Response(content=content, media_type=HEIGHTMAP_MEDIA_TYPE, headers={"ETag": etag})
+
+
 @router.get("/world/size", response_model=WorldSizeResponse)
 async def get_world_size_route(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
     repository: IBloqueRepository = Depends(get_bloque_repository),
 ):
-    """GET /bloques/world/size — Tamaño total del mundo (bounding box de todos los bloques)."""
+    """
+    GET /bloques/world/size — Tamaño total del mundo (bounding box de todos los bloques).
+    Lleva ETag (versiones de los bloques); responde 304 a If-None-Match sin recalcular.
+    """
+    version = await get_world_version(repository)
+    etag = build_etag("world-size", version)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
     return await get_world_size(repository)
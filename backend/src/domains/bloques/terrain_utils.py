@@ -1,5 +1,8 @@
 """
 Consultas de altura del terreno en un bloque (dimensión).
+
+Leen alturas_terreno (celda_z más alta no extraída por columna, mantenida por triggers) en lugar de recorrer
+particulas.
 """
 from typing import Optional
 import asyncpg
@@ -15,7 +18,7 @@ async def get_terrain_height(
     """
     Obtener la altura máxima del terreno (Z más alto) en una posición X, Y específica.
 
-    Busca la partícula con mayor Z (altura) en la posición (x, y) que no esté extraída.
+    Lee la partícula con mayor Z (altura) no extraída en la posición (x, y) del mapa de alturas.
     Si no hay partículas en esa posición, retorna None.
 
     Args:
@@ -28,12 +31,11 @@ async def get_terrain_height(
         Altura máxima (Z) del terreno en esa posición, o None si no hay partículas
     """
     max_z = await conn.fetchval("""
-        SELECT MAX(celda_z)
-        FROM juego_dioses.particulas
+        SELECT altura_z
+        FROM juego_dioses.alturas_terreno
         WHERE bloque_id = $1
           AND celda_x = $2
           AND celda_y = $3
-          AND extraida = false
     """, dimension_id, x, y)
 
     return max_z
@@ -63,12 +65,11 @@ async def get_terrain_height_area(
         Altura máxima (Z) del terreno en el área, o None si no hay partículas
     """
     max_z = await conn.fetchval("""
-        SELECT MAX(celda_z)
-        FROM juego_dioses.particulas
+        SELECT MAX(altura_z)
+        FROM juego_dioses.alturas_terreno
         WHERE bloque_id = $1
           AND celda_x BETWEEN ($2::INTEGER - $4::INTEGER) AND ($2::INTEGER + $4::INTEGER)
           AND celda_y BETWEEN ($3::INTEGER - $4::INTEGER) AND ($3::INTEGER + $4::INTEGER)
-          AND extraida = false
     """, dimension_id, x, y, radius)
 
     return max_z
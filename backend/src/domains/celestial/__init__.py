@@ -4,6 +4,8 @@ Dominio celestial (tiempo celestial, temperatura).
 from .schemas import (
     CelestialPosition,
     CelestialStateResponse,
+    TemperatureBatchRequest,
+    TemperatureGridSpec,
     TemperatureRequest,
     TemperatureResponse,
 )
@@ -11,6 +13,8 @@ from .schemas import (
 __all__ = [
     "CelestialPosition",
     "CelestialStateResponse",
+    "TemperatureBatchRequest",
+    "TemperatureGridSpec",
     "TemperatureRequest",
     "TemperatureResponse",
 ]
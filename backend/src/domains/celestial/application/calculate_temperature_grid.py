@@ -0,0 +1,84 @@
+"""
+Caso de uso: temperatura ambiental de muchas celdas en una pasada (POST /celestial/temperature/batch).
+Recibe CelestialTimeService y IParticleRepository inyectados; calcula con temperature_engine (mismos términos que
+calculate_cell_temperature) y guarda la respuesta codificada en temperature_grid_cache por tramo de tiempo.
+"""
+from uuid import UUID
+
+from src.config import CELESTIAL_CONFIG
+from src.domains.celestial.schemas import TemperatureBatchRequest
+from src.domains.celestial.temperature_engine import TemperatureEngine, temperature_engine
+from src.domains.celestial.temperature_grid import (
+    TemperatureGridCache,
+    cells_key,
+    encode_temperature_grid,
+    grid_cells,
+    point_cells,
+    temperature_grid_cache,
+)
+
+
+async def calculate_temperature_grid_use_case(
+    service,
+    request: TemperatureBatchRequest,
+    particle_repo,
+    engine: TemperatureEngine = temperature_engine,
+    cache: TemperatureGridCache = temperature_grid_cache,
+) -> bytes:
+    """
+    Temperaturas de los puntos o de la grilla del request, en el formato de temperature_grid.py.
+    service: CelestialTimeService; particle_repo: IParticleRepository.
+    Lanza ValueError si el request no es válido o pide más de TEMPERATURE_BATCH_MAX_CELDAS celdas.
+    """
+    try:
+        bloque_uuid = UUID(request.bloque_id)
+    except ValueError:
+        raise ValueError("bloque_id debe ser un UUID válido")
+    if (request.puntos is None) == (request.grilla is None):
+        raise ValueError("Indicar puntos o grilla (uno de los dos)")
+    max_celdas = CELESTIAL_CONFIG['TEMPERATURE_BATCH_MAX_CELDAS']
+    bloque_id = str(bloque_uuid)
+    tiempo = service.get_time()
+    tramo = cache.tramo(tiempo)
+
+    grilla = request.grilla
+    if grilla is not None:
+        if grilla.x_max < grilla.x_min or grilla.y_max < grilla.y_min or grilla.z_max < grilla.z_min:
+            raise ValueError("La grilla debe tener min <= max en cada eje")
+        counts = [
+            (grilla.x_max - grilla.x_min) // grilla.paso + 1,
+            (grilla.y_max - grilla.y_min) // grilla.paso + 1,
+            (grilla.z_max - grilla.z_min) // grilla.paso + 1,
+        ]
+        if counts[0] * counts[1] * counts[2] > max_celdas:
+            raise ValueError(f"La grilla supera el máximo de {max_celdas} celdas")
+        key = (bloque_id, "grilla", grilla.x_min, grilla.x_max, grilla.y_min, grilla.y_max,
+               grilla.z_min, grilla.z_max, grilla.paso)
+        content = cache.get(tramo, key)
+        if content is not None:
+            return content
+        cells, shape = grid_cells(
+            grilla.x_min, grilla.x_max, grilla.y_min, grilla.y_max, grilla.z_min, grilla.z_max, grilla.paso
+        )
+        origin = [grilla.x_min, grilla.y_min, grilla.z_min]
+        paso = grilla.paso
+    else:
+        if len(request.puntos) > max_celdas:
+            raise ValueError(f"Se superó el máximo de {max_celdas} puntos")
+        cells = point_cells(request.puntos)
+        key = (bloque_id, "puntos", cells_key(cells))
+        content = cache.get(tramo, key)
+        if content is not None:
+            return content
+        shape, origin, paso = [len(cells)], None, 1
+
+    temperaturas = await engine.ambient_temperatures(
+        bloque_id=bloque_id,
+        coords=cells,
+        celestial_time_service=service,
+        particle_repo=particle_repo,
+        guardar_columnas=False,
+    )
+    content = encode_temperature_grid(bloque_id, tiempo, tramo, temperaturas, shape, origin, paso)
+    cache.put(tramo, key, content)
+    return content
@@ -0,0 +1,171 @@
+"""
+Conducción de calor entre partículas vecinas (6 vecinos: ±x, ±y, ±z) para la tarea periódica de temperatura.
+
+Las partículas con inercia del bloque se pasan a una grilla densa por cubos de LADO_CUBO celdas [cubo, z, y, x]
+que solo tiene los cubos con partículas (CubeGrid): un bloque con dos montañas lejanas no reserva el aire de en
+medio. Las celdas vacías no conducen. Entre dos vecinas i, j la conductancia es la media armónica de sus
+conductividades (G = 2·k_i·k_j / (k_i + k_j)) y en cada tick pasa el flujo
+
+    F = coeficiente · G · (T_j - T_i),   T_i += F / inercia_i,   T_j -= F / inercia_j
+
+(la inercia hace de capacidad calorífica: Σ inercia·T se conserva). El paso explícito es estable si en cada celda
+Σ coeficiente·G / inercia <= 1; si no, el tick se parte en subpasos (hasta max_subpasos) y las celdas que aun así
+no cumplen se frenan (capacidad efectiva mayor) en vez de oscilar. Cada subpaso son operaciones sobre arrays
+completos: restas desplazadas por eje dentro de los cubos y, entre cubos vecinos, entre sus caras enfrentadas.
+"""
+import math
+from typing import List, Tuple
+
+import numpy as np
+
+# Lado (celdas) de los cubos de la grilla: solo se reservan los cubos con partículas
+LADO_CUBO = 16
+
+# Ejes de la grilla [cubo, z, y, x] hacia los que se busca el cubo vecino (+x, +y, +z)
+_EJES = (3, 2, 1)
+
+
+def conductance(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Media armónica elemento a elemento (0 si alguna de las dos es 0)."""
+    g = np.multiply(a, b)
+    g *= 2.0
+    suma = np.add(a, b)
+    np.divide(g, suma, out=g, where=suma > 0)
+    return g
+
+
+class CubeGrid:
+    """
+    Grilla [cubo, z, y, x] de los cubos de LADO_CUBO celdas con alguna partícula de coords (N, 3).
+    vecinos[eje] son los pares (cubo, cubo vecino en +x / +y / +z) que existen.
+    """
+
+    def __init__(self, coords: np.ndarray):
+        c = np.asarray(coords).reshape(-1, 3).astype(np.int64)
+        c -= c.min(axis=0)
+        cubo = c // LADO_CUBO
+        local = c - cubo * LADO_CUBO
+        # Un cubo de más por eje: el vecino +1 del último cubo cae en el mapa (vacío), no en la fila siguiente
+        dims = cubo.max(axis=0) + 2
+        codigos = (cubo[:, 2] * dims[1] + cubo[:, 1]) * dims[0] + cubo[:, 0]
+        mapa = np.full(int(np.prod(dims)), -1, dtype=np.int64)
+        mapa[codigos] = 0
+        ocupados = np.flatnonzero(mapa == 0)
+        mapa[ocupados] = np.arange(len(ocupados))
+        cubo_id = mapa[codigos]
+        self.shape = (len(ocupados), LADO_CUBO, LADO_CUBO, LADO_CUBO)
+        self.flat = ((cubo_id * LADO_CUBO + local[:, 2]) * LADO_CUBO + local[:, 1]) * LADO_CUBO + local[:, 0]
+        self.vecinos: List[Tuple[np.ndarray, np.ndarray]] = []
+        for paso in (1, dims[0], dims[0] * dims[1]):
+            vecino = mapa[ocupados + paso]
+            con_vecino = np.flatnonzero(vecino >= 0)
+            self.vecinos.append((con_vecino, vecino[con_vecino]))
+
+    def scatter(self, valores: np.ndarray) -> np.ndarray:
+        """Grilla float64 con valores en las celdas de las partículas y 0 en el resto."""
+        grilla = np.zeros(self.shape)
+        grilla.reshape(-1)[self.flat] = np.asarray(valores, dtype=np.float64)
+        return grilla
+
+    def gather(self, grilla: np.ndarray) -> np.ndarray:
+        """Valores (N,) de la grilla en las celdas de las partículas."""
+        return grilla.reshape(-1)[self.flat]
+
+
+def diffuse_temperatures(
+    coords: np.ndarray,
+    temperatura: np.ndarray,
+    conductividad: np.ndarray,
+    inercia: np.ndarray,
+    coeficiente: float,
+    max_subpasos: int = 16,
+) -> Tuple[np.ndarray, int]:
+    """
+    Un tick de conducción entre las partículas coords (N, 3).
+
+    Args:
+        coords: Celdas (N, 3) sin repetir
+        temperatura: Temperatura (N,) al empezar el tick
+        conductividad: conductividad_termica (N,) del tipo de cada partícula
+        inercia: inercia_termica (N,) (> 0)
+        coeficiente: Fracción de la diferencia que pasa por tick entre vecinas con G = 1 e inercia 1 (0 = nada)
+        max_subpasos: Máximo de subpasos por tick
+
+    Returns:
+        (temperaturas (N,) después del tick, subpasos usados)
+    """
+    temperatura = np.asarray(temperatura, dtype=np.float64)
+    if coeficiente <= 0 or len(coords) < 2:
+        return temperatura.copy(), 0
+    cubos = CubeGrid(coords)
+
+    k = cubos.scatter(conductividad)
+    # Conductancias (ya con el coeficiente) dentro de cada cubo, entre cada celda y la siguiente en x, y, z, y entre
+    # la última capa de cada cubo y la primera de su vecino
+    internas = [conductance(k[_side(eje, slice(None, -1))], k[_side(eje, slice(1, None))]) for eje in _EJES]
+    caras = [
+        conductance(k[_face(eje, a, -1)], k[_face(eje, b, 0)]) for eje, (a, b) in zip(_EJES, cubos.vecinos)
+    ]
+    del k
+    for g in internas + caras:
+        g *= coeficiente
+
+    salida = np.zeros(cubos.shape)
+    for eje, g in zip(_EJES, internas):
+        salida[_side(eje, slice(None, -1))] += g
+        salida[_side(eje, slice(1, None))] += g
+    # Cada cubo tiene a lo sumo un vecino por eje y es vecino de a lo sumo uno: índices sin repetir
+    for eje, (a, b), g in zip(_EJES, cubos.vecinos, caras):
+        salida[_face(eje, a, -1)] += g
+        salida[_face(eje, b, 0)] += g
+    capacidad = cubos.scatter(inercia)
+    # Σ G / inercia: fracción de su diferencia con los vecinos que cambia cada celda en el tick
+    rapidez = np.zeros(cubos.shape)
+    np.divide(salida, capacidad, out=rapidez, where=capacidad > 0)
+    rapidez = float(rapidez.max())
+    if rapidez <= 0:
+        return temperatura.copy(), 0
+    subpasos = max(1, min(int(max_subpasos), math.ceil(rapidez)))
+    if subpasos > 1:
+        for g in internas + caras + [salida]:
+            g /= subpasos
+    # Estabilidad: capacidad >= Σ G del subpaso (solo cambia en celdas que pedían más de max_subpasos)
+    np.maximum(capacidad, salida, out=capacidad)
+    inversa = np.zeros(cubos.shape)
+    np.divide(1.0, capacidad, out=inversa, where=capacidad > 0)
+    del salida, capacidad
+
+    t = cubos.scatter(temperatura)
+    calor = np.empty(cubos.shape)
+    flujos = [np.empty(g.shape) for g in internas]
+    for _ in range(subpasos):
+        calor.fill(0.0)
+        for eje, g, f in zip(_EJES, internas, flujos):
+            lo, hi = _side(eje, slice(None, -1)), _side(eje, slice(1, None))
+            np.subtract(t[hi], t[lo], out=f)
+            f *= g
+            calor[lo] += f
+            calor[hi] -= f
+        for eje, (a, b), g in zip(_EJES, cubos.vecinos, caras):
+            ultima, primera = _face(eje, a, -1), _face(eje, b, 0)
+            f = t[primera] - t[ultima]
+            f *= g
+            calor[ultima] += f
+            calor[primera] -= f
+        calor *= inversa
+        t += calor
+    return cubos.gather(t), subpasos
+
+
+def _side(eje: int, part) -> tuple:
+    """Índice de la grilla [cubo, z, y, x] con part en el eje dado y todo el resto."""
+    index = [slice(None)] * 4
+    index[eje] = part
+    return tuple(index)
+
+
+def _face(eje: int, cubos: np.ndarray, capa: int) -> tuple:
+    """Índice de la capa (0 o -1) del eje en los cubos dados: arrays (len(cubos), LADO_CUBO, LADO_CUBO)."""
+    index: list = [cubos, slice(None), slice(None), slice(None)]
+    index[eje] = capa
+    return tuple(index)
@@ -1,29 +1,37 @@
 """
 Puerta de entrada HTTP para Tiempo Celestial y Temperatura.
 
-Flujo: routes → casos de uso (get_celestial_state, calculate_temperature_use_case) y CelestialTimeService;
-IParticleRepository inyectado (PostgresParticleRepository) para temperatura. Sin get_connection en routes.
+Flujo: routes → casos de uso (get_celestial_state, calculate_temperature_use_case,
+calculate_temperature_grid_use_case) y CelestialTimeService;
+IParticleRepository inyectado (PostgresParticleRepository, envuelto en VoxelParticleRepository si el VoxelStore está
+activo) para temperatura. Sin get_connection en routes.
 """
 import logging
 import asyncio
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 
-from src.domains.celestial.service import (
-    CelestialTimeService,
-    calculate_cell_temperature,
-)
+from src.domains.celestial.service import CelestialTimeService
+from src.domains.celestial.temperature_scheduler import TemperatureScheduler, TemperatureTickStats
+from src.domains.bloques.infrastructure.postgres_bloque_repository import PostgresBloqueRepository
 from src.domains.particles.application.ports.particle_repository import IParticleRepository
+from src.domains.particles.infrastructure.cached_particle_repository import CachedParticleRepository
 from src.domains.particles.infrastructure.postgres_particle_repository import PostgresParticleRepository
+from src.domains.particles.infrastructure.voxel_particle_repository import VoxelParticleRepository
+from src.domains.particles.infrastructure.voxel_store import voxel_store
+from src.domains.shared.world_bloque_manager import WorldBloqueManager
 from src.domains.celestial.application.get_celestial_state import get_celestial_state
 from src.domains.celestial.application.calculate_temperature import calculate_temperature_use_case
+from src.domains.celestial.application.calculate_temperature_grid import calculate_temperature_grid_use_case
 from src.domains.celestial.schemas import (
     CelestialStateResponse,
+    TemperatureBatchRequest,
     TemperatureRequest,
     TemperatureResponse,
 )
-from src.config import CELESTIAL_CONFIG
+from src.domains.celestial.temperature_grid import TEMPERATURE_GRID_MEDIA_TYPE
+from src.config import CELESTIAL_CONFIG, PARTICLES_CONFIG
 
 logger = logging.getLogger(__name__)
 
@@ -32,11 +40,15 @@ router = APIRouter(tags=["celestial"])
 _celestial_service: Optional[CelestialTimeService] = None
 _update_task: Optional[asyncio.Task] = None
 _particle_temperature_update_task: Optional[asyncio.Task] = None
+_temperature_scheduler: Optional[TemperatureScheduler] = None
 
 
 def get_particle_repository() -> IParticleRepository:
-    """Factory para inyección: devuelve PostgresParticleRepository (usado por temperatura)."""
-    return PostgresParticleRepository()
+    """Factory para inyección (usado por temperatura): PostgresParticleRepository, con VoxelStore si está activo."""
+    particle_repo: IParticleRepository = PostgresParticleRepository()
+    if PARTICLES_CONFIG["VOXEL_STORE_ENABLED"]:
+        particle_repo = VoxelParticleRepository(particle_repo)
+    return particle_repo
 
 
 def get_celestial_service() -> CelestialTimeService:
@@ -55,6 +67,14 @@ def get_celestial_service() -> CelestialTimeService:
     return _celestial_service
 
 
+def get_temperature_scheduler() -> TemperatureScheduler:
+    """Singleton del planificador de la tarea de temperatura (regiones de WorldBloqueManager y sus métricas)."""
+    global _temperature_scheduler
+    if _temperature_scheduler is None:
+        _temperature_scheduler = TemperatureScheduler(WorldBloqueManager(PostgresBloqueRepository()))
+    return _temperature_scheduler
+
+
 async def update_celestial_service_periodically():
     """Tarea en background: cada 1s avanza el tiempo del juego (CelestialTimeService.update)."""
     global _celestial_service
@@ -78,21 +98,15 @@ async def start_celestial_service_background_task():
         logger.info("Tarea de actualización de CelestialTimeService iniciada")
 
 
-def _compute_new_temperature(
-    temp_actual: float, temp_ambiente: float, inercia: float
-) -> float:
-    """Calcula nueva temperatura con inercia térmica; clamp [-50, 1000]."""
-    if inercia <= 0:
-        return temp_actual
-    diferencia = float(temp_ambiente) - temp_actual
-    factor_cambio = 1.0 / inercia
-    nueva = temp_actual + (diferencia * factor_cambio)
-    return max(-50.0, min(1000.0, nueva))
-
-
 async def update_particle_temperatures_periodically():
     global _particle_temperature_update_task
     particle_repo: IParticleRepository = PostgresParticleRepository()
+    if PARTICLES_CONFIG["CACHE_ENABLED"]:
+        # Las temperaturas nuevas se escriben también en la caché de chunks de viewport
+        particle_repo = CachedParticleRepository(particle_repo)
+    if PARTICLES_CONFIG["VOXEL_STORE_ENABLED"]:
+        # Lecturas de vecindad y temperaturas en memoria; se escriben en Postgres al terminar cada bloque
+        particle_repo = VoxelParticleRepository(particle_repo)
     update_interval = CELESTIAL_CONFIG.get("PARTICLE_TEMPERATURE_UPDATE_INTERVAL", 300)
     while True:
         try:
@@ -107,40 +121,25 @@ async def update_particle_temperatures_periodically():
                     break
                 logger.error(f"Error obteniendo bloques para temperatura: {e}")
                 continue
+            scheduler = get_temperature_scheduler()
+            tick = TemperatureTickStats()
             for bloque_id in bloques:
+                # Solo las regiones sucias, con cambio de tramo solar o con jugadores recalculan la temperatura ambiente
                 try:
-                    particulas = await particle_repo.get_particles_with_thermal_inertia(bloque_id)
+                    tick.add(await scheduler.update_bloque(bloque_id, celestial_service, particle_repo))
+                except asyncio.CancelledError:
+                    raise
                 except Exception as e:
                     error_msg = str(e).lower()
                     if "pool is closing" in error_msg or "pool is closed" in error_msg:
                         break
-                    logger.debug(f"Error obteniendo partículas del bloque {bloque_id}: {e}")
-                    continue
-                if not particulas:
-                    continue
-                for particula in particulas:
+                    logger.error(f"Error actualizando temperaturas del bloque {bloque_id}: {e}")
+                if PARTICLES_CONFIG["VOXEL_STORE_ENABLED"]:
                     try:
-                        temp_ambiente = await calculate_cell_temperature(
-                            celda_x=float(particula["celda_x"]),
-                            celda_y=float(particula["celda_y"]),
-                            celda_z=float(particula["celda_z"]),
-                            bloque_id=bloque_id,
-                            celestial_time_service=celestial_service,
-                            particle_repo=particle_repo,
-                        )
-                        temp_actual = float(particula["temperatura"])
-                        inercia = float(particula["inercia_termica"])
-                        nueva_temp = _compute_new_temperature(temp_actual, temp_ambiente, inercia)
-                        await particle_repo.update_particle_temperature(
-                            str(particula["id"]), nueva_temp
-                        )
-                    except asyncio.CancelledError:
-                        raise
+                        await voxel_store.flush()
                     except Exception as e:
-                        error_msg = str(e).lower()
-                        if "pool is closing" in error_msg or "pool is closed" in error_msg:
-                            break
-                        logger.debug(f"Error actualizando temperatura de partícula {particula.get('id')}: {e}")
+                        logger.error(f"Error guardando temperaturas del bloque {bloque_id}: {e}")
+            scheduler.finish_tick(tick)
         except asyncio.CancelledError:
             logger.info("Tarea de actualización de temperatura de partículas cancelada")
             break
@@ -187,3 +186,24 @@ async def calculate_temperature_route(
     except Exception as e:
         logger.error(f"Error calculando temperatura: {e}")
         raise HTTPException(status_code=500, detail=f"Error calculando temperatura: {str(e)}")
+
+
+@router.post("/celestial/temperature/batch", response_class=Response)
+async def calculate_temperature_batch_route(
+    request: TemperatureBatchRequest,
+    service: CelestialTimeService = Depends(get_celestial_service),
+    particle_repo: IParticleRepository = Depends(get_particle_repository),
+):
+    """
+    POST /celestial/temperature/batch — Temperatura ambiental de una lista de puntos o de una grilla (caja + paso)
+    en una pasada vectorizada; binario application/x-jdd-temperature (float32, ver temperature_grid.py).
+    La misma consulta dentro del mismo tramo de tiempo de juego sale de caché.
+    """
+    try:
+        content = await calculate_temperature_grid_use_case(service, request, particle_repo)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error calculando temperaturas por lotes: {e}")
+        raise HTTPException(status_code=500, detail=f"Error calculando temperaturas por lotes: {str(e)}")
+    return Response(content=content, media_type=TEMPERATURE_GRID_MEDIA_TYPE)
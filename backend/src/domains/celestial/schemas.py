@@ -2,7 +2,7 @@
 DTOs del recurso celestial (tiempo celestial, temperatura).
 """
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional, Tuple
 
 
 class CelestialPosition(BaseModel):
@@ -39,3 +39,23 @@ class TemperatureResponse(BaseModel):
     x: float = Field(..., description="Coordenada X donde se calculó")
     y: float = Field(..., description="Coordenada Y donde se calculó")
     z: float = Field(..., description="Coordenada Z donde se calculó")
+
+
+class TemperatureGridSpec(BaseModel):
+    """Grilla de celdas (caja inclusiva + paso); z_min = z_max para una grilla 2D"""
+    x_min: int = Field(..., description="X mínima en celdas")
+    x_max: int = Field(..., description="X máxima en celdas (inclusive)")
+    y_min: int = Field(..., description="Y mínima en celdas")
+    y_max: int = Field(..., description="Y máxima en celdas (inclusive)")
+    z_min: int = Field(..., description="Z mínima en celdas")
+    z_max: int = Field(..., description="Z máxima en celdas (inclusive)")
+    paso: int = Field(1, ge=1, description="Distancia en celdas entre muestras en cada eje")
+
+
+class TemperatureBatchRequest(BaseModel):
+    """Request de temperatura por lotes: lista de puntos o grilla (uno de los dos)"""
+    bloque_id: str = Field(..., description="ID del bloque")
+    puntos: Optional[List[Tuple[float, float, float]]] = Field(
+        None, description="Puntos (x, y, z) en celdas; se evalúa la celda que contiene cada uno"
+    )
+    grilla: Optional[TemperatureGridSpec] = Field(None, description="Grilla de celdas a evaluar")
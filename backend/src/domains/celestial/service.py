@@ -274,6 +274,11 @@ async def calculate_cell_temperature(
         radio_maximo=radio_maximo,
     )
     mod_altitud = get_altitude_modifier(altitud_z=celda_z)
+    if tipo_particula_superficie is None:
+        # Tipo en la cima de la columna (alturas_terreno); sin partículas queda el albedo por defecto
+        tipo_particula_superficie = await particle_repo.get_surface_type_name(
+            bloque_id, math.floor(celda_x), math.floor(celda_y)
+        )
     mod_albedo = await get_albedo_modifier(particle_repo, tipo_particula_nombre=tipo_particula_superficie)
     temp_ambiente_base = temp_solar + mod_altitud + mod_albedo
     mod_particulas = await get_particle_temperature_modifier(
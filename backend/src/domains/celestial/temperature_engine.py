@@ -0,0 +1,176 @@
+"""
+Temperatura ambiental vectorizada para todas las partículas de un bloque (tarea periódica de temperatura).
+
+Mismos términos que calculate_cell_temperature en service.py, calculados con numpy sobre arrays:
+solar (latitud + día/noche), altitud, albedo del tipo en la cima de la columna y partículas de agua/hielo cercanas
+(campo de influencia del agua, water_field.py, indexado por celda). La parte estática por columna (temperatura por
+latitud y ángulo de la columna respecto del centro) se calcula una vez por bloque y se reutiliza mientras no
+cambien las columnas; el campo del agua, mientras no cambie el agua. El agua se lee de la misma foto que las
+partículas: a diferencia del bucle escalar, una actualización no afecta a las siguientes dentro del mismo tick.
+"""
+from typing import Dict, Optional, Sequence, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from src.config import CELESTIAL_CONFIG
+from src.domains.celestial.water_field import (
+    PROXIMIDAD_MAXIMA,
+    WaterInfluence,
+    build_water_influence,
+    water_fingerprint,
+)
+from src.domains.particles.infrastructure.particle_catalogue import ParticleCatalogue, particle_catalogue
+
+if TYPE_CHECKING:
+    from src.domains.celestial.service import CelestialTimeService
+    from src.domains.particles.application.ports.particle_repository import IParticleRepository
+
+# Tipos que modifican la temperatura de las partículas cercanas (como en calculate_cell_temperature)
+WATER_TYPES: Tuple[str, ...] = ('agua', 'oceano', 'agua_sucia', 'hielo')
+
+_ALBEDO_DEFECTO = 0.2
+
+
+def latitude_temperature(celda_x: np.ndarray, celda_y: np.ndarray, radio_maximo: float) -> np.ndarray:
+    """Temperatura base por latitud (radio desde el centro); vectorización de _calculate_solar_temperature."""
+    radio = np.sqrt(celda_x * celda_x + celda_y * celda_y)
+    radio_ecuador = radio_maximo * 0.5
+    if radio_ecuador > 0:
+        interior = -20.0 + (radio / radio_ecuador) * 50.0
+    else:
+        interior = np.full(radio.shape, -20.0)
+    if radio_maximo - radio_ecuador > 0:
+        exterior = 30.0 - ((radio - radio_ecuador) / (radio_maximo - radio_ecuador)) * 70.0
+    else:
+        exterior = np.full(radio.shape, 30.0)
+    return np.where(radio <= radio_ecuador, interior, exterior)
+
+
+def sun_intensity(angulo_columna: np.ndarray, angulo_sol: float) -> np.ndarray:
+    """max(0, cos(diferencia angular)) como get_sun_intensity_at (el coseno no depende de cómo se pliegue la diferencia)."""
+    return np.maximum(0.0, np.cos(angulo_columna - angulo_sol))
+
+
+def compute_new_temperatures(actual: np.ndarray, ambiente: np.ndarray, inercia: np.ndarray) -> np.ndarray:
+    """Acerca actual a ambiente en 1/inercia por tick (sin cambio si inercia <= 0); clamp [-50, 1000]."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        nueva = actual + (ambiente - actual) / inercia
+    nueva = np.clip(nueva, -50.0, 1000.0)
+    return np.where(inercia > 0, nueva, actual)
+
+
+class TemperatureEngine:
+    """Calcula temperaturas ambiente por lotes; guarda la parte estática por columna de cada bloque."""
+
+    def __init__(self, catalogue: ParticleCatalogue = particle_catalogue):
+        self._catalogue = catalogue
+        # bloque -> (radio_maximo, columnas (K, 2), temperatura por latitud (K,), ángulo de la columna (K,))
+        self._static: Dict[str, Tuple[float, np.ndarray, np.ndarray, np.ndarray]] = {}
+        # bloque -> campo de influencia del agua (se reconstruye cuando cambia la huella del agua)
+        self._water: Dict[str, WaterInfluence] = {}
+
+    def forget(self, bloque_id) -> None:
+        self._static.pop(str(bloque_id), None)
+        self._water.pop(str(bloque_id), None)
+
+    async def ambient_temperatures(
+        self,
+        bloque_id: str,
+        coords: np.ndarray,
+        celestial_time_service: "CelestialTimeService",
+        particle_repo: "IParticleRepository",
+        radio_maximo: Optional[float] = None,
+        radio_busqueda_agua: float = 10.0,
+        tipos_agua: Sequence[str] = WATER_TYPES,
+        guardar_columnas: bool = True,
+    ) -> np.ndarray:
+        """
+        Temperatura ambiente (N,) en cada celda de coords (N, 3); equivale a calculate_cell_temperature con el
+        tipo de superficie tomado del mapa de alturas. guardar_columnas=False no toca la parte estática guardada
+        (consultas puntuales que no deben desplazar la de las partículas del bloque).
+        """
+        if radio_maximo is None:
+            radio_maximo = CELESTIAL_CONFIG['RADIO_MUNDO']
+        coords = np.asarray(coords).reshape(-1, 3)
+        if not len(coords):
+            return np.empty(0)
+        columnas, columna = np.unique(coords[:, :2], axis=0, return_inverse=True)
+        columna = columna.reshape(-1)
+        latitud, angulo = self._static_terms(str(bloque_id), columnas, radio_maximo, guardar_columnas)
+        intensidad = sun_intensity(angulo, celestial_time_service.get_sun_angle())
+        temp_solar = latitud + (intensidad * 25.0) - 10.0
+        mod_altitud = -6.5 * (coords[:, 2].astype(np.float64) / 1000.0)
+        mod_albedo = await self._albedo_modifiers(bloque_id, columnas, particle_repo)
+        base = temp_solar[columna] + mod_altitud + mod_albedo[columna]
+
+        radio = min(float(int(radio_busqueda_agua)), PROXIMIDAD_MAXIMA)
+        campo = await self.water_influence(bloque_id, particle_repo, radio, tipos_agua)
+        return np.clip(base + campo.modifier(coords, base), -50.0, 60.0)
+
+    async def water_influence(
+        self,
+        bloque_id: str,
+        particle_repo: "IParticleRepository",
+        radio: float = PROXIMIDAD_MAXIMA,
+        tipos_agua: Sequence[str] = WATER_TYPES,
+    ) -> WaterInfluence:
+        """Campo del agua del bloque; se reconstruye solo si cambió el agua (o el radio)."""
+        bloque = str(bloque_id)
+        coords, temperatura, conductividad = await particle_repo.get_particle_arrays_by_type(bloque_id, tipos_agua)
+        huella = water_fingerprint(coords, temperatura, conductividad)
+        campo = self._water.get(bloque)
+        if campo is None or campo.huella != huella or campo.radio != radio:
+            campo = build_water_influence(coords, temperatura, conductividad, radio, huella)
+            self._water[bloque] = campo
+        return campo
+
+    def _static_terms(
+        self, bloque: str, columnas: np.ndarray, radio_maximo: float, guardar: bool = True
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        cached = self._static.get(bloque)
+        if cached is not None and cached[0] == radio_maximo and np.array_equal(cached[1], columnas):
+            return cached[2], cached[3]
+        x = columnas[:, 0].astype(np.float64)
+        y = columnas[:, 1].astype(np.float64)
+        latitud = latitude_temperature(x, y, radio_maximo)
+        angulo = np.arctan2(y, x)
+        if guardar:
+            self._static[bloque] = (radio_maximo, columnas, latitud, angulo)
+        return latitud, angulo
+
+    async def _albedo_modifiers(
+        self, bloque_id: str, columnas: np.ndarray, particle_repo: "IParticleRepository"
+    ) -> np.ndarray:
+        """(0.5 - albedo) * 20 por columna; albedo del tipo en la cima (0.2 sin tipo o sin valor)."""
+        superficie, tipo_ids = await particle_repo.get_surface_types(bloque_id)
+        snapshot = await self._catalogue.get()
+        albedos = np.full(len(columnas), _ALBEDO_DEFECTO)
+        if len(superficie):
+            por_tipo: Dict[str, float] = {}
+            valores = np.empty(len(tipo_ids))
+            for i, tipo_id in enumerate(tipo_ids):
+                key = str(tipo_id)
+                albedo = por_tipo.get(key)
+                if albedo is None:
+                    row = snapshot.type_by_id(key)
+                    albedo = float(row["albedo"]) if row and row.get("albedo") is not None else _ALBEDO_DEFECTO
+                    por_tipo[key] = albedo
+                valores[i] = albedo
+            codigos = _column_codes(superficie)
+            order = np.argsort(codigos)
+            codigos = codigos[order]
+            buscados = _column_codes(columnas)
+            pos = np.clip(np.searchsorted(codigos, buscados), 0, len(codigos) - 1)
+            found = codigos[pos] == buscados
+            albedos[found] = valores[order[pos[found]]]
+        return (0.5 - albedos) * 20.0
+
+
+def _column_codes(columnas: np.ndarray) -> np.ndarray:
+    """Código int64 único por (x, y) (coordenadas de celda en int32)."""
+    columnas = np.asarray(columnas, dtype=np.int64)
+    return (columnas[:, 0] << 32) + (columnas[:, 1] + (1 << 31))
+
+
+# Instancia compartida por la tarea de temperatura
+temperature_engine = TemperatureEngine()
@@ -0,0 +1,152 @@
+"""
+Temperatura por lotes: formato binario de la respuesta (application/x-jdd-temperature) y caché por tramo de tiempo.
+
+Layout del buffer (little-endian), misma estructura que el mapa de alturas (bloques/heightmap.py):
+  [0:4]   magic b"JDTG"
+  [4:8]   uint32 longitud N del header JSON (UTF-8)
+  [8:8+N] header JSON: version, bloque_id, tiempo, tramo, shape, origin, paso, count, columns
+  padding hasta múltiplo de 8 (inicio de la sección de datos)
+  columnas: cada una alineada a 8 bytes; header.columns[i] = {name, dtype, offset, length}
+
+Columna temperatura (float32). Para una grilla shape = [nz, ny, nx], origin = [x_min, y_min, z_min] y la muestra
+(i, j, k) (celda origin + paso * (i, j, k)) está en el índice (k * ny + j) * nx + i. Para una lista de puntos
+shape = [n], en el orden de la consulta, y origin = null.
+"""
+import hashlib
+import json
+import struct
+from collections import OrderedDict
+from typing import Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.config import CELESTIAL_CONFIG
+
+TEMPERATURE_GRID_MEDIA_TYPE = "application/x-jdd-temperature"
+TEMPERATURE_GRID_MAGIC = b"JDTG"
+TEMPERATURE_GRID_FORMAT_VERSION = 1
+
+_ALIGNMENT = 8
+
+
+def _pad(size: int) -> int:
+    """Bytes de relleno para alinear size a _ALIGNMENT."""
+    return (-size) % _ALIGNMENT
+
+
+def grid_cells(
+    x_min: int, x_max: int, y_min: int, y_max: int, z_min: int, z_max: int, paso: int = 1
+) -> Tuple[np.ndarray, List[int]]:
+    """Celdas (N, 3) int32 de la grilla en orden [z, y, x] (x varía más rápido) y su shape [nz, ny, nx]."""
+    xs = np.arange(x_min, x_max + 1, paso, dtype=np.int32)
+    ys = np.arange(y_min, y_max + 1, paso, dtype=np.int32)
+    zs = np.arange(z_min, z_max + 1, paso, dtype=np.int32)
+    z, y, x = np.meshgrid(zs, ys, xs, indexing="ij")
+    return np.stack([x.ravel(), y.ravel(), z.ravel()], axis=1), [len(zs), len(ys), len(xs)]
+
+
+def point_cells(puntos: Sequence[Sequence[float]]) -> np.ndarray:
+    """Celda (N, 3) int32 que contiene cada punto (floor por eje)."""
+    return np.floor(np.asarray(puntos, dtype=np.float64).reshape(-1, 3)).astype(np.int32)
+
+
+def encode_temperature_grid(
+    bloque_id,
+    tiempo: float,
+    tramo: int,
+    temperaturas: np.ndarray,
+    shape: List[int],
+    origin: Optional[List[int]] = None,
+    paso: int = 1,
+) -> bytes:
+    """
+    Serializa las temperaturas (N,) de una consulta por lotes.
+
+    Args:
+        bloque_id: ID del bloque (se incluye en el header)
+        tiempo: Tiempo de juego con el que se calcularon
+        tramo: Tramo de tiempo de la caché (TEMPERATURE_BATCH_TRAMO_SEGUNDOS)
+        temperaturas: Una por celda, en el orden de la grilla o de los puntos
+        shape: [nz, ny, nx] de la grilla o [n] para puntos
+        origin: Celda (x, y, z) de la primera muestra de la grilla (None para puntos)
+        paso: Paso de la grilla
+
+    Returns:
+        Buffer binario listo para enviar con media type TEMPERATURE_GRID_MEDIA_TYPE
+    """
+    data = np.ascontiguousarray(temperaturas, dtype="<f4")
+    header = json.dumps({
+        "version": TEMPERATURE_GRID_FORMAT_VERSION,
+        "bloque_id": str(bloque_id),
+        "tiempo": float(tiempo),
+        "tramo": int(tramo),
+        "shape": [int(n) for n in shape],
+        "origin": None if origin is None else [int(v) for v in origin],
+        "paso": int(paso),
+        "count": int(data.size),
+        "columns": [{"name": "temperatura", "dtype": data.dtype.str.lstrip("<|="), "offset": 0, "length": int(data.size)}],
+    }, separators=(",", ":")).encode("utf-8")
+    prefix = TEMPERATURE_GRID_MAGIC + struct.pack("<I", len(header))
+    return b"".join([
+        prefix, header, b"\x00" * _pad(len(prefix) + len(header)),
+        data.tobytes(), b"\x00" * _pad(data.nbytes),
+    ])
+
+
+def cells_key(cells: np.ndarray) -> bytes:
+    """Clave de una lista de celdas para la caché."""
+    return hashlib.blake2b(np.ascontiguousarray(cells, dtype=np.int32).tobytes(), digest_size=16).digest()
+
+
+class TemperatureGridCache:
+    """
+    Respuestas ya codificadas por (bloque, tramo de tiempo, consulta). Solo vive el tramo actual: al pasar al
+    siguiente se descarta todo; dentro del tramo, LRU de max_entries consultas.
+    """
+
+    def __init__(
+        self,
+        tramo_segundos: float = CELESTIAL_CONFIG['TEMPERATURE_BATCH_TRAMO_SEGUNDOS'],
+        max_entries: int = CELESTIAL_CONFIG['TEMPERATURE_BATCH_CACHE_ENTRADAS'],
+    ):
+        self.tramo_segundos = tramo_segundos
+        self.max_entries = max_entries
+        self._tramo: Optional[int] = None
+        self._entries: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def tramo(self, tiempo: float) -> int:
+        """Tramo de tiempo de juego al que pertenece tiempo."""
+        return int(tiempo // self.tramo_segundos)
+
+    def get(self, tramo: int, key: Hashable) -> Optional[bytes]:
+        if tramo != self._tramo:
+            self.misses += 1
+            return None
+        content = self._entries.get(key)
+        if content is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return content
+
+    def put(self, tramo: int, key: Hashable, content: bytes) -> None:
+        if self._tramo is None or tramo > self._tramo:
+            self._tramo = tramo
+            self._entries.clear()
+        elif tramo < self._tramo:
+            return
+        self._entries[key] = content
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._tramo = None
+
+
+# Instancia compartida por POST /celestial/temperature/batch
+temperature_grid_cache = TemperatureGridCache()
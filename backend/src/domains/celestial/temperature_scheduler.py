@@ -0,0 +1,197 @@
+"""
+Tarea de temperatura por regiones (WorldBloque de tamano_bloque³ celdas, vía WorldBloqueManager).
+
+Cada tick, las partículas con inercia del bloque se agrupan por región. La temperatura ambiente de una región se
+recalcula (temperature_engine) solo si:
+  - está sucia: cambiaron sus partículas (se compara la lista de celdas con la del último recálculo) o se marcó
+    con agregar_particula/remover_particula;
+  - cambió su tramo de intensidad solar (en el centro de la región, TEMPERATURE_SOL_TRAMOS tramos entre 0 y 1);
+  - tiene jugadores (WorldBloque.jugadores).
+Si no, sus partículas reutilizan la temperatura ambiente guardada en el WorldBloque. En todas se aplica el paso de
+inercia (compute_new_temperatures), después la conducción entre vecinas de todo el bloque (heat_diffusion) y se
+escriben en lote las que cambian; una región ya en equilibrio no escribe nada. Al final se aplican las transiciones de
+tipo del bloque (apply_particle_transitions) y las regiones con partículas que cambiaron de tipo quedan sucias.
+"""
+import logging
+import time
+from typing import Dict, Optional, TYPE_CHECKING
+
+import numpy as np
+
+from src.config import CELESTIAL_CONFIG
+from src.domains.celestial.heat_diffusion import diffuse_temperatures
+from src.domains.celestial.temperature_engine import (
+    TemperatureEngine,
+    compute_new_temperatures,
+    sun_intensity,
+    temperature_engine,
+)
+from src.domains.particles.application.apply_particle_transitions import apply_particle_transitions
+from src.domains.shared.world_bloque_manager import WorldBloqueManager
+
+if TYPE_CHECKING:
+    from src.domains.celestial.service import CelestialTimeService
+    from src.domains.particles.application.ports.particle_repository import IParticleRepository
+
+logger = logging.getLogger(__name__)
+
+MOTIVOS = ("sucio", "sol", "jugadores")
+
+
+class TemperatureTickStats:
+    """Contadores de un tick de la tarea de temperatura (acumulados sobre todos los bloques)."""
+
+    __slots__ = (
+        "bloques", "regiones", "recalculadas", "omitidas", "motivos", "particulas", "subpasos", "escritas",
+        "transiciones", "segundos",
+    )
+
+    def __init__(self):
+        self.bloques = 0
+        self.regiones = 0
+        self.recalculadas = 0
+        self.omitidas = 0
+        self.motivos: Dict[str, int] = {motivo: 0 for motivo in MOTIVOS}
+        self.particulas = 0
+        self.subpasos = 0
+        self.escritas = 0
+        self.transiciones = 0
+        self.segundos = 0.0
+
+    def add(self, other: "TemperatureTickStats") -> None:
+        self.bloques += other.bloques
+        self.regiones += other.regiones
+        self.recalculadas += other.recalculadas
+        self.omitidas += other.omitidas
+        for motivo, count in other.motivos.items():
+            self.motivos[motivo] += count
+        self.particulas += other.particulas
+        self.subpasos += other.subpasos
+        self.escritas += other.escritas
+        self.transiciones += other.transiciones
+        self.segundos += other.segundos
+
+    def as_dict(self) -> dict:
+        return {
+            "bloques": self.bloques,
+            "regiones": self.regiones,
+            "recalculadas": self.recalculadas,
+            "omitidas": self.omitidas,
+            "motivos": dict(self.motivos),
+            "particulas": self.particulas,
+            "subpasos": self.subpasos,
+            "escritas": self.escritas,
+            "transiciones": self.transiciones,
+            "segundos": round(self.segundos, 3),
+        }
+
+
+class TemperatureScheduler:
+    """Recalcula la temperatura ambiente solo en las regiones que lo necesitan; guarda la de las demás."""
+
+    def __init__(
+        self,
+        manager: WorldBloqueManager,
+        engine: TemperatureEngine = temperature_engine,
+        tramos_sol: int = CELESTIAL_CONFIG['TEMPERATURE_SOL_TRAMOS'],
+        difusion: float = CELESTIAL_CONFIG['TEMPERATURE_DIFUSION_COEFICIENTE'],
+        max_subpasos: int = CELESTIAL_CONFIG['TEMPERATURE_DIFUSION_MAX_SUBPASOS'],
+    ):
+        self.manager = manager
+        self._engine = engine
+        self.tramos_sol = tramos_sol
+        self.difusion = difusion
+        self.max_subpasos = max_subpasos
+        self.ultimo_tick: Optional[TemperatureTickStats] = None
+
+    def sun_bucket(self, intensidad: np.ndarray) -> np.ndarray:
+        """Tramo (0..tramos_sol) de cada intensidad solar."""
+        return np.floor(np.clip(intensidad, 0.0, 1.0) * self.tramos_sol).astype(np.int64)
+
+    async def update_bloque(
+        self,
+        bloque_id: str,
+        celestial_time_service: "CelestialTimeService",
+        particle_repo: "IParticleRepository",
+    ) -> TemperatureTickStats:
+        """Un tick de temperatura del bloque: recalcula las regiones necesarias y escribe en lote lo que cambió."""
+        stats = TemperatureTickStats()
+        start = time.perf_counter()
+        coords, temp_actual, inercia, conductividad = await particle_repo.get_thermal_particle_arrays(bloque_id)
+        stats.bloques = 1
+        stats.particulas = len(coords)
+        if not len(coords):
+            return stats
+        config = await self.manager.get_bloque_config(str(bloque_id))
+        if not config:
+            raise ValueError(f"Bloque config con id {bloque_id} no existe")
+        size = int(config.get('tamano_bloque', 40))
+        coords64 = coords.astype(np.int64)
+        regiones, region_of = np.unique(coords64 // size, axis=0, return_inverse=True)
+        region_of = region_of.reshape(-1)
+        order = np.argsort(region_of, kind="stable")
+        bounds = np.searchsorted(region_of[order], np.arange(len(regiones) + 1))
+        centros = (regiones[:, :2] + 0.5) * size
+        tramos = self.sun_bucket(sun_intensity(
+            np.arctan2(centros[:, 1], centros[:, 0]), celestial_time_service.get_sun_angle()
+        ))
+        stats.regiones = len(regiones)
+
+        ambiente = np.empty(len(coords))
+        pendientes = []
+        for index, (rx, ry, rz) in enumerate(regiones.tolist()):
+            region = await self.manager.get_bloque_for_position(str(bloque_id), rx * size, ry * size, rz * size)
+            sel = order[bounds[index]:bounds[index + 1]]
+            local = coords64[sel] - np.array([rx, ry, rz], dtype=np.int64) * size
+            codigos = (local[:, 2] * size + local[:, 1]) * size + local[:, 0]
+            por_codigo = np.argsort(codigos)
+            codigos = codigos[por_codigo].astype(np.int32)
+            sel = sel[por_codigo]
+            if region.celdas_temperatura is None or not np.array_equal(region.celdas_temperatura, codigos):
+                # Partículas agregadas o quitadas desde el último recálculo
+                region.necesita_recalcular_temperatura = True
+            motivo = region.motivo_recalculo_temperatura(int(tramos[index]))
+            if motivo is None:
+                ambiente[sel] = region.temperatura_ambiente
+                stats.omitidas += 1
+            else:
+                pendientes.append((region, sel, codigos, int(tramos[index])))
+                stats.motivos[motivo] += 1
+                stats.recalculadas += 1
+
+        if pendientes:
+            recalcular = np.concatenate([sel for _, sel, _, _ in pendientes])
+            ambiente[recalcular] = await self._engine.ambient_temperatures(
+                bloque_id=bloque_id,
+                coords=coords[recalcular],
+                celestial_time_service=celestial_time_service,
+                particle_repo=particle_repo,
+            )
+            for region, sel, codigos, tramo in pendientes:
+                valores = ambiente[sel]
+                region.guardar_temperatura_ambiente(codigos, valores, tramo, float(valores.mean()))
+
+        nuevas = compute_new_temperatures(temp_actual, ambiente, inercia)
+        nuevas, stats.subpasos = diffuse_temperatures(
+            coords, nuevas, conductividad, inercia, self.difusion, self.max_subpasos
+        )
+        # Un solo lote por bloque; las que cambian menos de TEMPERATURE_EPSILON no se escriben
+        stats.escritas = await particle_repo.update_particle_temperatures_at(bloque_id, coords, nuevas, temp_actual)
+        stats.transiciones, cambiadas = await apply_particle_transitions(bloque_id, particle_repo)
+        # Otro tipo: otra inercia, conductividad y quizás otra superficie
+        for rx, ry, rz in np.unique(cambiadas.astype(np.int64) // size, axis=0).tolist():
+            region = await self.manager.get_bloque_for_position(str(bloque_id), rx * size, ry * size, rz * size)
+            region.necesita_recalcular_temperatura = True
+        stats.segundos = time.perf_counter() - start
+        return stats
+
+    def finish_tick(self, stats: TemperatureTickStats) -> None:
+        """Guarda las métricas del tick y las deja en el log."""
+        self.ultimo_tick = stats
+        logger.info(
+            "Temperatura: %s regiones en %s bloques, %s recalculadas (sucias %s, sol %s, jugadores %s), "
+            "%s omitidas; %s subpasos de conducción; %s de %s partículas escritas, %s transiciones en %.2fs",
+            stats.regiones, stats.bloques, stats.recalculadas, stats.motivos["sucio"], stats.motivos["sol"],
+            stats.motivos["jugadores"], stats.omitidas, stats.subpasos, stats.escritas, stats.particulas,
+            stats.transiciones, stats.segundos,
+        )
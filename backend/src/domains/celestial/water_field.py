@@ -0,0 +1,105 @@
+"""
+Campo de influencia del agua por bloque (término de partículas cercanas de calculate_cell_temperature).
+
+El aporte de cada partícula de agua/hielo w a una celda p es (T_w - base_p) * k_w * g(d), con
+g(d) = 1 / (1 + d²) * max(0, 1 - d / 5) y d <= radio. Separando base_p queda
+
+    modificador(p) = suma(p) - base_p * peso(p),   suma = Σ k_w * T_w * g(d),   peso = Σ k_w * g(d)
+
+y suma y peso son convoluciones de las grillas de agua (k_w * T_w y k_w) con el núcleo g. Se calculan una vez
+(FFT, scipy.signal.fftconvolve) sobre la caja del agua ampliada en el radio; consultar una celda es indexar dos
+arrays. El campo se vuelve a construir solo si cambia el agua (posiciones, tipos o temperaturas a 2 decimales).
+"""
+import hashlib
+from typing import Tuple
+
+import numpy as np
+from scipy.signal import fftconvolve
+
+# factor_proximidad = max(0, 1 - d / 5): más allá de esta distancia el agua no aporta
+PROXIMIDAD_MAXIMA = 5.0
+
+
+def water_kernel(radio: float) -> np.ndarray:
+    """Núcleo g(d) (2R + 1)³ indexado [z, y, x], R = floor(radio); 0 fuera del radio."""
+    extent = int(radio)
+    offsets = np.arange(-extent, extent + 1, dtype=np.float64)
+    dz, dy, dx = np.meshgrid(offsets, offsets, offsets, indexing="ij")
+    distancia = np.sqrt(dx * dx + dy * dy + dz * dz)
+    kernel = (1.0 / (1.0 + distancia ** 2)) * np.maximum(0.0, 1.0 - distancia / PROXIMIDAD_MAXIMA)
+    kernel[distancia > radio] = 0.0
+    return kernel
+
+
+def water_fingerprint(coords: np.ndarray, temperatura: np.ndarray, conductividad: np.ndarray) -> bytes:
+    """Huella del agua independiente del orden de las filas (temperaturas a 2 decimales, como la columna)."""
+    coords = np.asarray(coords, dtype=np.int32).reshape(-1, 3)
+    order = np.lexsort((coords[:, 2], coords[:, 1], coords[:, 0]))
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(coords[order].tobytes())
+    digest.update(np.round(np.asarray(temperatura, dtype=np.float64)[order], 2).tobytes())
+    digest.update(np.asarray(conductividad, dtype=np.float64)[order].tobytes())
+    return digest.digest()
+
+
+class WaterInfluence:
+    """suma y peso (float64, [z, y, x]) sobre la caja que empieza en origin (x, y, z); 0 fuera de ella."""
+
+    __slots__ = ("origin", "suma", "peso", "radio", "huella")
+
+    def __init__(self, origin: np.ndarray, suma: np.ndarray, peso: np.ndarray, radio: float, huella: bytes):
+        self.origin = origin
+        self.suma = suma
+        self.peso = peso
+        self.radio = radio
+        self.huella = huella
+
+    def lookup(self, coords: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """(suma, peso) (N,) en las celdas coords (N, 3)."""
+        coords = np.asarray(coords, dtype=np.int64).reshape(-1, 3)
+        suma = np.zeros(len(coords))
+        peso = np.zeros(len(coords))
+        if self.suma is None:
+            return suma, peso
+        local = coords - self.origin
+        shape = np.array(self.suma.shape[::-1])
+        inside = np.all((local >= 0) & (local < shape), axis=1)
+        x, y, z = local[inside, 0], local[inside, 1], local[inside, 2]
+        suma[inside] = self.suma[z, y, x]
+        peso[inside] = self.peso[z, y, x]
+        return suma, peso
+
+    def modifier(self, coords: np.ndarray, base: np.ndarray) -> np.ndarray:
+        """Modificador por agua cercana (N,) para celdas con temperatura ambiente base (N,)."""
+        suma, peso = self.lookup(coords)
+        return suma - np.asarray(base, dtype=np.float64) * peso
+
+
+def build_water_influence(
+    coords: np.ndarray,
+    temperatura: np.ndarray,
+    conductividad: np.ndarray,
+    radio: float,
+    huella: bytes = b"",
+) -> WaterInfluence:
+    """Campo desde las partículas de agua (coordenadas (N, 3), temperatura y conductividad (N,))."""
+    coords = np.asarray(coords, dtype=np.int64).reshape(-1, 3)
+    radio = min(float(radio), PROXIMIDAD_MAXIMA)
+    if not len(coords) or radio < 0:
+        return WaterInfluence(np.zeros(3, dtype=np.int64), None, None, radio, huella)
+    extent = int(radio)
+    origin = coords.min(axis=0) - extent
+    local = coords - origin
+    shape = tuple((local.max(axis=0) + extent + 1)[::-1])
+    conductividad = np.asarray(conductividad, dtype=np.float64)
+    pesos = np.zeros(shape)
+    pesos[local[:, 2], local[:, 1], local[:, 0]] = conductividad
+    sumas = np.zeros(shape)
+    sumas[local[:, 2], local[:, 1], local[:, 0]] = conductividad * np.asarray(temperatura, dtype=np.float64)
+    kernel = water_kernel(radio)
+    # El núcleo es simétrico: convolución = suma sobre los vecinos. La FFT deja ruido ~1e-12 lejos del agua
+    suma = fftconvolve(sumas, kernel, mode="same")
+    peso = fftconvolve(pesos, kernel, mode="same")
+    peso[np.abs(peso) < 1e-9] = 0.0
+    suma[peso == 0.0] = 0.0
+    return WaterInfluence(origin, suma, peso, radio, huella)
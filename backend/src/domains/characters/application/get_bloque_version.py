@@ -0,0 +1,20 @@
+"""
+Caso de uso: versión del bloque para ETag / If-None-Match de los GET de characters.
+"""
+from uuid import UUID
+
+from src.domains.characters.application.ports.character_repository import ICharacterRepository
+
+
+async def get_bloque_version(
+    repository: ICharacterRepository,
+    bloque_id: UUID,
+) -> int:
+    """
+    Versión del bloque; cambia con cualquier escritura del bloque (agrupaciones, partículas o la fila del bloque).
+    Lanza ValueError si el bloque no existe.
+    """
+    version = await repository.get_bloque_version(bloque_id)
+    if version is None:
+        raise ValueError("Bloque no encontrado")
+    return version
@@ -18,6 +18,11 @@ class ICharacterRepository(ABC):
         """Indica si existe un bloque con el ID dado (tabla juego_dioses.bloques)."""
         pass
 
+    @abstractmethod
+    async def get_bloque_version(self, bloque_id: UUID) -> Optional[int]:
+        """Versión del bloque (cambia con cualquier escritura del bloque); None si el bloque no existe."""
+        pass
+
     @abstractmethod
     async def list_bipeds(self, bloque_id: UUID) -> List[CharacterResponse]:
         """Devuelve todos los personajes (agrupaciones tipo biped) del bloque, ordenados por creado_en DESC."""
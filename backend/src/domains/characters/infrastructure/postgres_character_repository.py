@@ -15,7 +15,10 @@ from src.domains.shared.schemas import parse_jsonb_field
 
 
 def _row_to_character_response(row, bloque_id: UUID) -> CharacterResponse:
-    """Convierte una fila de agrupaciones (dict/Record) en CharacterResponse; parsea geometria_agrupacion y modelo_3d JSONB."""
+    """
+    Convierte una fila de agrupaciones (dict/Record) en CharacterResponse; parsea geometria_agrupacion y modelo_3d JSONB.
+    Solo se validan los JSONB (forma libre); el resto de la fila es confiable y se arma con model_construct.
+    """
     geometria = None
     if row.get("geometria_agrupacion"):
         geometria_data = parse_jsonb_field(row["geometria_agrupacion"])
@@ -32,7 +35,7 @@ def _row_to_character_response(row, bloque_id: UUID) -> CharacterResponse:
                 modelo_3d = Model3D(**modelo_3d_data)
             except Exception:
                 pass
-    return CharacterResponse(
+    return CharacterResponse.model_construct(
         id=str(row["id"]),
         bloque_id=str(bloque_id),
         nombre=row["nombre"],
@@ -60,6 +63,17 @@ class PostgresCharacterRepository(ICharacterRepository):
                 bloque_id
             )
 
+    async def get_bloque_version(self, bloque_id: UUID) -> Optional[int]:
+        """bloque_versiones.version del bloque (0 si todavía no tiene); None si el bloque no existe."""
+        async with get_connection() as conn:
+            row = await conn.fetchrow("""
+                SELECT COALESCE(bv.version, 0) AS version
+                FROM juego_dioses.bloques b
+                LEFT JOIN juego_dioses.bloque_versiones bv ON bv.bloque_id = b.id
+                WHERE b.id = $1
+            """, bloque_id)
+            return row["version"] if row else None
+
     async def list_bipeds(self, bloque_id: UUID) -> List[CharacterResponse]:
         """SELECT de agrupaciones con bloque_id y tipo='biped', orden por creado_en DESC; mapea filas a CharacterResponse."""
         async with get_connection() as conn:
@@ -8,20 +8,24 @@ Flujo (Arquitectura Hexagonal):
   4. infrastructure/postgres_character_repository.py → adaptador de salida: implementa el puerto contra Postgres.
 
 Las routes no acceden a BD ni a infraestructura directa; solo inyectan el adaptador y llaman al caso de uso.
+Los GET de lectura responden con orjson_response y llevan ETag (versión del bloque) y responden 304 a If-None-Match sin correr las consultas.
 """
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Path
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Response
 
 from src.domains.characters.application.list_characters import list_characters
 from src.domains.characters.application.get_character import get_character
 from src.domains.characters.application.get_character_model import get_character_model
+from src.domains.characters.application.get_bloque_version import get_bloque_version
 from src.domains.characters.application.ports.character_repository import ICharacterRepository
 from src.domains.characters.application.ports.character_creation_port import ICharacterCreationPort
 from src.domains.characters.infrastructure.postgres_character_repository import PostgresCharacterRepository
 from src.domains.characters.infrastructure.entity_creation_adapter import EntityCreationAdapter
 from src.domains.characters.schemas import CharacterResponse, CharacterCreate
+from src.domains.shared.etag import build_etag, etag_matches, not_modified
+from src.domains.shared.orjson_response import orjson_response
 
 router = APIRouter(prefix="/bloques/{bloque_id}/characters", tags=["characters"])
 
@@ -46,11 +50,16 @@ def _handle_value_error(e: ValueError) -> None:
 @router.get("", response_model=List[CharacterResponse])
 async def list_characters_route(
     bloque_id: UUID = Path(..., description="ID del bloque"),
+    if_none_match: Optional[str] = Header(None),
     repository: ICharacterRepository = Depends(get_character_repository),
 ):
     """GET /bloques/{bloque_id}/characters — Lista todos los personajes (bípedos) del bloque."""
     try:
-        return await list_characters(repository, bloque_id)
+        version = await get_bloque_version(repository, bloque_id)
+        etag = build_etag("characters", bloque_id, version)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        return orjson_response(await list_characters(repository, bloque_id), headers={"ETag": etag})
     except ValueError as e:
         _handle_value_error(e)
 
@@ -59,23 +68,35 @@ async def list_characters_route(
 async def get_character_route(
     bloque_id: UUID = Path(..., description="ID del bloque"),
     character_id: UUID = Path(..., description="ID del personaje (agrupación)"),
+    if_none_match: Optional[str] = Header(None),
     repository: ICharacterRepository = Depends(get_character_repository),
 ):
     """GET /bloques/{bloque_id}/characters/{character_id} — Devuelve un personaje por ID."""
     try:
-        return await get_character(repository, bloque_id, character_id)
+        version = await get_bloque_version(repository, bloque_id)
+        etag = build_etag("character", bloque_id, character_id, version)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        return orjson_response(await get_character(repository, bloque_id, character_id), headers={"ETag": etag})
     except ValueError as e:
         _handle_value_error(e)
 
 
 @router.get("/{character_id}/model")
 async def get_character_model_route(
+    response: Response,
     bloque_id: UUID = Path(..., description="ID del bloque"),
     character_id: UUID = Path(..., description="ID del personaje"),
+    if_none_match: Optional[str] = Header(None),
     repository: ICharacterRepository = Depends(get_character_repository),
 ):
     """GET /bloques/{bloque_id}/characters/{character_id}/model — URL y metadata del modelo 3D del personaje."""
     try:
+        version = await get_bloque_version(repository, bloque_id)
+        etag = build_etag("character-model", bloque_id, character_id, version)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        response.headers["ETag"] = etag
         return await get_character_model(repository, bloque_id, character_id)
     except ValueError as e:
         _handle_value_error(e)
@@ -8,8 +8,16 @@ from .schemas import (
     ParticleResponse,
     ParticleViewportQuery,
     ParticlesResponse,
+    ParticleTombstone,
+    ParticleChangesResponse,
+    ParticleChunkCoord,
+    ParticleBatchRequest,
+    ParticleRegionResult,
+    ParticleBatchResponse,
     ParticleTypeResponse,
     ParticleTypesResponse,
+    MatterStateResponse,
+    ParticleCatalogueResponse,
     TipoParticulaBase,
     TipoParticulaCreate,
     TipoParticula,
@@ -26,8 +34,16 @@ __all__ = [
     "ParticleResponse",
     "ParticleViewportQuery",
     "ParticlesResponse",
+    "ParticleTombstone",
+    "ParticleChangesResponse",
+    "ParticleChunkCoord",
+    "ParticleBatchRequest",
+    "ParticleRegionResult",
+    "ParticleBatchResponse",
     "ParticleTypeResponse",
     "ParticleTypesResponse",
+    "MatterStateResponse",
+    "ParticleCatalogueResponse",
     "TipoParticulaBase",
     "TipoParticulaCreate",
     "TipoParticula",
@@ -0,0 +1,47 @@
+"""
+Caso de uso: aplicar transiciones_particulas a todo un bloque en una pasada (después de cada tick de temperatura).
+Recibe IParticleRepository inyectado; las reglas salen del catálogo en memoria compiladas en tablas (transitions.py).
+"""
+from typing import Tuple
+
+import numpy as np
+
+from src.domains.particles.application.ports.particle_repository import IParticleRepository
+from src.domains.particles.infrastructure.particle_catalogue import ParticleCatalogue, particle_catalogue
+from src.domains.particles.transitions import transition_table
+
+
+async def apply_particle_transitions(
+    bloque_id: str,
+    repository: IParticleRepository,
+    catalogue: ParticleCatalogue = particle_catalogue,
+) -> Tuple[int, np.ndarray]:
+    """
+    Evalúa las transiciones de todas las partículas del bloque cuyo tipo tiene alguna y escribe los cambios de tipo y
+    estado en una sentencia (update_particle_types_at, que invalida los chunks tocados).
+    Devuelve (partículas que cambiaron, celdas (N, 3) enviadas a cambiar).
+    """
+    table = transition_table(await catalogue.get())
+    sin_cambios = np.empty((0, 3), dtype=np.int32)
+    if table.empty:
+        return 0, sin_cambios
+    coords, origen, temperatura, integridad = await repository.get_transition_particle_arrays(
+        bloque_id, table.origen_ids
+    )
+    if not len(coords):
+        return 0, sin_cambios
+    destino, estado = table.evaluate(origen, temperatura, integridad)
+    cambian = destino >= 0
+    if not cambian.any():
+        return 0, sin_cambios
+    coords = coords[cambian]
+    # estado -1 (conserva el suyo) toma el None del final
+    estado_ids = np.array(table.estado_ids + [None], dtype=object)
+    changed = await repository.update_particle_types_at(
+        bloque_id,
+        coords,
+        np.array(table.origen_ids, dtype=object)[origen[cambian]].tolist(),
+        np.array(table.destino_ids, dtype=object)[destino[cambian]].tolist(),
+        estado_ids[estado[cambian]].tolist(),
+    )
+    return changed, coords
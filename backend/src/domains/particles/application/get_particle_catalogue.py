@@ -0,0 +1,11 @@
+"""
+Caso de uso: obtener el catálogo de tipos de partícula (estilos) y estados de materia.
+Recibe el puerto IParticleRepository inyectado; en runtime sale del catálogo en memoria (ParticleCatalogue).
+"""
+from src.domains.particles.application.ports.particle_repository import IParticleRepository
+from src.domains.particles.schemas import ParticleCatalogueResponse
+
+
+async def get_particle_catalogue(repository: IParticleRepository) -> ParticleCatalogueResponse:
+    """Catálogo completo; `hash` cambia solo si cambia el contenido (sirve de ETag)."""
+    return await repository.get_catalogue()
@@ -0,0 +1,40 @@
+"""
+Caso de uso: cambios de partículas en un viewport desde una versión del mundo.
+Recibe el puerto IParticleRepository inyectado; en runtime es PostgresParticleRepository.
+"""
+from uuid import UUID
+
+from src.domains.particles.application.ports.particle_repository import IParticleRepository
+from src.domains.particles.schemas import ParticleChangesResponse, ParticleViewportQuery
+
+
+async def get_particle_changes(
+    repository: IParticleRepository,
+    bloque_id: UUID,
+    viewport: ParticleViewportQuery,
+    since: int,
+    max_cells: int = 1000000,
+) -> ParticleChangesResponse:
+    """
+    Obtener partículas insertadas/modificadas y lápidas (extraídas/borradas) con versión > since. Los cambios de solo
+    temperatura no cambian la versión de la partícula, así que no entran.
+    La versión se lee antes que los cambios: lo escrito en medio vuelve a llegar en la próxima consulta.
+    Lanza ValueError si el bloque no existe o si since es posterior a la versión del bloque (un since que no salió
+    de esta API: hay que volver a pedir el viewport completo).
+    """
+    viewport.validate_ranges(max_cells)
+    exists = await repository.bloque_exists(bloque_id)
+    if not exists:
+        raise ValueError("Bloque no encontrado")
+    version = await repository.get_world_version(bloque_id)
+    if since > version:
+        raise ValueError(f"since {since} es posterior a la versión del bloque ({version}); pedir el viewport completo")
+    particles, removed = await repository.get_changes_by_viewport(bloque_id, viewport, since)
+    return ParticleChangesResponse(
+        bloque_id=bloque_id,
+        since=since,
+        version=version,
+        particles=particles,
+        removed=removed,
+        viewport=viewport,
+    )
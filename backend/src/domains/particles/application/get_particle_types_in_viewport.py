@@ -12,12 +12,13 @@ async def get_particle_types_in_viewport(
     repository: IParticleRepository,
     bloque_id: UUID,
     viewport: ParticleViewportQuery,
+    max_cells: int = 1000000,
 ) -> ParticleTypesResponse:
     """
     Obtener tipos de partícula presentes en el viewport.
     Lanza ValueError si el bloque no existe.
     """
-    viewport.validate_ranges()
+    viewport.validate_ranges(max_cells)
     exists = await repository.bloque_exists(bloque_id)
     if not exists:
         raise ValueError("Bloque no encontrado")
@@ -0,0 +1,68 @@
+"""
+Caso de uso: obtener partículas de varias regiones (AABB o chunks) de un bloque en un solo pedido.
+Recibe el puerto IParticleRepository inyectado; en runtime es PostgresParticleRepository.
+"""
+from typing import List
+from uuid import UUID
+
+from src.domains.particles.application.ports.particle_repository import IParticleRepository
+from src.domains.particles.schemas import (
+    ParticleBatchRequest,
+    ParticleBatchResponse,
+    ParticleRegionResult,
+    ParticleViewportQuery,
+)
+
+
+def _regions_of(request: ParticleBatchRequest, chunk_size: int) -> List[ParticleViewportQuery]:
+    """Regiones del pedido: primero las AABB, luego los chunks convertidos a su rango de celdas."""
+    regions = list(request.regions)
+    for chunk in request.chunks:
+        regions.append(ParticleViewportQuery(
+            x_min=chunk.chunk_x * chunk_size,
+            x_max=(chunk.chunk_x + 1) * chunk_size - 1,
+            y_min=chunk.chunk_y * chunk_size,
+            y_max=(chunk.chunk_y + 1) * chunk_size - 1,
+            z_min=chunk.chunk_z * chunk_size,
+            z_max=(chunk.chunk_z + 1) * chunk_size - 1,
+        ))
+    return regions
+
+
+async def get_particles_by_regions(
+    repository: IParticleRepository,
+    bloque_id: UUID,
+    request: ParticleBatchRequest,
+    chunk_size: int,
+    max_regions: int,
+    max_cells: int,
+) -> ParticleBatchResponse:
+    """
+    Obtener las partículas de cada región con una sola lectura al repositorio (get_by_viewports).
+    Los resultados van en el orden del pedido (regions y después chunks); total = cantidad devuelta por región.
+    Lanza ValueError si el bloque no existe, si no hay regiones o si se superan max_regions / max_cells.
+    """
+    regions = _regions_of(request, chunk_size)
+    if not regions:
+        raise ValueError("El batch debe incluir al menos una región o chunk")
+    if len(regions) > max_regions:
+        raise ValueError(f"Demasiadas regiones: {len(regions)}. Máximo: {max_regions}")
+    total_cells = 0
+    for region in regions:
+        region.validate_ranges()
+        total_cells += (
+            (region.x_max - region.x_min + 1) * (region.y_max - region.y_min + 1) * (region.z_max - region.z_min + 1)
+        )
+    if total_cells > max_cells:
+        raise ValueError(f"Batch demasiado grande: {total_cells} celdas. Máximo: {max_cells}")
+    exists = await repository.bloque_exists(bloque_id)
+    if not exists:
+        raise ValueError("Bloque no encontrado")
+    per_region = await repository.get_by_viewports(bloque_id, regions)
+    return ParticleBatchResponse(
+        bloque_id=bloque_id,
+        regions=[
+            ParticleRegionResult(viewport=region, particles=particles, total=len(particles))
+            for region, particles in zip(regions, per_region)
+        ],
+    )
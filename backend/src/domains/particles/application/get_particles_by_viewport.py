@@ -2,31 +2,69 @@
 Caso de uso: obtener partículas por viewport.
 Recibe el puerto IParticleRepository inyectado; en runtime es PostgresParticleRepository.
 """
+from typing import Optional
 from uuid import UUID
 
 from src.domains.particles.application.ports.particle_repository import IParticleRepository
-from src.domains.particles.schemas import ParticlesResponse, ParticleViewportQuery
+from src.domains.particles.schemas import ParticlesResponse, ParticleViewportQuery, Visibility
+
+
+async def check_viewport_density(
+    repository: IParticleRepository,
+    bloque_id: UUID,
+    viewport: ParticleViewportQuery,
+    max_particles: Optional[int],
+) -> None:
+    """
+    Límite por costo: la estimación de chunk_resumen (partículas de los chunks que tocan el viewport) no puede
+    superar max_particles (None = sin límite). Lanza ValueError si lo supera.
+    """
+    if max_particles is None:
+        return
+    estimate = await repository.estimate_count_by_viewport(bloque_id, viewport)
+    if estimate > max_particles:
+        raise ValueError(f"Viewport demasiado denso: ~{estimate} partículas. Máximo: {max_particles}")
 
 
 async def get_particles_by_viewport(
     repository: IParticleRepository,
     bloque_id: UUID,
     viewport: ParticleViewportQuery,
+    visibility: Visibility = "all",
+    lod: int = 0,
+    max_cells: int = 1000000,
+    max_particles: Optional[int] = None,
 ) -> ParticlesResponse:
     """
     Obtener partículas en el viewport y total.
-    Lanza ValueError si el bloque no existe.
+    Con visibility="surface" solo las que tienen alguna cara expuesta (total = cantidad devuelta).
+    Con lod > 0 un representativo por cubo de 2^lod celdas (total = cantidad devuelta).
+    Sin lod el límite es por costo: hasta max_cells celdas y max_particles partículas estimadas (chunk_resumen).
+    Lanza ValueError si el bloque no existe, si se superan los límites o si se combinan lod y visibility="surface".
     """
-    viewport.validate_ranges()
+    viewport.validate_ranges(max_cells)
+    if lod > 0 and visibility == "surface":
+        raise ValueError("lod > 0 no se puede combinar con visibility=surface")
     exists = await repository.bloque_exists(bloque_id)
     if not exists:
         raise ValueError("Bloque no encontrado")
-    # get_by_viewport y count_by_viewport en runtime son PostgresParticleRepository
-    particles = await repository.get_by_viewport(bloque_id, viewport)
-    total = await repository.count_by_viewport(bloque_id, viewport)
+    if lod == 0:
+        await check_viewport_density(repository, bloque_id, viewport, max_particles)
+    if lod > 0:
+        particles = await repository.get_lod_by_viewport(bloque_id, viewport, lod)
+        total = len(particles)
+    elif visibility == "surface":
+        particles = await repository.get_surface_by_viewport(bloque_id, viewport)
+        total = len(particles)
+    else:
+        # get_by_viewport y count_by_viewport en runtime son PostgresParticleRepository
+        particles = await repository.get_by_viewport(bloque_id, viewport)
+        total = await repository.count_by_viewport(bloque_id, viewport)
     return ParticlesResponse(
         bloque_id=bloque_id,
         particles=particles,
         total=total,
         viewport=viewport,
+        visibility=visibility,
+        lod=lod,
     )
@@ -0,0 +1,34 @@
+"""
+Caso de uso: versión de los datos de un viewport (para ETag / If-None-Match).
+Recibe el puerto IParticleRepository inyectado; en runtime es PostgresParticleRepository.
+"""
+from uuid import UUID
+
+from src.domains.particles.application.ports.particle_repository import IParticleRepository
+from src.domains.particles.schemas import ParticleViewportQuery
+
+
+async def get_viewport_version(
+    repository: IParticleRepository,
+    bloque_id: UUID,
+    viewport: ParticleViewportQuery,
+    max_cells: int = 1000000,
+    halo: int = 0,
+) -> str:
+    """
+    Firma de las versiones de los chunks del viewport ampliado halo celdas por lado; cambia con cualquier escritura
+    de partículas en ellos. halo=1 para respuestas que dependen de las vecinas del borde (visibility=surface).
+    Lanza ValueError si el viewport es inválido o el bloque no existe.
+    """
+    viewport.validate_ranges(max_cells)
+    if halo:
+        # model_copy no valida: el halo puede quedar en x/y negativos
+        viewport = viewport.model_copy(update={
+            "x_min": viewport.x_min - halo, "x_max": viewport.x_max + halo,
+            "y_min": viewport.y_min - halo, "y_max": viewport.y_max + halo,
+            "z_min": viewport.z_min - halo, "z_max": viewport.z_max + halo,
+        })
+    version = await repository.get_viewport_version(bloque_id, viewport)
+    if version is None:
+        raise ValueError("Bloque no encontrado")
+    return version
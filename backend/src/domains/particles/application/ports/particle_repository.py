@@ -3,11 +3,16 @@ Puerto de salida (interfaz) para persistencia de partículas.
 El caso de uso depende de esta interfaz; la implementa PostgresParticleRepository.
 """
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
 from uuid import UUID
 
+import numpy as np
+
+from src.domains.particles.neighbours import ParticleNeighbours
 from src.domains.particles.schemas import (
+    ParticleCatalogueResponse,
     ParticleResponse,
+    ParticleTombstone,
     ParticleTypeResponse,
     ParticleViewportQuery,
 )
@@ -33,6 +38,34 @@ class IParticleRepository(ABC):
         """Partículas no extraídas en el viewport; orden por celda_z, celda_y, celda_x."""
         pass
 
+    @abstractmethod
+    async def get_by_viewports(
+        self, bloque_id: UUID, viewports: List[ParticleViewportQuery]
+    ) -> List[List[ParticleResponse]]:
+        """Partículas no extraídas de cada viewport (misma posición que en viewports); cada lista como get_by_viewport."""
+        pass
+
+    @abstractmethod
+    async def get_surface_by_viewport(
+        self, bloque_id: UUID, viewport: ParticleViewportQuery
+    ) -> List[ParticleResponse]:
+        """Como get_by_viewport, pero solo partículas con alguna cara expuesta a un vecino vacío o no opaco."""
+        pass
+
+    @abstractmethod
+    async def get_lod_by_viewport(
+        self, bloque_id: UUID, viewport: ParticleViewportQuery, lod: int
+    ) -> List[ParticleResponse]:
+        """Un voxel representativo por cubo de 2^lod celdas en el viewport (ver lod.py); orden celda_z, celda_y, celda_x."""
+        pass
+
+    @abstractmethod
+    def stream_by_viewport(
+        self, bloque_id: UUID, viewport: ParticleViewportQuery, batch_size: int
+    ) -> AsyncIterator[List[ParticleResponse]]:
+        """Partículas del viewport en lotes de hasta batch_size (mismo orden que get_by_viewport), sin cargar todo en memoria."""
+        pass
+
     @abstractmethod
     async def count_by_viewport(
         self, bloque_id: UUID, viewport: ParticleViewportQuery
@@ -40,6 +73,52 @@ class IParticleRepository(ABC):
         """Número total de partículas no extraídas en el viewport."""
         pass
 
+    @abstractmethod
+    async def estimate_count_by_viewport(
+        self, bloque_id: UUID, viewport: ParticleViewportQuery
+    ) -> int:
+        """Cota superior barata del número de partículas: las de todos los chunks que tocan el viewport."""
+        pass
+
+    @abstractmethod
+    async def get_viewport_version(
+        self, bloque_id: UUID, viewport: ParticleViewportQuery
+    ) -> Optional[str]:
+        """Firma de las versiones de los chunks que cubren el viewport (cambia con cualquier escritura); None si el bloque no existe."""
+        pass
+
+    @abstractmethod
+    async def get_chunk_versions(
+        self, bloque_id: UUID, chunks: List[Tuple[int, int, int]]
+    ) -> Dict[Tuple[int, int, int], int]:
+        """Versión (chunk_versiones) de cada chunk (chunk_x, chunk_y, chunk_z) pedido; 0 si nunca se escribió."""
+        pass
+
+    @abstractmethod
+    async def get_changes_by_viewport(
+        self, bloque_id: UUID, viewport: ParticleViewportQuery, since: int
+    ) -> Tuple[List[ParticleResponse], List[ParticleTombstone]]:
+        """Partículas del viewport con version > since: (insertadas/modificadas, extraídas/borradas)."""
+        pass
+
+    @abstractmethod
+    async def get_world_version(self, bloque_id: UUID) -> int:
+        """
+        Versión más alta escrita en el bloque (partículas y lápidas) sin pasar el horizonte de las transacciones en
+        curso: todo cambio con versión <= la devuelta ya es visible, así que sirve de próximo since.
+        """
+        pass
+
+    @abstractmethod
+    async def get_type_opacities(self) -> Dict[UUID, float]:
+        """Opacidad de cada tipo de partícula (tipo_particula_id -> opacidad)."""
+        pass
+
+    @abstractmethod
+    async def get_catalogue(self) -> ParticleCatalogueResponse:
+        """Catálogo de tipos (con estilos) y estados de materia, con su versión y hash de contenido."""
+        pass
+
     @abstractmethod
     async def get_by_id(
         self, bloque_id: UUID, particle_id: UUID
@@ -59,6 +138,27 @@ class IParticleRepository(ABC):
         """Partículas del bloque con inercia térmica > inercia_minima (id, celda_*, temperatura, inercia_termica)."""
         pass
 
+    @abstractmethod
+    async def get_thermal_particle_arrays(
+        self, bloque_id: str, inercia_minima: float = 0.1
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Mismas partículas que get_particles_with_thermal_inertia como arrays alineados: coordenadas (N, 3) int32,
+        temperatura (N,) float64 (NULL = 20), inercia_termica (N,) float64 y conductividad_termica (N,) float64
+        (NULL = 1).
+        """
+        pass
+
+    @abstractmethod
+    async def get_particle_arrays_by_type(
+        self, bloque_id: str, tipos: Sequence[str]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Partículas no extraídas de los tipos dados (por nombre, sin distinguir mayúsculas) como arrays alineados:
+        coordenadas (N, 3) int32, temperatura (N,) float64 (NULL = 20) y conductividad_termica (N,) float64 (NULL = 1).
+        """
+        pass
+
     @abstractmethod
     async def update_particle_temperature(
         self, particula_id: str, temperatura: float
@@ -66,6 +166,117 @@ class IParticleRepository(ABC):
         """Actualiza la temperatura de una partícula por ID."""
         pass
 
+    @abstractmethod
+    async def update_particle_temperature_at(
+        self, bloque_id: str, celda_x: int, celda_y: int, celda_z: int, temperatura: float
+    ) -> None:
+        """Actualiza la temperatura de la partícula no extraída en la celda (bloque_id, celda_x, celda_y, celda_z)."""
+        pass
+
+    @abstractmethod
+    async def update_particle_temperatures_at(
+        self,
+        bloque_id: str,
+        coords: np.ndarray,
+        temperaturas: np.ndarray,
+        anteriores: Optional[np.ndarray] = None,
+    ) -> int:
+        """
+        Temperaturas (N,) de las partículas no extraídas en las celdas coords (N, 3), en lote. Con anteriores (N,)
+        se descartan las que cambian menos de PARTICLES_TEMPERATURE_EPSILON. Devuelve cuántas se escribieron.
+        """
+        pass
+
+    @abstractmethod
+    async def get_transition_particle_arrays(
+        self, bloque_id: str, tipo_ids: Sequence[str]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Partículas no extraídas de los tipos tipo_ids (UUIDs) como arrays alineados: coordenadas (N, 3) int32,
+        tipo (N,) int32 (índice en tipo_ids), temperatura (N,) float64 (NULL = 20) e integridad (N,) float64
+        (NULL = 1). Para evaluar transiciones_particulas.
+        """
+        pass
+
+    @abstractmethod
+    async def get_retyped_particle_arrays(
+        self, bloque_id: str, since: int, tipo_ids: Sequence[str]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Partículas no extraídas de los tipos tipo_ids (UUIDs) insertadas, movidas o que cambiaron de tipo después de
+        la versión since (particulas.version_tipo; las demás escrituras no cuentan) como arrays alineados:
+        coordenadas (N, 3) int32, tipo (N,) int32 (índice en tipo_ids) y temperatura (N,) float64 (NULL = 20). Para
+        la propagación por frentes.
+        """
+        pass
+
+    @abstractmethod
+    async def update_particle_types_at(
+        self,
+        bloque_id: str,
+        coords: np.ndarray,
+        origenes: Sequence[str],
+        destinos: Sequence[str],
+        estados: Sequence[Optional[str]],
+    ) -> int:
+        """
+        Cambia a destinos[i] el tipo de la partícula no extraída en coords[i] si todavía es del tipo origenes[i], y su
+        estado de materia a estados[i] (None: lo conserva). Una sola sentencia; devuelve cuántas cambiaron.
+        """
+        pass
+
+    @abstractmethod
+    async def get_bloque_ids_with_types(self, tipo_ids: Sequence[str]) -> List[str]:
+        """Bloques con alguna partícula no extraída de los tipos tipo_ids (UUIDs), según chunk_resumen."""
+        pass
+
+    @abstractmethod
+    async def get_chunk_contents(self, bloque_id: str) -> Dict[Tuple[int, int, int], Dict[str, int]]:
+        """
+        Contenido de cada chunk de VERSION_CHUNK_SIZE³ del bloque según chunk_resumen: (chunk_x, chunk_y, chunk_z) ->
+        {tipo_particula_id: partículas no extraídas}. No cambia con las escrituras de temperatura.
+        """
+        pass
+
+    @abstractmethod
+    async def get_bloque_extent(self, bloque_id: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Celdas mínima y máxima (inclusive) del bloque como arrays (3,) int64 [x, y, z]: x e y desde 0 hasta
+        ancho_metros / tamano_celda y alto_metros / tamano_celda (excluidos), z de profundidad_maxima a altura_maxima.
+        None si el bloque no existe.
+        """
+        pass
+
+    @abstractmethod
+    async def get_liquid_particle_arrays(
+        self, bloque_id: str, chunks: np.ndarray, tipo_ids: Sequence[str], margen: int
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Líquidos (tipo_ids) no extraídos de los chunks (K, 3) y las demás partículas de esos chunks dentro de la caja
+        de los líquidos ampliada margen celdas (hacia arriba no se amplía), como arrays alineados: coordenadas (N, 3)
+        int32, tipo (N,) int32 (índice en tipo_ids; -1 para las que no son líquido), cantidad (N,) float64 (NULL = 1)
+        y temperatura (N,) float64 (NULL = 20). Para el flujo de líquidos.
+        """
+        pass
+
+    @abstractmethod
+    async def write_liquid_cells(
+        self,
+        bloque_id: str,
+        coords: np.ndarray,
+        tipos: Sequence[str],
+        estados: Sequence[str],
+        cantidades: np.ndarray,
+        temperaturas: np.ndarray,
+    ) -> int:
+        """
+        Escribe el líquido tipos[i] en coords[i] en una transacción: con cantidad <= 0 borra la partícula si sigue
+        siendo de ese tipo; si no, actualiza cantidad y temperatura de la del mismo tipo o crea una (estado estados[i])
+        en la celda vacía o extraída. Las celdas ocupadas mientras tanto por otro tipo no se tocan.
+        Devuelve las filas escritas.
+        """
+        pass
+
     @abstractmethod
     async def get_particles_near(
         self,
@@ -78,6 +289,30 @@ class IParticleRepository(ABC):
         """Partículas en radio de (celda_x, celda_y, celda_z). Dicts con tipo_nombre, temperatura, celda_x, celda_y, celda_z, etc."""
         pass
 
+    @abstractmethod
+    async def get_particles_near_many(
+        self,
+        bloque_id: str,
+        puntos: Sequence[Tuple[float, float, float]],
+        radio: float,
+        tipos: Optional[Sequence[str]] = None,
+    ) -> ParticleNeighbours:
+        """
+        Partículas no extraídas en radio euclidiano de cada punto (solo de los tipos con esos nombres, si se indican),
+        en arrays compactos ordenados por distancia (ver neighbours.py).
+        """
+        pass
+
+    @abstractmethod
+    async def get_surface_type_name(self, bloque_id: str, celda_x: int, celda_y: int) -> Optional[str]:
+        """Nombre del tipo de la partícula más alta no extraída en la columna (x, y) (mapa de alturas) o None."""
+        pass
+
+    @abstractmethod
+    async def get_surface_types(self, bloque_id: str) -> Tuple[np.ndarray, List[UUID]]:
+        """Columnas (K, 2) int32 del mapa de alturas del bloque y el tipo de partícula en la cima de cada una."""
+        pass
+
     @abstractmethod
     async def get_particle_type_by_name(self, nombre: str) -> Optional[dict]:
         """Fila del tipo de partícula por nombre (conductividad_termica, albedo, etc.) o None."""
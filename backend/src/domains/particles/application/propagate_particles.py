@@ -0,0 +1,97 @@
+"""
+Caso de uso: propagar fuego y energía desde las celdas del frente a sus vecinas inflamables (tarea de propagación,
+PropagationScheduler). Recibe IParticleRepository inyectado; las reglas salen del catálogo en memoria (propagation.py).
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+from src.domains.particles.application.ports.particle_repository import IParticleRepository
+from src.domains.particles.infrastructure.particle_catalogue import ParticleCatalogue, particle_catalogue
+from src.domains.particles.morton import morton_codes
+from src.domains.particles.propagation import propagation_table
+from src.domains.particles.transitions import transition_table
+
+
+class PropagationResult(NamedTuple):
+    """Resultado de propagate_particles: vecinas evaluadas, partículas que cambiaron y celdas (N, 3) enviadas."""
+
+    vecinas: int
+    prendidas: int
+    celdas: np.ndarray
+
+
+async def propagate_particles(
+    bloque_id: str,
+    repository: IParticleRepository,
+    coords: np.ndarray,
+    fuente: np.ndarray,
+    temperatura: np.ndarray,
+    catalogue: ParticleCatalogue = particle_catalogue,
+) -> PropagationResult:
+    """
+    Por cada tipo fuente del frente (coords (F, 3), fuente (F,) índice en fuente_ids y temperatura (F,)) lee las
+    vecinas inflamables en su radio (get_particles_near_many, una lectura por tipo fuente), evalúa la condición con la
+    temperatura de la fuente y escribe tipo y estado (update_particle_types_at) y la temperatura de la fuente
+    (update_particle_temperatures_at) de las que se prenden. Una vecina alcanzada por varias fuentes toma la más
+    cercana.
+    """
+    snapshot = await catalogue.get()
+    table = propagation_table(snapshot, transition_table(snapshot))
+    sin_cambios = PropagationResult(0, 0, np.empty((0, 3), dtype=np.int32))
+    coords = np.asarray(coords).reshape(-1, 3)
+    fuente = np.asarray(fuente, dtype=np.int64)
+    temperatura = np.asarray(temperatura, dtype=np.float64)
+    if table.empty or not len(coords):
+        return sin_cambios
+    origen_index = {tipo_id: index for index, tipo_id in enumerate(table.origen_ids)}
+    estado_ids = np.array(table.estado_ids + [None], dtype=object)
+    vistas = np.empty(0, dtype=np.int64)
+    vecinas = 0
+    partes = []
+    for s in np.unique(fuente).tolist():
+        inflamables = table.inflamables(s)
+        if not inflamables or table.radio[s] < 1:
+            continue
+        del_tipo = fuente == s
+        near = await repository.get_particles_near_many(
+            bloque_id, coords[del_tipo], float(table.radio[s]), tipos=inflamables
+        )
+        if not len(near.coords):
+            continue
+        vecinas += len(near.coords)
+        paleta = np.array([origen_index.get(str(tipo_id), -1) for tipo_id in near.tipo_ids] or [-1], dtype=np.int64)
+        origen = paleta[near.tipo.astype(np.int64)]
+        calor = temperatura[del_tipo][near.punto()]
+        prende = np.nonzero(table.evaluate(s, origen, calor))[0]
+        # La primera aparición de cada celda, por distancia, es su fuente más cercana
+        prende = prende[np.argsort(near.distancia[prende], kind="stable")]
+        codigos = morton_codes(near.coords[prende])
+        _, primera = np.unique(codigos, return_index=True)
+        primera = primera[~np.isin(codigos[primera], vistas)]
+        if not len(primera):
+            continue
+        vistas = np.concatenate([vistas, codigos[primera]])
+        elegidas = prende[primera]
+        partes.append((
+            near.coords[elegidas],
+            np.array(table.origen_ids, dtype=object)[origen[elegidas]],
+            [table.fuente_ids[s]] * len(elegidas),
+            estado_ids[table.estado[s, origen[elegidas]]],
+            calor[elegidas],
+        ))
+    if not partes:
+        return PropagationResult(vecinas, 0, sin_cambios.celdas)
+    celdas = np.concatenate([parte[0] for parte in partes]).astype(np.int32)
+    prendidas = await repository.update_particle_types_at(
+        bloque_id,
+        celdas,
+        np.concatenate([parte[1] for parte in partes]).tolist(),
+        [tipo_id for parte in partes for tipo_id in parte[2]],
+        np.concatenate([parte[3] for parte in partes]).tolist(),
+    )
+    if prendidas:
+        await repository.update_particle_temperatures_at(
+            bloque_id, celdas, np.concatenate([parte[4] for parte in partes])
+        )
+    return PropagationResult(vecinas, prendidas, celdas)
@@ -0,0 +1,231 @@
+"""
+Caso de uso: flujo de líquidos en los chunks activos de un bloque (tarea de líquidos, LiquidFlowScheduler).
+Recibe IParticleRepository inyectado; los líquidos (tipo_fisico 'liquido') y su viscosidad salen del catálogo en
+memoria y la simulación es el autómata de liquid_flow.py sobre una grilla densa por grupo conexo de chunks.
+"""
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.config import PARTICLES_CONFIG
+from src.domains.particles.application.ports.particle_repository import IParticleRepository
+from src.domains.particles.infrastructure.particle_catalogue import ParticleCatalogue, particle_catalogue
+from src.domains.particles.infrastructure.postgres_particle_repository import VERSION_CHUNK_SIZE
+from src.domains.particles.liquid_flow import OBSTACULO, VACIO, fluidity, liquid_temperatures, settle_liquids
+from src.domains.particles.transitions import ESTADO_POR_TIPO_FISICO
+
+# Vecinos de un chunk hacia los que puede fluir el líquido (nunca hacia arriba)
+_VECINOS_FLUJO = np.array([(0, 0, -1), (1, 0, 0), (-1, 0, 0), (0, 1, 0), (0, -1, 0)], dtype=np.int64)
+# Zona de un chunk activo: él y esos vecinos
+_ZONA = [(0, 0, 0)] + [tuple(offset) for offset in _VECINOS_FLUJO.tolist()]
+
+
+class LiquidFlowResult(NamedTuple):
+    """
+    Resultado de simulate_liquid_flow: filas escritas, celdas (N, 3) enviadas, pasos (sumados sobre los grupos), si
+    se asentó todo, chunks pedidos cuyo grupo se asentó y chunks (M, 3) que siguen activos (los de las celdas
+    escritas por los grupos que no se asentaron y los de los grupos que no entraron en limite_segundos).
+    """
+
+    escritas: int
+    celdas: np.ndarray
+    pasos: int
+    estable: bool
+    asentados: int
+    pendientes: np.ndarray
+
+
+class LiquidTypes(NamedTuple):
+    """Líquidos del catálogo: ids, viscosidad (NULL = LIQUID_DEFAULT_VISCOSITY) y estado de las celdas nuevas."""
+
+    tipo_ids: List[str]
+    viscosidad: np.ndarray
+    estado_id: Optional[str]
+
+
+def liquid_types(snapshot, viscosidad_defecto: float = PARTICLES_CONFIG["LIQUID_DEFAULT_VISCOSITY"]) -> LiquidTypes:
+    """Tipos con tipo_fisico 'liquido' de un CatalogueSnapshot."""
+    tipos = [row for row in snapshot.tipos if row.get("tipo_fisico") == "liquido"]
+    estado = snapshot.state_by_name(ESTADO_POR_TIPO_FISICO["liquido"])
+    return LiquidTypes(
+        [str(row["id"]) for row in tipos],
+        np.array(
+            [float(row["viscosidad"]) if row.get("viscosidad") is not None else viscosidad_defecto for row in tipos],
+            dtype=np.float64,
+        ),
+        str(estado["id"]) if estado else None,
+    )
+
+
+def liquid_chunk_groups(chunks: np.ndarray) -> List[np.ndarray]:
+    """
+    Grupos de chunks (K, 3) cuyas zonas (el chunk y sus vecinos de _VECINOS_FLUJO) comparten algún chunk. El líquido
+    de un grupo no llega en un tick a la zona de otro, así que cada grupo se simula en su propia grilla.
+    """
+    chunks = np.asarray(chunks, dtype=np.int64).reshape(-1, 3)
+    padre = list(range(len(chunks)))
+
+    def raiz(i: int) -> int:
+        while padre[i] != i:
+            padre[i] = padre[padre[i]]
+            i = padre[i]
+        return i
+
+    duenos: Dict[Tuple[int, int, int], int] = {}
+    for i, (cx, cy, cz) in enumerate(chunks.tolist()):
+        for dx, dy, dz in _ZONA:
+            j = duenos.setdefault((cx + dx, cy + dy, cz + dz), i)
+            padre[raiz(i)] = raiz(j)
+    grupos: Dict[int, List[int]] = {}
+    for i in range(len(chunks)):
+        grupos.setdefault(raiz(i), []).append(i)
+    return [chunks[indices] for indices in grupos.values()]
+
+
+async def simulate_liquid_flow(
+    bloque_id: str,
+    repository: IParticleRepository,
+    chunks: Sequence[Tuple[int, int, int]],
+    catalogue: ParticleCatalogue = particle_catalogue,
+    max_pasos: int = PARTICLES_CONFIG["LIQUID_MAX_STEPS"],
+    diferencia_minima: float = PARTICLES_CONFIG["LIQUID_MIN_DIFFERENCE"],
+    margen: int = PARTICLES_CONFIG["LIQUID_MARGIN"],
+    limite_segundos: Optional[float] = PARTICLES_CONFIG["LIQUID_BUDGET_SECONDS"],
+) -> LiquidFlowResult:
+    """
+    Simula el líquido de los chunks (cx, cy, cz) dados hasta que se asienta (o max_pasos / limite_segundos) y escribe
+    las celdas que cambiaron con write_liquid_cells (quedan en el feed de cambios: versión nueva o lápida).
+    Los chunks se simulan por grupos conexos (liquid_chunk_groups), cada uno en una grilla del tamaño de su líquido;
+    limite_segundos es para todos los grupos y los que no entran quedan pendientes.
+    """
+    vacio = np.empty((0, 3), dtype=np.int64)
+    sin_cambios = LiquidFlowResult(0, vacio, 0, True, len(chunks), vacio)
+    liquidos = liquid_types(await catalogue.get())
+    if not liquidos.tipo_ids or liquidos.estado_id is None or not len(chunks):
+        return sin_cambios
+    extension = await repository.get_bloque_extent(bloque_id)
+    if extension is None:
+        return sin_cambios
+
+    inicio = time.perf_counter()
+    escritas, pasos, asentados = 0, 0, 0
+    celdas: List[np.ndarray] = []
+    pendientes: List[np.ndarray] = []
+    for grupo in liquid_chunk_groups(np.asarray(chunks, dtype=np.int64)):
+        restante = None if limite_segundos is None else limite_segundos - (time.perf_counter() - inicio)
+        if restante is not None and restante <= 0:
+            pendientes.append(grupo)
+            continue
+        escritas_grupo, celdas_grupo, pasos_grupo, estable = await _simulate_group(
+            bloque_id, repository, grupo, liquidos, extension, max_pasos, diferencia_minima, margen, restante
+        )
+        escritas += escritas_grupo
+        pasos += pasos_grupo
+        celdas.append(celdas_grupo)
+        if estable:
+            asentados += len(grupo)
+        else:
+            pendientes.append(np.unique(celdas_grupo // VERSION_CHUNK_SIZE, axis=0))
+    celdas_todas = np.concatenate(celdas) if celdas else vacio
+    pendientes_todos = np.unique(np.concatenate(pendientes), axis=0) if pendientes else vacio
+    return LiquidFlowResult(
+        escritas, celdas_todas, pasos, asentados == len(chunks), asentados, pendientes_todos
+    )
+
+
+async def _simulate_group(
+    bloque_id: str,
+    repository: IParticleRepository,
+    activos: np.ndarray,
+    liquidos: LiquidTypes,
+    extension: Tuple[np.ndarray, np.ndarray],
+    max_pasos: int,
+    diferencia_minima: float,
+    margen: int,
+    limite_segundos: Optional[float],
+) -> Tuple[int, np.ndarray, int, bool]:
+    """
+    Un grupo de chunks: la zona son esos chunks y sus vecinos de abajo y de los costados dentro del bloque; se simula
+    la caja del líquido ampliada margen celdas a los costados y hacia abajo, recortada a la zona y a la extensión del
+    bloque, y lo que queda fuera es obstáculo (lo que llega al borde de la caja sigue en el próximo tick, con la caja
+    nueva; el borde del bloque no se cruza). Devuelve (filas escritas, celdas (N, 3), pasos, estable).
+    """
+    sin_cambios = (0, np.empty((0, 3), dtype=np.int64), 0, True)
+    size = VERSION_CHUNK_SIZE
+    minimo, maximo = extension
+    zona = np.unique(np.concatenate([activos + offset for offset in _VECINOS_FLUJO] + [activos]), axis=0)
+    zona = zona[np.all((zona * size <= maximo) & ((zona + 1) * size - 1 >= minimo), axis=1)]
+    if not len(zona):
+        return sin_cambios
+    coords, tipo, cantidad, temperatura = await repository.get_liquid_particle_arrays(
+        bloque_id, zona, liquidos.tipo_ids, margen
+    )
+    es_liquido = (tipo >= 0) & np.all((coords >= minimo) & (coords <= maximo), axis=1)
+    if not es_liquido.any():
+        return sin_cambios
+
+    # Grilla [z, y, x] sobre la caja del líquido ampliada margen celdas (el líquido no sube: arriba, ninguna),
+    # recortada a la zona y al bloque; las celdas de la caja fuera de los chunks de la zona son obstáculo
+    chunk_min = zona.min(axis=0)
+    chunk_shape = zona.max(axis=0) - chunk_min + 1
+    origin = np.maximum(coords[es_liquido].min(axis=0).astype(np.int64) - margen, np.maximum(chunk_min * size, minimo))
+    end = np.minimum(
+        coords[es_liquido].max(axis=0).astype(np.int64) + margen,
+        np.minimum((chunk_min + chunk_shape) * size - 1, maximo),
+    )
+    end[2] = coords[es_liquido, 2].max()
+    shape = tuple((end - origin + 1)[::-1].tolist())
+    en_zona = np.zeros(tuple(chunk_shape[::-1]), dtype=bool)
+    en_zona[tuple((zona - chunk_min)[:, ::-1].T)] = True
+    celda_chunk = [(origin[axis] + np.arange(end[axis] - origin[axis] + 1)) // size - chunk_min[axis] for axis in (2, 1, 0)]
+    grilla_tipo = np.where(en_zona[np.ix_(*celda_chunk)], VACIO, OBSTACULO).astype(np.int16)
+
+    local = coords.astype(np.int64) - origin
+    dentro = np.all((local >= 0) & (local <= end - origin), axis=1)
+    local, tipo, cantidad, temperatura = local[dentro], tipo[dentro], cantidad[dentro], temperatura[dentro]
+    z, y, x = local[:, 2], local[:, 1], local[:, 0]
+    grilla_tipo[z, y, x] = np.where(tipo >= 0, tipo, OBSTACULO)
+    grilla_cantidad = np.zeros(shape)
+    grilla_energia = np.zeros(shape)
+    liquido = tipo >= 0
+    grilla_cantidad[z[liquido], y[liquido], x[liquido]] = np.clip(cantidad[liquido], 0.0, 1.0)
+    grilla_energia[z[liquido], y[liquido], x[liquido]] = (
+        grilla_cantidad[z[liquido], y[liquido], x[liquido]] * temperatura[liquido]
+    )
+    tipo_inicial = grilla_tipo.copy()
+    cantidad_inicial = np.round(grilla_cantidad, 4)
+    temperatura_inicial = liquid_temperatures(grilla_cantidad, grilla_energia)
+
+    pasos, estable = settle_liquids(
+        grilla_tipo, grilla_cantidad, grilla_energia, fluidity(liquidos.viscosidad),
+        max_pasos, diferencia_minima, limite_segundos,
+    )
+
+    # Celdas que cambiaron: secas o con otro líquido (se borra la partícula anterior) y con líquido distinto
+    temperatura_final = liquid_temperatures(grilla_cantidad, grilla_energia)
+    otro_tipo = grilla_tipo != tipo_inicial
+    borrar = otro_tipo & (tipo_inicial >= 0)
+    escribir = (grilla_tipo >= 0) & (
+        otro_tipo
+        | (np.round(grilla_cantidad, 4) != cantidad_inicial)
+        | (np.round(temperatura_final, 2) != np.round(temperatura_inicial, 2))
+    )
+    if not borrar.any() and not escribir.any():
+        return 0, sin_cambios[1], pasos, estable
+    tipo_ids = np.array(liquidos.tipo_ids, dtype=object)
+    zb, yb, xb = np.nonzero(borrar)
+    ze, ye, xe = np.nonzero(escribir)
+    celdas = np.concatenate([
+        np.stack([xb, yb, zb], axis=1), np.stack([xe, ye, ze], axis=1)
+    ]).astype(np.int64) + origin
+    n_borrar = len(zb)
+    escritas = await repository.write_liquid_cells(
+        bloque_id,
+        celdas,
+        tipo_ids[np.concatenate([tipo_inicial[zb, yb, xb], grilla_tipo[ze, ye, xe]])].tolist(),
+        [liquidos.estado_id] * len(celdas),
+        np.concatenate([np.zeros(n_borrar), grilla_cantidad[ze, ye, xe]]),
+        np.concatenate([np.zeros(n_borrar), temperatura_final[ze, ye, xe]]),
+    )
+    return escritas, celdas, pasos, estable
@@ -0,0 +1,50 @@
+"""
+Caso de uso: obtener partículas por viewport en streaming (lotes leídos con cursor).
+Recibe el puerto IParticleRepository inyectado; en runtime es PostgresParticleRepository.
+"""
+from typing import AsyncIterator, List, Optional
+from uuid import UUID
+
+from src.domains.particles.application.get_particles_by_viewport import check_viewport_density
+from src.domains.particles.application.ports.particle_repository import IParticleRepository
+from src.domains.particles.schemas import ParticleResponse, ParticleViewportQuery, Visibility
+
+
+async def stream_particles_by_viewport(
+    repository: IParticleRepository,
+    bloque_id: UUID,
+    viewport: ParticleViewportQuery,
+    batch_size: int,
+    visibility: Visibility = "all",
+    lod: int = 0,
+    max_cells: int = 1000000,
+    max_particles: Optional[int] = None,
+) -> AsyncIterator[List[ParticleResponse]]:
+    """
+    Validar viewport y bloque y devolver el iterador de lotes de partículas.
+    Con visibility="surface" o lod > 0 el resultado (mucho menor que el viewport completo) se obtiene entero
+    y se parte en lotes.
+    Mismos límites que get_particles_by_viewport (max_cells y, sin lod, max_particles).
+    Lanza ValueError si el bloque no existe o se superan los límites (antes de empezar a leer filas) o si se
+    combinan lod y surface.
+    """
+    viewport.validate_ranges(max_cells)
+    if lod > 0 and visibility == "surface":
+        raise ValueError("lod > 0 no se puede combinar con visibility=surface")
+    exists = await repository.bloque_exists(bloque_id)
+    if not exists:
+        raise ValueError("Bloque no encontrado")
+    if lod == 0:
+        await check_viewport_density(repository, bloque_id, viewport, max_particles)
+    if lod > 0:
+        return _in_batches(await repository.get_lod_by_viewport(bloque_id, viewport, lod), batch_size)
+    if visibility == "surface":
+        return _in_batches(await repository.get_surface_by_viewport(bloque_id, viewport), batch_size)
+    return repository.stream_by_viewport(bloque_id, viewport, batch_size)
+
+
+async def _in_batches(
+    particles: List[ParticleResponse], batch_size: int
+) -> AsyncIterator[List[ParticleResponse]]:
+    for start in range(0, len(particles), batch_size):
+        yield particles[start:start + batch_size]
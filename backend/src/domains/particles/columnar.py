@@ -0,0 +1,185 @@
+"""
+Formato binario columnar para partículas de un viewport (application/x-jdd-columnar).
+
+En lugar de una lista JSON de objetos, las partículas se envían como struct-of-arrays:
+una columna tipada por campo, lista para subir directamente a buffers de GPU en el cliente.
+
+Layout del buffer (little-endian):
+  [0:4]   magic b"JDDC"
+  [4:8]   uint32 longitud N del header JSON (UTF-8)
+  [8:8+N] header JSON: version, bloque_id, count, total, viewport, lod, palette, agrupaciones, columns
+  padding hasta múltiplo de 8 (inicio de la sección de datos)
+  columnas: cada una alineada a 8 bytes; header.columns[i] = {name, dtype, offset, length}
+            con offset relativo al inicio de la sección de datos.
+
+Columnas siempre presentes: celda_x, celda_y, celda_z (int16, o int32 si algún valor no cabe),
+palette (uint16, índice en header.palette de pares tipo/estado) y temperatura (float32).
+Columnas opcionales (solo si algún valor difiere del default): cantidad (float32),
+energia (float32), agrupacion (uint16, 0 = sin agrupación, i + 1 = header.agrupaciones[i])
+y es_nucleo (uint8).
+"""
+import json
+import struct
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.domains.particles.schemas import ParticleResponse, ParticleViewportQuery
+
+COLUMNAR_MEDIA_TYPE = "application/x-jdd-columnar"
+COLUMNAR_MAGIC = b"JDDC"
+COLUMNAR_VERSION = 1
+
+_ALIGNMENT = 8
+_INT16_MIN, _INT16_MAX = -32768, 32767
+
+
+def accepts_columnar(accept_header: Optional[str]) -> bool:
+    """True si el header Accept del cliente pide el formato columnar."""
+    if not accept_header:
+        return False
+    return any(
+        part.split(";")[0].strip().lower() == COLUMNAR_MEDIA_TYPE
+        for part in accept_header.split(",")
+    )
+
+
+def _pad(size: int) -> int:
+    """Bytes de relleno para alinear size a _ALIGNMENT."""
+    return (-size) % _ALIGNMENT
+
+
+def _coords_dtype(*columns: np.ndarray) -> np.dtype:
+    """int16 si todas las coordenadas caben en 16 bits; si no, int32."""
+    for column in columns:
+        if column.size and (column.min() < _INT16_MIN or column.max() > _INT16_MAX):
+            return np.dtype("<i4")
+    return np.dtype("<i2")
+
+
+def _build_palette(
+    particles: Sequence[ParticleResponse],
+) -> Tuple[List[Dict[str, str]], np.ndarray]:
+    """Paleta de pares (tipo, estado) únicos y columna uint16 de índices en la paleta."""
+    palette_index: Dict[Tuple[str, str], int] = {}
+    palette: List[Dict[str, str]] = []
+    indices = np.empty(len(particles), dtype="<u2")
+    for i, p in enumerate(particles):
+        key = (p.tipo, p.estado)
+        idx = palette_index.get(key)
+        if idx is None:
+            idx = len(palette)
+            if idx > 0xFFFF:
+                raise ValueError("Demasiados pares tipo/estado distintos para el formato columnar")
+            palette_index[key] = idx
+            palette.append({
+                "tipo": p.tipo,
+                "estado": p.estado,
+                "tipo_particula_id": str(p.tipo_particula_id),
+                "estado_materia_id": str(p.estado_materia_id),
+            })
+        indices[i] = idx
+    return palette, indices
+
+
+def _build_agrupaciones(
+    particles: Sequence[ParticleResponse],
+) -> Tuple[List[str], Optional[np.ndarray]]:
+    """Lista de agrupaciones presentes y columna uint16 (0 = ninguna); None si ninguna partícula tiene agrupación."""
+    agrupacion_index: Dict[str, int] = {}
+    agrupaciones: List[str] = []
+    column = np.zeros(len(particles), dtype="<u2")
+    for i, p in enumerate(particles):
+        if p.agrupacion_id is None:
+            continue
+        key = str(p.agrupacion_id)
+        idx = agrupacion_index.get(key)
+        if idx is None:
+            agrupaciones.append(key)
+            idx = len(agrupaciones)
+            if idx > 0xFFFF:
+                raise ValueError("Demasiadas agrupaciones distintas para el formato columnar")
+            agrupacion_index[key] = idx
+        column[i] = idx
+    if not agrupaciones:
+        return [], None
+    return agrupaciones, column
+
+
+def encode_particles_columnar(
+    bloque_id,
+    particles: Sequence[ParticleResponse],
+    total: int,
+    viewport: ParticleViewportQuery,
+    lod: int = 0,
+) -> bytes:
+    """
+    Serializa las partículas del viewport al formato columnar.
+
+    Args:
+        bloque_id: ID del bloque (se incluye en el header)
+        particles: Partículas ya ordenadas (mismo orden que la respuesta JSON)
+        total: Total de partículas en el viewport
+        viewport: Viewport consultado
+        lod: Nivel de detalle de las partículas (cada una representa un cubo de 2^lod celdas)
+
+    Returns:
+        Buffer binario listo para enviar con media type COLUMNAR_MEDIA_TYPE
+    """
+    count = len(particles)
+    xs = np.fromiter((p.celda_x for p in particles), dtype=np.int64, count=count)
+    ys = np.fromiter((p.celda_y for p in particles), dtype=np.int64, count=count)
+    zs = np.fromiter((p.celda_z for p in particles), dtype=np.int64, count=count)
+    coords_dtype = _coords_dtype(xs, ys, zs)
+    palette, palette_column = _build_palette(particles)
+    temperatura = np.fromiter((p.temperatura for p in particles), dtype="<f4", count=count)
+
+    columns: List[Tuple[str, np.ndarray]] = [
+        ("celda_x", xs.astype(coords_dtype)),
+        ("celda_y", ys.astype(coords_dtype)),
+        ("celda_z", zs.astype(coords_dtype)),
+        ("palette", palette_column),
+        ("temperatura", temperatura),
+    ]
+    cantidad = np.fromiter((p.cantidad for p in particles), dtype="<f4", count=count)
+    if np.any(cantidad != 1.0):
+        columns.append(("cantidad", cantidad))
+    energia = np.fromiter((p.energia for p in particles), dtype="<f4", count=count)
+    if np.any(energia != 0.0):
+        columns.append(("energia", energia))
+    agrupaciones, agrupacion_column = _build_agrupaciones(particles)
+    if agrupacion_column is not None:
+        columns.append(("agrupacion", agrupacion_column))
+    es_nucleo = np.fromiter((p.es_nucleo for p in particles), dtype=np.uint8, count=count)
+    if np.any(es_nucleo):
+        columns.append(("es_nucleo", es_nucleo))
+
+    column_specs = []
+    offset = 0
+    for name, data in columns:
+        column_specs.append({
+            "name": name,
+            "dtype": data.dtype.str.lstrip("<|="),
+            "offset": offset,
+            "length": int(data.size),
+        })
+        offset += data.nbytes + _pad(data.nbytes)
+
+    header = json.dumps({
+        "version": COLUMNAR_VERSION,
+        "bloque_id": str(bloque_id),
+        "count": count,
+        "total": int(total),
+        "viewport": viewport.model_dump(),
+        "lod": lod,
+        "palette": palette,
+        "agrupaciones": agrupaciones,
+        "columns": column_specs,
+    }, separators=(",", ":")).encode("utf-8")
+
+    prefix = COLUMNAR_MAGIC + struct.pack("<I", len(header))
+    parts = [prefix, header, b"\x00" * _pad(len(prefix) + len(header))]
+    for _, data in columns:
+        parts.append(data.tobytes())
+        parts.append(b"\x00" * _pad(data.nbytes))
+    return b"".join(parts)
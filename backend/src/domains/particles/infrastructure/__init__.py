@@ -1,3 +1,35 @@
 from .postgres_particle_repository import PostgresParticleRepository
+from .cached_particle_repository import CachedParticleRepository
+from .particle_chunk_cache import ParticleChunkCache, particle_chunk_cache
+from .particle_catalogue import (
+    CatalogueSnapshot,
+    ParticleCatalogue,
+    particle_catalogue,
+    start_particle_catalogue,
+)
+from .shared_particle_chunks import (
+    SharedParticleChunks,
+    connect_shared_particle_chunks,
+    get_shared_particle_chunks,
+)
+from .voxel_store import VoxelChunk, VoxelStore, connect_voxel_store, voxel_store
+from .voxel_particle_repository import VoxelParticleRepository
 
-__all__ = ["PostgresParticleRepository"]
+__all__ = [
+    "PostgresParticleRepository",
+    "CachedParticleRepository",
+    "ParticleChunkCache",
+    "particle_chunk_cache",
+    "CatalogueSnapshot",
+    "ParticleCatalogue",
+    "particle_catalogue",
+    "start_particle_catalogue",
+    "SharedParticleChunks",
+    "connect_shared_particle_chunks",
+    "get_shared_particle_chunks",
+    "VoxelChunk",
+    "VoxelStore",
+    "connect_voxel_store",
+    "voxel_store",
+    "VoxelParticleRepository",
+]
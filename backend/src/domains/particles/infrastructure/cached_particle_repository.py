@@ -0,0 +1,513 @@
+"""
+Decorador de IParticleRepository con caché de chunks (ParticleChunkCache).
+
+Las lecturas de viewport (bloque_exists, get_by_viewport(s), get_surface_by_viewport) se arman desde chunks en
+caché; solo los chunks que faltan se piden al repositorio envuelto (una consulta por el rango que los cubre).
+count_by_viewport y get_types_in_viewport solo usan la caché si ya tiene todos los chunks: si no, el repositorio
+envuelto responde desde chunk_resumen sin leer partículas.
+La superficie usa la máscara de exposición guardada en cada chunk (ver surface.py) y el LOD la pirámide de
+representativos de cada chunk (ver lod.py); el LOD de los chunks que no están en caché lo da el repositorio envuelto
+desde sus pirámides por versión de chunk, sin cargarlos. Tipos y opacidades salen del catálogo en memoria (ParticleCatalogue).
+Con `shared` (SharedParticleChunks) hay un segundo nivel entre workers: los chunks que faltan en proceso se buscan
+en la caché compartida por su versión de chunk_versiones antes de ir a la BD.
+El resto de métodos delega; las escrituras de temperatura (update_particle_temperature, update_particle_temperature_at,
+update_particle_temperatures_at) además actualizan las partículas en caché sin descartar chunks (los demás workers
+los descartan con el aviso particle_temperatures); las demás escrituras descartan los chunks tocados.
+"""
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+
+from src.config import PARTICLES_CONFIG
+from src.domains.particles.application.ports.particle_repository import IParticleRepository
+from src.domains.particles.infrastructure.particle_chunk_cache import (
+    ChunkKey,
+    ParticleChunk,
+    ParticleChunkCache,
+    particle_chunk_cache,
+)
+from src.domains.particles.infrastructure.particle_catalogue import ParticleCatalogue, particle_catalogue
+from src.domains.particles.infrastructure.shared_particle_chunks import SharedParticleChunks
+from src.domains.particles.neighbours import ParticleNeighbours
+from src.domains.particles.schemas import (
+    ParticleCatalogueResponse,
+    ParticleResponse,
+    ParticleTombstone,
+    ParticleTypeResponse,
+    ParticleViewportQuery,
+)
+from src.domains.particles.lod import align_viewport, in_lod_viewport, lod_representatives
+from src.domains.particles.surface import exposed_mask
+
+
+def _in_viewport(p: ParticleResponse, viewport: ParticleViewportQuery) -> bool:
+    return (
+        viewport.x_min <= p.celda_x <= viewport.x_max
+        and viewport.y_min <= p.celda_y <= viewport.y_max
+        and viewport.z_min <= p.celda_z <= viewport.z_max
+    )
+
+
+def _sort_key(p: ParticleResponse):
+    return (p.celda_z, p.celda_y, p.celda_x)
+
+
+class CachedParticleRepository(IParticleRepository):
+    """Envuelve otro IParticleRepository (Postgres) y sirve los viewports desde la caché de chunks."""
+
+    def __init__(
+        self,
+        inner: IParticleRepository,
+        cache: ParticleChunkCache = particle_chunk_cache,
+        shared: Optional[SharedParticleChunks] = None,
+        catalogue: ParticleCatalogue = particle_catalogue,
+    ):
+        self._inner = inner
+        self._cache = cache
+        self._shared = shared
+        self._catalogue = catalogue
+
+    async def bloque_exists(self, bloque_id: UUID) -> bool:
+        """Usa la marca de existencia de la caché; si no está, consulta y la guarda."""
+        if self._cache.bloque_known(bloque_id):
+            return True
+        exists = await self._inner.bloque_exists(bloque_id)
+        if exists:
+            self._cache.mark_bloque_exists(bloque_id)
+        return exists
+
+    async def get_types_in_viewport(
+        self, bloque_id: UUID, viewport: ParticleViewportQuery
+    ) -> List[ParticleTypeResponse]:
+        """
+        Desde los chunks si ya están todos en caché; si falta alguno delega (el repositorio envuelto usa
+        chunk_resumen y no hace falta cargar partículas).
+        """
+        keys = self._cache.chunk_keys_for_viewport(bloque_id, viewport)
+        chunks = self._cached(keys)
+        if chunks is None:
+            return await self._inner.get_types_in_viewport(bloque_id, viewport)
+        tipo_ids = set()
+        for key in keys:
+            entry = chunks[key]
+            if self._chunk_inside(key, viewport):
+                tipo_ids.update(p.tipo_particula_id for p in entry.particles)
+            else:
+                tipo_ids.update(p.tipo_particula_id for p in entry.particles if _in_viewport(p, viewport))
+        return (await self._catalogue.get()).type_responses(tipo_ids)
+
+    async def get_by_viewport(
+        self, bloque_id: UUID, viewport: ParticleViewportQuery
+    ) -> List[ParticleResponse]:
+        """Partículas del viewport desde los chunks (cargando los que falten); orden celda_z, celda_y, celda_x."""
+        keys = self._cache.chunk_keys_for_viewport(bloque_id, viewport)
+        chunks = await self._load_keys(bloque_id, keys)
+        return self._collect(keys, chunks, viewport)
+
+    async def get_by_viewports(
+        self, bloque_id: UUID, viewports: List[ParticleViewportQuery]
+    ) -> List[List[ParticleResponse]]:
+        """Carga la unión de chunks de todas las regiones (una consulta para los que falten) y filtra cada región."""
+        keys_per_region = [self._cache.chunk_keys_for_viewport(bloque_id, viewport) for viewport in viewports]
+        needed: Dict[ChunkKey, None] = {}
+        for keys in keys_per_region:
+            needed.update(dict.fromkeys(keys))
+        chunks = await self._load_keys(bloque_id, needed)
+        return [
+            self._collect(keys, chunks, viewport) for keys, viewport in zip(keys_per_region, viewports)
+        ]
+
+    async def get_surface_by_viewport(
+        self, bloque_id: UUID, viewport: ParticleViewportQuery
+    ) -> List[ParticleResponse]:
+        """Partículas expuestas del viewport; carga también los vecinos de cara de cada chunk (halo de exposición)."""
+        keys = self._cache.chunk_keys_for_viewport(bloque_id, viewport)
+        needed = dict.fromkeys(keys)
+        for key in keys:
+            needed.update(dict.fromkeys(self._cache.face_neighbour_keys(key)))
+        chunks = await self._load_keys(bloque_id, needed)
+        opacities = await self._type_opacities()
+        particles: List[ParticleResponse] = []
+        for key in keys:
+            entry = chunks[key]
+            mask = self._exposure(key, chunks, opacities)
+            inside = self._chunk_inside(key, viewport)
+            particles.extend(
+                p for p, expuesta in zip(entry.particles, mask)
+                if expuesta and (inside or _in_viewport(p, viewport))
+            )
+        particles.sort(key=_sort_key)
+        return particles
+
+    async def get_lod_by_viewport(
+        self, bloque_id: UUID, viewport: ParticleViewportQuery, lod: int
+    ) -> List[ParticleResponse]:
+        """
+        Representativos del nivel lod: de la pirámide de cada chunk que ya está en caché (se calcula al primer uso
+        del nivel) y, para los que faltan, del repositorio envuelto (pirámides por versión de chunk, ver
+        lod_pyramid_cache.py) sin cargar esos chunks a resolución completa.
+        """
+        aligned = align_viewport(viewport, lod)
+        opacities = await self._type_opacities()
+        particles: List[ParticleResponse] = []
+        missing: Dict[ChunkKey, None] = {}
+        for key in self._cache.chunk_keys_for_viewport(bloque_id, aligned):
+            entry = self._cache.get(key)
+            if entry is None:
+                missing[key] = None
+                continue
+            representatives = entry.lod.get(lod)
+            if representatives is None:
+                self._ensure_arrays(entry, opacities)
+                representatives = lod_representatives(entry.particles, entry.coords, entry.tipos, lod)
+                entry.lod[lod] = representatives
+            particles.extend(p for p in representatives if in_lod_viewport(p, aligned))
+        if missing:
+            # Caja de los chunks que faltan recortada al viewport (sigue alineada: 2^lod divide al chunk)
+            bounds = self._cache.bounds_for_keys(missing)
+            region = ParticleViewportQuery(
+                x_min=max(bounds.x_min, aligned.x_min), x_max=min(bounds.x_max, aligned.x_max),
+                y_min=max(bounds.y_min, aligned.y_min), y_max=min(bounds.y_max, aligned.y_max),
+                z_min=max(bounds.z_min, aligned.z_min), z_max=min(bounds.z_max, aligned.z_max),
+            )
+            # La caja puede cubrir chunks que sí estaban en caché: solo se toman los representativos de los que faltan
+            particles.extend(
+                p for p in await self._inner.get_lod_by_viewport(bloque_id, region, lod)
+                if self._cache.chunk_key(bloque_id, p.celda_x, p.celda_y, p.celda_z) in missing
+            )
+        particles.sort(key=_sort_key)
+        return particles
+
+    def stream_by_viewport(
+        self, bloque_id: UUID, viewport: ParticleViewportQuery, batch_size: int
+    ) -> AsyncIterator[List[ParticleResponse]]:
+        """Sin caché: el streaming es para viewports grandes que no conviene materializar en chunks."""
+        return self._inner.stream_by_viewport(bloque_id, viewport, batch_size)
+
+    async def count_by_viewport(
+        self, bloque_id: UUID, viewport: ParticleViewportQuery
+    ) -> int:
+        """Cuenta sobre los chunks si ya están todos en caché; si falta alguno delega (chunk_resumen)."""
+        chunks = self._cached(self._cache.chunk_keys_for_viewport(bloque_id, viewport))
+        if chunks is None:
+            return await self._inner.count_by_viewport(bloque_id, viewport)
+        total = 0
+        for key, entry in chunks.items():
+            if self._chunk_inside(key, viewport):
+                total += len(entry.particles)
+            else:
+                total += sum(1 for p in entry.particles if _in_viewport(p, viewport))
+        return total
+
+    async def estimate_count_by_viewport(
+        self, bloque_id: UUID, viewport: ParticleViewportQuery
+    ) -> int:
+        return await self._inner.estimate_count_by_viewport(bloque_id, viewport)
+
+    async def get_viewport_version(
+        self, bloque_id: UUID, viewport: ParticleViewportQuery
+    ) -> Optional[str]:
+        return await self._inner.get_viewport_version(bloque_id, viewport)
+
+    async def get_chunk_versions(
+        self, bloque_id: UUID, chunks: List[Tuple[int, int, int]]
+    ) -> Dict[Tuple[int, int, int], int]:
+        return await self._inner.get_chunk_versions(bloque_id, chunks)
+
+    async def get_changes_by_viewport(
+        self, bloque_id: UUID, viewport: ParticleViewportQuery, since: int
+    ) -> Tuple[List[ParticleResponse], List[ParticleTombstone]]:
+        return await self._inner.get_changes_by_viewport(bloque_id, viewport, since)
+
+    async def get_world_version(self, bloque_id: UUID) -> int:
+        return await self._inner.get_world_version(bloque_id)
+
+    async def get_type_opacities(self) -> Dict[UUID, float]:
+        return await self._inner.get_type_opacities()
+
+    async def get_catalogue(self) -> ParticleCatalogueResponse:
+        return await self._inner.get_catalogue()
+
+    async def get_by_id(
+        self, bloque_id: UUID, particle_id: UUID
+    ) -> Optional[ParticleResponse]:
+        return await self._inner.get_by_id(bloque_id, particle_id)
+
+    async def get_distinct_bloque_ids_for_temperature_update(self) -> List[str]:
+        return await self._inner.get_distinct_bloque_ids_for_temperature_update()
+
+    async def get_particles_with_thermal_inertia(
+        self, bloque_id: str, inercia_minima: float = 0.1
+    ) -> List[dict]:
+        return await self._inner.get_particles_with_thermal_inertia(bloque_id, inercia_minima)
+
+    async def get_thermal_particle_arrays(
+        self, bloque_id: str, inercia_minima: float = 0.1
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        return await self._inner.get_thermal_particle_arrays(bloque_id, inercia_minima)
+
+    async def get_particle_arrays_by_type(
+        self, bloque_id: str, tipos: Sequence[str]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return await self._inner.get_particle_arrays_by_type(bloque_id, tipos)
+
+    async def update_particle_temperature(
+        self, particula_id: str, temperatura: float
+    ) -> None:
+        """Escribe en el repositorio envuelto y actualiza la copia en caché."""
+        await self._inner.update_particle_temperature(particula_id, temperatura)
+        self._cache.update_temperature(particula_id, temperatura)
+
+    async def update_particle_temperature_at(
+        self, bloque_id: str, celda_x: int, celda_y: int, celda_z: int, temperatura: float
+    ) -> None:
+        """Escribe en el repositorio envuelto y actualiza la celda en caché."""
+        await self._inner.update_particle_temperature_at(bloque_id, celda_x, celda_y, celda_z, temperatura)
+        self._cache.update_temperatures_at(bloque_id, [(celda_x, celda_y, celda_z)], [temperatura])
+
+    async def update_particle_temperatures_at(
+        self,
+        bloque_id: str,
+        coords: np.ndarray,
+        temperaturas: np.ndarray,
+        anteriores: Optional[np.ndarray] = None,
+    ) -> int:
+        """Escribe en el repositorio envuelto y actualiza las celdas en caché (sin descartar chunks)."""
+        written = await self._inner.update_particle_temperatures_at(bloque_id, coords, temperaturas, anteriores)
+        if written:
+            self._cache.update_temperatures_at(bloque_id, coords, temperaturas)
+        return written
+
+    async def get_transition_particle_arrays(
+        self, bloque_id: str, tipo_ids: Sequence[str]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        return await self._inner.get_transition_particle_arrays(bloque_id, tipo_ids)
+
+    async def get_retyped_particle_arrays(
+        self, bloque_id: str, since: int, tipo_ids: Sequence[str]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return await self._inner.get_retyped_particle_arrays(bloque_id, since, tipo_ids)
+
+    async def update_particle_types_at(
+        self,
+        bloque_id: str,
+        coords: np.ndarray,
+        origenes: Sequence[str],
+        destinos: Sequence[str],
+        estados: Sequence[Optional[str]],
+    ) -> int:
+        """Escribe en el repositorio envuelto y descarta los chunks tocados (uno por chunk, no por celda)."""
+        changed = await self._inner.update_particle_types_at(bloque_id, coords, origenes, destinos, estados)
+        if changed:
+            size = self._cache.chunk_size
+            origins = np.unique(np.asarray(coords, dtype=np.int64).reshape(-1, 3) // size, axis=0) * size
+            self._cache.invalidate_cells(bloque_id, [tuple(origin) for origin in origins.tolist()])
+        return changed
+
+    async def get_bloque_ids_with_types(self, tipo_ids: Sequence[str]) -> List[str]:
+        return await self._inner.get_bloque_ids_with_types(tipo_ids)
+
+    async def get_chunk_contents(self, bloque_id: str) -> Dict[Tuple[int, int, int], Dict[str, int]]:
+        return await self._inner.get_chunk_contents(bloque_id)
+
+    async def get_bloque_extent(self, bloque_id: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        return await self._inner.get_bloque_extent(bloque_id)
+
+    async def get_liquid_particle_arrays(
+        self, bloque_id: str, chunks: np.ndarray, tipo_ids: Sequence[str], margen: int
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        return await self._inner.get_liquid_particle_arrays(bloque_id, chunks, tipo_ids, margen)
+
+    async def write_liquid_cells(
+        self,
+        bloque_id: str,
+        coords: np.ndarray,
+        tipos: Sequence[str],
+        estados: Sequence[str],
+        cantidades: np.ndarray,
+        temperaturas: np.ndarray,
+    ) -> int:
+        """Escribe en el repositorio envuelto y descarta los chunks tocados (uno por chunk, no por celda)."""
+        written = await self._inner.write_liquid_cells(bloque_id, coords, tipos, estados, cantidades, temperaturas)
+        if written:
+            size = self._cache.chunk_size
+            origins = np.unique(np.asarray(coords, dtype=np.int64).reshape(-1, 3) // size, axis=0) * size
+            self._cache.invalidate_cells(bloque_id, [tuple(origin) for origin in origins.tolist()])
+        return written
+
+    async def get_particles_near(
+        self,
+        bloque_id: str,
+        celda_x: float,
+        celda_y: float,
+        celda_z: float,
+        radio: int = 1,
+    ) -> List[dict]:
+        return await self._inner.get_particles_near(bloque_id, celda_x, celda_y, celda_z, radio)
+
+    async def get_particles_near_many(
+        self,
+        bloque_id: str,
+        puntos: Sequence[Tuple[float, float, float]],
+        radio: float,
+        tipos: Optional[Sequence[str]] = None,
+    ) -> ParticleNeighbours:
+        return await self._inner.get_particles_near_many(bloque_id, puntos, radio, tipos)
+
+    async def get_surface_type_name(self, bloque_id: str, celda_x: int, celda_y: int) -> Optional[str]:
+        return await self._inner.get_surface_type_name(bloque_id, celda_x, celda_y)
+
+    async def get_surface_types(self, bloque_id: str) -> Tuple[np.ndarray, List[UUID]]:
+        return await self._inner.get_surface_types(bloque_id)
+
+    async def get_particle_type_by_name(self, nombre: str) -> Optional[dict]:
+        return await self._inner.get_particle_type_by_name(nombre)
+
+    # --- Internos ---
+
+    def _collect(
+        self, keys: Iterable[ChunkKey], chunks: Dict[ChunkKey, ParticleChunk], viewport: ParticleViewportQuery
+    ) -> List[ParticleResponse]:
+        """Partículas del viewport en los chunks dados; orden celda_z, celda_y, celda_x."""
+        particles: List[ParticleResponse] = []
+        for key in keys:
+            entry = chunks[key]
+            if self._chunk_inside(key, viewport):
+                particles.extend(entry.particles)
+            else:
+                particles.extend(p for p in entry.particles if _in_viewport(p, viewport))
+        particles.sort(key=_sort_key)
+        return particles
+
+    def _chunk_inside(self, key: ChunkKey, viewport: ParticleViewportQuery) -> bool:
+        """True si el chunk está completamente dentro del viewport (no hace falta filtrar)."""
+        size = self._cache.chunk_size
+        _, cx, cy, cz = key
+        return (
+            viewport.x_min <= cx * size and (cx + 1) * size - 1 <= viewport.x_max
+            and viewport.y_min <= cy * size and (cy + 1) * size - 1 <= viewport.y_max
+            and viewport.z_min <= cz * size and (cz + 1) * size - 1 <= viewport.z_max
+        )
+
+    async def _type_opacities(self) -> Dict[str, float]:
+        """Opacidades por tipo (str(id)) del catálogo en memoria."""
+        return (await self._catalogue.get()).opacities
+
+    def _ensure_arrays(self, entry: ParticleChunk, opacities: Dict[str, float]) -> None:
+        """Calcula coords (N, 3), tipos, opacas y visibles del chunk si todavía no están."""
+        if entry.coords is not None:
+            return
+        n = len(entry.particles)
+        coords = np.empty((n, 3), dtype=np.int32)
+        tipos = np.empty(n, dtype=np.int32)
+        opacidad = np.empty(n, dtype=np.float32)
+        for i, p in enumerate(entry.particles):
+            coords[i] = (p.celda_x, p.celda_y, p.celda_z)
+            tipo_id = str(p.tipo_particula_id)
+            tipos[i] = self._cache.type_index(tipo_id)
+            opacidad[i] = opacities.get(tipo_id, 1.0)
+        entry.coords = coords
+        entry.tipos = tipos
+        entry.opacas = opacidad >= PARTICLES_CONFIG["SURFACE_OPACITY_THRESHOLD"]
+        entry.visibles = opacidad > 0.0
+
+    def _exposure(
+        self, key: ChunkKey, chunks: Dict[ChunkKey, ParticleChunk], opacities: Dict[str, float]
+    ) -> np.ndarray:
+        """Máscara de partículas visibles con alguna cara expuesta (se calcula con el halo de vecinos si falta)."""
+        entry = chunks[key]
+        if entry.expuestas is not None:
+            return entry.expuestas
+        halo = [entry]
+        for neighbour_key in self._cache.face_neighbour_keys(key):
+            halo.append(chunks[neighbour_key])
+        for chunk in halo:
+            self._ensure_arrays(chunk, opacities)
+        size = self._cache.chunk_size
+        _, cx, cy, cz = key
+        mask = exposed_mask(
+            entry.coords,
+            entry.tipos,
+            (cx * size, cy * size, cz * size),
+            size,
+            np.concatenate([chunk.coords for chunk in halo]),
+            np.concatenate([chunk.tipos for chunk in halo]),
+            np.concatenate([chunk.opacas for chunk in halo]),
+        )
+        entry.expuestas = mask & entry.visibles
+        return entry.expuestas
+
+    def _cached(self, keys: Iterable[ChunkKey]) -> Optional[Dict[ChunkKey, ParticleChunk]]:
+        """Entradas de los chunks pedidos si están todos en caché; None si falta alguno (no carga nada)."""
+        result: Dict[ChunkKey, ParticleChunk] = {}
+        for key in keys:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            result[key] = entry
+        return result
+
+    async def _load_keys(
+        self, bloque_id: UUID, keys: Iterable[ChunkKey]
+    ) -> Dict[ChunkKey, ParticleChunk]:
+        """
+        Entrada de cada chunk pedido. Los que faltan se buscan en la caché compartida (si está conectada) por su
+        versión de chunk_versiones y el resto se carga de la BD en una sola consulta (ver _query_chunks).
+        """
+        result: Dict[ChunkKey, ParticleChunk] = {}
+        missing: List[ChunkKey] = []
+        for key in keys:
+            entry = self._cache.get(key)
+            if entry is None:
+                missing.append(key)
+            else:
+                result[key] = entry
+        if not missing:
+            return result
+
+        generation = self._cache.generation(bloque_id)
+        versions: Dict[ChunkKey, int] = {}
+        if self._shared is not None:
+            # La versión se lee antes que los datos: si cambian en medio, se guardan bajo una versión ya vieja
+            by_coords = await self._inner.get_chunk_versions(bloque_id, [key[1:] for key in missing])
+            versions = {key: by_coords[key[1:]] for key in missing}
+            for key, chunk_particles in (await self._shared.get_many(versions)).items():
+                result[key] = self._cache.put(key, chunk_particles, generation)
+            missing = [key for key in missing if key not in result]
+            if not missing:
+                return result
+
+        loaded = await self._query_chunks(bloque_id, missing)
+        for key, chunk_particles in loaded.items():
+            result[key] = self._cache.put(key, chunk_particles, generation)
+        if self._shared is not None:
+            await self._shared.put_many(versions, loaded)
+        return result
+
+    async def _query_chunks(
+        self, bloque_id: UUID, missing: List[ChunkKey]
+    ) -> Dict[ChunkKey, List[ParticleResponse]]:
+        """
+        Partículas de los chunks en una sola consulta: por el rango que los cubre si lo llenan, o por un rango por
+        chunk si están dispersos.
+        """
+        bounds = self._cache.bounds_for_keys(missing)
+        size = self._cache.chunk_size
+        box_chunks = (
+            (bounds.x_max + 1 - bounds.x_min) * (bounds.y_max + 1 - bounds.y_min) * (bounds.z_max + 1 - bounds.z_min)
+        ) // size ** 3
+        if box_chunks == len(missing):
+            rows = await self._inner.get_by_viewport(bloque_id, bounds)
+        else:
+            # Chunks dispersos (p. ej. regiones de un batch): un rango por chunk en una sola consulta, sin leer los huecos
+            per_chunk = await self._inner.get_by_viewports(
+                bloque_id, [self._cache.bounds_for_keys([key]) for key in missing]
+            )
+            rows = [p for chunk_rows in per_chunk for p in chunk_rows]
+        loaded: Dict[ChunkKey, List[ParticleResponse]] = {key: [] for key in missing}
+        for p in rows:
+            bucket = loaded.get(self._cache.chunk_key(bloque_id, p.celda_x, p.celda_y, p.celda_z))
+            if bucket is not None:
+                bucket.append(p)
+        return loaded
@@ -0,0 +1,80 @@
+"""
+Caché en proceso de pirámides LOD por chunk (lecturas de viewport con lod > 0).
+
+Cada entrada es la pirámide de un chunk de VERSION_CHUNK_SIZE celdas (nivel -> representativos, ver lod.py) junto
+con la versión de chunk_versiones leída antes de cargar sus partículas. Una entrada solo vale para esa versión: si el
+chunk cambia (también su temperatura, o cambia el catálogo) la versión es otra y la pirámide se recalcula, así que no
+hace falta invalidar.
+Evicción LRU por número total de representativos.
+"""
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from src.config.particles_config import PARTICLES_CACHE_TTL_SECONDS, PARTICLES_LOD_CACHE_MAX_PARTICLES
+from src.domains.particles.schemas import ParticleResponse
+
+# (bloque_id, chunk_x, chunk_y, chunk_z) en chunks de VERSION_CHUNK_SIZE
+LodKey = Tuple[str, int, int, int]
+Pyramid = Dict[int, List[ParticleResponse]]
+
+
+class LodPyramid:
+    """Entrada de la caché: versión del chunk, niveles y momento de carga."""
+
+    __slots__ = ("version", "niveles", "cargado_en", "tamano")
+
+    def __init__(self, version: int, niveles: Pyramid):
+        self.version = version
+        self.niveles = niveles
+        self.cargado_en = time.monotonic()
+        self.tamano = sum(len(representatives) for representatives in niveles.values())
+
+
+class LodPyramidCache:
+    """Caché LRU de pirámides LOD por (chunk, versión)."""
+
+    def __init__(
+        self,
+        max_particles: int = PARTICLES_LOD_CACHE_MAX_PARTICLES,
+        ttl_seconds: float = PARTICLES_CACHE_TTL_SECONDS,
+    ):
+        self.max_particles = max_particles
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[LodKey, LodPyramid]" = OrderedDict()
+        self._particle_count = 0
+
+    def get(self, key: LodKey, version: int) -> Optional[Pyramid]:
+        """Pirámide del chunk para esa versión (y la marca como usada) o None si falta, es de otra versión o expiró."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.version != version or (
+            self.ttl_seconds > 0 and time.monotonic() - entry.cargado_en > self.ttl_seconds
+        ):
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry.niveles
+
+    def put(self, key: LodKey, version: int, niveles: Pyramid) -> None:
+        """Guarda la pirámide bajo la versión leída antes de consultar las partículas del chunk."""
+        if key in self._entries:
+            self._remove(key)
+        entry = LodPyramid(version, niveles)
+        self._entries[key] = entry
+        self._particle_count += entry.tamano
+        while self._entries and self._particle_count > self.max_particles:
+            self._remove(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        """Vacía la caché completa."""
+        self._entries.clear()
+        self._particle_count = 0
+
+    def _remove(self, key: LodKey) -> None:
+        self._particle_count -= self._entries.pop(key).tamano
+
+
+# Instancia compartida por el proceso (las rutas crean un repositorio por request)
+lod_pyramid_cache = LodPyramidCache()
@@ -0,0 +1,234 @@
+"""
+Catálogo de partículas en memoria: tipos_particulas, estados_materia y transiciones_particulas.
+
+Son tablas chicas y casi estáticas que antes se consultaban en cada uso (tipo por nombre para cada partícula de agua
+en la temperatura, estilos de tipos por viewport, ids en EntityCreator, transiciones). ParticleCatalogue las carga
+una vez por proceso en un CatalogueSnapshot indexado por id y por nombre.
+Se recarga cuando cambia catalogo_version: el trigger versionar_catalogo avisa con NOTIFY juego_dioses_catalogo
+(listen_catalogue_changes) y, como red de seguridad, get() vuelve a leer la versión cada CATALOGUE_REFRESH_SECONDS.
+Al cambiar la versión se avisa a los listeners (la caché de chunks se vacía: las partículas llevan tipo_nombre y
+las máscaras de superficie dependen de las opacidades).
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, TypeVar
+
+from src.config.particles_config import PARTICLES_CATALOGUE_REFRESH_SECONDS
+from src.database.connection import connect_dedicated, get_connection
+from src.domains.particles.infrastructure.particle_chunk_cache import ParticleChunkCache, particle_chunk_cache
+from src.domains.particles.schemas import MatterStateResponse, ParticleCatalogueResponse, ParticleTypeResponse
+from src.domains.shared.orjson_response import orjson_dumps
+from src.domains.shared.schemas import parse_jsonb_field
+
+logger = logging.getLogger(__name__)
+
+CATALOGUE_CHANNEL = "juego_dioses_catalogo"
+
+_VERSION_SQL = "SELECT COALESCE((SELECT version FROM juego_dioses.catalogo_version), 0)"
+
+T = TypeVar("T")
+
+
+class CatalogueSnapshot:
+    """Catálogo en una versión. Las filas son dicts de la BD compartidos entre quienes los piden: no modificarlos."""
+
+    def __init__(self, version: int, tipos: List[dict], estados: List[dict], transiciones: List[dict]):
+        self.version = version
+        self.tipos = tipos
+        self.estados = estados
+        self._tipos_by_id = {str(row["id"]): row for row in tipos}
+        self._tipos_by_name = {row["nombre"]: row for row in tipos}
+        self._estados_by_id = {str(row["id"]): row for row in estados}
+        self._estados_by_name = {row["nombre"]: row for row in estados}
+        # Solo activas, en orden de prioridad descendente (como las devuelve la consulta)
+        self.transiciones = transiciones
+        self._transiciones_by_origen: Dict[str, List[dict]] = {}
+        for row in transiciones:
+            self._transiciones_by_origen.setdefault(str(row["tipo_origen_id"]), []).append(row)
+        # tipo_particula_id (str) -> opacidad; NULL se toma como opaco
+        self.opacities: Dict[str, float] = {
+            str(row["id"]): float(row["opacidad"]) if row["opacidad"] is not None else 1.0 for row in tipos
+        }
+        self._type_responses = {str(row["id"]): _type_response(row) for row in tipos}
+        self._state_responses = [
+            MatterStateResponse(id=str(row["id"]), nombre=row["nombre"], tipo_fisica=row["tipo_fisica"])
+            for row in estados
+        ]
+        self.hash = hashlib.blake2b(
+            orjson_dumps([list(self._type_responses.values()), self._state_responses]), digest_size=12
+        ).hexdigest()
+        self._compiled: Dict[str, Any] = {}
+
+    def type_by_id(self, tipo_id) -> Optional[dict]:
+        return self._tipos_by_id.get(str(tipo_id))
+
+    def type_by_name(self, nombre: str) -> Optional[dict]:
+        return self._tipos_by_name.get(nombre)
+
+    def state_by_id(self, estado_id) -> Optional[dict]:
+        return self._estados_by_id.get(str(estado_id))
+
+    def state_by_name(self, nombre: str) -> Optional[dict]:
+        return self._estados_by_name.get(nombre)
+
+    def transitions_from(self, tipo_origen_id) -> List[dict]:
+        """Transiciones activas del tipo de origen, de mayor a menor prioridad."""
+        return self._transiciones_by_origen.get(str(tipo_origen_id), [])
+
+    def compiled(self, nombre: str, compile: Callable[["CatalogueSnapshot"], T]) -> T:
+        """
+        Tabla derivada del catálogo (transiciones, propagación) compilada la primera vez que se pide. Vive con el
+        snapshot, así que se recompila solo cuando el catálogo cambia de versión.
+        """
+        if nombre not in self._compiled:
+            self._compiled[nombre] = compile(self)
+        return self._compiled[nombre]
+
+    def type_responses(self, tipo_ids) -> List[ParticleTypeResponse]:
+        """Estilos (ParticleTypeResponse) de los tipos dados, en orden de nombre; los ids desconocidos se omiten."""
+        wanted = {str(tipo_id) for tipo_id in tipo_ids}
+        return [response for tipo_id, response in self._type_responses.items() if tipo_id in wanted]
+
+    def response(self) -> ParticleCatalogueResponse:
+        return ParticleCatalogueResponse(
+            version=self.version,
+            hash=self.hash,
+            types=list(self._type_responses.values()),
+            states=self._state_responses,
+        )
+
+
+def _type_response(row: dict) -> ParticleTypeResponse:
+    return ParticleTypeResponse(
+        id=str(row["id"]),
+        nombre=row["nombre"],
+        color=row["color"] if row["color"] else None,
+        geometria=parse_jsonb_field(row["geometria"]) or None,
+        opacidad=float(row["opacidad"]) if row["opacidad"] is not None else None,
+    )
+
+
+class ParticleCatalogue:
+    """Catálogo del proceso; get() devuelve el snapshot vigente y lo recarga si cambió catalogo_version."""
+
+    def __init__(self, refresh_seconds: float = PARTICLES_CATALOGUE_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._snapshot: Optional[CatalogueSnapshot] = None
+        self._checked_at = 0.0
+        self._stale = False
+        self._lock = asyncio.Lock()
+        self._pending: Set[asyncio.Task] = set()
+        # Reciben el snapshot nuevo cada vez que cambia la versión (no en la primera carga)
+        self.listeners: List[Callable[[CatalogueSnapshot], None]] = []
+
+    async def get(self) -> CatalogueSnapshot:
+        if self._fresh():
+            return self._snapshot
+        async with self._lock:
+            if self._fresh():
+                # Otra tarea lo recargó mientras se esperaba el lock
+                return self._snapshot
+            return await self._refresh()
+
+    def invalidate(self) -> None:
+        """La próxima get() vuelve a leer la versión (y recarga si cambió)."""
+        self._stale = True
+
+    def refresh_soon(self) -> None:
+        """Invalida y recarga en segundo plano (al recibir un NOTIFY), así los listeners se avisan enseguida."""
+        self.invalidate()
+        task = asyncio.get_running_loop().create_task(self.get())
+        self._pending.add(task)
+        task.add_done_callback(self._refresh_done)
+
+    def _refresh_done(self, task: asyncio.Task) -> None:
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("No se pudo recargar el catálogo de partículas: %s", task.exception())
+
+    def _fresh(self) -> bool:
+        return (
+            self._snapshot is not None
+            and not self._stale
+            and time.monotonic() - self._checked_at < self.refresh_seconds
+        )
+
+    async def _refresh(self) -> CatalogueSnapshot:
+        previous = self._snapshot
+        # Un NOTIFY que llegue durante la carga vuelve a marcarlo
+        self._stale = False
+        try:
+            async with get_connection() as conn:
+                version = await conn.fetchval(_VERSION_SQL)
+                if previous is None or version != previous.version:
+                    snapshot = await _load_snapshot(conn)
+                else:
+                    snapshot = previous
+        except Exception as e:
+            if previous is None:
+                raise
+            logger.warning("No se pudo comprobar el catálogo de partículas, se usa la versión %s: %s", previous.version, e)
+            snapshot = previous
+        self._checked_at = time.monotonic()
+        self._snapshot = snapshot
+        if previous is not None and snapshot is not previous:
+            for listener in self.listeners:
+                listener(snapshot)
+        return snapshot
+
+
+async def _load_snapshot(conn) -> CatalogueSnapshot:
+    """Versión y filas en una misma transacción (lecturas consistentes entre las tres tablas)."""
+    async with conn.transaction(isolation="repeatable_read", readonly=True):
+        version = await conn.fetchval(_VERSION_SQL)
+        tipos = await conn.fetch("SELECT * FROM juego_dioses.tipos_particulas ORDER BY nombre")
+        estados = await conn.fetch("SELECT * FROM juego_dioses.estados_materia ORDER BY nombre")
+        transiciones = await conn.fetch("""
+            SELECT * FROM juego_dioses.transiciones_particulas
+            WHERE activa = true
+            ORDER BY tipo_origen_id, prioridad DESC
+        """)
+    return CatalogueSnapshot(
+        version, [dict(row) for row in tipos], [dict(row) for row in estados], [dict(row) for row in transiciones]
+    )
+
+
+async def listen_catalogue_changes(catalogue: ParticleCatalogue, retry_seconds: float = 5.0) -> None:
+    """
+    Tarea de fondo: LISTEN juego_dioses_catalogo en una conexión dedicada; cada aviso recarga el catálogo.
+    Si la conexión se cae se reconecta, y al (re)conectar se recarga por los avisos que se hayan perdido.
+    """
+    while True:
+        conn = None
+        try:
+            conn = await connect_dedicated()
+            closed = asyncio.Event()
+            conn.add_termination_listener(lambda _conn: closed.set())
+            await conn.add_listener(CATALOGUE_CHANNEL, lambda *_args: catalogue.refresh_soon())
+            catalogue.refresh_soon()
+            await closed.wait()
+            logger.warning("Se cerró la conexión LISTEN del catálogo; reintento en %ss", retry_seconds)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("No se pudo escuchar %s (%s); reintento en %ss", CATALOGUE_CHANNEL, e, retry_seconds)
+        finally:
+            if conn is not None and not conn.is_closed():
+                await conn.close()
+        await asyncio.sleep(retry_seconds)
+
+
+particle_catalogue = ParticleCatalogue()
+
+
+def start_particle_catalogue(
+    catalogue: ParticleCatalogue = particle_catalogue, cache: ParticleChunkCache = particle_chunk_cache
+) -> asyncio.Task:
+    """
+    Conecta el catálogo del proceso (lifespan de la app): al cambiar, vacía la caché de chunks local (cada worker
+    recibe su propio NOTIFY) y arranca la tarea LISTEN. Devuelve la tarea para cancelarla al cerrar.
+    """
+    catalogue.listeners.append(lambda _snapshot: cache.apply_invalidation({"tipo": "particle_clear"}))
+    return asyncio.create_task(listen_catalogue_changes(catalogue))
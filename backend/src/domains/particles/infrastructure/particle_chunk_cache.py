@@ -0,0 +1,319 @@
+"""
+Caché en proceso de chunks de partículas (lecturas de viewport).
+
+El mundo se divide en chunks cúbicos de PARTICLES_CHUNK_SIZE celdas por lado (40 = WorldBloque.tamano_bloque),
+indexados por (bloque_id, chunk_x, chunk_y, chunk_z). Cada entrada guarda las ParticleResponse ya decodificadas
+del chunk (orden celda_z, celda_y, celda_x); los chunks vacíos también se guardan.
+Evicción LRU por número de chunks y por número total de partículas.
+Las invalidaciones se avisan a los listeners (p. ej. shared_particle_chunks los publica a los demás workers, que las
+aplican con apply_invalidation). Las escrituras de temperatura se aplican en el lugar y se avisan como
+particle_temperatures: los demás workers descartan esos chunks.
+Para visibility=surface cada entrada guarda además su máscara de caras expuestas (ver surface.py) y para lod > 0
+su pirámide de niveles de detalle (ver lod.py).
+"""
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from src.config.particles_config import (
+    PARTICLES_CACHE_MAX_CHUNKS,
+    PARTICLES_CACHE_MAX_PARTICLES,
+    PARTICLES_CACHE_TTL_SECONDS,
+    PARTICLES_CHUNK_SIZE,
+)
+from src.domains.particles.schemas import ParticleResponse, ParticleViewportQuery
+
+ChunkKey = Tuple[str, int, int, int]
+
+
+class ParticleChunk:
+    """
+    Entrada de la caché: partículas de un chunk y momento de carga.
+    coords/tipos/opacas/visibles/expuestas son derivados (arrays numpy alineados con particles) que se calculan
+    bajo demanda; expuestas se descarta cuando cambia el chunk o alguno de sus 6 vecinos de cara.
+    lod es la pirámide de niveles de detalle (nivel -> representativos, ver lod.py), también bajo demanda.
+    celdas es (índice lineal local ordenado, posición en particles) para las escrituras de temperatura por celda.
+    """
+
+    __slots__ = ("particles", "cargado_en", "coords", "tipos", "opacas", "visibles", "expuestas", "lod", "celdas")
+
+    def __init__(self, particles: List[ParticleResponse]):
+        self.particles = particles
+        self.cargado_en = time.monotonic()
+        self.coords: Optional[np.ndarray] = None
+        self.tipos: Optional[np.ndarray] = None
+        self.opacas: Optional[np.ndarray] = None
+        self.visibles: Optional[np.ndarray] = None
+        self.expuestas: Optional[np.ndarray] = None
+        self.lod: Dict[int, List[ParticleResponse]] = {}
+        self.celdas: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+
+class ParticleChunkCache:
+    """Caché LRU de chunks de partículas con invalidación por chunk, por celdas y por bloque."""
+
+    def __init__(
+        self,
+        chunk_size: int = PARTICLES_CHUNK_SIZE,
+        max_chunks: int = PARTICLES_CACHE_MAX_CHUNKS,
+        max_particles: int = PARTICLES_CACHE_MAX_PARTICLES,
+        ttl_seconds: float = PARTICLES_CACHE_TTL_SECONDS,
+    ):
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.max_particles = max_particles
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[ChunkKey, ParticleChunk]" = OrderedDict()
+        self._particle_count = 0
+        # id de partícula -> (chunk, posición en chunk.particles) para escrituras in-place como la temperatura
+        self._particle_index: Dict[str, Tuple[ChunkKey, int]] = {}
+        # Se incrementa en cada invalidación del bloque; una carga iniciada antes no se guarda
+        self._generations: Dict[str, int] = {}
+        self._known_bloques: Set[str] = set()
+        # tipo_particula_id -> índice entero (para las máscaras de superficie)
+        self._type_indices: Dict[str, int] = {}
+        # Reciben cada invalidación local como mensaje (ver apply_invalidation)
+        self.listeners: List[Callable[[dict], None]] = []
+
+    # --- Geometría de chunks ---
+
+    def chunk_key(self, bloque_id, celda_x: int, celda_y: int, celda_z: int) -> ChunkKey:
+        """Clave del chunk que contiene la celda."""
+        size = self.chunk_size
+        return (str(bloque_id), celda_x // size, celda_y // size, celda_z // size)
+
+    def chunk_keys_for_viewport(self, bloque_id, viewport: ParticleViewportQuery) -> List[ChunkKey]:
+        """Claves de todos los chunks que intersectan el viewport."""
+        size = self.chunk_size
+        bloque = str(bloque_id)
+        return [
+            (bloque, cx, cy, cz)
+            for cz in range(viewport.z_min // size, viewport.z_max // size + 1)
+            for cy in range(viewport.y_min // size, viewport.y_max // size + 1)
+            for cx in range(viewport.x_min // size, viewport.x_max // size + 1)
+        ]
+
+    def face_neighbour_keys(self, key: ChunkKey) -> List[ChunkKey]:
+        """Claves de los 6 chunks vecinos de cara (sin chunks con x/y negativos, que no tienen partículas)."""
+        bloque, cx, cy, cz = key
+        neighbours = [
+            (bloque, cx + 1, cy, cz), (bloque, cx - 1, cy, cz),
+            (bloque, cx, cy + 1, cz), (bloque, cx, cy - 1, cz),
+            (bloque, cx, cy, cz + 1), (bloque, cx, cy, cz - 1),
+        ]
+        return [k for k in neighbours if k[1] >= 0 and k[2] >= 0]
+
+    def bounds_for_keys(self, keys: Iterable[ChunkKey]) -> ParticleViewportQuery:
+        """Viewport (inclusivo) que cubre todos los chunks dados."""
+        size = self.chunk_size
+        keys = list(keys)
+        return ParticleViewportQuery(
+            x_min=min(k[1] for k in keys) * size,
+            x_max=(max(k[1] for k in keys) + 1) * size - 1,
+            y_min=min(k[2] for k in keys) * size,
+            y_max=(max(k[2] for k in keys) + 1) * size - 1,
+            z_min=min(k[3] for k in keys) * size,
+            z_max=(max(k[3] for k in keys) + 1) * size - 1,
+        )
+
+    # --- Lectura / escritura ---
+
+    def get(self, key: ChunkKey) -> Optional[ParticleChunk]:
+        """Chunk en caché (y lo marca como usado) o None si falta o expiró."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if self.ttl_seconds > 0 and time.monotonic() - entry.cargado_en > self.ttl_seconds:
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def generation(self, bloque_id) -> int:
+        """Generación actual del bloque; tomarla antes de consultar la BD y pasarla a put()."""
+        return self._generations.get(str(bloque_id), 0)
+
+    def put(self, key: ChunkKey, particles: List[ParticleResponse], generation: int) -> ParticleChunk:
+        """Crea la entrada del chunk y la guarda si el bloque no fue invalidado desde `generation`."""
+        entry = ParticleChunk(particles)
+        if self._generations.get(key[0], 0) != generation:
+            return entry
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = entry
+        self._particle_count += len(particles)
+        for i, p in enumerate(particles):
+            self._particle_index[str(p.id)] = (key, i)
+        self._reset_neighbour_exposure(key)
+        self._evict()
+        return entry
+
+    def update_temperature(self, particle_id, temperatura: float) -> None:
+        """Aplica la nueva temperatura a la partícula en caché (write-through), si está cacheada."""
+        location = self._particle_index.get(str(particle_id))
+        if location is None:
+            return
+        key, index = location
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.particles[index].temperatura = float(temperatura)
+            # Los representativos LOD son copias: se regeneran con la temperatura nueva
+            entry.lod = {}
+            self._notify({"tipo": "particle_temperatures", "bloque_id": key[0], "chunks": [list(key[1:])]})
+
+    def update_temperatures_at(self, bloque_id, coords: np.ndarray, temperaturas: np.ndarray) -> None:
+        """
+        Aplica temperaturas nuevas por celda (N, 3) a los chunks en caché (write-through) y avisa los chunks tocados
+        como particle_temperatures: la escritura cambió su versión en chunk_versiones (la caché compartida ya no
+        los sirve) y los demás workers los descartan al recibir el aviso.
+        """
+        coords = np.asarray(coords, dtype=np.int64).reshape(-1, 3)
+        temperaturas = np.round(np.asarray(temperaturas, dtype=np.float64).reshape(-1), 2)
+        if not len(coords):
+            return
+        bloque = str(bloque_id)
+        size = self.chunk_size
+        chunks, inverse = np.unique(coords // size, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        orden = np.argsort(inverse, kind="stable")
+        limites = np.searchsorted(inverse[orden], np.arange(len(chunks) + 1))
+        for i, (cx, cy, cz) in enumerate(chunks.tolist()):
+            key = (bloque, cx, cy, cz)
+            entry = self._entries.get(key)
+            if entry is None or not entry.particles:
+                continue
+            filas = orden[limites[i]:limites[i + 1]]
+            local = coords[filas] - np.array([cx, cy, cz]) * size
+            buscadas = (local[:, 2] * size + local[:, 1]) * size + local[:, 0]
+            celdas, posiciones = self._cell_index(key, entry)
+            donde = np.minimum(np.searchsorted(celdas, buscadas), len(celdas) - 1)
+            hay = celdas[donde] == buscadas
+            for posicion, temperatura in zip(posiciones[donde[hay]].tolist(), temperaturas[filas[hay]].tolist()):
+                entry.particles[posicion].temperatura = temperatura
+            # Los representativos LOD son copias: se regeneran con la temperatura nueva
+            entry.lod = {}
+        self._notify({"tipo": "particle_temperatures", "bloque_id": bloque, "chunks": chunks.tolist()})
+
+    def type_index(self, tipo_particula_id) -> int:
+        """Índice entero estable del tipo de partícula (asignado la primera vez que se ve)."""
+        return self._type_indices.setdefault(str(tipo_particula_id), len(self._type_indices))
+
+    # --- Existencia de bloques ---
+
+    def bloque_known(self, bloque_id) -> bool:
+        """True si ya se comprobó que el bloque existe."""
+        return str(bloque_id) in self._known_bloques
+
+    def mark_bloque_exists(self, bloque_id) -> None:
+        """Recuerda que el bloque existe (se olvida en invalidate_bloque)."""
+        self._known_bloques.add(str(bloque_id))
+
+    # --- Invalidación ---
+
+    def invalidate_chunk(self, key: ChunkKey) -> None:
+        """Descarta un chunk."""
+        self._invalidate_keys(key[0], [key])
+        self._notify({"tipo": "particle_chunks", "bloque_id": key[0], "chunks": [list(key[1:])]})
+
+    def invalidate_cells(self, bloque_id, cells: Iterable[Tuple[int, int, int]]) -> None:
+        """Descarta los chunks que contienen las celdas (x, y, z) dadas."""
+        keys = list({self.chunk_key(bloque_id, x, y, z) for x, y, z in cells})
+        self._invalidate_keys(str(bloque_id), keys)
+        self._notify({"tipo": "particle_chunks", "bloque_id": str(bloque_id), "chunks": [list(k[1:]) for k in keys]})
+
+    def invalidate_bloque(self, bloque_id) -> None:
+        """Descarta todos los chunks del bloque y su marca de existencia."""
+        self._invalidate_bloque(str(bloque_id))
+        self._notify({"tipo": "particle_bloque", "bloque_id": str(bloque_id)})
+
+    def clear(self) -> None:
+        """Vacía la caché completa."""
+        self._clear()
+        self._notify({"tipo": "particle_clear"})
+
+    def apply_invalidation(self, message: dict) -> None:
+        """Aplica una invalidación recibida de otro proceso (mismo formato que el aviso a listeners), sin reavisar."""
+        tipo = message.get("tipo")
+        if tipo in ("particle_chunks", "particle_temperatures"):
+            bloque = message["bloque_id"]
+            self._invalidate_keys(bloque, [(bloque, cx, cy, cz) for cx, cy, cz in message["chunks"]])
+        elif tipo == "particle_bloque":
+            self._invalidate_bloque(message["bloque_id"])
+        elif tipo == "particle_clear":
+            self._clear()
+
+    # --- Internos ---
+
+    def _notify(self, message: dict) -> None:
+        for listener in self.listeners:
+            listener(message)
+
+    def _invalidate_keys(self, bloque: str, keys: Iterable[ChunkKey]) -> None:
+        self._bump(bloque)
+        for key in keys:
+            if key in self._entries:
+                self._remove(key)
+            self._reset_neighbour_exposure(key)
+
+    def _invalidate_bloque(self, bloque: str) -> None:
+        self._bump(bloque)
+        self._known_bloques.discard(bloque)
+        for key in [k for k in self._entries if k[0] == bloque]:
+            self._remove(key)
+
+    def _clear(self) -> None:
+        for bloque in set(self._generations) | {k[0] for k in self._entries}:
+            self._bump(bloque)
+        self._entries.clear()
+        self._particle_index.clear()
+        self._known_bloques.clear()
+        self._particle_count = 0
+        self._type_indices.clear()
+
+    def _bump(self, bloque: str) -> None:
+        self._generations[bloque] = self._generations.get(bloque, 0) + 1
+
+    def _reset_neighbour_exposure(self, key: ChunkKey) -> None:
+        """Las caras del borde de los vecinos dependen de este chunk: su máscara de exposición deja de valer."""
+        for neighbour in self.face_neighbour_keys(key):
+            entry = self._entries.get(neighbour)
+            if entry is not None:
+                entry.expuestas = None
+
+    def _remove(self, key: ChunkKey) -> None:
+        entry = self._entries.pop(key)
+        self._particle_count -= len(entry.particles)
+        for p in entry.particles:
+            pid = str(p.id)
+            location = self._particle_index.get(pid)
+            if location is not None and location[0] == key:
+                del self._particle_index[pid]
+
+    def _cell_index(self, key: ChunkKey, entry: ParticleChunk) -> Tuple[np.ndarray, np.ndarray]:
+        """Índice lineal local (z, y, x) ordenado de las partículas del chunk y su posición en particles."""
+        if entry.celdas is None:
+            size = self.chunk_size
+            _, cx, cy, cz = key
+            lineal = np.fromiter(
+                (
+                    ((p.celda_z - cz * size) * size + (p.celda_y - cy * size)) * size + (p.celda_x - cx * size)
+                    for p in entry.particles
+                ),
+                dtype=np.int64,
+                count=len(entry.particles),
+            )
+            orden = np.argsort(lineal, kind="stable")
+            entry.celdas = (lineal[orden], orden)
+        return entry.celdas
+
+    def _evict(self) -> None:
+        while self._entries and (
+            len(self._entries) > self.max_chunks or self._particle_count > self.max_particles
+        ):
+            self._remove(next(iter(self._entries)))
+
+
+# Instancia compartida por el proceso (las rutas crean un repositorio por request)
+particle_chunk_cache = ParticleChunkCache()
@@ -2,19 +2,320 @@
 Adaptador de persistencia: implementa IParticleRepository contra Postgres.
 Las llamadas del caso de uso (get_particle_by_id, get_particles_by_viewport, etc.) terminan aquí.
 """
-from typing import List, Optional
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
 from uuid import UUID
 
+import numpy as np
+
+from src.config import PARTICLES_CONFIG
 from src.database.connection import get_connection
 from src.domains.particles.application.ports.particle_repository import IParticleRepository
+from src.domains.particles.infrastructure.lod_pyramid_cache import lod_pyramid_cache
+from src.domains.particles.infrastructure.particle_catalogue import particle_catalogue
+from src.domains.particles.lod import align_viewport, in_lod_viewport, lod_pyramid
+from src.domains.particles.morton import morton_codes, morton_ranges
+from src.domains.particles.neighbours import (
+    ParticleNeighbours,
+    build_neighbours,
+    chunks_for_points,
+    neighbour_pairs,
+)
 from src.domains.particles.schemas import (
+    ParticleCatalogueResponse,
     ParticleResponse,
+    ParticleTombstone,
     ParticleTypeResponse,
     ParticleViewportQuery,
 )
-from src.domains.shared.schemas import parse_jsonb_field
+from src.domains.particles.surface import exposed_mask
+
+# Viewport por rangos de morton ($8 = inicios, $9 = finales; ver morton.py): un recorrido de idx_particulas_morton
+# por rango (páginas contiguas, la tabla está agrupada por ese índice) y filtro exacto por celdas.
+# OFFSET 0 evita que el planner aplane el LATERAL y vuelva a idx_particulas_posicion: no sabe estimar los rangos.
+_VIEWPORT_SELECT_SQL = """
+    SELECT
+        p.id, p.bloque_id, p.celda_x, p.celda_y, p.celda_z,
+        p.tipo_particula_id, p.estado_materia_id, p.cantidad, p.temperatura, p.energia,
+        p.extraida, p.agrupacion_id, p.es_nucleo, p.propiedades, p.creado_por,
+        p.creado_en, p.modificado_en,
+        tp.nombre as tipo_nombre, em.nombre as estado_nombre
+    FROM unnest($8::bigint[], $9::bigint[]) AS m(lo, hi)
+    CROSS JOIN LATERAL (
+        SELECT * FROM juego_dioses.particulas q
+        WHERE q.bloque_id = $1 AND q.morton BETWEEN m.lo AND m.hi
+        OFFSET 0
+    ) p
+    JOIN juego_dioses.tipos_particulas tp ON p.tipo_particula_id = tp.id
+    JOIN juego_dioses.estados_materia em ON p.estado_materia_id = em.id
+    WHERE p.celda_x BETWEEN $2 AND $3
+      AND p.celda_y BETWEEN $4 AND $5
+      AND p.celda_z BETWEEN $6 AND $7
+      AND p.extraida = false
+"""
+
+_VIEWPORT_ORDER_SQL = """
+    ORDER BY p.celda_z, p.celda_y, p.celda_x
+"""
+
+_VIEWPORT_SQL = _VIEWPORT_SELECT_SQL + _VIEWPORT_ORDER_SQL
+
+# Varias regiones en una consulta: unnest de los rangos de celdas ($2..$7) con su posición (idx) y de los rangos de
+# morton de todas las regiones ($8 = región, $9 = inicio, $10 = fin), como en _VIEWPORT_SELECT_SQL
+_REGIONS_SQL = """
+    SELECT
+        r.idx,
+        p.id, p.bloque_id, p.celda_x, p.celda_y, p.celda_z,
+        p.tipo_particula_id, p.estado_materia_id, p.cantidad, p.temperatura, p.energia,
+        p.extraida, p.agrupacion_id, p.es_nucleo, p.propiedades, p.creado_por,
+        p.creado_en, p.modificado_en,
+        tp.nombre as tipo_nombre, em.nombre as estado_nombre
+    FROM unnest($2::int[], $3::int[], $4::int[], $5::int[], $6::int[], $7::int[])
+        WITH ORDINALITY AS r(x_min, x_max, y_min, y_max, z_min, z_max, idx)
+    JOIN unnest($8::bigint[], $9::bigint[], $10::bigint[]) AS m(idx, lo, hi) ON m.idx = r.idx
+    CROSS JOIN LATERAL (
+        SELECT * FROM juego_dioses.particulas q
+        WHERE q.bloque_id = $1 AND q.morton BETWEEN m.lo AND m.hi
+        OFFSET 0
+    ) p
+    JOIN juego_dioses.tipos_particulas tp ON p.tipo_particula_id = tp.id
+    JOIN juego_dioses.estados_materia em ON p.estado_materia_id = em.id
+    WHERE p.celda_x BETWEEN r.x_min AND r.x_max
+      AND p.celda_y BETWEEN r.y_min AND r.y_max
+      AND p.celda_z BETWEEN r.z_min AND r.z_max
+      AND p.extraida = false
+    ORDER BY r.idx, p.celda_z, p.celda_y, p.celda_x
+"""
+
+
+# Filas del viewport escritas después de una versión (incluye extraídas: son las lápidas de extracción)
+_CHANGES_SQL = """
+    SELECT
+        p.id, p.bloque_id, p.celda_x, p.celda_y, p.celda_z,
+        p.tipo_particula_id, p.estado_materia_id, p.cantidad, p.temperatura, p.energia,
+        p.extraida, p.agrupacion_id, p.es_nucleo, p.propiedades, p.creado_por,
+        p.creado_en, p.modificado_en, p.version,
+        tp.nombre as tipo_nombre, em.nombre as estado_nombre
+    FROM juego_dioses.particulas p
+    JOIN juego_dioses.tipos_particulas tp ON p.tipo_particula_id = tp.id
+    JOIN juego_dioses.estados_materia em ON p.estado_materia_id = em.id
+    WHERE p.bloque_id = $1
+      AND p.celda_x BETWEEN $2 AND $3
+      AND p.celda_y BETWEEN $4 AND $5
+      AND p.celda_z BETWEEN $6 AND $7
+      AND p.version > $8
+    ORDER BY p.version
+"""
+
+_DELETED_SQL = """
+    SELECT id, celda_x, celda_y, celda_z
+    FROM juego_dioses.particulas_eliminadas
+    WHERE bloque_id = $1
+      AND celda_x BETWEEN $2 AND $3
+      AND celda_y BETWEEN $4 AND $5
+      AND celda_z BETWEEN $6 AND $7
+      AND version > $8
+    ORDER BY version
+"""
+
+
+# Lado de los chunks de juego_dioses.chunk_versiones; debe coincidir con chunk_de() en 03-functions.sql
+VERSION_CHUNK_SIZE = 40
+
+_Box = Tuple[int, int, int, int, int, int]
+
+# Rango de chunks de chunk_resumen ($2..$7, vacío si min > max) + cajas de celdas de los bordes ($8..$13)
+_SUMMARY_COUNT_SQL = """
+    SELECT
+        COALESCE((
+            SELECT SUM(cr.cantidad)
+            FROM juego_dioses.chunk_resumen cr
+            WHERE cr.bloque_id = $1
+              AND cr.chunk_x BETWEEN $2 AND $3
+              AND cr.chunk_y BETWEEN $4 AND $5
+              AND cr.chunk_z BETWEEN $6 AND $7
+        ), 0)
+        + (
+            SELECT COUNT(*)
+            FROM unnest($8::int[], $9::int[], $10::int[], $11::int[], $12::int[], $13::int[])
+                AS r(x_min, x_max, y_min, y_max, z_min, z_max)
+            JOIN juego_dioses.particulas p
+              ON p.bloque_id = $1
+             AND p.celda_x BETWEEN r.x_min AND r.x_max
+             AND p.celda_y BETWEEN r.y_min AND r.y_max
+             AND p.celda_z BETWEEN r.z_min AND r.z_max
+             AND p.extraida = false
+        ) AS total
+"""
+
+_SUMMARY_TYPES_SQL = """
+    SELECT cr.tipo_particula_id
+    FROM juego_dioses.chunk_resumen cr
+    WHERE cr.bloque_id = $1
+      AND cr.chunk_x BETWEEN $2 AND $3
+      AND cr.chunk_y BETWEEN $4 AND $5
+      AND cr.chunk_z BETWEEN $6 AND $7
+      AND cr.cantidad > 0
+    UNION
+    SELECT p.tipo_particula_id
+    FROM unnest($8::int[], $9::int[], $10::int[], $11::int[], $12::int[], $13::int[])
+        AS r(x_min, x_max, y_min, y_max, z_min, z_max)
+    JOIN juego_dioses.particulas p
+      ON p.bloque_id = $1
+     AND p.celda_x BETWEEN r.x_min AND r.x_max
+     AND p.celda_y BETWEEN r.y_min AND r.y_max
+     AND p.celda_z BETWEEN r.z_min AND r.z_max
+     AND p.extraida = false
+"""
+
+
+# Temperaturas por posición desde arrays; $6 = cambio mínimo (0 escribe todas las filas enviadas)
+_TEMPERATURES_SQL = """
+    UPDATE juego_dioses.particulas p
+    SET temperatura = d.temperatura
+    FROM unnest($2::int[], $3::int[], $4::int[], $5::float8[]) AS d(celda_x, celda_y, celda_z, temperatura)
+    WHERE p.bloque_id = $1
+      AND p.celda_x = d.celda_x AND p.celda_y = d.celda_y AND p.celda_z = d.celda_z
+      AND NOT p.extraida
+      AND (p.temperatura IS NULL OR abs(p.temperatura - d.temperatura::numeric) >= $6)
+"""
 
 
+# Cambio de tipo por posición (transiciones); solo si la partícula sigue siendo del tipo de origen evaluado
+_TYPES_SQL = """
+    UPDATE juego_dioses.particulas p
+    SET tipo_particula_id = d.destino, estado_materia_id = COALESCE(d.estado, p.estado_materia_id)
+    FROM unnest($2::int[], $3::int[], $4::int[], $5::uuid[], $6::uuid[], $7::uuid[])
+         AS d(celda_x, celda_y, celda_z, origen, destino, estado)
+    WHERE p.bloque_id = $1
+      AND p.celda_x = d.celda_x AND p.celda_y = d.celda_y AND p.celda_z = d.celda_z
+      AND NOT p.extraida
+      AND p.tipo_particula_id = d.origen
+"""
+
+
+# Flujo de líquidos: partículas de una caja por rangos de morton (como _VIEWPORT_SELECT_SQL), solo los líquidos
+# ($11 = true, $10 = sus tipos) o solo las demás; tipo = índice en $10 (-1 si no es líquido)
+_LIQUID_BOX_SQL = """
+    SELECT p.celda_x, p.celda_y, p.celda_z, COALESCE(array_position($10::uuid[], p.tipo_particula_id) - 1, -1),
+           COALESCE(p.cantidad, 1.0)::float8, COALESCE(p.temperatura, 20.0)::float8
+    FROM unnest($2::bigint[], $3::bigint[]) AS m(lo, hi)
+    CROSS JOIN LATERAL (
+        SELECT * FROM juego_dioses.particulas q
+        WHERE q.bloque_id = $1 AND q.morton BETWEEN m.lo AND m.hi
+        OFFSET 0
+    ) p
+    WHERE p.celda_x BETWEEN $4 AND $5
+      AND p.celda_y BETWEEN $6 AND $7
+      AND p.celda_z BETWEEN $8 AND $9
+      AND p.extraida = false
+      AND (p.tipo_particula_id = ANY($10::uuid[])) = $11
+"""
+
+# Las celdas que se secaron se borran (lápida en particulas_eliminadas) si siguen siendo del tipo
+_LIQUID_DELETE_SQL = """
+    DELETE FROM juego_dioses.particulas p
+    USING unnest($2::int[], $3::int[], $4::int[], $5::uuid[]) AS d(celda_x, celda_y, celda_z, tipo)
+    WHERE p.bloque_id = $1
+      AND p.celda_x = d.celda_x AND p.celda_y = d.celda_y AND p.celda_z = d.celda_z
+      AND NOT p.extraida
+      AND p.tipo_particula_id = d.tipo
+"""
+
+# ... y las demás se crean o actualizan: una partícula del mismo líquido cambia cantidad y temperatura; una extraída
+# se reemplaza por el líquido; cualquier otra (ocupada mientras tanto) no se toca
+_LIQUID_UPSERT_SQL = """
+    INSERT INTO juego_dioses.particulas
+        (bloque_id, celda_x, celda_y, celda_z, tipo_particula_id, estado_materia_id, cantidad, temperatura)
+    SELECT $1, d.celda_x, d.celda_y, d.celda_z, d.tipo, d.estado, d.cantidad, d.temperatura
+    FROM unnest($2::int[], $3::int[], $4::int[], $5::uuid[], $6::uuid[], $7::float8[], $8::float8[])
+         AS d(celda_x, celda_y, celda_z, tipo, estado, cantidad, temperatura)
+    ON CONFLICT (bloque_id, celda_x, celda_y, celda_z) DO UPDATE
+    SET cantidad = EXCLUDED.cantidad,
+        temperatura = EXCLUDED.temperatura,
+        tipo_particula_id = EXCLUDED.tipo_particula_id,
+        estado_materia_id = CASE WHEN particulas.extraida THEN EXCLUDED.estado_materia_id
+                                 ELSE particulas.estado_materia_id END,
+        integridad = CASE WHEN particulas.extraida THEN 1.0 ELSE particulas.integridad END,
+        energia = CASE WHEN particulas.extraida THEN 0.0 ELSE particulas.energia END,
+        agrupacion_id = CASE WHEN particulas.extraida THEN NULL ELSE particulas.agrupacion_id END,
+        es_nucleo = particulas.es_nucleo AND NOT particulas.extraida,
+        propiedades = CASE WHEN particulas.extraida THEN '{}'::jsonb ELSE particulas.propiedades END,
+        extraida = false
+    WHERE particulas.extraida OR particulas.tipo_particula_id = EXCLUDED.tipo_particula_id
+"""
+
+
+async def write_temperatures(
+    conn,
+    bloque_id: UUID,
+    coords: np.ndarray,
+    temperaturas: np.ndarray,
+    batch_size: int = PARTICLES_CONFIG["TEMPERATURE_WRITE_BATCH"],
+    epsilon: float = 0.0,
+) -> int:
+    """
+    Escribe temperaturas (N,) en las celdas coords (N, 3) con UPDATE ... FROM unnest en sentencias de batch_size
+    filas, sobre la conexión dada (la transacción la abre quien llama). Devuelve las filas actualizadas.
+    """
+    total = 0
+    for start in range(0, len(coords), batch_size):
+        batch = coords[start:start + batch_size]
+        status = await conn.execute(
+            _TEMPERATURES_SQL,
+            bloque_id,
+            batch[:, 0].tolist(),
+            batch[:, 1].tolist(),
+            batch[:, 2].tolist(),
+            temperaturas[start:start + batch_size].tolist(),
+            epsilon,
+        )
+        total += int(status.split()[-1])
+    return total
+
+
+def _split_by_chunks(viewport: ParticleViewportQuery, size: int = VERSION_CHUNK_SIZE) -> Tuple[_Box, List[_Box]]:
+    """
+    Parte el viewport en los chunks que cubre enteros (rango cx0, cx1, cy0, cy1, cz0, cz1; vacío si algún min > max)
+    y hasta 6 cajas de celdas disjuntas con el resto (bordes de chunks cortados por el viewport).
+    """
+    mins = (viewport.x_min, viewport.y_min, viewport.z_min)
+    maxs = (viewport.x_max, viewport.y_max, viewport.z_max)
+    first = [-(-v // size) for v in mins]
+    last = [(v + 1) // size - 1 for v in maxs]
+    if any(f > l for f, l in zip(first, last)):
+        # Ningún chunk entero: todo el viewport es borde
+        return (0, -1, 0, -1, 0, -1), [(mins[0], maxs[0], mins[1], maxs[1], mins[2], maxs[2])]
+    lo = [f * size for f in first]
+    hi = [(l + 1) * size - 1 for l in last]
+    boxes: List[_Box] = []
+    if mins[0] < lo[0]:
+        boxes.append((mins[0], lo[0] - 1, mins[1], maxs[1], mins[2], maxs[2]))
+    if hi[0] < maxs[0]:
+        boxes.append((hi[0] + 1, maxs[0], mins[1], maxs[1], mins[2], maxs[2]))
+    if mins[1] < lo[1]:
+        boxes.append((lo[0], hi[0], mins[1], lo[1] - 1, mins[2], maxs[2]))
+    if hi[1] < maxs[1]:
+        boxes.append((lo[0], hi[0], hi[1] + 1, maxs[1], mins[2], maxs[2]))
+    if mins[2] < lo[2]:
+        boxes.append((lo[0], hi[0], lo[1], hi[1], mins[2], lo[2] - 1))
+    if hi[2] < maxs[2]:
+        boxes.append((lo[0], hi[0], lo[1], hi[1], hi[2] + 1, maxs[2]))
+    return (first[0], last[0], first[1], last[1], first[2], last[2]), boxes
+
+
+def _viewport_args(bloque_id: UUID, viewport: ParticleViewportQuery) -> tuple:
+    """Parámetros $1..$9 de _VIEWPORT_SELECT_SQL: bloque, rango de celdas y rangos de morton."""
+    ranges = morton_ranges(viewport)
+    return (
+        bloque_id, viewport.x_min, viewport.x_max, viewport.y_min, viewport.y_max, viewport.z_min, viewport.z_max,
+        [lo for lo, _ in ranges], [hi for _, hi in ranges],
+    )
+
+
+def _summary_args(bloque_id: UUID, viewport: ParticleViewportQuery) -> tuple:
+    chunks, boxes = _split_by_chunks(viewport)
+    return (bloque_id, *chunks, *([box[i] for box in boxes] for i in range(6)))
+
 class PostgresParticleRepository(IParticleRepository):
     """Implementación concreta del puerto: lee/escribe partículas en juego_dioses.particulas y tipos_particulas."""
 
@@ -29,78 +330,314 @@ class PostgresParticleRepository(IParticleRepository):
     async def get_types_in_viewport(
         self, bloque_id: UUID, viewport: ParticleViewportQuery
     ) -> List[ParticleTypeResponse]:
-        """DISTINCT tipo_particula_id en viewport; luego SELECT tipos_particulas por IDs; mapea a ParticleTypeResponse."""
+        """
+        Tipos presentes: de chunk_resumen en los chunks enteros y DISTINCT sobre particulas solo en los bordes
+        (_split_by_chunks); los estilos salen del catálogo en memoria (ParticleCatalogue).
+        """
         async with get_connection() as conn:
-            tipo_ids_rows = await conn.fetch("""
-                SELECT DISTINCT p.tipo_particula_id
-                FROM juego_dioses.particulas p
-                WHERE p.bloque_id = $1
-                  AND p.celda_x BETWEEN $2 AND $3
-                  AND p.celda_y BETWEEN $4 AND $5
-                  AND p.celda_z BETWEEN $6 AND $7
-                  AND p.extraida = false
-            """, bloque_id, viewport.x_min, viewport.x_max, viewport.y_min, viewport.y_max,
-                viewport.z_min, viewport.z_max)
-            tipo_ids_list = [row["tipo_particula_id"] for row in tipo_ids_rows]
-            if not tipo_ids_list:
-                return []
-            tipos = await conn.fetch("""
-                SELECT id, nombre, color, geometria, opacidad
-                FROM juego_dioses.tipos_particulas
-                WHERE id = ANY($1::uuid[])
-            """, tipo_ids_list)
-            return [
-                ParticleTypeResponse(
-                    id=str(row["id"]),
-                    nombre=row["nombre"],
-                    color=row["color"] if row["color"] else None,
-                    geometria=parse_jsonb_field(row["geometria"]) or None,
-                    opacidad=float(row["opacidad"]) if row["opacidad"] is not None else None,
-                )
-                for row in tipos
-            ]
+            tipo_ids_rows = await conn.fetch(_SUMMARY_TYPES_SQL, *_summary_args(bloque_id, viewport))
+        catalogue = await particle_catalogue.get()
+        return catalogue.type_responses(row["tipo_particula_id"] for row in tipo_ids_rows)
 
     async def get_by_viewport(
         self, bloque_id: UUID, viewport: ParticleViewportQuery
     ) -> List[ParticleResponse]:
         async with get_connection() as conn:
-            rows = await conn.fetch("""
-                SELECT
-                    p.id, p.bloque_id, p.celda_x, p.celda_y, p.celda_z,
-                    p.tipo_particula_id, p.estado_materia_id, p.cantidad, p.temperatura, p.energia,
-                    p.extraida, p.agrupacion_id, p.es_nucleo, p.propiedades, p.creado_por,
-                    p.creado_en, p.modificado_en,
-                    tp.nombre as tipo_nombre, em.nombre as estado_nombre
-                FROM juego_dioses.particulas p
-                JOIN juego_dioses.tipos_particulas tp ON p.tipo_particula_id = tp.id
-                JOIN juego_dioses.estados_materia em ON p.estado_materia_id = em.id
-                WHERE p.bloque_id = $1
-                  AND p.celda_x BETWEEN $2 AND $3
-                  AND p.celda_y BETWEEN $4 AND $5
-                  AND p.celda_z BETWEEN $6 AND $7
-                  AND p.extraida = false
-                ORDER BY p.celda_z, p.celda_y, p.celda_x
-            """, bloque_id, viewport.x_min, viewport.x_max, viewport.y_min, viewport.y_max,
-                viewport.z_min, viewport.z_max)
+            rows = await conn.fetch(_VIEWPORT_SQL, *_viewport_args(bloque_id, viewport))
             return [ParticleResponse.from_row(row) for row in rows]
 
+    async def get_by_viewports(
+        self, bloque_id: UUID, viewports: List[ParticleViewportQuery]
+    ) -> List[List[ParticleResponse]]:
+        """Todas las regiones en una sola consulta (_REGIONS_SQL); las filas se reparten por r.idx (1-based)."""
+        result: List[List[ParticleResponse]] = [[] for _ in viewports]
+        if not viewports:
+            return result
+        range_idx: List[int] = []
+        range_lo: List[int] = []
+        range_hi: List[int] = []
+        for idx, viewport in enumerate(viewports, start=1):
+            for lo, hi in morton_ranges(viewport):
+                range_idx.append(idx)
+                range_lo.append(lo)
+                range_hi.append(hi)
+        async with get_connection() as conn:
+            rows = await conn.fetch(
+                _REGIONS_SQL, bloque_id,
+                [v.x_min for v in viewports], [v.x_max for v in viewports],
+                [v.y_min for v in viewports], [v.y_max for v in viewports],
+                [v.z_min for v in viewports], [v.z_max for v in viewports],
+                range_idx, range_lo, range_hi,
+            )
+        for row in rows:
+            result[row['idx'] - 1].append(ParticleResponse.from_row(row))
+        return result
+
+    async def get_surface_by_viewport(
+        self, bloque_id: UUID, viewport: ParticleViewportQuery
+    ) -> List[ParticleResponse]:
+        """
+        Lee el viewport con un halo de 1 celda (una lectura por rangos de morton) y calcula las caras expuestas por
+        chunk en memoria con exposed_mask, como la caché: sin sondas por fila a los 6 vecinos.
+        """
+        # model_copy no valida: el halo puede quedar en x/y = -1
+        halo = viewport.model_copy(update={
+            "x_min": viewport.x_min - 1, "x_max": viewport.x_max + 1,
+            "y_min": viewport.y_min - 1, "y_max": viewport.y_max + 1,
+            "z_min": viewport.z_min - 1, "z_max": viewport.z_max + 1,
+        })
+        particles = await self.get_by_viewport(bloque_id, halo)
+        if not particles:
+            return []
+        opacities = (await particle_catalogue.get()).opacities
+        type_indices: Dict[UUID, int] = {}
+        n = len(particles)
+        coords = np.array([(p.celda_x, p.celda_y, p.celda_z) for p in particles], dtype=np.int64).reshape(-1, 3)
+        tipos = np.fromiter(
+            (type_indices.setdefault(p.tipo_particula_id, len(type_indices)) for p in particles),
+            dtype=np.int64, count=n,
+        )
+        opacidad = np.fromiter(
+            (opacities.get(str(p.tipo_particula_id), 1.0) for p in particles), dtype=np.float64, count=n
+        )
+        opacas = opacidad >= PARTICLES_CONFIG["SURFACE_OPACITY_THRESHOLD"]
+        low = np.array([viewport.x_min, viewport.y_min, viewport.z_min], dtype=np.int64)
+        high = np.array([viewport.x_max, viewport.y_max, viewport.z_max], dtype=np.int64)
+        candidatas = np.flatnonzero(np.all((coords >= low) & (coords <= high), axis=1) & (opacidad > 0.0))
+        expuestas = np.zeros(n, dtype=bool)
+        size = VERSION_CHUNK_SIZE
+        chunks, grupo = np.unique(coords[candidatas] // size, axis=0, return_inverse=True)
+        grupo = grupo.reshape(-1)
+        for index, chunk in enumerate(chunks):
+            propias = candidatas[grupo == index]
+            origin = chunk * size
+            vecinas = np.all((coords >= origin - 1) & (coords <= origin + size), axis=1)
+            expuestas[propias] = exposed_mask(
+                coords[propias], tipos[propias], tuple(origin.tolist()), size,
+                coords[vecinas], tipos[vecinas], opacas[vecinas],
+            )
+        return [p for p, expuesta in zip(particles, expuestas) if expuesta]
+
+    async def get_lod_by_viewport(
+        self, bloque_id: UUID, viewport: ParticleViewportQuery, lod: int
+    ) -> List[ParticleResponse]:
+        """
+        Representativos del nivel lod desde la pirámide de cada chunk (lod_pyramid_cache), guardada bajo su versión de
+        chunk_versiones: solo los chunks que cambiaron o no están en caché se leen a resolución completa (una consulta)
+        y se reducen a todos los niveles.
+        """
+        aligned = align_viewport(viewport, lod)
+        size = VERSION_CHUNK_SIZE
+        chunks = [
+            (cx, cy, cz)
+            for cz in range(aligned.z_min // size, aligned.z_max // size + 1)
+            for cy in range(aligned.y_min // size, aligned.y_max // size + 1)
+            for cx in range(aligned.x_min // size, aligned.x_max // size + 1)
+        ]
+        # La versión se lee antes que los datos: si cambian en medio, la pirámide queda bajo una versión ya vieja
+        versions = await self.get_chunk_versions(bloque_id, chunks)
+        bloque = str(bloque_id)
+        pyramids: Dict[Tuple[int, int, int], Dict[int, List[ParticleResponse]]] = {}
+        missing: List[Tuple[int, int, int]] = []
+        for chunk in chunks:
+            # Sin fila en chunk_versiones: el chunk nunca tuvo partículas
+            if not versions[chunk]:
+                continue
+            niveles = lod_pyramid_cache.get((bloque, *chunk), versions[chunk])
+            if niveles is None or lod not in niveles:
+                missing.append(chunk)
+            else:
+                pyramids[chunk] = niveles
+        if missing:
+            low = np.array(missing).min(axis=0)
+            high = np.array(missing).max(axis=0)
+            box = ParticleViewportQuery(
+                x_min=int(low[0]) * size, x_max=(int(high[0]) + 1) * size - 1,
+                y_min=int(low[1]) * size, y_max=(int(high[1]) + 1) * size - 1,
+                z_min=int(low[2]) * size, z_max=(int(high[2]) + 1) * size - 1,
+            )
+            loaded: Dict[Tuple[int, int, int], List[ParticleResponse]] = {chunk: [] for chunk in missing}
+            if not any(np.all((low <= chunk) & (chunk <= high)) for chunk in pyramids):
+                # Ningún chunk de la caja está en caché (los vacíos no cuestan): una lectura por rangos de la caja
+                rows = await self.get_by_viewport(bloque_id, box)
+            else:
+                regions = [
+                    ParticleViewportQuery(
+                        x_min=cx * size, x_max=(cx + 1) * size - 1,
+                        y_min=cy * size, y_max=(cy + 1) * size - 1,
+                        z_min=cz * size, z_max=(cz + 1) * size - 1,
+                    )
+                    for cx, cy, cz in missing
+                ]
+                rows = [p for region in await self.get_by_viewports(bloque_id, regions) for p in region]
+            for p in rows:
+                bucket = loaded.get((p.celda_x // size, p.celda_y // size, p.celda_z // size))
+                if bucket is not None:
+                    bucket.append(p)
+            max_lod = max(lod, PARTICLES_CONFIG["LOD_MAX_LEVEL"])
+            for chunk, particles in loaded.items():
+                type_indices: Dict[UUID, int] = {}
+                tipos = np.fromiter(
+                    (type_indices.setdefault(p.tipo_particula_id, len(type_indices)) for p in particles),
+                    dtype=np.int64, count=len(particles),
+                )
+                coords = np.array(
+                    [(p.celda_x, p.celda_y, p.celda_z) for p in particles], dtype=np.int64
+                ).reshape(-1, 3)
+                pyramids[chunk] = lod_pyramid(particles, coords, tipos, max_lod)
+                lod_pyramid_cache.put((bloque, *chunk), versions[chunk], pyramids[chunk])
+        representatives = [
+            p for niveles in pyramids.values() for p in niveles[lod] if in_lod_viewport(p, aligned)
+        ]
+        representatives.sort(key=lambda p: (p.celda_z, p.celda_y, p.celda_x))
+        return representatives
+
+    async def stream_by_viewport(
+        self, bloque_id: UUID, viewport: ParticleViewportQuery, batch_size: int
+    ) -> AsyncIterator[List[ParticleResponse]]:
+        """Misma consulta que get_by_viewport leída con cursor (dentro de una transacción) en lotes de batch_size."""
+        async with get_connection() as conn:
+            async with conn.transaction():
+                cursor = await conn.cursor(_VIEWPORT_SQL, *_viewport_args(bloque_id, viewport))
+                while True:
+                    rows = await cursor.fetch(batch_size)
+                    if not rows:
+                        break
+                    yield [ParticleResponse.from_row(row) for row in rows]
+
     async def count_by_viewport(
         self, bloque_id: UUID, viewport: ParticleViewportQuery
     ) -> int:
-        """COUNT(*) de partículas en viewport y extraida=false."""
+        """Suma de chunk_resumen en los chunks enteros + COUNT(*) sobre particulas en los bordes (_split_by_chunks)."""
+        async with get_connection() as conn:
+            return await conn.fetchval(_SUMMARY_COUNT_SQL, *_summary_args(bloque_id, viewport))
+
+    async def estimate_count_by_viewport(
+        self, bloque_id: UUID, viewport: ParticleViewportQuery
+    ) -> int:
+        """Suma de chunk_resumen en todos los chunks que tocan el viewport (solo lee el resumen)."""
+        size = VERSION_CHUNK_SIZE
         async with get_connection() as conn:
             total = await conn.fetchval("""
-                SELECT COUNT(*)
-                FROM juego_dioses.particulas
+                SELECT SUM(cantidad)
+                FROM juego_dioses.chunk_resumen
                 WHERE bloque_id = $1
-                  AND celda_x BETWEEN $2 AND $3
-                  AND celda_y BETWEEN $4 AND $5
-                  AND celda_z BETWEEN $6 AND $7
-                  AND extraida = false
-            """, bloque_id, viewport.x_min, viewport.x_max, viewport.y_min, viewport.y_max,
-                viewport.z_min, viewport.z_max)
+                  AND chunk_x BETWEEN $2 AND $3
+                  AND chunk_y BETWEEN $4 AND $5
+                  AND chunk_z BETWEEN $6 AND $7
+            """,
+                bloque_id,
+                viewport.x_min // size, viewport.x_max // size,
+                viewport.y_min // size, viewport.y_max // size,
+                viewport.z_min // size, viewport.z_max // size,
+            )
             return total or 0
 
+    async def get_viewport_version(
+        self, bloque_id: UUID, viewport: ParticleViewportQuery
+    ) -> Optional[str]:
+        """
+        md5 de los pares (chunk, versión) de chunk_versiones en el rango de chunks del viewport (solo lee la PK).
+        Es el conjunto y no el máximo: las versiones no son monótonas entre transacciones concurrentes.
+        """
+        size = VERSION_CHUNK_SIZE
+        async with get_connection() as conn:
+            row = await conn.fetchrow("""
+                SELECT md5(COALESCE((
+                    SELECT string_agg(
+                        cv.chunk_x || ',' || cv.chunk_y || ',' || cv.chunk_z || ':' || cv.version, ';'
+                        ORDER BY cv.chunk_x, cv.chunk_y, cv.chunk_z
+                    )
+                    FROM juego_dioses.chunk_versiones cv
+                    WHERE cv.bloque_id = b.id
+                      AND cv.chunk_x BETWEEN $2 AND $3
+                      AND cv.chunk_y BETWEEN $4 AND $5
+                      AND cv.chunk_z BETWEEN $6 AND $7
+                ), '')) AS version
+                FROM juego_dioses.bloques b
+                WHERE b.id = $1
+            """,
+                bloque_id,
+                viewport.x_min // size, viewport.x_max // size,
+                viewport.y_min // size, viewport.y_max // size,
+                viewport.z_min // size, viewport.z_max // size,
+            )
+            return row["version"] if row else None
+
+    async def get_chunk_versions(
+        self, bloque_id: UUID, chunks: List[Tuple[int, int, int]]
+    ) -> Dict[Tuple[int, int, int], int]:
+        """Lee chunk_versiones por PK para los chunks pedidos (unnest de coordenadas); los que no tienen fila quedan en 0."""
+        versions = {chunk: 0 for chunk in chunks}
+        if not chunks:
+            return versions
+        async with get_connection() as conn:
+            rows = await conn.fetch("""
+                SELECT cv.chunk_x, cv.chunk_y, cv.chunk_z, cv.version
+                FROM unnest($2::int[], $3::int[], $4::int[]) AS c(chunk_x, chunk_y, chunk_z)
+                JOIN juego_dioses.chunk_versiones cv
+                  ON cv.bloque_id = $1
+                 AND cv.chunk_x = c.chunk_x AND cv.chunk_y = c.chunk_y AND cv.chunk_z = c.chunk_z
+            """,
+                bloque_id,
+                [c[0] for c in chunks], [c[1] for c in chunks], [c[2] for c in chunks],
+            )
+        for row in rows:
+            versions[(row["chunk_x"], row["chunk_y"], row["chunk_z"])] = row["version"]
+        return versions
+
+    async def get_changes_by_viewport(
+        self, bloque_id: UUID, viewport: ParticleViewportQuery, since: int
+    ) -> Tuple[List[ParticleResponse], List[ParticleTombstone]]:
+        """Filas con version > since (extraídas como lápidas) más lápidas de DELETE físico (particulas_eliminadas)."""
+        args = (
+            bloque_id, viewport.x_min, viewport.x_max, viewport.y_min, viewport.y_max,
+            viewport.z_min, viewport.z_max, since,
+        )
+        async with get_connection() as conn:
+            rows = await conn.fetch(_CHANGES_SQL, *args)
+            deleted = await conn.fetch(_DELETED_SQL, *args)
+        particles: List[ParticleResponse] = []
+        removed: List[ParticleTombstone] = []
+        for row in rows:
+            if row["extraida"]:
+                removed.append(ParticleTombstone(
+                    id=row["id"], celda_x=row["celda_x"], celda_y=row["celda_y"], celda_z=row["celda_z"]
+                ))
+            else:
+                particles.append(ParticleResponse.from_row(row))
+        removed.extend(
+            ParticleTombstone(id=row["id"], celda_x=row["celda_x"], celda_y=row["celda_y"], celda_z=row["celda_z"])
+            for row in deleted
+        )
+        return particles, removed
+
+    async def get_world_version(self, bloque_id: UUID) -> int:
+        """
+        MAX(version) entre particulas y particulas_eliminadas del bloque (índices por bloque_id, version), acotado por
+        version_segura(): una transacción en curso puede confirmar filas con una versión menor que las ya visibles.
+        """
+        async with get_connection() as conn:
+            version = await conn.fetchval("""
+                SELECT LEAST(
+                    GREATEST(
+                        (SELECT MAX(version) FROM juego_dioses.particulas WHERE bloque_id = $1),
+                        (SELECT MAX(version) FROM juego_dioses.particulas_eliminadas WHERE bloque_id = $1)
+                    ),
+                    juego_dioses.version_segura()
+                )
+            """, bloque_id)
+            return version or 0
+
+    async def get_type_opacities(self) -> Dict[UUID, float]:
+        """Opacidades del catálogo en memoria (NULL se toma como opaco)."""
+        catalogue = await particle_catalogue.get()
+        return {UUID(tipo_id): opacidad for tipo_id, opacidad in catalogue.opacities.items()}
+
+    async def get_catalogue(self) -> ParticleCatalogueResponse:
+        """Catálogo en memoria (se recarga si cambió catalogo_version)."""
+        return (await particle_catalogue.get()).response()
+
     async def get_by_id(
         self, bloque_id: UUID, particle_id: UUID
     ) -> Optional[ParticleResponse]:
@@ -158,6 +695,50 @@ class PostgresParticleRepository(IParticleRepository):
                 for row in rows
             ]
 
+    async def get_thermal_particle_arrays(
+        self, bloque_id: str, inercia_minima: float = 0.1
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Misma consulta que get_particles_with_thermal_inertia, sin id y con la conductividad, pasada a arrays."""
+        async with get_connection() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT p.celda_x, p.celda_y, p.celda_z, COALESCE(p.temperatura, 20.0)::float8, tp.inercia_termica::float8,
+                       COALESCE(tp.conductividad_termica, 1.0)::float8
+                FROM juego_dioses.particulas p
+                JOIN juego_dioses.tipos_particulas tp ON p.tipo_particula_id = tp.id
+                WHERE p.bloque_id = $1 AND p.extraida = false AND tp.inercia_termica > $2
+                """,
+                UUID(str(bloque_id)),
+                inercia_minima,
+            )
+        n = len(rows)
+        coords = np.array([(row[0], row[1], row[2]) for row in rows], dtype=np.int32).reshape(-1, 3)
+        temperatura = np.fromiter((row[3] for row in rows), dtype=np.float64, count=n)
+        inercia = np.fromiter((row[4] for row in rows), dtype=np.float64, count=n)
+        conductividad = np.fromiter((row[5] for row in rows), dtype=np.float64, count=n)
+        return coords, temperatura, inercia, conductividad
+
+    async def get_particle_arrays_by_type(
+        self, bloque_id: str, tipos: Sequence[str]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        async with get_connection() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT p.celda_x, p.celda_y, p.celda_z, COALESCE(p.temperatura, 20.0)::float8,
+                       COALESCE(tp.conductividad_termica, 1.0)::float8
+                FROM juego_dioses.particulas p
+                JOIN juego_dioses.tipos_particulas tp ON p.tipo_particula_id = tp.id
+                WHERE p.bloque_id = $1 AND p.extraida = false AND lower(tp.nombre) = ANY($2::text[])
+                """,
+                UUID(str(bloque_id)),
+                [t.lower() for t in tipos],
+            )
+        n = len(rows)
+        coords = np.array([(row[0], row[1], row[2]) for row in rows], dtype=np.int32).reshape(-1, 3)
+        temperatura = np.fromiter((row[3] for row in rows), dtype=np.float64, count=n)
+        conductividad = np.fromiter((row[4] for row in rows), dtype=np.float64, count=n)
+        return coords, temperatura, conductividad
+
     async def update_particle_temperature(
         self, particula_id: str, temperatura: float
     ) -> None:
@@ -169,6 +750,267 @@ class PostgresParticleRepository(IParticleRepository):
                 particula_id,
             )
 
+    async def update_particle_temperature_at(
+        self, bloque_id: str, celda_x: int, celda_y: int, celda_z: int, temperatura: float
+    ) -> None:
+        """UPDATE por posición (UNIQUE(bloque_id, celda_x, celda_y, celda_z))."""
+        async with get_connection() as conn:
+            await conn.execute(
+                """
+                UPDATE juego_dioses.particulas SET temperatura = $5
+                WHERE bloque_id = $1 AND celda_x = $2 AND celda_y = $3 AND celda_z = $4 AND NOT extraida
+                """,
+                UUID(str(bloque_id)),
+                celda_x,
+                celda_y,
+                celda_z,
+                temperatura,
+            )
+
+    async def update_particle_temperatures_at(
+        self,
+        bloque_id: str,
+        coords: np.ndarray,
+        temperaturas: np.ndarray,
+        anteriores: Optional[np.ndarray] = None,
+    ) -> int:
+        """
+        Una transacción con sentencias de TEMPERATURE_WRITE_BATCH filas (write_temperatures). Las que cambian menos
+        de TEMPERATURE_EPSILON no se envían (si hay anteriores) ni se escriben (se compara también en el UPDATE).
+        """
+        coords = np.asarray(coords, dtype=np.int64).reshape(-1, 3)
+        temperaturas = np.round(np.asarray(temperaturas, dtype=np.float64), 2)
+        epsilon = PARTICLES_CONFIG["TEMPERATURE_EPSILON"]
+        if anteriores is not None:
+            cambiadas = np.abs(temperaturas - np.asarray(anteriores, dtype=np.float64)) >= epsilon
+            coords, temperaturas = coords[cambiadas], temperaturas[cambiadas]
+        if not len(coords):
+            return 0
+        async with get_connection() as conn:
+            async with conn.transaction():
+                return await write_temperatures(conn, UUID(str(bloque_id)), coords, temperaturas, epsilon=epsilon)
+
+    async def get_transition_particle_arrays(
+        self, bloque_id: str, tipo_ids: Sequence[str]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        async with get_connection() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT p.celda_x, p.celda_y, p.celda_z, array_position($2::uuid[], p.tipo_particula_id) - 1,
+                       COALESCE(p.temperatura, 20.0)::float8, COALESCE(p.integridad, 1.0)::float8
+                FROM juego_dioses.particulas p
+                WHERE p.bloque_id = $1 AND p.extraida = false AND p.tipo_particula_id = ANY($2::uuid[])
+                """,
+                UUID(str(bloque_id)),
+                [UUID(str(tipo_id)) for tipo_id in tipo_ids],
+            )
+        n = len(rows)
+        coords = np.array([(row[0], row[1], row[2]) for row in rows], dtype=np.int32).reshape(-1, 3)
+        tipo = np.fromiter((row[3] for row in rows), dtype=np.int32, count=n)
+        temperatura = np.fromiter((row[4] for row in rows), dtype=np.float64, count=n)
+        integridad = np.fromiter((row[5] for row in rows), dtype=np.float64, count=n)
+        return coords, tipo, temperatura, integridad
+
+    async def get_retyped_particle_arrays(
+        self, bloque_id: str, since: int, tipo_ids: Sequence[str]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Recorre idx_particulas_version_tipo desde since: el costo depende de lo que cambió de tipo, no del bloque."""
+        async with get_connection() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT p.celda_x, p.celda_y, p.celda_z, array_position($3::uuid[], p.tipo_particula_id) - 1,
+                       COALESCE(p.temperatura, 20.0)::float8
+                FROM juego_dioses.particulas p
+                WHERE p.bloque_id = $1 AND p.version_tipo > $2 AND p.extraida = false
+                  AND p.tipo_particula_id = ANY($3::uuid[])
+                """,
+                UUID(str(bloque_id)),
+                int(since),
+                [UUID(str(tipo_id)) for tipo_id in tipo_ids],
+            )
+        n = len(rows)
+        coords = np.array([(row[0], row[1], row[2]) for row in rows], dtype=np.int32).reshape(-1, 3)
+        tipo = np.fromiter((row[3] for row in rows), dtype=np.int32, count=n)
+        temperatura = np.fromiter((row[4] for row in rows), dtype=np.float64, count=n)
+        return coords, tipo, temperatura
+
+    async def update_particle_types_at(
+        self,
+        bloque_id: str,
+        coords: np.ndarray,
+        origenes: Sequence[str],
+        destinos: Sequence[str],
+        estados: Sequence[Optional[str]],
+    ) -> int:
+        """UPDATE ... FROM unnest (_TYPES_SQL): una sentencia para todas las celdas."""
+        coords = np.asarray(coords, dtype=np.int64).reshape(-1, 3)
+        if not len(coords):
+            return 0
+        async with get_connection() as conn:
+            status = await conn.execute(
+                _TYPES_SQL,
+                UUID(str(bloque_id)),
+                coords[:, 0].tolist(),
+                coords[:, 1].tolist(),
+                coords[:, 2].tolist(),
+                [UUID(str(tipo_id)) for tipo_id in origenes],
+                [UUID(str(tipo_id)) for tipo_id in destinos],
+                [UUID(str(estado_id)) if estado_id is not None else None for estado_id in estados],
+            )
+        return int(status.split()[-1])
+
+    async def get_bloque_ids_with_types(self, tipo_ids: Sequence[str]) -> List[str]:
+        async with get_connection() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT DISTINCT bloque_id FROM juego_dioses.chunk_resumen
+                WHERE tipo_particula_id = ANY($1::uuid[]) AND cantidad > 0
+                """,
+                [UUID(str(tipo_id)) for tipo_id in tipo_ids],
+            )
+        return [str(row["bloque_id"]) for row in rows]
+
+    async def get_chunk_contents(self, bloque_id: str) -> Dict[Tuple[int, int, int], Dict[str, int]]:
+        async with get_connection() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT chunk_x, chunk_y, chunk_z, tipo_particula_id, cantidad
+                FROM juego_dioses.chunk_resumen
+                WHERE bloque_id = $1 AND cantidad > 0
+                """,
+                UUID(str(bloque_id)),
+            )
+        contents: Dict[Tuple[int, int, int], Dict[str, int]] = {}
+        for row in rows:
+            contents.setdefault((row[0], row[1], row[2]), {})[str(row[3])] = row[4]
+        return contents
+
+    async def get_bloque_extent(self, bloque_id: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        async with get_connection() as conn:
+            row = await conn.fetchrow(
+                """
+                SELECT ancho_metros, alto_metros, tamano_celda, profundidad_maxima, altura_maxima
+                FROM juego_dioses.bloques
+                WHERE id = $1
+                """,
+                UUID(str(bloque_id)),
+            )
+        if row is None:
+            return None
+        celdas_x = int(float(row["ancho_metros"]) / float(row["tamano_celda"]))
+        celdas_y = int(float(row["alto_metros"]) / float(row["tamano_celda"]))
+        return (
+            np.array([0, 0, row["profundidad_maxima"]], dtype=np.int64),
+            np.array([celdas_x - 1, celdas_y - 1, row["altura_maxima"]], dtype=np.int64),
+        )
+
+    async def get_liquid_particle_arrays(
+        self, bloque_id: str, chunks: np.ndarray, tipo_ids: Sequence[str], margen: int
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Dos lecturas por rangos de morton (como el viewport): los líquidos de la caja de los chunks y, con su caja
+        ampliada, las demás partículas (la mayoría de los chunks es suelo lejos del líquido, que no se lee).
+        Las filas de la caja fuera de los chunks pedidos se descartan.
+        """
+        chunks = np.asarray(chunks, dtype=np.int64).reshape(-1, 3)
+        empty = (
+            np.empty((0, 3), dtype=np.int32), np.empty(0, dtype=np.int32), np.empty(0), np.empty(0),
+        )
+        if not len(chunks):
+            return empty
+        size = VERSION_CHUNK_SIZE
+        tipo_uuids = [UUID(str(tipo_id)) for tipo_id in tipo_ids]
+        chunk_keys = np.unique(morton_codes(chunks))
+
+        def in_chunks(coords: np.ndarray) -> np.ndarray:
+            return np.isin(morton_codes(np.floor_divide(coords, size)), chunk_keys)
+
+        async with get_connection() as conn:
+            liquidos = await self._fetch_liquid_box(
+                conn, bloque_id, chunks.min(axis=0) * size, chunks.max(axis=0) * size + size - 1, tipo_uuids, True
+            )
+            liquidos = tuple(array[in_chunks(liquidos[0])] for array in liquidos)
+            if not len(liquidos[0]):
+                return empty
+            lo = np.maximum(liquidos[0].min(axis=0).astype(np.int64) - margen, chunks.min(axis=0) * size)
+            hi = np.minimum(liquidos[0].max(axis=0).astype(np.int64) + margen, chunks.max(axis=0) * size + size - 1)
+            hi[2] = liquidos[0][:, 2].max()
+            resto = await self._fetch_liquid_box(conn, bloque_id, lo, hi, tipo_uuids, False)
+        resto = tuple(array[in_chunks(resto[0])] for array in resto)
+        return tuple(np.concatenate([a, b]) for a, b in zip(liquidos, resto))
+
+    @staticmethod
+    async def _fetch_liquid_box(
+        conn, bloque_id: str, lo: np.ndarray, hi: np.ndarray, tipo_uuids: List[UUID], liquidos: bool
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Líquidos (o las demás partículas) no extraídos de la caja [lo, hi]: coords, índice de tipo, cantidad, temperatura."""
+        ranges = morton_ranges(ParticleViewportQuery.model_construct(
+            x_min=int(lo[0]), x_max=int(hi[0]), y_min=int(lo[1]), y_max=int(hi[1]), z_min=int(lo[2]), z_max=int(hi[2]),
+        ))
+        rows = await conn.fetch(
+            _LIQUID_BOX_SQL,
+            UUID(str(bloque_id)),
+            [r[0] for r in ranges],
+            [r[1] for r in ranges],
+            int(lo[0]), int(hi[0]), int(lo[1]), int(hi[1]), int(lo[2]), int(hi[2]),
+            tipo_uuids,
+            liquidos,
+        )
+        n = len(rows)
+        coords = np.array([(row[0], row[1], row[2]) for row in rows], dtype=np.int32).reshape(-1, 3)
+        tipo = np.fromiter((row[3] for row in rows), dtype=np.int32, count=n)
+        cantidad = np.fromiter((row[4] for row in rows), dtype=np.float64, count=n)
+        temperatura = np.fromiter((row[5] for row in rows), dtype=np.float64, count=n)
+        return coords, tipo, cantidad, temperatura
+
+    async def write_liquid_cells(
+        self,
+        bloque_id: str,
+        coords: np.ndarray,
+        tipos: Sequence[str],
+        estados: Sequence[str],
+        cantidades: np.ndarray,
+        temperaturas: np.ndarray,
+    ) -> int:
+        """DELETE de las celdas secas y un INSERT ... ON CONFLICT para el resto, en una transacción."""
+        coords = np.asarray(coords, dtype=np.int64).reshape(-1, 3)
+        if not len(coords):
+            return 0
+        cantidades = np.round(np.asarray(cantidades, dtype=np.float64), 4)
+        temperaturas = np.round(np.asarray(temperaturas, dtype=np.float64), 2)
+        tipos = np.array([UUID(str(tipo_id)) for tipo_id in tipos], dtype=object)
+        estados = np.array([UUID(str(estado_id)) for estado_id in estados], dtype=object)
+        secas = cantidades <= 0
+        bloque_uuid = UUID(str(bloque_id))
+        total = 0
+        async with get_connection() as conn:
+            async with conn.transaction():
+                if secas.any():
+                    status = await conn.execute(
+                        _LIQUID_DELETE_SQL,
+                        bloque_uuid,
+                        coords[secas, 0].tolist(),
+                        coords[secas, 1].tolist(),
+                        coords[secas, 2].tolist(),
+                        tipos[secas].tolist(),
+                    )
+                    total += int(status.split()[-1])
+                llenas = ~secas
+                if llenas.any():
+                    status = await conn.execute(
+                        _LIQUID_UPSERT_SQL,
+                        bloque_uuid,
+                        coords[llenas, 0].tolist(),
+                        coords[llenas, 1].tolist(),
+                        coords[llenas, 2].tolist(),
+                        tipos[llenas].tolist(),
+                        estados[llenas].tolist(),
+                        cantidades[llenas].tolist(),
+                        temperaturas[llenas].tolist(),
+                    )
+                    total += int(status.split()[-1])
+        return total
+
     async def get_particles_near(
         self,
         bloque_id: str,
@@ -185,7 +1027,9 @@ class PostgresParticleRepository(IParticleRepository):
                 FROM juego_dioses.particulas p
                 JOIN juego_dioses.tipos_particulas tp ON p.tipo_particula_id = tp.id
                 WHERE p.bloque_id = $1
-                AND ABS(p.celda_x - $2) <= $5 AND ABS(p.celda_y - $3) <= $5 AND ABS(p.celda_z - $4) <= $5
+                AND p.celda_x BETWEEN $2::int - $5::int AND $2::int + $5::int
+                AND p.celda_y BETWEEN $3::int - $5::int AND $3::int + $5::int
+                AND p.celda_z BETWEEN $4::int - $5::int AND $4::int + $5::int
                 AND (POWER(p.celda_x - $2, 2) + POWER(p.celda_y - $3, 2) + POWER(p.celda_z - $4, 2)) <= POWER($5, 2)
                 ORDER BY POWER(p.celda_x - $2, 2) + POWER(p.celda_y - $3, 2) + POWER(p.celda_z - $4, 2)
                 """,
@@ -197,11 +1041,79 @@ class PostgresParticleRepository(IParticleRepository):
             )
             return [dict(row) for row in rows]
 
-    async def get_particle_type_by_name(self, nombre: str) -> Optional[dict]:
-        """SELECT * FROM juego_dioses.tipos_particulas WHERE nombre = $1; devuelve fila como dict o None."""
+    async def get_particles_near_many(
+        self,
+        bloque_id: str,
+        puntos: Sequence[Tuple[float, float, float]],
+        radio: float,
+        tipos: Optional[Sequence[str]] = None,
+    ) -> ParticleNeighbours:
+        """
+        Una consulta por los chunks de VERSION_CHUNK_SIZE³ que tocan las esferas (rangos del índice por posición,
+        sin POWER por fila); la distancia se filtra en numpy con una grilla uniforme (neighbours.py).
+        """
+        points = np.asarray(puntos, dtype=np.float64).reshape(-1, 3)
+        chunks = chunks_for_points(points, radio, VERSION_CHUNK_SIZE)
+        tipo_ids = None
+        if tipos is not None:
+            snapshot = await particle_catalogue.get()
+            tipo_ids = [row["id"] for row in map(snapshot.type_by_name, tipos) if row is not None]
+        rows = []
+        if len(chunks) and tipo_ids != []:
+            async with get_connection() as conn:
+                rows = await conn.fetch(
+                    """
+                    SELECT p.celda_x, p.celda_y, p.celda_z, p.tipo_particula_id,
+                           COALESCE(p.temperatura, 20.0)::real AS temperatura
+                    FROM unnest($2::int[], $3::int[], $4::int[]) AS c(chunk_x, chunk_y, chunk_z)
+                    JOIN LATERAL (
+                        SELECT celda_x, celda_y, celda_z, tipo_particula_id, temperatura
+                        FROM juego_dioses.particulas
+                        WHERE bloque_id = $1 AND NOT extraida
+                          AND celda_x BETWEEN c.chunk_x * $5 AND c.chunk_x * $5 + $5 - 1
+                          AND celda_y BETWEEN c.chunk_y * $5 AND c.chunk_y * $5 + $5 - 1
+                          AND celda_z BETWEEN c.chunk_z * $5 AND c.chunk_z * $5 + $5 - 1
+                          AND ($6::uuid[] IS NULL OR tipo_particula_id = ANY($6))
+                    ) p ON true
+                    """,
+                    UUID(str(bloque_id)),
+                    chunks[:, 0].tolist(),
+                    chunks[:, 1].tolist(),
+                    chunks[:, 2].tolist(),
+                    VERSION_CHUNK_SIZE,
+                    tipo_ids,
+                )
+        palette: Dict[UUID, int] = {}
+        coords = np.array([(row[0], row[1], row[2]) for row in rows], dtype=np.int64).reshape(-1, 3)
+        tipo = np.fromiter((palette.setdefault(row[3], len(palette)) for row in rows), dtype=np.uint16, count=len(rows))
+        temperatura = np.fromiter((row[4] for row in rows), dtype=np.float32, count=len(rows))
+        point_idx, cand_idx, d2 = neighbour_pairs(points, radio, coords)
+        return build_neighbours(len(points), point_idx, cand_idx, d2, coords, tipo, temperatura, list(palette))
+
+    async def get_surface_type_name(self, bloque_id: str, celda_x: int, celda_y: int) -> Optional[str]:
+        """Tipo de la columna en alturas_terreno (una lectura por clave primaria); nombre desde el catálogo."""
         async with get_connection() as conn:
-            row = await conn.fetchrow(
-                "SELECT * FROM juego_dioses.tipos_particulas WHERE nombre = $1",
-                nombre,
-            )
-            return dict(row) if row else None
+            tipo_id = await conn.fetchval("""
+                SELECT tipo_particula_id
+                FROM juego_dioses.alturas_terreno
+                WHERE bloque_id = $1 AND celda_x = $2 AND celda_y = $3
+            """, UUID(str(bloque_id)), celda_x, celda_y)
+        if tipo_id is None:
+            return None
+        tipo = (await particle_catalogue.get()).type_by_id(tipo_id)
+        return tipo["nombre"] if tipo else None
+
+    async def get_surface_types(self, bloque_id: str) -> Tuple[np.ndarray, List[UUID]]:
+        """Filas de alturas_terreno del bloque."""
+        async with get_connection() as conn:
+            rows = await conn.fetch("""
+                SELECT celda_x, celda_y, tipo_particula_id
+                FROM juego_dioses.alturas_terreno
+                WHERE bloque_id = $1
+            """, UUID(str(bloque_id)))
+        columnas = np.array([(row[0], row[1]) for row in rows], dtype=np.int32).reshape(-1, 2)
+        return columnas, [row[2] for row in rows]
+
+    async def get_particle_type_by_name(self, nombre: str) -> Optional[dict]:
+        """Fila de tipos_particulas por nombre desde el catálogo en memoria (dict compartido: no modificarlo) o None."""
+        return (await particle_catalogue.get()).type_by_name(nombre)
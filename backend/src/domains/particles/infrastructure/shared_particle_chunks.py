@@ -0,0 +1,115 @@
+"""
+Segundo nivel de la caché de chunks: payloads de chunks en la caché compartida entre workers (src/cache).
+
+Clave por chunk: {prefix}:particulas:{bloque}:{cx}:{cy}:{cz}:v{version}, con la versión de chunk_versiones
+(cambia con cualquier escritura del chunk y con cambios del catálogo), así que un worker nunca lee un chunk
+viejo y no hace falta borrar claves. Requiere PARTICLES_CHUNK_SIZE == VERSION_CHUNK_SIZE (40).
+El payload es JSON (orjson) con una fila por partícula en el orden de PARTICLE_FIELDS.
+Además conecta la caché de chunks en proceso con el canal pub/sub: sus invalidaciones se publican y las de otros
+workers se aplican localmente.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional
+from uuid import UUID
+
+import orjson
+
+from src.cache import SharedCache
+from src.domains.particles.infrastructure.particle_chunk_cache import (
+    ChunkKey,
+    ParticleChunkCache,
+    particle_chunk_cache,
+)
+from src.domains.particles.infrastructure.postgres_particle_repository import VERSION_CHUNK_SIZE
+from src.domains.particles.schemas import ParticleResponse
+from src.domains.shared.orjson_response import orjson_dumps
+from src.domains.shared.schemas import trusted_model
+
+PARTICLE_FIELDS = tuple(ParticleResponse.model_fields)
+
+_ID_INDEX = PARTICLE_FIELDS.index("id")
+# UUID que se repiten entre partículas del chunk (se parsean una vez por valor)
+_SHARED_UUID_INDICES = tuple(
+    PARTICLE_FIELDS.index(field)
+    for field in ("bloque_id", "tipo_particula_id", "estado_materia_id", "agrupacion_id", "creado_por")
+)
+_DATETIME_INDICES = tuple(PARTICLE_FIELDS.index(field) for field in ("creado_en", "modificado_en"))
+
+
+def encode_chunk(particles: List[ParticleResponse]) -> bytes:
+    """Partículas del chunk → filas JSON (valores en el orden de PARTICLE_FIELDS)."""
+    return orjson_dumps([[p.__dict__[field] for field in PARTICLE_FIELDS] for p in particles])
+
+
+def decode_chunk(payload: bytes) -> List[ParticleResponse]:
+    """Inverso de encode_chunk; UUID y datetime repetidos (tipo, estado, bloque, fechas del seed) se parsean una vez."""
+    parsed: Dict[str, object] = {}
+    particles: List[ParticleResponse] = []
+    for row in orjson.loads(payload):
+        row[_ID_INDEX] = UUID(row[_ID_INDEX])
+        for i in _SHARED_UUID_INDICES:
+            value = row[i]
+            if value is not None:
+                result = parsed.get(value)
+                if result is None:
+                    result = parsed[value] = UUID(value)
+                row[i] = result
+        for i in _DATETIME_INDICES:
+            value = row[i]
+            result = parsed.get(value)
+            if result is None:
+                result = parsed[value] = datetime.fromisoformat(value)
+            row[i] = result
+        particles.append(trusted_model(ParticleResponse, dict(zip(PARTICLE_FIELDS, row))))
+    return particles
+
+
+class SharedParticleChunks:
+    """Lee y escribe chunks en la caché compartida."""
+
+    def __init__(self, shared: SharedCache):
+        self._shared = shared
+
+    def _chunk_key(self, key: ChunkKey, version: int) -> str:
+        bloque, cx, cy, cz = key
+        return self._shared.key("particulas", bloque, cx, cy, cz, version=version)
+
+    async def get_many(self, versions: Dict[ChunkKey, int]) -> Dict[ChunkKey, List[ParticleResponse]]:
+        """Chunks encontrados para esas versiones (los que faltan no aparecen en el resultado)."""
+        keys = list(versions)
+        payloads = await self._shared.get_many([self._chunk_key(key, versions[key]) for key in keys])
+        return {key: decode_chunk(payload) for key, payload in zip(keys, payloads) if payload is not None}
+
+    async def put_many(
+        self, versions: Dict[ChunkKey, int], chunks: Dict[ChunkKey, List[ParticleResponse]]
+    ) -> None:
+        """Guarda los chunks bajo la versión leída antes de consultarlos."""
+        if chunks:
+            await self._shared.set_many(
+                {self._chunk_key(key, versions[key]): encode_chunk(particles) for key, particles in chunks.items()}
+            )
+
+
+_shared_particle_chunks: Optional[SharedParticleChunks] = None
+
+
+def connect_shared_particle_chunks(
+    shared: SharedCache, cache: ParticleChunkCache = particle_chunk_cache
+) -> Optional[SharedParticleChunks]:
+    """
+    Conecta la caché de chunks del proceso con la compartida (lifespan de la app): publica sus invalidaciones y
+    aplica las de otros workers.
+    Devuelve None (sin segundo nivel de chunks) si el tamaño de chunk no coincide con chunk_versiones.
+    """
+    global _shared_particle_chunks
+    cache.listeners.append(shared.publish_soon)
+    for tipo in ("particle_chunks", "particle_temperatures", "particle_bloque", "particle_clear"):
+        shared.on(tipo, cache.apply_invalidation)
+    _shared_particle_chunks = SharedParticleChunks(shared) if cache.chunk_size == VERSION_CHUNK_SIZE else None
+    return _shared_particle_chunks
+
+
+def get_shared_particle_chunks() -> Optional[SharedParticleChunks]:
+    """Segundo nivel de chunks del proceso; None si la caché compartida no está conectada."""
+    return _shared_particle_chunks
+
@@ -0,0 +1,418 @@
+"""
+Decorador de IParticleRepository sobre el estado en memoria (VoxelStore).
+
+Vecindad (get_particles_near), temperatura (get_particles_with_thermal_inertia, update_particle_temperature_at,
+update_particle_temperatures_at)
+y, si los chunks ya están residentes, count_by_viewport y get_types_in_viewport se resuelven con los arrays del
+store; las temperaturas escritas se guardan en Postgres en el próximo VoxelStore.flush().
+El store no guarda IDs ni filas completas: las lecturas de partículas de viewport (ParticleResponse) siguen en
+el repositorio envuelto (normalmente CachedParticleRepository) y el resto de métodos delega.
+"""
+import math
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+
+from src.config import PARTICLES_CONFIG
+from src.domains.particles.application.ports.particle_repository import IParticleRepository
+from src.domains.particles.infrastructure.particle_catalogue import ParticleCatalogue, particle_catalogue
+from src.domains.particles.infrastructure.voxel_store import AIRE, VoxelStore, voxel_store
+from src.domains.particles.neighbours import (
+    ParticleNeighbours,
+    build_neighbours,
+    chunks_for_points,
+    neighbour_pairs,
+)
+from src.domains.particles.schemas import (
+    ParticleCatalogueResponse,
+    ParticleResponse,
+    ParticleTombstone,
+    ParticleTypeResponse,
+    ParticleViewportQuery,
+)
+
+
+_INT32_MIN, _INT32_MAX = -(2 ** 31), 2 ** 31 - 1
+
+
+def _celsius(temperaturas: np.ndarray) -> List[float]:
+    """Temperaturas float32 del store como floats de 2 decimales (los de la columna NUMERIC)."""
+    return np.round(temperaturas.astype(np.float64), 2).tolist()
+
+
+class VoxelParticleRepository(IParticleRepository):
+    """Lecturas de vecindad y temperatura desde el VoxelStore; escrituras de temperatura diferidas."""
+
+    def __init__(
+        self,
+        inner: IParticleRepository,
+        store: VoxelStore = voxel_store,
+        catalogue: ParticleCatalogue = particle_catalogue,
+    ):
+        self._inner = inner
+        self._store = store
+        self._catalogue = catalogue
+
+    @property
+    def store(self) -> VoxelStore:
+        return self._store
+
+    async def bloque_exists(self, bloque_id: UUID) -> bool:
+        return await self._inner.bloque_exists(bloque_id)
+
+    async def get_types_in_viewport(
+        self, bloque_id: UUID, viewport: ParticleViewportQuery
+    ) -> List[ParticleTypeResponse]:
+        """Desde el store si todos los chunks del viewport están residentes; si no delega."""
+        cells = self._resident_cells(bloque_id, viewport)
+        if cells is None:
+            return await self._inner.get_types_in_viewport(bloque_id, viewport)
+        tipo_ids = [self._store.tipo_id(int(index)) for index in np.unique(cells[1])]
+        return (await self._catalogue.get()).type_responses(tipo_ids)
+
+    async def get_by_viewport(
+        self, bloque_id: UUID, viewport: ParticleViewportQuery
+    ) -> List[ParticleResponse]:
+        return await self._inner.get_by_viewport(bloque_id, viewport)
+
+    async def get_by_viewports(
+        self, bloque_id: UUID, viewports: List[ParticleViewportQuery]
+    ) -> List[List[ParticleResponse]]:
+        return await self._inner.get_by_viewports(bloque_id, viewports)
+
+    async def get_surface_by_viewport(
+        self, bloque_id: UUID, viewport: ParticleViewportQuery
+    ) -> List[ParticleResponse]:
+        return await self._inner.get_surface_by_viewport(bloque_id, viewport)
+
+    async def get_lod_by_viewport(
+        self, bloque_id: UUID, viewport: ParticleViewportQuery, lod: int
+    ) -> List[ParticleResponse]:
+        return await self._inner.get_lod_by_viewport(bloque_id, viewport, lod)
+
+    def stream_by_viewport(
+        self, bloque_id: UUID, viewport: ParticleViewportQuery, batch_size: int
+    ) -> AsyncIterator[List[ParticleResponse]]:
+        return self._inner.stream_by_viewport(bloque_id, viewport, batch_size)
+
+    async def count_by_viewport(
+        self, bloque_id: UUID, viewport: ParticleViewportQuery
+    ) -> int:
+        """Cuenta en el store si todos los chunks del viewport están residentes; si no delega."""
+        cells = self._resident_cells(bloque_id, viewport)
+        if cells is None:
+            return await self._inner.count_by_viewport(bloque_id, viewport)
+        return int(cells[1].size)
+
+    async def estimate_count_by_viewport(
+        self, bloque_id: UUID, viewport: ParticleViewportQuery
+    ) -> int:
+        return await self._inner.estimate_count_by_viewport(bloque_id, viewport)
+
+    async def get_viewport_version(
+        self, bloque_id: UUID, viewport: ParticleViewportQuery
+    ) -> Optional[str]:
+        return await self._inner.get_viewport_version(bloque_id, viewport)
+
+    async def get_chunk_versions(
+        self, bloque_id: UUID, chunks: List[Tuple[int, int, int]]
+    ) -> Dict[Tuple[int, int, int], int]:
+        return await self._inner.get_chunk_versions(bloque_id, chunks)
+
+    async def get_changes_by_viewport(
+        self, bloque_id: UUID, viewport: ParticleViewportQuery, since: int
+    ) -> Tuple[List[ParticleResponse], List[ParticleTombstone]]:
+        return await self._inner.get_changes_by_viewport(bloque_id, viewport, since)
+
+    async def get_world_version(self, bloque_id: UUID) -> int:
+        return await self._inner.get_world_version(bloque_id)
+
+    async def get_type_opacities(self) -> Dict[UUID, float]:
+        return await self._inner.get_type_opacities()
+
+    async def get_catalogue(self) -> ParticleCatalogueResponse:
+        return await self._inner.get_catalogue()
+
+    async def get_by_id(
+        self, bloque_id: UUID, particle_id: UUID
+    ) -> Optional[ParticleResponse]:
+        return await self._inner.get_by_id(bloque_id, particle_id)
+
+    async def get_distinct_bloque_ids_for_temperature_update(self) -> List[str]:
+        return await self._inner.get_distinct_bloque_ids_for_temperature_update()
+
+    async def get_particles_with_thermal_inertia(
+        self, bloque_id: str, inercia_minima: float = 0.1
+    ) -> List[dict]:
+        """
+        Todas las partículas del bloque cargadas en el store (valida versiones con chunk_versiones); inercia
+        desde el catálogo. Sin id: se actualizan con update_particle_temperature_at.
+        """
+        chunks = await self._store.load_bloque(bloque_id)
+        inercias = await self._inertia_lookup()
+        result: List[dict] = []
+        for chunk in chunks.values():
+            if chunk.empty:
+                continue
+            inercia = inercias[chunk.tipo]
+            z, y, x = np.nonzero((chunk.tipo != AIRE) & (inercia > inercia_minima))
+            x0, y0, z0 = chunk.origin
+            for cx, cy, cz, temperatura, valor in zip(
+                (x + x0).tolist(), (y + y0).tolist(), (z + z0).tolist(),
+                _celsius(chunk.temperatura[z, y, x]), inercia[z, y, x].tolist(),
+            ):
+                result.append({
+                    "celda_x": float(cx),
+                    "celda_y": float(cy),
+                    "celda_z": float(cz),
+                    "temperatura": temperatura,
+                    "inercia_termica": valor,
+                })
+        return result
+
+    async def get_thermal_particle_arrays(
+        self, bloque_id: str, inercia_minima: float = 0.1
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Como get_particles_with_thermal_inertia pero sin armar dicts (numpy sobre cada chunk)."""
+        chunks = await self._store.load_bloque(bloque_id)
+        inercias = await self._inertia_lookup()
+        conductividades = await self._conductivity_lookup()
+        coords: List[np.ndarray] = []
+        temperaturas: List[np.ndarray] = []
+        valores: List[np.ndarray] = []
+        conductividad: List[np.ndarray] = []
+        for chunk in chunks.values():
+            if chunk.empty:
+                continue
+            inercia = inercias[chunk.tipo]
+            z, y, x = np.nonzero((chunk.tipo != AIRE) & (inercia > inercia_minima))
+            x0, y0, z0 = chunk.origin
+            coords.append(np.stack([x + x0, y + y0, z + z0], axis=1).astype(np.int32))
+            temperaturas.append(np.round(chunk.temperatura[z, y, x].astype(np.float64), 2))
+            valores.append(inercia[z, y, x])
+            conductividad.append(conductividades[chunk.tipo[z, y, x]])
+        if not coords:
+            return np.empty((0, 3), dtype=np.int32), np.empty(0), np.empty(0), np.empty(0)
+        return (
+            np.concatenate(coords), np.concatenate(temperaturas), np.concatenate(valores),
+            np.concatenate(conductividad),
+        )
+
+    async def get_particle_arrays_by_type(
+        self, bloque_id: str, tipos: Sequence[str]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Celdas de los tipos pedidos en los chunks del bloque (cargando los que falten)."""
+        chunks = await self._store.load_bloque(bloque_id)
+        snapshot = await self._catalogue.get()
+        nombres = {t.lower() for t in tipos}
+        filas = [row for row in snapshot.tipos if (row.get("nombre") or "").lower() in nombres]
+        tipo_indices = np.array([self._store.tipo_index(row["id"]) for row in filas], dtype=np.uint16)
+        conductividades = await self._conductivity_lookup()
+        everything = (_INT32_MIN, _INT32_MAX) * 3
+        coords, tipo, _, temperatura = self._store.cells_in_box(chunks, *everything, solo_tipos=tipo_indices)
+        return coords, np.round(temperatura.astype(np.float64), 2), conductividades[tipo]
+
+    async def update_particle_temperature(
+        self, particula_id: str, temperatura: float
+    ) -> None:
+        """Por ID escribe directo; el store nota el cambio de versión del chunk en el próximo load_bloque."""
+        await self._inner.update_particle_temperature(particula_id, temperatura)
+
+    async def update_particle_temperature_at(
+        self, bloque_id: str, celda_x: int, celda_y: int, celda_z: int, temperatura: float
+    ) -> None:
+        """En el store si la celda está residente (se escribe en el próximo flush); si no, directo al envuelto."""
+        if not self._store.set_temperature(bloque_id, celda_x, celda_y, celda_z, temperatura):
+            await self._inner.update_particle_temperature_at(bloque_id, celda_x, celda_y, celda_z, temperatura)
+
+    async def update_particle_temperatures_at(
+        self,
+        bloque_id: str,
+        coords: np.ndarray,
+        temperaturas: np.ndarray,
+        anteriores: Optional[np.ndarray] = None,
+    ) -> int:
+        """
+        Las celdas de chunks residentes se marcan sucias en el store (cambio >= TEMPERATURE_EPSILON) y se escriben en
+        el próximo flush; las demás van en lote al envuelto.
+        """
+        coords = np.asarray(coords).reshape(-1, 3)
+        temperaturas = np.asarray(temperaturas, dtype=np.float64)
+        handled, changed = self._store.set_cell_temperatures(
+            bloque_id, coords, temperaturas, PARTICLES_CONFIG["TEMPERATURE_EPSILON"]
+        )
+        rest = ~handled
+        if rest.any():
+            changed += await self._inner.update_particle_temperatures_at(
+                bloque_id, coords[rest], temperaturas[rest], None if anteriores is None else np.asarray(anteriores)[rest]
+            )
+        return changed
+
+    async def get_transition_particle_arrays(
+        self, bloque_id: str, tipo_ids: Sequence[str]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """El store no guarda integridad: se guarda lo pendiente (flush) y se lee del envuelto."""
+        await self._store.flush()
+        return await self._inner.get_transition_particle_arrays(bloque_id, tipo_ids)
+
+    async def get_retyped_particle_arrays(
+        self, bloque_id: str, since: int, tipo_ids: Sequence[str]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Se guarda lo pendiente (flush) para leer las temperaturas al día del envuelto."""
+        await self._store.flush()
+        return await self._inner.get_retyped_particle_arrays(bloque_id, since, tipo_ids)
+
+    async def update_particle_types_at(
+        self,
+        bloque_id: str,
+        coords: np.ndarray,
+        origenes: Sequence[str],
+        destinos: Sequence[str],
+        estados: Sequence[Optional[str]],
+    ) -> int:
+        """Escribe en el envuelto y descarta del store los chunks tocados (se recargan con los tipos nuevos)."""
+        changed = await self._inner.update_particle_types_at(bloque_id, coords, origenes, destinos, estados)
+        if changed:
+            chunks = np.unique(np.asarray(coords, dtype=np.int64).reshape(-1, 3) // self._store.chunk_size, axis=0)
+            self._store.invalidate_chunks(bloque_id, [tuple(chunk) for chunk in chunks.tolist()])
+        return changed
+
+    async def get_bloque_ids_with_types(self, tipo_ids: Sequence[str]) -> List[str]:
+        return await self._inner.get_bloque_ids_with_types(tipo_ids)
+
+    async def get_chunk_contents(self, bloque_id: str) -> Dict[Tuple[int, int, int], Dict[str, int]]:
+        return await self._inner.get_chunk_contents(bloque_id)
+
+    async def get_bloque_extent(self, bloque_id: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        return await self._inner.get_bloque_extent(bloque_id)
+
+    async def get_liquid_particle_arrays(
+        self, bloque_id: str, chunks: np.ndarray, tipo_ids: Sequence[str], margen: int
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """El store no guarda cantidad: se guarda lo pendiente (flush) y se lee del envuelto."""
+        await self._store.flush()
+        return await self._inner.get_liquid_particle_arrays(bloque_id, chunks, tipo_ids, margen)
+
+    async def write_liquid_cells(
+        self,
+        bloque_id: str,
+        coords: np.ndarray,
+        tipos: Sequence[str],
+        estados: Sequence[str],
+        cantidades: np.ndarray,
+        temperaturas: np.ndarray,
+    ) -> int:
+        """Escribe en el envuelto y descarta del store los chunks tocados (celdas nuevas y borradas)."""
+        written = await self._inner.write_liquid_cells(bloque_id, coords, tipos, estados, cantidades, temperaturas)
+        if written:
+            chunks = np.unique(np.asarray(coords, dtype=np.int64).reshape(-1, 3) // self._store.chunk_size, axis=0)
+            self._store.invalidate_chunks(bloque_id, [tuple(chunk) for chunk in chunks.tolist()])
+        return written
+
+    async def get_particles_near(
+        self,
+        bloque_id: str,
+        celda_x: float,
+        celda_y: float,
+        celda_z: float,
+        radio: int = 1,
+    ) -> List[dict]:
+        """
+        Partículas no extraídas en radio euclidiano, desde los chunks que cubren la esfera (cargando los que
+        falten); ordenadas por distancia. Dicts con tipo_nombre, tipo_fisico, temperatura, celda_* e IDs de tipo y estado.
+        """
+        box = (
+            math.ceil(celda_x - radio), math.floor(celda_x + radio),
+            math.ceil(celda_y - radio), math.floor(celda_y + radio),
+            math.ceil(celda_z - radio), math.floor(celda_z + radio),
+        )
+        chunks = await self._store.load(bloque_id, self._store.chunk_keys_for_box(bloque_id, *box))
+        coords, tipos, estados, temperaturas = self._store.cells_in_box(chunks, *box)
+        distancia = ((coords - np.array([celda_x, celda_y, celda_z])) ** 2).sum(axis=1)
+        inside = np.nonzero(distancia <= radio ** 2)[0]
+        order = inside[np.argsort(distancia[inside], kind="stable")]
+        snapshot = await self._catalogue.get()
+        result: List[dict] = []
+        for (cx, cy, cz), tipo, estado, temperatura in zip(
+            coords[order].tolist(), tipos[order].tolist(), estados[order].tolist(), _celsius(temperaturas[order])
+        ):
+            tipo_id = self._store.tipo_id(tipo)
+            row = snapshot.type_by_id(tipo_id) or {}
+            result.append({
+                "bloque_id": bloque_id,
+                "celda_x": cx,
+                "celda_y": cy,
+                "celda_z": cz,
+                "tipo_particula_id": tipo_id,
+                "estado_materia_id": self._store.estado_id(estado),
+                "temperatura": temperatura,
+                "tipo_nombre": row.get("nombre"),
+                "tipo_fisico": row.get("tipo_fisico"),
+            })
+        return result
+
+    async def get_particles_near_many(
+        self,
+        bloque_id: str,
+        puntos: Sequence[Tuple[float, float, float]],
+        radio: float,
+        tipos: Optional[Sequence[str]] = None,
+    ) -> ParticleNeighbours:
+        """
+        Desde los chunks que tocan las esferas (cargando los que falten): celdas de los tipos pedidos indexadas
+        en una grilla uniforme (neighbours.py). tipo_ids del resultado es la paleta del store.
+        """
+        points = np.asarray(puntos, dtype=np.float64).reshape(-1, 3)
+        bloque = str(bloque_id)
+        chunk_coords = chunks_for_points(points, radio, self._store.chunk_size)
+        keys = [(bloque, cx, cy, cz) for cx, cy, cz in chunk_coords.tolist()]
+        tipo_indices = None
+        if tipos is not None:
+            snapshot = await self._catalogue.get()
+            tipo_indices = np.array(
+                [self._store.tipo_index(row["id"]) for row in map(snapshot.type_by_name, tipos) if row is not None],
+                dtype=np.uint16,
+            )
+        chunks = await self._store.load(bloque, keys) if keys else {}
+        everything = (_INT32_MIN, _INT32_MAX) * 3
+        coords, tipo, _, temperatura = self._store.cells_in_box(chunks, *everything, solo_tipos=tipo_indices)
+        point_idx, cand_idx, d2 = neighbour_pairs(points, radio, coords)
+        return build_neighbours(
+            len(points), point_idx, cand_idx, d2, coords, tipo, temperatura, self._store.tipo_ids()
+        )
+
+    async def get_surface_type_name(self, bloque_id: str, celda_x: int, celda_y: int) -> Optional[str]:
+        return await self._inner.get_surface_type_name(bloque_id, celda_x, celda_y)
+
+    async def get_surface_types(self, bloque_id: str) -> Tuple[np.ndarray, List[UUID]]:
+        return await self._inner.get_surface_types(bloque_id)
+
+    async def get_particle_type_by_name(self, nombre: str) -> Optional[dict]:
+        return await self._inner.get_particle_type_by_name(nombre)
+
+    # --- Internos ---
+
+    async def _inertia_lookup(self) -> np.ndarray:
+        """Inercia térmica por índice de tipo del store (0 para AIRE y tipos sin valor)."""
+        snapshot = await self._catalogue.get()
+        return self._store.tipo_lookup({
+            str(row["id"]): float(row["inercia_termica"])
+            for row in snapshot.tipos if row.get("inercia_termica") is not None
+        })
+
+    async def _conductivity_lookup(self) -> np.ndarray:
+        """Conductividad térmica por índice de tipo del store (1 para tipos sin valor, como COALESCE en Postgres)."""
+        snapshot = await self._catalogue.get()
+        return self._store.tipo_lookup({
+            str(row["id"]): float(row["conductividad_termica"])
+            for row in snapshot.tipos if row.get("conductividad_termica") is not None
+        }, default=1.0)
+
+    def _resident_cells(self, bloque_id, viewport: ParticleViewportQuery):
+        """Celdas del viewport (ver VoxelStore.cells_in_box) si todos sus chunks están residentes; si no None."""
+        box = (viewport.x_min, viewport.x_max, viewport.y_min, viewport.y_max, viewport.z_min, viewport.z_max)
+        chunks = self._store.resident(self._store.chunk_keys_for_box(bloque_id, *box))
+        if chunks is None:
+            return None
+        return self._store.cells_in_box(chunks, *box)
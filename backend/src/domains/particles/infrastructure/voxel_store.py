@@ -0,0 +1,656 @@
+"""
+Estado del mundo en memoria: chunks densos de celdas (VoxelStore).
+
+Cada chunk de VERSION_CHUNK_SIZE³ celdas (los mismos de chunk_versiones y de la caché de viewport) se guarda como
+arrays numpy densos indexados [z, y, x] en coordenadas locales: tipo (uint16, índice en la paleta del store;
+AIRE = 0 para celdas vacías o con la partícula extraída), estado (uint16, índice en la paleta de estados),
+temperatura (float32) y flags (uint8: FLAG_NUCLEO, FLAG_AGRUPACION). Los chunks sin partículas no guardan arrays.
+Los chunks se cargan bajo demanda desde Postgres junto con su versión de chunk_versiones (misma transacción) y se
+descartan por LRU cuando superan PARTICLES_VOXEL_STORE_MAX_MB.
+Las escrituras (temperatura) marcan celdas sucias; flush() las escribe por posición (write_temperatures, en sentencias
+de PARTICLES_TEMPERATURE_WRITE_BATCH filas) dentro de una transacción y las aplica a la caché de viewport de este
+proceso. Solo escribe las celdas de chunks que siguen en la versión en que se calcularon (las pendientes guardan la
+suya): si otra escritura cambió el chunk, la celda puede ser de otra partícula y se descartan. La escritura cambia la versión de los chunks en chunk_versiones: el store toma la nueva en la misma
+transacción y los demás workers descartan esos chunks (aviso particle_temperatures de la caché de chunks).
+Las invalidaciones de la caché de chunks (escrituras de este proceso y mensajes de otros workers, ver
+connect_voxel_store) descartan los chunks del store; lo sucio de un chunk descartado queda pendiente hasta el
+próximo flush. Postgres sigue siendo la copia durable: el store se puede vaciar sin perder más que lo pendiente.
+"""
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+
+from src.cache import SharedCache
+from src.config.particles_config import PARTICLES_TEMPERATURE_WRITE_BATCH, PARTICLES_VOXEL_STORE_MAX_MB
+from src.database.connection import get_connection
+from src.domains.particles.infrastructure.particle_chunk_cache import (
+    ChunkKey,
+    ParticleChunkCache,
+    particle_chunk_cache,
+)
+from src.domains.particles.infrastructure.postgres_particle_repository import VERSION_CHUNK_SIZE, write_temperatures
+
+logger = logging.getLogger(__name__)
+
+# Índice de tipo de las celdas sin partícula
+AIRE = 0
+
+FLAG_NUCLEO = 1
+FLAG_AGRUPACION = 2
+
+_INT32_MIN, _INT32_MAX = -(2 ** 31), 2 ** 31 - 1
+
+_VERSIONS_SQL = """
+    SELECT chunk_x, chunk_y, chunk_z, version
+    FROM juego_dioses.chunk_versiones
+    WHERE bloque_id = $1
+      AND chunk_x BETWEEN $2 AND $3 AND chunk_y BETWEEN $4 AND $5 AND chunk_z BETWEEN $6 AND $7
+"""
+
+_ROWS_SQL = """
+    SELECT celda_x, celda_y, celda_z, tipo_particula_id, estado_materia_id,
+           COALESCE(temperatura, 20.0)::real AS temperatura, es_nucleo, agrupacion_id IS NOT NULL AS agrupada
+    FROM juego_dioses.particulas
+    WHERE bloque_id = $1 AND NOT extraida
+      AND celda_x BETWEEN $2 AND $3 AND celda_y BETWEEN $4 AND $5 AND celda_z BETWEEN $6 AND $7
+"""
+
+# Bloquea las versiones de los chunks a escribir: lo que cambie entre la carga y el flush se detecta al comparar
+_LOCK_VERSIONS_SQL = """
+    SELECT v.chunk_x, v.chunk_y, v.chunk_z, v.version
+    FROM juego_dioses.chunk_versiones v
+    JOIN unnest($2::int[], $3::int[], $4::int[]) AS c(chunk_x, chunk_y, chunk_z)
+      ON v.chunk_x = c.chunk_x AND v.chunk_y = c.chunk_y AND v.chunk_z = c.chunk_z
+    WHERE v.bloque_id = $1
+    ORDER BY v.chunk_x, v.chunk_y, v.chunk_z
+    FOR UPDATE OF v
+"""
+
+Cells = Tuple[np.ndarray, np.ndarray]
+# Celdas sucias de un chunk: (chunk_x, chunk_y, chunk_z), versión del chunk en que se calcularon, coordenadas y
+# temperaturas (ver _flush_bloque)
+Dirty = Tuple[Tuple[int, int, int], int, np.ndarray, np.ndarray]
+
+
+class VoxelChunk:
+    """
+    Celdas de un chunk. tipo/estado/temperatura/flags son arrays (size, size, size) [z, y, x], o None si el chunk
+    no tiene partículas. version es la de chunk_versiones al cargarlo (o tras el último flush); sucias marca las
+    celdas con temperatura que todavía no está en Postgres (None si no hay ninguna).
+    """
+
+    __slots__ = ("origin", "version", "tipo", "estado", "temperatura", "flags", "sucias")
+
+    def __init__(
+        self,
+        origin: Tuple[int, int, int],
+        version: int,
+        tipo: Optional[np.ndarray] = None,
+        estado: Optional[np.ndarray] = None,
+        temperatura: Optional[np.ndarray] = None,
+        flags: Optional[np.ndarray] = None,
+    ):
+        self.origin = origin
+        self.version = version
+        self.tipo = tipo
+        self.estado = estado
+        self.temperatura = temperatura
+        self.flags = flags
+        self.sucias: Optional[np.ndarray] = None
+
+    @property
+    def empty(self) -> bool:
+        return self.tipo is None
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.tipo, self.estado, self.temperatura, self.flags, self.sucias)
+        return sum(a.nbytes for a in arrays if a is not None)
+
+
+class VoxelStore:
+    """Chunks densos por bloque con carga perezosa, LRU por memoria y escritura diferida de temperaturas."""
+
+    def __init__(
+        self,
+        chunk_size: int = VERSION_CHUNK_SIZE,
+        max_bytes: int = PARTICLES_VOXEL_STORE_MAX_MB * 1024 * 1024,
+        flush_batch: int = PARTICLES_TEMPERATURE_WRITE_BATCH,
+        cache: ParticleChunkCache = particle_chunk_cache,
+    ):
+        self.chunk_size = chunk_size
+        self.max_bytes = max_bytes
+        self.flush_batch = flush_batch
+        self._cache = cache
+        self._chunks: "OrderedDict[ChunkKey, VoxelChunk]" = OrderedDict()
+        self._bytes = 0
+        # Se incrementa en cada invalidación del bloque; una carga iniciada antes no se guarda
+        self._generations: Dict[str, int] = {}
+        # Temperaturas escritas en chunks ya descartados, con la versión del chunk: bloque -> [Dirty]
+        self._pendientes: Dict[str, List[Dirty]] = {}
+        # Paletas append-only: índice -> UUID (el 0 es el aire / sin estado)
+        self._tipo_ids: List[Optional[UUID]] = [None]
+        self._tipo_index: Dict[object, int] = {}
+        self._estado_ids: List[Optional[UUID]] = [None]
+        self._estado_index: Dict[object, int] = {}
+        self._flush_lock = asyncio.Lock()
+
+    # --- Paletas ---
+
+    def tipo_index(self, tipo_particula_id) -> int:
+        """Índice (>= 1) del tipo de partícula en la paleta del store (asignado la primera vez que se ve)."""
+        return _palette_index(self._tipo_index, self._tipo_ids, tipo_particula_id)
+
+    def estado_index(self, estado_materia_id) -> int:
+        return _palette_index(self._estado_index, self._estado_ids, estado_materia_id)
+
+    def tipo_id(self, index: int) -> Optional[UUID]:
+        """UUID del tipo con ese índice (None para AIRE)."""
+        return self._tipo_ids[index]
+
+    def estado_id(self, index: int) -> Optional[UUID]:
+        return self._estado_ids[index]
+
+    def tipo_ids(self) -> List[Optional[UUID]]:
+        """Copia de la paleta de tipos (índice -> UUID; None en AIRE)."""
+        return list(self._tipo_ids)
+
+    def tipo_lookup(self, values: Dict[str, float], default: float = 0.0) -> np.ndarray:
+        """
+        Tabla float64 índice de tipo -> values[str(tipo_id)] (default para tipos sin valor y para AIRE).
+        Para propiedades del catálogo sobre arrays de tipo: tabla[chunk.tipo].
+        """
+        table = np.full(len(self._tipo_ids), default, dtype=np.float64)
+        for index, tipo_id in enumerate(self._tipo_ids):
+            if tipo_id is not None:
+                value = values.get(str(tipo_id))
+                if value is not None:
+                    table[index] = value
+        return table
+
+    # --- Geometría ---
+
+    def chunk_key(self, bloque_id, celda_x: int, celda_y: int, celda_z: int) -> ChunkKey:
+        size = self.chunk_size
+        return (str(bloque_id), celda_x // size, celda_y // size, celda_z // size)
+
+    def chunk_keys_for_box(
+        self, bloque_id, x_min: int, x_max: int, y_min: int, y_max: int, z_min: int, z_max: int
+    ) -> List[ChunkKey]:
+        """Claves de los chunks que intersectan la caja (inclusiva)."""
+        size = self.chunk_size
+        bloque = str(bloque_id)
+        return [
+            (bloque, cx, cy, cz)
+            for cz in range(z_min // size, z_max // size + 1)
+            for cy in range(y_min // size, y_max // size + 1)
+            for cx in range(x_min // size, x_max // size + 1)
+        ]
+
+    def cells_in_box(
+        self,
+        chunks: Dict[ChunkKey, VoxelChunk],
+        x_min: int, x_max: int, y_min: int, y_max: int, z_min: int, z_max: int,
+        solo_tipos: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Celdas con partícula dentro de la caja, en los chunks dados (solo las de índices de tipo en solo_tipos, si se
+        indica): coordenadas (N, 3) int32 y tipo, estado y temperatura (N,) alineados. Orden por chunk y dentro de
+        cada chunk [z, y, x].
+        """
+        size = self.chunk_size
+        coords: List[np.ndarray] = []
+        tipos: List[np.ndarray] = []
+        estados: List[np.ndarray] = []
+        temperaturas: List[np.ndarray] = []
+        for chunk in chunks.values():
+            if chunk.empty:
+                continue
+            x0, y0, z0 = chunk.origin
+            lx0, lx1 = max(x_min - x0, 0), min(x_max - x0, size - 1)
+            ly0, ly1 = max(y_min - y0, 0), min(y_max - y0, size - 1)
+            lz0, lz1 = max(z_min - z0, 0), min(z_max - z0, size - 1)
+            if lx0 > lx1 or ly0 > ly1 or lz0 > lz1:
+                continue
+            window = (slice(lz0, lz1 + 1), slice(ly0, ly1 + 1), slice(lx0, lx1 + 1))
+            tipo = chunk.tipo[window]
+            z, y, x = np.nonzero(tipo if solo_tipos is None else np.isin(tipo, solo_tipos))
+            if not len(z):
+                continue
+            coords.append(np.stack([x + (x0 + lx0), y + (y0 + ly0), z + (z0 + lz0)], axis=1).astype(np.int32))
+            tipos.append(tipo[z, y, x])
+            estados.append(chunk.estado[window][z, y, x])
+            temperaturas.append(chunk.temperatura[window][z, y, x])
+        if not coords:
+            return (
+                np.empty((0, 3), dtype=np.int32), np.empty(0, dtype=np.uint16),
+                np.empty(0, dtype=np.uint16), np.empty(0, dtype=np.float32),
+            )
+        return np.concatenate(coords), np.concatenate(tipos), np.concatenate(estados), np.concatenate(temperaturas)
+
+    # --- Lectura ---
+
+    def get(self, key: ChunkKey) -> Optional[VoxelChunk]:
+        """Chunk residente (y lo marca como usado) o None."""
+        chunk = self._chunks.get(key)
+        if chunk is not None:
+            self._chunks.move_to_end(key)
+        return chunk
+
+    def resident(self, keys: Iterable[ChunkKey]) -> Optional[Dict[ChunkKey, VoxelChunk]]:
+        """Los chunks pedidos si están todos residentes; None si falta alguno (no carga nada)."""
+        result: Dict[ChunkKey, VoxelChunk] = {}
+        for key in keys:
+            chunk = self.get(key)
+            if chunk is None:
+                return None
+            result[key] = chunk
+        return result
+
+    async def load(self, bloque_id, keys: Iterable[ChunkKey]) -> Dict[ChunkKey, VoxelChunk]:
+        """
+        Chunk de cada clave; los que faltan se cargan en una consulta por la caja que los cubre (con sus versiones
+        en la misma transacción). Si el presupuesto no alcanza, algunos chunks devueltos pueden no quedar residentes.
+        """
+        bloque = str(bloque_id)
+        result: Dict[ChunkKey, VoxelChunk] = {}
+        missing: List[ChunkKey] = []
+        for key in keys:
+            chunk = self.get(key)
+            if chunk is None:
+                missing.append(key)
+            else:
+                result[key] = chunk
+        if not missing:
+            return result
+        generation = self._generations.get(bloque, 0)
+        loaded = await self._query(bloque, missing)
+        for key, chunk in loaded.items():
+            if self._generations.get(bloque, 0) == generation:
+                chunk = self._put(key, chunk)
+            result[key] = chunk
+        return result
+
+    async def load_bloque(self, bloque_id) -> Dict[ChunkKey, VoxelChunk]:
+        """
+        Todos los chunks del bloque que figuran en chunk_versiones. Antes compara sus versiones con las de los
+        residentes (una consulta) y descarta los que cambiaron fuera del store, así que sirve de red de seguridad
+        por si se perdió una invalidación.
+        """
+        bloque = str(bloque_id)
+        async with get_connection() as conn:
+            rows = await conn.fetch(_VERSIONS_SQL, UUID(bloque), *([_INT32_MIN, _INT32_MAX] * 3))
+        versions = {(bloque, row["chunk_x"], row["chunk_y"], row["chunk_z"]): row["version"] for row in rows}
+        for key in [key for key in self._chunks if key[0] == bloque]:
+            if versions.get(key) != self._chunks[key].version:
+                self._drop(key)
+        return await self.load(bloque, list(versions))
+
+    # --- Escritura ---
+
+    def set_temperature(self, bloque_id, celda_x: int, celda_y: int, celda_z: int, temperatura: float) -> bool:
+        """Temperatura de una celda residente (redondeada a 2 decimales como la columna); False si no está o es aire."""
+        key = self.chunk_key(bloque_id, celda_x, celda_y, celda_z)
+        chunk = self._chunks.get(key)
+        if chunk is None or chunk.empty:
+            return False
+        x0, y0, z0 = chunk.origin
+        cell = (celda_z - z0, celda_y - y0, celda_x - x0)
+        if chunk.tipo[cell] == AIRE:
+            return False
+        value = np.float32(round(float(temperatura), 2))
+        if chunk.temperatura[cell] != value:
+            chunk.temperatura[cell] = value
+            self._dirty_mask(chunk)[cell] = True
+        return True
+
+    def set_temperatures(self, key: ChunkKey, chunk: VoxelChunk, temperaturas: np.ndarray) -> int:
+        """
+        Reemplaza las temperaturas del chunk (array (size, size, size); las celdas de aire se ignoran) y marca
+        sucias las que cambiaron. Si el chunk ya no está residente, lo cambiado queda pendiente para el flush.
+        Devuelve cuántas celdas cambiaron.
+        """
+        if chunk.empty:
+            return 0
+        nuevas = np.round(temperaturas, 2).astype(np.float32)
+        changed = (nuevas != chunk.temperatura) & (chunk.tipo != AIRE)
+        count = int(np.count_nonzero(changed))
+        if not count:
+            return 0
+        chunk.temperatura[changed] = nuevas[changed]
+        if self._chunks.get(key) is chunk:
+            mask = self._dirty_mask(chunk)
+            mask |= changed
+        else:
+            self._pendientes.setdefault(key[0], []).append((key[1:], chunk.version, *self._cells(chunk, changed)))
+        return count
+
+    def set_cell_temperatures(
+        self, bloque_id, coords: np.ndarray, temperaturas: np.ndarray, epsilon: float = 0.0
+    ) -> Tuple[np.ndarray, int]:
+        """
+        Temperaturas de varias celdas (coords (N, 3)) agrupadas por chunk; las que cambian menos de epsilon no se
+        marcan sucias. Devuelve la máscara (N,) de celdas resueltas en el store (chunk residente y celda no aire;
+        el resto lo escribe quien llama) y cuántas cambiaron.
+        """
+        bloque = str(bloque_id)
+        size = self.chunk_size
+        coords = np.asarray(coords, dtype=np.int64).reshape(-1, 3)
+        nuevas = np.round(np.asarray(temperaturas, dtype=np.float64), 2).astype(np.float32)
+        handled = np.zeros(len(coords), dtype=bool)
+        if not len(coords):
+            return handled, 0
+        chunk_coords, inverse = np.unique(coords // size, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.searchsorted(inverse[order], np.arange(len(chunk_coords) + 1))
+        changed_total = 0
+        for index, (cx, cy, cz) in enumerate(chunk_coords.tolist()):
+            key = (bloque, cx, cy, cz)
+            chunk = self._chunks.get(key)
+            if chunk is None or chunk.empty:
+                continue
+            sel = order[bounds[index]:bounds[index + 1]]
+            local = coords[sel] - np.array(chunk.origin, dtype=np.int64)
+            z, y, x = local[:, 2], local[:, 1], local[:, 0]
+            solid = chunk.tipo[z, y, x] != AIRE
+            handled[sel[solid]] = True
+            z, y, x, values = z[solid], y[solid], x[solid], nuevas[sel[solid]]
+            changed = np.abs(values - chunk.temperatura[z, y, x]) >= max(epsilon, 1e-6)
+            count = int(np.count_nonzero(changed))
+            if not count:
+                continue
+            z, y, x = z[changed], y[changed], x[changed]
+            chunk.temperatura[z, y, x] = values[changed]
+            self._dirty_mask(chunk)[z, y, x] = True
+            self._chunks.move_to_end(key)
+            changed_total += count
+        return handled, changed_total
+
+    async def flush(self) -> int:
+        """Escribe en Postgres las temperaturas sucias y pendientes de todos los bloques; devuelve las filas enviadas."""
+        async with self._flush_lock:
+            bloques = {key[0] for key, chunk in self._chunks.items() if chunk.sucias is not None}
+            bloques.update(self._pendientes)
+            total = 0
+            for bloque in bloques:
+                total += await self._flush_bloque(bloque)
+            return total
+
+    # --- Invalidación ---
+
+    def apply_invalidation(self, message: dict) -> None:
+        """
+        Mismo formato que ParticleChunkCache (particle_chunks / particle_temperatures / particle_bloque /
+        particle_clear).
+        """
+        tipo = message.get("tipo")
+        chunks = tipo in ("particle_chunks", "particle_temperatures")
+        if chunks and self._cache.chunk_size == self.chunk_size:
+            self.invalidate_chunks(message["bloque_id"], message["chunks"])
+        elif chunks or tipo == "particle_bloque":
+            self.invalidate_bloque(message["bloque_id"])
+        elif tipo == "particle_clear":
+            self.clear()
+
+    def invalidate_chunks(self, bloque_id, chunks: Iterable[Tuple[int, int, int]]) -> None:
+        """Descarta los chunks (cx, cy, cz) del bloque; una carga en curso del bloque no se guarda."""
+        bloque = str(bloque_id)
+        self._bump(bloque)
+        for cx, cy, cz in chunks:
+            if (bloque, cx, cy, cz) in self._chunks:
+                self._drop((bloque, cx, cy, cz))
+
+    def invalidate_bloque(self, bloque_id) -> None:
+        bloque = str(bloque_id)
+        self._bump(bloque)
+        for key in [key for key in self._chunks if key[0] == bloque]:
+            self._drop(key)
+
+    def clear(self) -> None:
+        """Descarta todos los chunks (lo sucio queda pendiente para el próximo flush)."""
+        for bloque in set(self._generations) | {key[0] for key in self._chunks}:
+            self._bump(bloque)
+        for key in list(self._chunks):
+            self._drop(key)
+
+    # --- Internos ---
+
+    def _bump(self, bloque: str) -> None:
+        self._generations[bloque] = self._generations.get(bloque, 0) + 1
+
+    def _dirty_mask(self, chunk: VoxelChunk) -> np.ndarray:
+        if chunk.sucias is None:
+            chunk.sucias = np.zeros(chunk.tipo.shape, dtype=bool)
+            self._bytes += chunk.sucias.nbytes
+        return chunk.sucias
+
+    def _cells(self, chunk: VoxelChunk, mask: np.ndarray) -> Cells:
+        """Coordenadas (N, 3) y temperaturas de las celdas marcadas en mask."""
+        z, y, x = np.nonzero(mask)
+        x0, y0, z0 = chunk.origin
+        coords = np.stack([x + x0, y + y0, z + z0], axis=1).astype(np.int32)
+        return coords, chunk.temperatura[z, y, x]
+
+    def _take_dirty(self, chunk: VoxelChunk) -> Cells:
+        cells = self._cells(chunk, chunk.sucias)
+        self._bytes -= chunk.sucias.nbytes
+        chunk.sucias = None
+        return cells
+
+    def _put(self, key: ChunkKey, chunk: VoxelChunk) -> VoxelChunk:
+        """Guarda el chunk; si otra carga ya lo dejó residente se conserva ese (puede tener celdas sucias)."""
+        current = self._chunks.get(key)
+        if current is not None:
+            return current
+        self._chunks[key] = chunk
+        self._bytes += chunk.nbytes
+        self._evict()
+        return chunk
+
+    def _drop(self, key: ChunkKey) -> None:
+        chunk = self._chunks.pop(key)
+        if chunk.sucias is not None:
+            self._pendientes.setdefault(key[0], []).append((key[1:], chunk.version, *self._take_dirty(chunk)))
+        self._bytes -= chunk.nbytes
+
+    def _evict(self) -> None:
+        while self._chunks and self._bytes > self.max_bytes:
+            self._drop(next(iter(self._chunks)))
+
+    async def _query(self, bloque: str, keys: List[ChunkKey]) -> Dict[ChunkKey, VoxelChunk]:
+        """Carga los chunks desde la caja que los cubre; filas y versiones en una transacción repeatable read."""
+        size = self.chunk_size
+        cxs = [key[1] for key in keys]
+        cys = [key[2] for key in keys]
+        czs = [key[3] for key in keys]
+        chunk_box = (min(cxs), max(cxs), min(cys), max(cys), min(czs), max(czs))
+        cell_box = [v * size if i % 2 == 0 else (v + 1) * size - 1 for i, v in enumerate(chunk_box)]
+        bloque_uuid = UUID(bloque)
+        async with get_connection() as conn:
+            async with conn.transaction(isolation="repeatable_read", readonly=True):
+                version_rows = await conn.fetch(_VERSIONS_SQL, bloque_uuid, *chunk_box)
+                rows = await conn.fetch(_ROWS_SQL, bloque_uuid, *cell_box)
+        versions = {(row["chunk_x"], row["chunk_y"], row["chunk_z"]): row["version"] for row in version_rows}
+        chunks = {
+            key: VoxelChunk((key[1] * size, key[2] * size, key[3] * size), versions.get(key[1:], 0))
+            for key in keys
+        }
+        if not rows:
+            return chunks
+
+        n = len(rows)
+        xs = np.fromiter((row[0] for row in rows), dtype=np.int64, count=n)
+        ys = np.fromiter((row[1] for row in rows), dtype=np.int64, count=n)
+        zs = np.fromiter((row[2] for row in rows), dtype=np.int64, count=n)
+        tipos = np.fromiter((self.tipo_index(row[3]) for row in rows), dtype=np.uint16, count=n)
+        estados = np.fromiter((self.estado_index(row[4]) for row in rows), dtype=np.uint16, count=n)
+        temperaturas = np.fromiter((row[5] for row in rows), dtype=np.float32, count=n)
+        flags = np.fromiter(
+            ((FLAG_NUCLEO if row[6] else 0) | (FLAG_AGRUPACION if row[7] else 0) for row in rows),
+            dtype=np.uint8, count=n,
+        )
+        cx, cy, cz = xs // size, ys // size, zs // size
+        local = ((zs - cz * size) * size + (ys - cy * size)) * size + (xs - cx * size)
+        # Filas agrupadas por chunk (código lineal dentro de la caja de chunks)
+        ny, nz = chunk_box[3] - chunk_box[2] + 1, chunk_box[5] - chunk_box[4] + 1
+        codes = ((cx - chunk_box[0]) * ny + (cy - chunk_box[2])) * nz + (cz - chunk_box[4])
+        order = np.argsort(codes, kind="stable")
+        codes = codes[order]
+        shape = (size, size, size)
+        for key, chunk in chunks.items():
+            code = ((key[1] - chunk_box[0]) * ny + (key[2] - chunk_box[2])) * nz + (key[3] - chunk_box[4])
+            start, end = np.searchsorted(codes, [code, code + 1])
+            if start == end:
+                continue
+            sel = order[start:end]
+            cells = local[sel]
+            chunk.tipo = np.zeros(size ** 3, dtype=np.uint16)
+            chunk.tipo[cells] = tipos[sel]
+            chunk.tipo = chunk.tipo.reshape(shape)
+            chunk.estado = np.zeros(size ** 3, dtype=np.uint16)
+            chunk.estado[cells] = estados[sel]
+            chunk.estado = chunk.estado.reshape(shape)
+            chunk.temperatura = np.zeros(size ** 3, dtype=np.float32)
+            chunk.temperatura[cells] = temperaturas[sel]
+            chunk.temperatura = chunk.temperatura.reshape(shape)
+            chunk.flags = np.zeros(size ** 3, dtype=np.uint8)
+            chunk.flags[cells] = flags[sel]
+            chunk.flags = chunk.flags.reshape(shape)
+        return chunks
+
+    async def _flush_bloque(self, bloque: str) -> int:
+        """
+        Escribe las celdas sucias y pendientes del bloque en una transacción. Antes bloquea las versiones de sus
+        chunks y descarta las celdas de los chunks que cambiaron desde que se calcularon: la escritura es por
+        posición y la celda puede tener ya otra partícula. Después toma la versión nueva de los chunks escritos.
+        """
+        size = self.chunk_size
+        # Lo pendiente primero: si una celda está dos veces, gana la temperatura más reciente (la residente)
+        parts = self._pendientes.pop(bloque, [])
+        parts.extend(
+            (key[1:], chunk.version, *self._take_dirty(chunk))
+            for key, chunk in list(self._chunks.items())
+            if key[0] == bloque and chunk.sucias is not None
+        )
+        if not parts:
+            return 0
+        chunk_coords = sorted({part[0] for part in parts})
+        lock_args = ([c[0] for c in chunk_coords], [c[1] for c in chunk_coords], [c[2] for c in chunk_coords])
+        bloque_uuid = UUID(bloque)
+        coords = np.empty((0, 3), dtype=np.int32)
+        temperaturas = np.empty(0, dtype=np.float64)
+        try:
+            async with get_connection() as conn:
+                async with conn.transaction():
+                    before = _versions(await conn.fetch(_LOCK_VERSIONS_SQL, bloque_uuid, *lock_args))
+                    vigentes = [part for part in parts if before.get(part[0], 0) == part[1]]
+                    after = before
+                    if vigentes:
+                        coords, temperaturas = _last_per_cell(vigentes)
+                        await write_temperatures(conn, bloque_uuid, coords, temperaturas, self.flush_batch)
+                        # La escritura cambió la versión de los chunks (misma transacción: nadie más los tocó)
+                        after = _versions(await conn.fetch(_LOCK_VERSIONS_SQL, bloque_uuid, *lock_args))
+        except Exception:
+            # Se reintenta en el próximo flush (con la versión en que se calcularon)
+            self._pendientes.setdefault(bloque, [])[:0] = parts
+            raise
+        written = {tuple(c) for c in np.unique(coords // size, axis=0).tolist()}
+        for chunk_xyz in chunk_coords:
+            key = (bloque, *chunk_xyz)
+            chunk = self._chunks.get(key)
+            if chunk is None:
+                continue
+            if before.get(chunk_xyz, 0) != chunk.version:
+                # Otra escritura entre la carga y el flush: se vuelve a cargar la próxima vez
+                self._drop(key)
+            elif chunk_xyz in written:
+                self._apply_written(chunk, coords, temperaturas)
+                chunk.version = after.get(chunk_xyz, chunk.version)
+        if len(coords):
+            self._cache.update_temperatures_at(bloque, coords, temperaturas)
+        descartadas = sum(len(part[2]) for part in parts) - sum(len(part[2]) for part in vigentes)
+        logger.debug(
+            "VoxelStore: %s temperaturas escritas en el bloque %s (%s descartadas por chunks cambiados)",
+            len(coords), bloque, descartadas,
+        )
+        return len(coords)
+
+    def _apply_written(self, chunk: VoxelChunk, coords: np.ndarray, temperaturas: np.ndarray) -> None:
+        """
+        Copia al chunk residente lo escrito en sus celdas (p. ej. pendientes de una copia anterior del chunk), salvo
+        las celdas sucias, que tienen una temperatura más nueva.
+        """
+        if chunk.empty:
+            return
+        size = self.chunk_size
+        local = coords.astype(np.int64) - np.array(chunk.origin, dtype=np.int64)
+        inside = np.all((local >= 0) & (local < size), axis=1)
+        x, y, z = local[inside, 0], local[inside, 1], local[inside, 2]
+        keep = chunk.tipo[z, y, x] != AIRE
+        if chunk.sucias is not None:
+            keep &= ~chunk.sucias[z, y, x]
+        chunk.temperatura[z[keep], y[keep], x[keep]] = temperaturas[inside][keep]
+
+
+def _versions(rows) -> Dict[Tuple[int, int, int], int]:
+    return {(row["chunk_x"], row["chunk_y"], row["chunk_z"]): row["version"] for row in rows}
+
+
+def _last_per_cell(parts: List[Dirty]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Coordenadas (N, 3) y temperaturas float64 de las partes, una vez por celda con la última temperatura (un UPDATE
+    ... FROM con la misma fila dos veces la actualiza con una cualquiera).
+    """
+    coords = np.concatenate([part[2] for part in parts]).astype(np.int32)
+    temperaturas = np.concatenate([part[3] for part in parts]).astype(np.float64)
+    _, first = np.unique(coords[::-1], axis=0, return_index=True)
+    last = np.sort(len(coords) - 1 - first)
+    return coords[last], temperaturas[last]
+
+
+def _palette_index(index: Dict[object, int], ids: List[Optional[UUID]], value) -> int:
+    """Índice de value en la paleta; acepta UUID de asyncpg, uuid.UUID o str (se normaliza a uuid.UUID)."""
+    result = index.get(value)
+    if result is None:
+        normalized = UUID(str(value))
+        result = index.get(normalized)
+        if result is None:
+            result = len(ids)
+            if result > 0xFFFF:
+                raise ValueError("Demasiados tipos o estados distintos para el VoxelStore")
+            ids.append(normalized)
+            index[normalized] = result
+        index[value] = result
+    return result
+
+
+# Instancia compartida por el proceso
+voxel_store = VoxelStore()
+
+
+def connect_voxel_store(
+    shared: Optional[SharedCache] = None,
+    store: VoxelStore = voxel_store,
+    cache: ParticleChunkCache = particle_chunk_cache,
+) -> VoxelStore:
+    """
+    Conecta el store con las invalidaciones de la caché de chunks (lifespan de la app): las de este proceso y,
+    con caché compartida, las de otros workers.
+    """
+
+    def apply_local(message: dict) -> None:
+        # Las temperaturas de este proceso se escriben en el store (o desde su flush); las que no pasan por él
+        # cambian la versión del chunk y load_bloque lo descarta
+        if message.get("tipo") != "particle_temperatures":
+            store.apply_invalidation(message)
+
+    cache.listeners.append(apply_local)
+    if shared is not None:
+        for tipo in ("particle_chunks", "particle_temperatures", "particle_bloque", "particle_clear"):
+            shared.on(tipo, store.apply_invalidation)
+    return store
@@ -0,0 +1,194 @@
+"""
+Flujo de líquidos por autómata celular sobre una grilla densa [z, y, x] (z hacia arriba).
+
+Cada celda es OBSTACULO (partícula no líquida o fuera de la zona simulada), VACIO o un tipo de líquido (índice >= 0)
+con su cantidad (0..1) y su energía (cantidad · temperatura). Cada paso, por tipo de líquido:
+
+- Caída: cada celda pasa a la de abajo (vacía o del mismo líquido) fluidez · min(cantidad, 1 - cantidad de abajo).
+- Lateral (±x, ±y): entre vecinas del mismo líquido o vacías pasa FLUJO_LATERAL · fluidez · diferencia, solo desde
+  celdas apoyadas (abajo hay un obstáculo, otro líquido o el mismo líquido lleno) y si la diferencia supera
+  diferencia_minima; así una capa fina deja de extenderse.
+
+La fluidez de cada tipo es 1 / (1 + viscosidad). Todos los pares de una fase se calculan sobre el mismo estado
+(operaciones sobre arrays completos) y la cantidad queda en [0, 1] (FLUJO_LATERAL <= 1/4 con 4 vecinas). La energía
+viaja con la cantidad a la temperatura de la celda de origen. Una celda que baja de CANTIDAD_MINIMA (la precisión de
+particulas.cantidad) queda vacía y le pasa el resto de cantidad y energía a una vecina del mismo líquido con lugar;
+si no tiene ninguna, se queda con él. Así la cantidad y la energía de la grilla se conservan; lo único que se pierde
+es el redondeo a 4 decimales al escribir (una celda cuyo resto redondea a 0 se borra).
+"""
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+OBSTACULO = -2
+VACIO = -1
+
+# Fracción de la diferencia que pasa por paso entre vecinas laterales con fluidez 1 (máximo estable: 1/4)
+FLUJO_LATERAL = 0.25
+
+# Cantidad por debajo de la cual una celda queda vacía (particulas.cantidad tiene 4 decimales)
+CANTIDAD_MINIMA = 1e-4
+
+# Vecinas [z, y, x] que reciben el resto de una celda que queda vacía: abajo, los costados y arriba
+_VECINAS_RESTO = np.array([(-1, 0, 0), (0, 0, 1), (0, 0, -1), (0, 1, 0), (0, -1, 0), (1, 0, 0)], dtype=np.int64)
+
+
+def fluidity(viscosidad: np.ndarray) -> np.ndarray:
+    """Fracción (0..1] de cada flujo que se mueve por paso según la viscosidad (0 = la más fluida)."""
+    return 1.0 / (1.0 + np.maximum(np.asarray(viscosidad, dtype=np.float64), 0.0))
+
+
+def settle_liquids(
+    tipo: np.ndarray,
+    cantidad: np.ndarray,
+    energia: np.ndarray,
+    fluidez: np.ndarray,
+    max_pasos: int,
+    diferencia_minima: float,
+    limite_segundos: Optional[float] = None,
+) -> Tuple[int, bool]:
+    """
+    Pasos del autómata hasta que nada se mueva, max_pasos o limite_segundos. Modifica los arrays.
+
+    Args:
+        tipo: Grilla int16 [z, y, x] (OBSTACULO, VACIO o índice de líquido)
+        cantidad: Grilla float64 (0 en las celdas que no son líquido)
+        energia: Grilla float64 cantidad · temperatura
+        fluidez: (T,) fluidez de cada tipo de líquido (fluidity)
+        max_pasos: Máximo de pasos
+        diferencia_minima: Diferencia de cantidad por debajo de la cual no hay flujo lateral
+        limite_segundos: Tiempo máximo (None = sin límite)
+
+    Returns:
+        (pasos dados, True si el último paso no movió nada)
+    """
+    inicio = time.perf_counter()
+    pasos = 0
+    while pasos < max_pasos:
+        movido = step_liquids(tipo, cantidad, energia, fluidez, diferencia_minima)
+        pasos += 1
+        if movido < CANTIDAD_MINIMA:
+            return pasos, True
+        if limite_segundos is not None and time.perf_counter() - inicio >= limite_segundos:
+            break
+    return pasos, False
+
+
+def step_liquids(
+    tipo: np.ndarray, cantidad: np.ndarray, energia: np.ndarray, fluidez: np.ndarray, diferencia_minima: float
+) -> float:
+    """Un paso (caída y después lateral) de cada tipo de líquido presente; devuelve el mayor flujo movido."""
+    movido = 0.0
+    for t in np.unique(tipo[tipo >= 0]).tolist():
+        movido = max(movido, _fall(tipo, cantidad, energia, t, float(fluidez[t])))
+        movido = max(movido, _spread(tipo, cantidad, energia, t, float(fluidez[t]), diferencia_minima))
+    return movido
+
+
+def liquid_temperatures(cantidad: np.ndarray, energia: np.ndarray) -> np.ndarray:
+    """Temperatura de cada celda (energía / cantidad; 0 en las vacías)."""
+    t = np.zeros(cantidad.shape)
+    np.divide(energia, cantidad, out=t, where=cantidad > 0)
+    return t
+
+
+def _fall(tipo: np.ndarray, cantidad: np.ndarray, energia: np.ndarray, t: int, fluidez: float) -> float:
+    """Caída del líquido t a la celda de abajo (pares z+1 -> z)."""
+    propia = tipo == t
+    recibe = propia[:-1] | (tipo[:-1] == VACIO)
+    par = propia[1:] & recibe
+    if not par.any():
+        return 0.0
+    flujo = np.minimum(cantidad[1:], 1.0 - cantidad[:-1])
+    flujo *= fluidez
+    flujo[~par] = 0.0
+    np.maximum(flujo, 0.0, out=flujo)
+    calor = flujo * liquid_temperatures(cantidad[1:], energia[1:])
+    cantidad[1:] -= flujo
+    cantidad[:-1] += flujo
+    energia[1:] -= calor
+    energia[:-1] += calor
+    tipo[:-1][flujo > 0] = t
+    _vaciar(tipo, cantidad, energia, t)
+    return float(flujo.max())
+
+
+def _spread(
+    tipo: np.ndarray, cantidad: np.ndarray, energia: np.ndarray, t: int, fluidez: float, diferencia_minima: float
+) -> float:
+    """Flujo lateral del líquido t entre vecinas en x e y (mismo estado para los dos ejes)."""
+    propia = tipo == t
+    libre = propia | (tipo == VACIO)
+    # Apoyada: abajo hay obstáculo u otro líquido, o el mismo líquido lleno (la capa de más abajo se apoya en el borde)
+    apoyada = np.ones(tipo.shape, dtype=bool)
+    abajo = tipo[:-1]
+    apoyada[1:] = ((abajo != t) & (abajo != VACIO)) | ((abajo == t) & (cantidad[:-1] >= 1.0 - CANTIDAD_MINIMA))
+    temperatura = liquid_temperatures(cantidad, energia)
+    k = FLUJO_LATERAL * fluidez
+    flujos = []
+    for axis in (2, 1):
+        lo = _side(tipo.ndim, axis, slice(None, -1))
+        hi = _side(tipo.ndim, axis, slice(1, None))
+        diferencia = cantidad[lo] - cantidad[hi]
+        par = libre[lo] & libre[hi] & (propia[lo] | propia[hi]) & (np.abs(diferencia) > diferencia_minima)
+        par &= np.where(diferencia > 0, apoyada[lo], apoyada[hi])
+        flujo = np.where(par, k * diferencia, 0.0)
+        calor = flujo * np.where(flujo > 0, temperatura[lo], temperatura[hi])
+        flujos.append((lo, hi, flujo, calor))
+    movido = 0.0
+    for lo, hi, flujo, calor in flujos:
+        cantidad[lo] -= flujo
+        cantidad[hi] += flujo
+        energia[lo] -= calor
+        energia[hi] += calor
+        tipo[lo][flujo < 0] = t
+        tipo[hi][flujo > 0] = t
+        if flujo.size:
+            movido = max(movido, float(np.abs(flujo).max()))
+    _vaciar(tipo, cantidad, energia, t)
+    return movido
+
+
+def _side(ndim: int, axis: int, part: slice) -> tuple:
+    index = [slice(None)] * ndim
+    index[axis] = part
+    return tuple(index)
+
+
+def _vaciar(tipo: np.ndarray, cantidad: np.ndarray, energia: np.ndarray, t: int) -> None:
+    """
+    Las celdas del líquido t con menos de CANTIDAD_MINIMA quedan vacías y su resto (cantidad y energía) pasa a una
+    vecina del mismo líquido con lugar, en el orden de _VECINAS_RESTO. Una celda sin ninguna se queda con el resto.
+    """
+    secas = (tipo == t) & (cantidad < CANTIDAD_MINIMA)
+    if not secas.any():
+        return
+    celdas = np.stack(np.nonzero(secas), axis=1)
+    pendientes = np.ones(len(celdas), dtype=bool)
+    shape = np.array(tipo.shape)
+    for offset in _VECINAS_RESTO:
+        vecina = celdas + offset
+        valida = pendientes & np.all((vecina >= 0) & (vecina < shape), axis=1)
+        donantes = np.flatnonzero(valida)
+        v = tuple(vecina[donantes].T)
+        d = tuple(celdas[donantes].T)
+        recibe = (tipo[v] == t) & ~secas[v] & (cantidad[v] + cantidad[d] <= 1.0)
+        donantes = donantes[recibe]
+        # Una sola donante por vecina en cada pasada (la suma de dos restos podría pasarse de 1)
+        _, primera = np.unique(np.ravel_multi_index(tuple(vecina[donantes].T), tipo.shape), return_index=True)
+        donantes = donantes[primera]
+        if not len(donantes):
+            continue
+        v = tuple(vecina[donantes].T)
+        d = tuple(celdas[donantes].T)
+        cantidad[v] += cantidad[d]
+        energia[v] += energia[d]
+        cantidad[d] = 0.0
+        energia[d] = 0.0
+        pendientes[donantes] = False
+    # Las que no tienen a quién pasarle nada (ni cantidad) quedan vacías; las demás conservan su resto
+    vacias = tuple(celdas[~pendientes | (cantidad[tuple(celdas.T)] <= 0.0)].T)
+    tipo[vacias] = VACIO
+    cantidad[vacias] = 0.0
+    energia[vacias] = 0.0
@@ -0,0 +1,127 @@
+"""
+Tarea de flujo de líquidos por chunks activos (simulate_liquid_flow).
+
+Cada tick, por bloque, se lee el contenido de sus chunks en chunk_resumen (get_chunk_contents; las escrituras de
+temperatura no lo cambian) y se compara con el del tick anterior. Un chunk con líquido se simula si:
+  - cambió él o uno de sus 6 vecinos de cara (partículas agregadas, quitadas o que cambiaron de tipo; en el primer
+    tick todos cuentan como cambiados);
+  - o el líquido se seguía moviendo al terminar el tick anterior (no se asentó en LIQUID_BUDGET_SECONDS).
+Los chunks asentados y sin cambios alrededor no se leen. Por tick se simulan hasta LIQUID_MAX_CHUNKS; el resto
+queda activo para el siguiente.
+"""
+import logging
+import time
+from typing import Dict, Optional, Set, Tuple
+
+from src.config import PARTICLES_CONFIG
+from src.domains.particles.application.ports.particle_repository import IParticleRepository
+from src.domains.particles.application.simulate_liquid_flow import liquid_types, simulate_liquid_flow
+from src.domains.particles.infrastructure.particle_catalogue import ParticleCatalogue, particle_catalogue
+
+logger = logging.getLogger(__name__)
+
+Chunk = Tuple[int, int, int]
+
+_VECINOS = ((1, 0, 0), (-1, 0, 0), (0, 1, 0), (0, -1, 0), (0, 0, 1), (0, 0, -1))
+
+
+class LiquidTickStats:
+    """Contadores de un tick de la tarea de líquidos (acumulados sobre todos los bloques)."""
+
+    __slots__ = ("bloques", "activos", "pendientes", "pasos", "asentados", "escritas", "segundos")
+
+    def __init__(self):
+        self.bloques = 0
+        self.activos = 0
+        self.pendientes = 0
+        self.pasos = 0
+        self.asentados = 0
+        self.escritas = 0
+        self.segundos = 0.0
+
+    def add(self, other: "LiquidTickStats") -> None:
+        self.bloques += other.bloques
+        self.activos += other.activos
+        self.pendientes += other.pendientes
+        self.pasos += other.pasos
+        self.asentados += other.asentados
+        self.escritas += other.escritas
+        self.segundos += other.segundos
+
+    def as_dict(self) -> dict:
+        return {
+            "bloques": self.bloques,
+            "activos": self.activos,
+            "pendientes": self.pendientes,
+            "pasos": self.pasos,
+            "asentados": self.asentados,
+            "escritas": self.escritas,
+            "segundos": round(self.segundos, 3),
+        }
+
+
+class LiquidFlowScheduler:
+    """Simula solo los chunks con líquido cerca de cambios recientes o que todavía no se asentaron."""
+
+    def __init__(
+        self,
+        catalogue: ParticleCatalogue = particle_catalogue,
+        max_chunks: int = PARTICLES_CONFIG["LIQUID_MAX_CHUNKS"],
+    ):
+        self._catalogue = catalogue
+        self.max_chunks = max_chunks
+        # Último contenido visto de cada chunk (chunk_resumen) y chunks que siguen activos, por bloque
+        self._contenidos: Dict[str, Dict[Chunk, Dict[str, int]]] = {}
+        self._activos: Dict[str, Set[Chunk]] = {}
+        self.ultimo_tick: Optional[LiquidTickStats] = None
+
+    async def bloque_ids(self, particle_repo: IParticleRepository) -> list:
+        """Bloques con alguna partícula de líquido."""
+        tipo_ids = liquid_types(await self._catalogue.get()).tipo_ids
+        if not tipo_ids:
+            return []
+        return await particle_repo.get_bloque_ids_with_types(tipo_ids)
+
+    async def update_bloque(self, bloque_id: str, particle_repo: IParticleRepository) -> LiquidTickStats:
+        """Un tick del bloque: elige los chunks activos, simula y deja activos los que no se asentaron."""
+        stats = LiquidTickStats()
+        start = time.perf_counter()
+        bloque = str(bloque_id)
+        stats.bloques = 1
+        liquidos = set(liquid_types(await self._catalogue.get()).tipo_ids)
+        contenidos = await particle_repo.get_chunk_contents(bloque)
+        anteriores = self._contenidos.get(bloque, {})
+        self._contenidos[bloque] = contenidos
+        cambiados = {
+            chunk for chunk in contenidos.keys() | anteriores.keys()
+            if contenidos.get(chunk) != anteriores.get(chunk)
+        }
+        cerca = set(cambiados)
+        for cx, cy, cz in cambiados:
+            cerca.update((cx + dx, cy + dy, cz + dz) for dx, dy, dz in _VECINOS)
+        con_liquido = {chunk for chunk, tipos in contenidos.items() if liquidos.intersection(tipos)}
+        activos = sorted(con_liquido & (cerca | self._activos.get(bloque, set())))
+        simular, pendientes = activos[:self.max_chunks], set(activos[self.max_chunks:])
+        stats.activos = len(simular)
+        stats.pendientes = len(pendientes)
+        if simular:
+            result = await simulate_liquid_flow(bloque, particle_repo, simular, catalogue=self._catalogue)
+            stats.pasos = result.pasos
+            stats.asentados = result.asentados
+            stats.escritas = result.escritas
+            # Grupos que siguen moviéndose: los chunks donde cambió algo vuelven a simularse en el próximo tick
+            pendientes.update(tuple(chunk) for chunk in result.pendientes.tolist())
+        self._activos[bloque] = pendientes
+        stats.segundos = time.perf_counter() - start
+        return stats
+
+    def finish_tick(self, stats: LiquidTickStats) -> None:
+        """Guarda las métricas del tick; al log solo si hubo chunks activos."""
+        self.ultimo_tick = stats
+        if stats.activos:
+            logger.info(
+                "Líquidos: %s chunks activos en %s bloques (%s pendientes), %s pasos, %s asentados, "
+                "%s celdas escritas en %.2fs",
+                stats.activos, stats.bloques, stats.pendientes, stats.pasos, stats.asentados, stats.escritas,
+                stats.segundos,
+            )
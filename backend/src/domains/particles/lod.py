@@ -0,0 +1,114 @@
+"""
+Nivel de detalle (LOD) para viewports lejanos.
+
+Con lod = N el espacio se divide en cubos alineados de 2^N celdas por lado (celda // 2^N) y cada cubo con partículas
+se reduce a un único voxel representativo:
+  - tipo: el tipo dominante (más partículas) del cubo
+  - partícula: una partícula real de ese tipo (la más alta), con sus datos (estado, temperatura, etc.)
+  - coordenadas: celda_x/celda_y = esquina mínima del cubo; celda_z = altura de la superficie superior del cubo
+El cliente dibuja cada representativo escalado 2^N en x/y.
+Los cubos nunca cruzan chunks (40 es múltiplo de 2^N para N <= 3), así que el resultado por chunk es exacto y cada
+chunk guarda su pirámide (lod_pyramid: todos los niveles de una vez, ver lod_pyramid_cache.py).
+"""
+from typing import Dict, List
+
+import numpy as np
+
+from src.domains.particles.schemas import ParticleResponse, ParticleViewportQuery
+
+
+def lod_representatives(
+    particles: List[ParticleResponse],
+    coords: np.ndarray,
+    tipos: np.ndarray,
+    lod: int,
+) -> List[ParticleResponse]:
+    """
+    Reduce las partículas a un representativo por cubo de 2^lod.
+
+    Args:
+        particles: Partículas a reducir
+        coords: (N, 3) coordenadas de las partículas (mismo orden que particles)
+        tipos: (N,) índice entero del tipo de cada partícula
+        lod: Nivel (0 = sin reducción)
+
+    Returns:
+        Copias de las partículas representativas con coordenadas del cubo
+    """
+    if lod == 0 or not particles:
+        return list(particles)
+    coords = coords.astype(np.int64)
+    # Cubos como un entero por cubo (mismo orden que (x, y, z) lexicográfico): np.unique 1D en lugar de por filas
+    cubes = coords >> lod
+    low = cubes.min(axis=0)
+    span = cubes.max(axis=0) - low + 1
+    codes = ((cubes[:, 0] - low[0]) * span[1] + (cubes[:, 1] - low[1])) * span[2] + (cubes[:, 2] - low[2])
+    codes, cell_of = np.unique(codes, return_inverse=True)
+    cell_of = cell_of.reshape(-1)
+    n_cells = len(codes)
+    cells = np.stack([codes // (span[1] * span[2]), codes // span[2] % span[1], codes % span[2]], axis=1) + low
+
+    # Tipo dominante por cubo: conteo de pares (cubo, tipo)
+    tipos = tipos.astype(np.int64)
+    n_tipos = int(tipos.max()) + 1
+    pair_codes, counts = np.unique(cell_of * n_tipos + tipos, return_counts=True)
+    pairs = np.stack([pair_codes // n_tipos, pair_codes % n_tipos], axis=1)
+    order = np.lexsort((-counts, pairs[:, 0]))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = pairs[order[1:], 0] != pairs[order[:-1], 0]
+    dominant = np.empty(n_cells, dtype=np.int64)
+    dominant[pairs[order[first], 0]] = pairs[order[first], 1]
+
+    # Altura de la superficie superior por cubo
+    top_z = np.full(n_cells, np.iinfo(np.int64).min, dtype=np.int64)
+    np.maximum.at(top_z, cell_of, coords[:, 2])
+
+    # Partícula representativa: la más alta del tipo dominante
+    candidates = np.nonzero(tipos == dominant[cell_of])[0]
+    order = np.lexsort((coords[candidates, 2], cell_of[candidates]))
+    last = np.ones(len(order), dtype=bool)
+    last[:-1] = cell_of[candidates[order[:-1]]] != cell_of[candidates[order[1:]]]
+    chosen = candidates[order[last]]
+
+    size = 1 << lod
+    result = []
+    for i in chosen:
+        cell = cell_of[i]
+        result.append(particles[i].model_copy(update={
+            "celda_x": int(cells[cell, 0]) * size,
+            "celda_y": int(cells[cell, 1]) * size,
+            "celda_z": int(top_z[cell]),
+        }))
+    return result
+
+
+def lod_pyramid(
+    particles: List[ParticleResponse],
+    coords: np.ndarray,
+    tipos: np.ndarray,
+    max_lod: int,
+) -> Dict[int, List[ParticleResponse]]:
+    """Representativos de los niveles 1..max_lod de las partículas de un chunk (nivel -> lod_representatives)."""
+    return {lod: lod_representatives(particles, coords, tipos, lod) for lod in range(1, max_lod + 1)}
+
+
+def align_viewport(viewport: ParticleViewportQuery, lod: int) -> ParticleViewportQuery:
+    """Viewport ampliado a cubos completos de 2^lod (para no partir cubos en los bordes)."""
+    size = 1 << lod
+    return ParticleViewportQuery(
+        x_min=viewport.x_min - viewport.x_min % size,
+        x_max=viewport.x_max - viewport.x_max % size + size - 1,
+        y_min=viewport.y_min - viewport.y_min % size,
+        y_max=viewport.y_max - viewport.y_max % size + size - 1,
+        z_min=viewport.z_min - viewport.z_min % size,
+        z_max=viewport.z_max - viewport.z_max % size + size - 1,
+    )
+
+
+def in_lod_viewport(p: ParticleResponse, aligned: ParticleViewportQuery) -> bool:
+    """True si el representativo (esquina x/y del cubo, z de superficie) cae en el viewport alineado."""
+    return (
+        aligned.x_min <= p.celda_x <= aligned.x_max
+        and aligned.y_min <= p.celda_y <= aligned.y_max
+        and aligned.z_min <= p.celda_z <= aligned.z_max
+    )
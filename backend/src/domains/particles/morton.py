@@ -0,0 +1,110 @@
+"""
+Clave espacial Z-order (Morton) de las partículas y descomposición de un AABB en rangos de esa clave.
+
+particulas.morton es una columna generada con juego_dioses.morton3(celda_x, celda_y, celda_z) (01-init-schema.sql):
+los bits de x, y, z (desplazados por MORTON_BIAS para admitir negativos) intercalados, x en el bit menos
+significativo. La tabla se agrupa físicamente por (bloque_id, morton) (CLUSTER sobre idx_particulas_morton), así que
+celdas cercanas en 3D quedan en páginas cercanas.
+Un viewport se lee como unos pocos rangos contiguos de morton (morton_ranges) en lugar de un rango de celda_x con
+y/z filtrados fila a fila. Los rangos cubren el viewport con algo de sobra: la consulta vuelve a filtrar por celdas.
+"""
+from functools import lru_cache
+from typing import List, Tuple
+
+import numpy as np
+
+from src.domains.particles.schemas import ParticleViewportQuery
+
+# Deben coincidir con morton3() en 01-init-schema.sql: 21 bits por eje, celdas en [-2^20, 2^20)
+MORTON_BITS = 21
+MORTON_BIAS = 1 << (MORTON_BITS - 1)
+
+# Máximo de rangos por viewport (un recorrido de índice cada uno)
+MORTON_MAX_RANGES = 64
+
+# Máximo de octantes parciales por nivel al subdividir; acota el costo de morton_ranges (~1 ms)
+MORTON_MAX_NODES = 256
+
+_MASKS = (
+    (32, 0x1f00000000ffff),
+    (16, 0x1f0000ff0000ff),
+    (8, 0x100f00f00f00f00f),
+    (4, 0x10c30c30c30c30c3),
+    (2, 0x1249249249249249),
+)
+
+# Esquinas de los 8 hijos de un octante (en unidades de medio lado)
+_CHILDREN = np.array([(dx, dy, dz) for dz in (0, 1) for dy in (0, 1) for dx in (0, 1)], dtype=np.int64)
+
+
+def _expand(v: np.ndarray) -> np.ndarray:
+    """Separa los 21 bits bajos de v dejando dos ceros entre cada uno."""
+    v = v & ((1 << MORTON_BITS) - 1)
+    for shift, mask in _MASKS:
+        v = (v | (v << shift)) & mask
+    return v
+
+
+def _interleave(biased: np.ndarray) -> np.ndarray:
+    return _expand(biased[:, 0]) | (_expand(biased[:, 1]) << 1) | (_expand(biased[:, 2]) << 2)
+
+
+def morton_codes(coords: np.ndarray) -> np.ndarray:
+    """Clave Morton de coordenadas (N, 3) de celda; mismo valor que juego_dioses.morton3."""
+    return _interleave(np.asarray(coords, dtype=np.int64) + MORTON_BIAS)
+
+
+def morton_ranges(viewport: ParticleViewportQuery) -> Tuple[Tuple[int, int], ...]:
+    """Rangos [lo, hi] de morton, ordenados y disjuntos, que cubren todas las celdas del viewport."""
+    return _morton_ranges(
+        viewport.x_min, viewport.x_max, viewport.y_min, viewport.y_max, viewport.z_min, viewport.z_max
+    )
+
+
+@lru_cache(maxsize=4096)
+def _morton_ranges(
+    x_min: int, x_max: int, y_min: int, y_max: int, z_min: int, z_max: int
+) -> Tuple[Tuple[int, int], ...]:
+    """
+    Subdivide el octante alineado que contiene el AABB: los octantes dentro del AABB son un rango completo
+    (8^nivel claves consecutivas), los de afuera se descartan y los parciales se dividen en 8 hasta el nivel 0
+    o hasta MORTON_MAX_NODES parciales, que entonces se toman enteros. Los rangos contiguos se unen y, si quedan
+    más de MORTON_MAX_RANGES, se unen los separados por los huecos más chicos.
+    Cacheado por AABB: los chunks de la caché y las regiones del batch se repiten.
+    """
+    lo = np.array([x_min, y_min, z_min], dtype=np.int64) + MORTON_BIAS
+    hi = np.array([x_max, y_max, z_max], dtype=np.int64) + MORTON_BIAS
+    level = int(max(int(a) ^ int(b) for a, b in zip(lo, hi))).bit_length()
+    nodes = (lo >> level << level).reshape(1, 3)
+    starts: List[np.ndarray] = []
+    ends: List[np.ndarray] = []
+    while len(nodes):
+        side = 1 << level
+        far = nodes + (side - 1)
+        overlaps = np.all((nodes <= hi) & (far >= lo), axis=1)
+        inside = np.all((nodes >= lo) & (far <= hi), axis=1)
+        full = _interleave(nodes[inside])
+        starts.append(full)
+        ends.append(full + ((1 << 3 * level) - 1))
+        partial = nodes[overlaps & ~inside]
+        if level == 0 or len(partial) * 8 > MORTON_MAX_NODES:
+            codes = _interleave(partial)
+            starts.append(codes)
+            ends.append(codes + ((1 << 3 * level) - 1))
+            break
+        level -= 1
+        nodes = (partial[:, None, :] + (_CHILDREN << level)[None, :, :]).reshape(-1, 3)
+    start = np.concatenate(starts)
+    end = np.concatenate(ends)
+    order = np.argsort(start)
+    ranges: List[List[int]] = []
+    for a, b in zip(start[order].tolist(), end[order].tolist()):
+        if ranges and ranges[-1][1] + 1 >= a:
+            ranges[-1][1] = max(ranges[-1][1], b)
+        else:
+            ranges.append([a, b])
+    while len(ranges) > MORTON_MAX_RANGES:
+        gaps = [ranges[i + 1][0] - ranges[i][1] for i in range(len(ranges) - 1)]
+        i = gaps.index(min(gaps))
+        ranges[i:i + 2] = [[ranges[i][0], ranges[i + 1][1]]]
+    return tuple((a, b) for a, b in ranges)
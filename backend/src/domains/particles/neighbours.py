@@ -0,0 +1,178 @@
+"""
+Consultas de vecindad por lotes: para cada punto, las partículas a distancia euclidiana <= radio.
+
+Los candidatos se indexan en una grilla uniforme (spatial hash) de celdas de lado max(radio, 1): cada punto solo
+compara contra los candidatos de los 27 cubos alrededor del suyo, encontrados con searchsorted sobre los códigos
+ordenados. El resultado (ParticleNeighbours) es compacto: arrays alineados en formato CSR, los vecinos del punto i
+en [offsets[i], offsets[i + 1]) ordenados por distancia.
+"""
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+
+# Puntos por lote al expandir pares punto-candidato (acota la memoria con muchos candidatos por cubo)
+POINT_BATCH = 32768
+
+# Desplazamientos a los 27 cubos de la grilla alrededor de uno (incluido él mismo)
+_CUBE_OFFSETS = np.array(
+    [(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)], dtype=np.int64
+)
+
+
+class ParticleNeighbours:
+    """
+    Vecinos de varios puntos. coords (M, 3) int32, tipo (M,) uint16 (índice en tipo_ids), temperatura (M,) float32
+    y distancia (M,) float32 alineados; offsets (P + 1,) int64 delimita los vecinos de cada punto.
+    """
+
+    __slots__ = ("offsets", "coords", "tipo", "temperatura", "distancia", "tipo_ids")
+
+    def __init__(
+        self,
+        offsets: np.ndarray,
+        coords: np.ndarray,
+        tipo: np.ndarray,
+        temperatura: np.ndarray,
+        distancia: np.ndarray,
+        tipo_ids: List[Optional[UUID]],
+    ):
+        self.offsets = offsets
+        self.coords = coords
+        self.tipo = tipo
+        self.temperatura = temperatura
+        self.distancia = distancia
+        self.tipo_ids = tipo_ids
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def of(self, punto: int) -> slice:
+        """Rango de los vecinos del punto en los arrays."""
+        return slice(int(self.offsets[punto]), int(self.offsets[punto + 1]))
+
+    def punto(self) -> np.ndarray:
+        """(M,) índice del punto de cada vecino."""
+        return np.repeat(np.arange(len(self), dtype=np.int64), np.diff(self.offsets))
+
+    def tipo_lookup(self, values: Dict[str, float], default: float = 0.0) -> np.ndarray:
+        """Tabla float64 índice de tipo -> values[str(tipo_id)]; tabla[vecinos.tipo] da el valor por vecino."""
+        table = np.full(max(len(self.tipo_ids), 1), default, dtype=np.float64)
+        for index, tipo_id in enumerate(self.tipo_ids):
+            if tipo_id is not None:
+                value = values.get(str(tipo_id))
+                if value is not None:
+                    table[index] = value
+        return table
+
+
+def chunks_for_points(puntos: np.ndarray, radio: float, size: int) -> np.ndarray:
+    """(K, 3) coordenadas de chunk (lado size) distintas que tocan las esferas de radio alrededor de los puntos."""
+    puntos = np.asarray(puntos, dtype=np.float64).reshape(-1, 3)
+    if not len(puntos):
+        return np.empty((0, 3), dtype=np.int64)
+    lo = np.floor((puntos - radio) / size).astype(np.int64)
+    hi = np.floor((puntos + radio) / size).astype(np.int64)
+    # Primero las esquinas distintas: muchos puntos comparten chunks
+    corners = np.unique(np.concatenate([lo, hi], axis=1), axis=0)
+    lo, hi = corners[:, :3], corners[:, 3:]
+    span = int((hi - lo).max())
+    parts = []
+    for dx in range(span + 1):
+        for dy in range(span + 1):
+            for dz in range(span + 1):
+                chunk = lo + np.array([dx, dy, dz], dtype=np.int64)
+                parts.append(chunk[np.all(chunk <= hi, axis=1)])
+    return np.unique(np.concatenate(parts), axis=0)
+
+
+def neighbour_pairs(
+    puntos: np.ndarray, radio: float, coords: np.ndarray, batch: int = POINT_BATCH
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Pares (punto, candidato) a distancia <= radio.
+
+    Args:
+        puntos: (P, 3) coordenadas de los puntos (pueden ser fraccionarias)
+        radio: Radio euclidiano (en celdas)
+        coords: (M, 3) coordenadas de los candidatos
+
+    Returns:
+        (índice de punto, índice de candidato, distancia²), ordenados por punto y luego por distancia
+    """
+    puntos = np.asarray(puntos, dtype=np.float64).reshape(-1, 3)
+    coords = np.asarray(coords, dtype=np.int64).reshape(-1, 3)
+    if not len(puntos) or not len(coords) or radio < 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    side = max(float(radio), 1.0)
+    origin = coords.min(axis=0)
+    cubes = ((coords - origin) // side).astype(np.int64)
+    dims = cubes.max(axis=0) + 1
+    codes = (cubes[:, 0] * dims[1] + cubes[:, 1]) * dims[2] + cubes[:, 2]
+    order = np.argsort(codes, kind="stable")
+    codes = codes[order]
+    # Candidatos ordenados por cubo, un array por eje (accesos contiguos al recorrer un cubo)
+    cx, cy, cz = (coords[order, axis].astype(np.float64) for axis in range(3))
+    radio2 = float(radio) ** 2
+
+    point_cubes = np.floor((puntos - origin) / side).astype(np.int64)
+    # Puntos del mismo cubo juntos: los lotes leen los mismos rangos de candidatos
+    point_order = np.argsort(
+        (point_cubes[:, 0] * dims[1] + point_cubes[:, 1]) * dims[2] + point_cubes[:, 2], kind="stable"
+    )
+    point_parts: List[np.ndarray] = []
+    cand_parts: List[np.ndarray] = []
+    dist_parts: List[np.ndarray] = []
+    for start in range(0, len(puntos), batch):
+        selected = point_order[start:start + batch]
+        px, py, pz = (puntos[selected, axis] for axis in range(3))
+        batch_cubes = point_cubes[selected]
+        for offset in _CUBE_OFFSETS:
+            cube = batch_cubes + offset
+            valid = np.all((cube >= 0) & (cube < dims), axis=1)
+            code = (cube[:, 0] * dims[1] + cube[:, 1]) * dims[2] + cube[:, 2]
+            lo = np.searchsorted(codes, code, side="left")
+            counts = np.where(valid, np.searchsorted(codes, code, side="right") - lo, 0)
+            with_candidates = np.nonzero(counts)[0]
+            if not len(with_candidates):
+                continue
+            counts = counts[with_candidates]
+            total = int(counts.sum())
+            point_idx = np.repeat(with_candidates, counts)
+            cand_idx = np.repeat(lo[with_candidates] - (np.cumsum(counts) - counts), counts) + np.arange(total)
+            d2 = (cx[cand_idx] - px[point_idx]) ** 2 + (cy[cand_idx] - py[point_idx]) ** 2
+            d2 += (cz[cand_idx] - pz[point_idx]) ** 2
+            keep = d2 <= radio2
+            point_parts.append(selected[point_idx[keep]])
+            cand_parts.append(order[cand_idx[keep]])
+            dist_parts.append(d2[keep])
+    if not point_parts:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    point_idx = np.concatenate(point_parts)
+    cand_idx = np.concatenate(cand_parts)
+    d2 = np.concatenate(dist_parts)
+    sort = np.lexsort((d2, point_idx))
+    return point_idx[sort], cand_idx[sort], d2[sort]
+
+
+def build_neighbours(
+    n_puntos: int,
+    point_idx: np.ndarray,
+    cand_idx: np.ndarray,
+    d2: np.ndarray,
+    coords: np.ndarray,
+    tipo: np.ndarray,
+    temperatura: np.ndarray,
+    tipo_ids: List[Optional[UUID]],
+) -> ParticleNeighbours:
+    """ParticleNeighbours desde los pares de neighbour_pairs y los arrays de los candidatos."""
+    offsets = np.zeros(n_puntos + 1, dtype=np.int64)
+    np.cumsum(np.bincount(point_idx, minlength=n_puntos), out=offsets[1:])
+    return ParticleNeighbours(
+        offsets=offsets,
+        coords=np.asarray(coords, dtype=np.int32).reshape(-1, 3)[cand_idx],
+        tipo=np.asarray(tipo, dtype=np.uint16)[cand_idx],
+        temperatura=np.asarray(temperatura, dtype=np.float32)[cand_idx],
+        distancia=np.sqrt(d2).astype(np.float32),
+        tipo_ids=tipo_ids,
+    )
@@ -0,0 +1,129 @@
+"""
+Propagación de fuego y energía (tipos gas/energia con tipos_particulas.propagacion) a las vecinas inflamables.
+
+Un tipo fuente (tipo_fisico 'gas' o 'energia' con propagacion > 0) alcanza las partículas a distancia euclidiana
+<= propagacion celdas por tick (con menos de 1 no llega ni a las vecinas de cara). Una vecina es inflamable para esa
+fuente si su tipo tiene una transición hacia el tipo fuente con condición de temperatura (transitions.py, incluidas
+las inversas de las reversibles): la primera por prioridad. La vecina se convierte si la condición se cumple con la
+temperatura de la fuente (ej. madera -> energia_fuego si > 300: una celda de fuego a 600 °C prende la madera de al
+lado) y toma esa temperatura, así sigue propagando en el próximo tick. Las reglas con condición de integridad quedan
+para la tarea de transiciones (las vecinas se leen sin integridad).
+"""
+from typing import List
+
+import numpy as np
+
+from src.domains.particles.transitions import SIN_CONDICION, TOLERANCIA_TEMPERATURA, TransitionTable, condition_mask
+
+TIPOS_FISICOS_FUENTE = ("gas", "energia")
+
+
+class PropagationTable:
+    """
+    Reglas de propagación compiladas. fuente_ids[s] (nombre fuente_nombres[s]) tiene radio[s]; origen_ids[o]
+    (nombres en origen_nombres) son los tipos inflamables de alguna fuente. condicion/valor (S, O) son la condición
+    de temperatura de origen o -> fuente s (SIN_CONDICION: no es inflamable para esa fuente) y estado (S, O) indexa
+    estado_ids (-1: conserva el suyo).
+    """
+
+    __slots__ = ("version", "fuente_ids", "fuente_nombres", "radio", "origen_ids", "origen_nombres", "estado_ids",
+                 "condicion", "valor", "estado")
+
+    def __init__(
+        self,
+        version: int,
+        fuente_ids: List[str],
+        fuente_nombres: List[str],
+        radio: np.ndarray,
+        origen_ids: List[str],
+        origen_nombres: List[str],
+        estado_ids: List[str],
+        condicion: np.ndarray,
+        valor: np.ndarray,
+        estado: np.ndarray,
+    ):
+        self.version = version
+        self.fuente_ids = fuente_ids
+        self.fuente_nombres = fuente_nombres
+        self.radio = radio
+        self.origen_ids = origen_ids
+        self.origen_nombres = origen_nombres
+        self.estado_ids = estado_ids
+        self.condicion = condicion
+        self.valor = valor
+        self.estado = estado
+
+    @property
+    def empty(self) -> bool:
+        return not self.origen_ids
+
+    def inflamables(self, fuente: int) -> List[str]:
+        """Nombres de los tipos que la fuente puede prender."""
+        return [self.origen_nombres[o] for o in np.nonzero(self.condicion[fuente] != SIN_CONDICION)[0].tolist()]
+
+    def evaluate(self, fuente: int, origen: np.ndarray, temperatura: np.ndarray) -> np.ndarray:
+        """Máscara (N,) de las vecinas (origen: índice en origen_ids, -1 si no es inflamable) que prende la fuente."""
+        origen = np.asarray(origen, dtype=np.int64)
+        valida = origen >= 0
+        o = np.where(valida, origen, 0)
+        condicion = self.condicion[fuente, o]
+        return valida & (condicion != SIN_CONDICION) & condition_mask(
+            condicion, self.valor[fuente, o], np.asarray(temperatura, dtype=np.float64), TOLERANCIA_TEMPERATURA
+        )
+
+
+def compile_propagation(snapshot, transiciones: TransitionTable) -> PropagationTable:
+    """PropagationTable de un CatalogueSnapshot y su TransitionTable (transition_table)."""
+    fuentes = [
+        row for row in snapshot.tipos
+        if row.get("tipo_fisico") in TIPOS_FISICOS_FUENTE and float(row.get("propagacion") or 0) > 0
+    ]
+    fuente_ids = [str(row["id"]) for row in fuentes]
+    fuente_index = {tipo_id: index for index, tipo_id in enumerate(fuente_ids)}
+    # (fuente, origen) -> (condición, valor, estado) de la primera regla con condición de temperatura hacia la fuente
+    reglas = {}
+    for fila, origen in enumerate(transiciones.origen_ids):
+        for columna in range(transiciones.destino.shape[1]):
+            destino = int(transiciones.destino[fila, columna])
+            if destino < 0:
+                break
+            fuente = fuente_index.get(transiciones.destino_ids[destino])
+            if (
+                fuente is None
+                or (fuente, origen) in reglas
+                or transiciones.temp_condicion[fila, columna] == SIN_CONDICION
+                or transiciones.int_condicion[fila, columna] != SIN_CONDICION
+            ):
+                continue
+            reglas[(fuente, origen)] = (
+                int(transiciones.temp_condicion[fila, columna]),
+                float(transiciones.temp_valor[fila, columna]),
+                int(transiciones.estado[fila, columna]),
+            )
+
+    origen_ids = sorted({origen for _, origen in reglas})
+    origen_index = {tipo_id: index for index, tipo_id in enumerate(origen_ids)}
+    shape = (len(fuente_ids), len(origen_ids))
+    condicion = np.full(shape, SIN_CONDICION, dtype=np.int8)
+    valor = np.zeros(shape)
+    estado = np.full(shape, -1, dtype=np.int32)
+    for (fuente, origen), (cond, val, est) in reglas.items():
+        o = origen_index[origen]
+        condicion[fuente, o], valor[fuente, o], estado[fuente, o] = cond, val, est
+    return PropagationTable(
+        snapshot.version,
+        fuente_ids,
+        [row["nombre"] for row in fuentes],
+        np.array([float(row["propagacion"]) for row in fuentes], dtype=np.float64),
+        origen_ids,
+        [(snapshot.type_by_id(origen) or {}).get("nombre", "") for origen in origen_ids],
+        list(transiciones.estado_ids),
+        condicion,
+        valor,
+        estado,
+    )
+
+
+def propagation_table(snapshot, transiciones: TransitionTable) -> PropagationTable:
+    """PropagationTable del snapshot; se compila una vez por versión del catálogo (CatalogueSnapshot.compiled)."""
+    return snapshot.compiled("propagacion", lambda snapshot: compile_propagation(snapshot, transiciones))
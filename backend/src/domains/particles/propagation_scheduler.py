@@ -0,0 +1,171 @@
+"""
+Tarea de propagación de fuego y energía por frentes (propagate_particles).
+
+El frente de un bloque son las celdas fuente (tipos de propagation.py) que pueden prender algo nuevo. Cada tick se
+arma desde particulas.version_tipo (get_retyped_particle_arrays) desde la versión del tick anterior, que solo cambia
+con inserciones, movimientos y cambios de tipo (no con la temperatura ni el resto de las columnas):
+  - las fuentes nuevas (las que se prendieron en el tick anterior, las insertadas o las que se movieron);
+  - las fuentes en el radio de las partículas inflamables nuevas (get_particles_near_many).
+Una fuente que ya miró a sus vecinas no vuelve al frente hasta que aparezca algo inflamable cerca (si se calienta
+después no se reevalúa), así que el costo depende del tamaño del frente y no del bloque ni de la tarea de temperatura. En el primer tick todas las fuentes del bloque son frente. Por
+tick se procesan hasta PROPAGATION_MAX_FRONT celdas; el resto queda para el siguiente.
+"""
+import logging
+import time
+from typing import Dict, Optional, Tuple
+from uuid import UUID
+
+import numpy as np
+
+from src.config import PARTICLES_CONFIG
+from src.domains.particles.application.ports.particle_repository import IParticleRepository
+from src.domains.particles.application.propagate_particles import propagate_particles
+from src.domains.particles.infrastructure.particle_catalogue import ParticleCatalogue, particle_catalogue
+from src.domains.particles.morton import morton_codes
+from src.domains.particles.propagation import PropagationTable, propagation_table
+from src.domains.particles.transitions import transition_table
+
+logger = logging.getLogger(__name__)
+
+# Celdas del frente: coordenadas (N, 3), índice de fuente (N,) y temperatura (N,)
+Frente = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+class PropagationTickStats:
+    """Contadores de un tick de la tarea de propagación (acumulados sobre todos los bloques)."""
+
+    __slots__ = ("bloques", "frente", "pendientes", "vecinas", "prendidas", "segundos")
+
+    def __init__(self):
+        self.bloques = 0
+        self.frente = 0
+        self.pendientes = 0
+        self.vecinas = 0
+        self.prendidas = 0
+        self.segundos = 0.0
+
+    def add(self, other: "PropagationTickStats") -> None:
+        self.bloques += other.bloques
+        self.frente += other.frente
+        self.pendientes += other.pendientes
+        self.vecinas += other.vecinas
+        self.prendidas += other.prendidas
+        self.segundos += other.segundos
+
+    def as_dict(self) -> dict:
+        return {
+            "bloques": self.bloques,
+            "frente": self.frente,
+            "pendientes": self.pendientes,
+            "vecinas": self.vecinas,
+            "prendidas": self.prendidas,
+            "segundos": round(self.segundos, 3),
+        }
+
+
+class PropagationScheduler:
+    """Propaga solo desde las fuentes nuevas o que tienen algo inflamable nuevo cerca."""
+
+    def __init__(
+        self,
+        catalogue: ParticleCatalogue = particle_catalogue,
+        max_frente: int = PARTICLES_CONFIG["PROPAGATION_MAX_FRONT"],
+    ):
+        self._catalogue = catalogue
+        self.max_frente = max_frente
+        # Versión del mundo leída en el último tick y frente que no entró en él, por bloque
+        self._versiones: Dict[str, int] = {}
+        self._pendientes: Dict[str, Frente] = {}
+        self.ultimo_tick: Optional[PropagationTickStats] = None
+
+    async def _table(self) -> PropagationTable:
+        snapshot = await self._catalogue.get()
+        return propagation_table(snapshot, transition_table(snapshot))
+
+    async def bloque_ids(self, particle_repo: IParticleRepository) -> list:
+        """Bloques con alguna partícula de un tipo fuente que prende algo."""
+        table = await self._table()
+        if table.empty:
+            return []
+        return await particle_repo.get_bloque_ids_with_types(table.fuente_ids)
+
+    async def update_bloque(self, bloque_id: str, particle_repo: IParticleRepository) -> PropagationTickStats:
+        """Un tick del bloque: arma el frente desde el feed de cambios y propaga desde él."""
+        stats = PropagationTickStats()
+        start = time.perf_counter()
+        bloque = str(bloque_id)
+        stats.bloques = 1
+        table = await self._table()
+        if table.empty:
+            return stats
+        # La versión se lee antes que los cambios: lo que se escriba mientras tanto entra en el próximo tick
+        version = await particle_repo.get_world_version(UUID(bloque))
+        anterior = self._versiones.get(bloque)
+        if anterior is None:
+            coords, fuente, temperatura, _ = await particle_repo.get_transition_particle_arrays(
+                bloque, table.fuente_ids
+            )
+            partes = [(coords, fuente, temperatura)]
+        else:
+            partes = await self._changed_front(bloque, particle_repo, table, anterior)
+        self._versiones[bloque] = version
+        if bloque in self._pendientes:
+            partes.append(self._pendientes.pop(bloque))
+
+        coords = np.concatenate([parte[0] for parte in partes]).reshape(-1, 3).astype(np.int32)
+        fuente = np.concatenate([parte[1] for parte in partes]).astype(np.int64)
+        temperatura = np.concatenate([parte[2] for parte in partes]).astype(np.float64)
+        # Una vez por celda (la lectura más reciente va primero)
+        _, primera = np.unique(morton_codes(coords), return_index=True)
+        primera.sort()
+        coords, fuente, temperatura = coords[primera], fuente[primera], temperatura[primera]
+        if len(coords) > self.max_frente:
+            resto = slice(self.max_frente, None)
+            self._pendientes[bloque] = (coords[resto], fuente[resto], temperatura[resto])
+            stats.pendientes = len(coords) - self.max_frente
+            coords, fuente, temperatura = (
+                coords[:self.max_frente], fuente[:self.max_frente], temperatura[:self.max_frente]
+            )
+        stats.frente = len(coords)
+        if len(coords):
+            result = await propagate_particles(
+                bloque, particle_repo, coords, fuente, temperatura, catalogue=self._catalogue
+            )
+            stats.vecinas = result.vecinas
+            stats.prendidas = result.prendidas
+        stats.segundos = time.perf_counter() - start
+        return stats
+
+    async def _changed_front(
+        self, bloque: str, particle_repo: IParticleRepository, table: PropagationTable, since: int
+    ) -> list:
+        """Fuentes nuevas desde since y fuentes en el radio de las inflamables nuevas (version_tipo, no version)."""
+        n_fuentes = len(table.fuente_ids)
+        coords, tipo, temperatura = await particle_repo.get_retyped_particle_arrays(
+            bloque, since, table.fuente_ids + table.origen_ids
+        )
+        es_fuente = tipo < n_fuentes
+        partes = [(coords[es_fuente], tipo[es_fuente], temperatura[es_fuente])]
+        inflamables = coords[~es_fuente]
+        if len(inflamables):
+            near = await particle_repo.get_particles_near_many(
+                bloque, inflamables, float(table.radio.max()), tipos=table.fuente_nombres
+            )
+            fuente_index = {tipo_id: index for index, tipo_id in enumerate(table.fuente_ids)}
+            paleta = np.array(
+                [fuente_index.get(str(tipo_id), -1) for tipo_id in near.tipo_ids] or [-1], dtype=np.int64
+            )
+            fuente = paleta[near.tipo.astype(np.int64)]
+            # Cada fuente alcanza solo su radio
+            cerca = (fuente >= 0) & (near.distancia <= table.radio[np.maximum(fuente, 0)])
+            partes.append((near.coords[cerca], fuente[cerca], near.temperatura[cerca].astype(np.float64)))
+        return partes
+
+    def finish_tick(self, stats: PropagationTickStats) -> None:
+        """Guarda las métricas del tick; al log solo si hubo frente."""
+        self.ultimo_tick = stats
+        if stats.frente:
+            logger.info(
+                "Propagación: frente de %s celdas en %s bloques (%s pendientes), %s vecinas, %s prendidas en %.2fs",
+                stats.frente, stats.bloques, stats.pendientes, stats.vecinas, stats.prendidas, stats.segundos,
+            )
@@ -2,33 +2,83 @@
 Puerta de entrada HTTP para Partículas.
 
 Flujo (Arquitectura Hexagonal):
-  routes → casos de uso (get_particle_by_id, get_particles_by_viewport, get_particle_types_in_viewport) → puerto IParticleRepository → PostgresParticleRepository.
+  routes → casos de uso (get_particle_by_id, get_particles_by_viewport, get_particles_by_regions, get_particle_changes,
+  get_particle_types_in_viewport, get_particle_catalogue) → puerto IParticleRepository
+  → CachedParticleRepository (caché de chunks, si PARTICLES_CONFIG['CACHE_ENABLED'], con segundo nivel en la caché
+  compartida si está conectada) → PostgresParticleRepository.
 No usa get_connection ni SQL; solo inyecta el adaptador y delega.
+Las respuestas JSON se serializan con orjson_response (DTOs armados con model_construct desde filas confiables).
+Los GET de viewport llevan ETag (versión de los chunks cubiertos) y responden 304 a If-None-Match sin consultar partículas.
+Tipos y estados salen del catálogo en memoria (ParticleCatalogue); GET /particle-types/catalogue (catalogue_router)
+los devuelve completos con ETag por hash de contenido.
+Las tareas periódicas de líquidos (start_liquid_flow_task, LiquidFlowScheduler) y de propagación
+(start_propagation_task, PropagationScheduler) usan la misma cadena de adaptadores, envuelta en VoxelParticleRepository
+si el VoxelStore está activo.
 """
+import asyncio
 import logging
+from typing import Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
 
+from src.domains.particles.application.get_particle_catalogue import get_particle_catalogue
 from src.domains.particles.application.get_particle_types_in_viewport import get_particle_types_in_viewport
+from src.domains.particles.application.get_particles_by_regions import get_particles_by_regions
 from src.domains.particles.application.get_particles_by_viewport import get_particles_by_viewport
 from src.domains.particles.application.get_particle_by_id import get_particle_by_id
+from src.domains.particles.application.get_particle_changes import get_particle_changes
+from src.domains.particles.application.get_viewport_version import get_viewport_version
+from src.domains.particles.application.stream_particles_by_viewport import stream_particles_by_viewport
 from src.domains.particles.application.ports.particle_repository import IParticleRepository
+from src.domains.particles.columnar import (
+    COLUMNAR_MEDIA_TYPE,
+    accepts_columnar,
+    encode_particles_columnar,
+)
+from src.domains.particles.infrastructure.cached_particle_repository import CachedParticleRepository
 from src.domains.particles.infrastructure.postgres_particle_repository import PostgresParticleRepository
+from src.domains.particles.infrastructure.shared_particle_chunks import get_shared_particle_chunks
+from src.domains.particles.infrastructure.voxel_particle_repository import VoxelParticleRepository
+from src.domains.particles.liquid_scheduler import LiquidFlowScheduler, LiquidTickStats
+from src.domains.particles.propagation_scheduler import PropagationScheduler, PropagationTickStats
+from src.config import PARTICLES_CONFIG
+from src.domains.shared.etag import build_etag, etag_matches, not_modified
+from src.domains.shared.orjson_response import orjson_response
+from src.domains.particles.streaming import (
+    COLUMNAR_STREAM_MEDIA_TYPE,
+    columnar_frames,
+    ndjson_frames,
+    negotiate_stream_media_type,
+)
 from src.domains.particles.schemas import (
+    ParticleBatchRequest,
+    ParticleBatchResponse,
+    ParticleCatalogueResponse,
+    ParticleChangesResponse,
     ParticleResponse,
     ParticleTypesResponse,
     ParticlesResponse,
     ParticleViewportQuery,
+    Visibility,
 )
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/bloques", tags=["particles"])
+catalogue_router = APIRouter(prefix="/particle-types", tags=["particles"])
+
+_liquid_flow_task: Optional[asyncio.Task] = None
+_liquid_scheduler: Optional[LiquidFlowScheduler] = None
+_propagation_task: Optional[asyncio.Task] = None
+_propagation_scheduler: Optional[PropagationScheduler] = None
 
 
 def get_particle_repository() -> IParticleRepository:
-    """Factory para inyección de dependencias: devuelve el adaptador concreto (Postgres)."""
+    """Factory para inyección de dependencias: adaptador Postgres, envuelto en la caché de chunks si está habilitada."""
+    if PARTICLES_CONFIG["CACHE_ENABLED"]:
+        return CachedParticleRepository(PostgresParticleRepository(), shared=get_shared_particle_chunks())
     return PostgresParticleRepository()
 
 
@@ -39,15 +89,155 @@ def _handle_value_error(e: ValueError) -> None:
     raise HTTPException(status_code=400, detail=str(e))
 
 
+def get_liquid_scheduler() -> LiquidFlowScheduler:
+    """Singleton del scheduler de líquidos (chunks activos por bloque entre ticks)."""
+    global _liquid_scheduler
+    if _liquid_scheduler is None:
+        _liquid_scheduler = LiquidFlowScheduler()
+    return _liquid_scheduler
+
+
+async def update_liquids_periodically():
+    particle_repo: IParticleRepository = PostgresParticleRepository()
+    if PARTICLES_CONFIG["CACHE_ENABLED"]:
+        # Las celdas escritas invalidan sus chunks en la caché de viewport
+        particle_repo = CachedParticleRepository(particle_repo, shared=get_shared_particle_chunks())
+    if PARTICLES_CONFIG["VOXEL_STORE_ENABLED"]:
+        # Guarda los cambios pendientes antes de leer e invalida los chunks escritos
+        particle_repo = VoxelParticleRepository(particle_repo)
+    update_interval = PARTICLES_CONFIG["LIQUID_TICK_SECONDS"]
+    while True:
+        try:
+            await asyncio.sleep(update_interval)
+            scheduler = get_liquid_scheduler()
+            try:
+                bloques = await scheduler.bloque_ids(particle_repo)
+            except Exception as e:
+                error_msg = str(e).lower()
+                if "pool is closing" in error_msg or "pool is closed" in error_msg:
+                    logger.debug("Pool de conexiones cerró, deteniendo flujo de líquidos")
+                    break
+                logger.error(f"Error obteniendo bloques con líquidos: {e}")
+                continue
+            tick = LiquidTickStats()
+            for bloque_id in bloques:
+                try:
+                    tick.add(await scheduler.update_bloque(bloque_id, particle_repo))
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    error_msg = str(e).lower()
+                    if "pool is closing" in error_msg or "pool is closed" in error_msg:
+                        break
+                    logger.error(f"Error simulando líquidos del bloque {bloque_id}: {e}")
+            scheduler.finish_tick(tick)
+        except asyncio.CancelledError:
+            logger.info("Tarea de flujo de líquidos cancelada")
+            break
+        except Exception as e:
+            error_msg = str(e).lower()
+            if "pool is closing" in error_msg or "pool is closed" in error_msg:
+                break
+            logger.error(f"Error simulando líquidos: {e}")
+
+
+async def start_liquid_flow_task():
+    """Arranca la tarea que simula el flujo de líquidos periódicamente."""
+    global _liquid_flow_task
+    if _liquid_flow_task is None or _liquid_flow_task.done():
+        _liquid_flow_task = asyncio.create_task(update_liquids_periodically())
+        logger.info("Tarea de flujo de líquidos iniciada")
+
+
+def get_propagation_scheduler() -> PropagationScheduler:
+    """Singleton del scheduler de propagación (versión leída y frente pendiente por bloque entre ticks)."""
+    global _propagation_scheduler
+    if _propagation_scheduler is None:
+        _propagation_scheduler = PropagationScheduler()
+    return _propagation_scheduler
+
+
+async def update_propagation_periodically():
+    particle_repo: IParticleRepository = PostgresParticleRepository()
+    if PARTICLES_CONFIG["CACHE_ENABLED"]:
+        # Las celdas prendidas invalidan sus chunks en la caché de viewport
+        particle_repo = CachedParticleRepository(particle_repo, shared=get_shared_particle_chunks())
+    if PARTICLES_CONFIG["VOXEL_STORE_ENABLED"]:
+        # Vecinas desde memoria; guarda los cambios pendientes antes de leer el feed e invalida los chunks escritos
+        particle_repo = VoxelParticleRepository(particle_repo)
+    update_interval = PARTICLES_CONFIG["PROPAGATION_TICK_SECONDS"]
+    while True:
+        try:
+            await asyncio.sleep(update_interval)
+            scheduler = get_propagation_scheduler()
+            try:
+                bloques = await scheduler.bloque_ids(particle_repo)
+            except Exception as e:
+                error_msg = str(e).lower()
+                if "pool is closing" in error_msg or "pool is closed" in error_msg:
+                    logger.debug("Pool de conexiones cerró, deteniendo propagación")
+                    break
+                logger.error(f"Error obteniendo bloques con fuentes de propagación: {e}")
+                continue
+            tick = PropagationTickStats()
+            for bloque_id in bloques:
+                try:
+                    tick.add(await scheduler.update_bloque(bloque_id, particle_repo))
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    error_msg = str(e).lower()
+                    if "pool is closing" in error_msg or "pool is closed" in error_msg:
+                        break
+                    logger.error(f"Error propagando en el bloque {bloque_id}: {e}")
+            scheduler.finish_tick(tick)
+        except asyncio.CancelledError:
+            logger.info("Tarea de propagación cancelada")
+            break
+        except Exception as e:
+            error_msg = str(e).lower()
+            if "pool is closing" in error_msg or "pool is closed" in error_msg:
+                break
+            logger.error(f"Error propagando: {e}")
+
+
+async def start_propagation_task():
+    """Arranca la tarea que propaga fuego y energía periódicamente."""
+    global _propagation_task
+    if _propagation_task is None or _propagation_task.done():
+        _propagation_task = asyncio.create_task(update_propagation_periodically())
+        logger.info("Tarea de propagación iniciada")
+
+
+@catalogue_router.get("/catalogue", response_model=ParticleCatalogueResponse)
+async def get_particle_catalogue_route(
+    if_none_match: Optional[str] = Header(None),
+    repository: IParticleRepository = Depends(get_particle_repository),
+):
+    """
+    GET /particle-types/catalogue — Todos los tipos de partícula (estilos) y estados de materia.
+    El ETag es el hash del contenido y la respuesta es cacheable (Cache-Control max-age = CATALOGUE_MAX_AGE);
+    los clientes lo descargan una vez y revalidan con If-None-Match (304 si no cambió).
+    """
+    catalogue = await get_particle_catalogue(repository)
+    etag = build_etag("particle-catalogue", catalogue.hash)
+    headers = {"Cache-Control": f"public, max-age={PARTICLES_CONFIG['CATALOGUE_MAX_AGE']}"}
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, headers)
+    return orjson_response(catalogue, headers={"ETag": etag, **headers})
+
+
 @router.get("/{bloque_id}/particle-types", response_model=ParticleTypesResponse)
 async def get_particle_types_in_viewport_route(
     bloque_id: UUID,
+    response: Response,
     x_min: int = Query(..., ge=0),
     x_max: int = Query(..., ge=0),
     y_min: int = Query(..., ge=0),
     y_max: int = Query(..., ge=0),
     z_min: int = Query(-10),
     z_max: int = Query(10),
+    if_none_match: Optional[str] = Header(None),
     repository: IParticleRepository = Depends(get_particle_repository),
 ):
     """GET /bloques/{bloque_id}/particle-types — Tipos de partícula presentes en el viewport (x_min..x_max, y_min..y_max, z_min..z_max)."""
@@ -55,7 +245,16 @@ async def get_particle_types_in_viewport_route(
         x_min=x_min, x_max=x_max, y_min=y_min, y_max=y_max, z_min=z_min, z_max=z_max
     )
     try:
-        return await get_particle_types_in_viewport(repository, bloque_id, viewport)
+        version = await get_viewport_version(
+            repository, bloque_id, viewport, PARTICLES_CONFIG["VIEWPORT_MAX_CELLS"]
+        )
+        etag = build_etag("particle-types", bloque_id, version, x_min, x_max, y_min, y_max, z_min, z_max)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+        response.headers["ETag"] = etag
+        return await get_particle_types_in_viewport(
+            repository, bloque_id, viewport, PARTICLES_CONFIG["VIEWPORT_MAX_CELLS"]
+        )
     except ValueError as e:
         _handle_value_error(e)
 
@@ -69,14 +268,115 @@ async def get_particles_by_viewport_route(
     y_max: int = Query(..., ge=0),
     z_min: int = Query(-10),
     z_max: int = Query(10),
+    visibility: Visibility = Query("all"),
+    lod: int = Query(0, ge=0, le=PARTICLES_CONFIG["LOD_MAX_LEVEL"]),
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+    repository: IParticleRepository = Depends(get_particle_repository),
+):
+    """
+    GET /bloques/{bloque_id}/particles — Partículas en el viewport y total; query params x_min, x_max, y_min, y_max, z_min, z_max.
+    Con `Accept: application/x-jdd-columnar` devuelve el formato binario columnar (ver columnar.py) en lugar de JSON.
+    Con `Accept: application/x-ndjson` o `application/x-jdd-columnar-stream` responde en streaming (ver streaming.py).
+    Con `visibility=surface` solo devuelve partículas con alguna cara expuesta (vecino vacío o no opaco).
+    Con `lod=N` (N > 0) devuelve un voxel representativo por cubo de 2^N celdas (ver lod.py).
+    Con `If-None-Match` igual al ETag actual responde 304 sin leer partículas.
+    """
+    viewport = ParticleViewportQuery(
+        x_min=x_min, x_max=x_max, y_min=y_min, y_max=y_max, z_min=z_min, z_max=z_max
+    )
+    try:
+        # La exposición de las celdas del borde depende de sus vecinas de fuera del viewport
+        version = await get_viewport_version(
+            repository, bloque_id, viewport, PARTICLES_CONFIG["VIEWPORT_MAX_CELLS"],
+            halo=1 if visibility == "surface" else 0,
+        )
+    except ValueError as e:
+        _handle_value_error(e)
+    stream_media_type = negotiate_stream_media_type(accept)
+    representation = stream_media_type or (COLUMNAR_MEDIA_TYPE if accepts_columnar(accept) else "json")
+    etag = build_etag(
+        "particles", bloque_id, version, x_min, x_max, y_min, y_max, z_min, z_max, visibility, lod, representation
+    )
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, {"Vary": "Accept"})
+    headers = {"ETag": etag, "Vary": "Accept"}
+    if stream_media_type is not None:
+        try:
+            batches = await stream_particles_by_viewport(
+                repository, bloque_id, viewport, PARTICLES_CONFIG["STREAM_BATCH_SIZE"], visibility, lod,
+                PARTICLES_CONFIG["VIEWPORT_MAX_CELLS"], PARTICLES_CONFIG["VIEWPORT_MAX_PARTICLES"],
+            )
+        except ValueError as e:
+            _handle_value_error(e)
+        frames = columnar_frames if stream_media_type == COLUMNAR_STREAM_MEDIA_TYPE else ndjson_frames
+        return StreamingResponse(
+            frames(bloque_id, viewport, batches, lod=lod), media_type=stream_media_type, headers=headers
+        )
+    try:
+        result = await get_particles_by_viewport(
+            repository, bloque_id, viewport, visibility, lod,
+            PARTICLES_CONFIG["VIEWPORT_MAX_CELLS"], PARTICLES_CONFIG["VIEWPORT_MAX_PARTICLES"],
+        )
+    except ValueError as e:
+        _handle_value_error(e)
+    if representation == COLUMNAR_MEDIA_TYPE:
+        content = encode_particles_columnar(
+            result.bloque_id, result.particles, result.total, result.viewport, lod=result.lod
+        )
+        return Response(content=content, media_type=COLUMNAR_MEDIA_TYPE, headers=headers)
+    return orjson_response(result, headers=headers)
+
+
+@router.get("/{bloque_id}/particles/changes", response_model=ParticleChangesResponse)
+async def get_particle_changes_route(
+    bloque_id: UUID,
+    since: int = Query(..., ge=0),
+    x_min: int = Query(..., ge=0),
+    x_max: int = Query(..., ge=0),
+    y_min: int = Query(..., ge=0),
+    y_max: int = Query(..., ge=0),
+    z_min: int = Query(-10),
+    z_max: int = Query(10),
     repository: IParticleRepository = Depends(get_particle_repository),
 ):
-    """GET /bloques/{bloque_id}/particles — Partículas en el viewport y total; query params x_min, x_max, y_min, y_max, z_min, z_max."""
+    """
+    GET /bloques/{bloque_id}/particles/changes?since=N — Cambios del viewport con versión > since:
+    partículas insertadas/modificadas y lápidas de las extraídas/borradas. La respuesta trae `version` para el próximo since.
+    No incluye los cambios de solo temperatura: la `temperatura` de cada partícula es la de su último cambio entregado;
+    para temperaturas al día, volver a pedir el viewport (GET /particles, cuyo ETag sí cambia con ellas).
+    """
     viewport = ParticleViewportQuery(
         x_min=x_min, x_max=x_max, y_min=y_min, y_max=y_max, z_min=z_min, z_max=z_max
     )
     try:
-        return await get_particles_by_viewport(repository, bloque_id, viewport)
+        return orjson_response(await get_particle_changes(
+            repository, bloque_id, viewport, since, PARTICLES_CONFIG["VIEWPORT_MAX_CELLS"]
+        ))
+    except ValueError as e:
+        _handle_value_error(e)
+
+
+@router.post("/{bloque_id}/particles/batch", response_model=ParticleBatchResponse)
+async def get_particles_batch_route(
+    bloque_id: UUID,
+    request: ParticleBatchRequest = Body(...),
+    repository: IParticleRepository = Depends(get_particle_repository),
+):
+    """
+    POST /bloques/{bloque_id}/particles/batch — Partículas de varias regiones en un pedido.
+    Body: `regions` (AABB como el viewport) y/o `chunks` (chunk_x, chunk_y, chunk_z de PARTICLES_CHUNK_SIZE celdas).
+    Responde un resultado por región, en el orden del body (primero regions, luego chunks), con una consulta por bloque.
+    """
+    try:
+        return orjson_response(await get_particles_by_regions(
+            repository,
+            bloque_id,
+            request,
+            PARTICLES_CONFIG["CHUNK_SIZE"],
+            PARTICLES_CONFIG["BATCH_MAX_REGIONS"],
+            PARTICLES_CONFIG["BATCH_MAX_CELLS"],
+        ))
     except ValueError as e:
         _handle_value_error(e)
 
@@ -89,6 +389,6 @@ async def get_particle_route(
 ):
     """GET /bloques/{bloque_id}/particles/{particle_id} — Una partícula por ID."""
     try:
-        return await get_particle_by_id(repository, bloque_id, particle_id)
+        return orjson_response(await get_particle_by_id(repository, bloque_id, particle_id))
     except ValueError as e:
         _handle_value_error(e)
@@ -8,7 +8,7 @@ from decimal import Decimal
 from datetime import datetime
 from uuid import UUID
 
-from src.domains.shared.schemas import parse_jsonb_field
+from src.domains.shared.schemas import parse_jsonb_field, trusted_model
 
 
 # =============================================================================
@@ -175,30 +175,30 @@ class ParticleResponse(ParticleBase):
 
     @classmethod
     def from_row(cls, row) -> 'ParticleResponse':
-        propiedades = parse_jsonb_field(row.get('propiedades'))
-        return cls(
-            id=row['id'],
-            bloque_id=row['bloque_id'],
-            celda_x=row['celda_x'],
-            celda_y=row['celda_y'],
-            celda_z=row['celda_z'],
-            tipo=row['tipo_nombre'],
-            estado=row['estado_nombre'],
-            cantidad=float(row['cantidad']),
-            temperatura=float(row['temperatura']),
-            energia=float(row['energia']),
-            extraida=row['extraida'],
-            agrupacion_id=row.get('agrupacion_id'),
-            es_nucleo=row['es_nucleo'],
-            propiedades=propiedades,
-            tipo_particula_id=row['tipo_particula_id'],
-            estado_materia_id=row['estado_materia_id'],
-            tipo_nombre=row['tipo_nombre'],
-            estado_nombre=row['estado_nombre'],
-            creado_en=row['creado_en'],
-            modificado_en=row['modificado_en'],
-            creado_por=row.get('creado_por')
-        )
+        """Fila de asyncpg (confiable) → modelo sin validar (trusted_model); ver shared/orjson_response.py."""
+        return trusted_model(cls, {
+            'celda_x': row['celda_x'],
+            'celda_y': row['celda_y'],
+            'celda_z': row['celda_z'],
+            'tipo': row['tipo_nombre'],
+            'estado': row['estado_nombre'],
+            'cantidad': float(row['cantidad']),
+            'temperatura': float(row['temperatura']),
+            'energia': float(row['energia']),
+            'extraida': row['extraida'],
+            'agrupacion_id': row.get('agrupacion_id'),
+            'es_nucleo': row['es_nucleo'],
+            'propiedades': parse_jsonb_field(row.get('propiedades')),
+            'id': row['id'],
+            'bloque_id': row['bloque_id'],
+            'tipo_particula_id': row['tipo_particula_id'],
+            'estado_materia_id': row['estado_materia_id'],
+            'tipo_nombre': row['tipo_nombre'],
+            'estado_nombre': row['estado_nombre'],
+            'creado_en': row['creado_en'],
+            'modificado_en': row['modificado_en'],
+            'creado_por': row.get('creado_por'),
+        })
 
     class Config:
         from_attributes = True
@@ -213,7 +213,7 @@ class ParticleViewportQuery(BaseModel):
     z_min: int = Field(default=-10, description="Coordenada Z mínima")
     z_max: int = Field(default=10, description="Coordenada Z máxima")
 
-    def validate_ranges(self):
+    def validate_ranges(self, max_cells: int = 1000000):
         if self.x_min > self.x_max:
             raise ValueError("x_min debe ser menor o igual a x_max")
         if self.y_min > self.y_max:
@@ -224,17 +224,72 @@ class ParticleViewportQuery(BaseModel):
         y_range = self.y_max - self.y_min + 1
         z_range = self.z_max - self.z_min + 1
         total_cells = x_range * y_range * z_range
-        if total_cells > 1000000:
-            raise ValueError(f"Viewport demasiado grande: {total_cells} celdas. Máximo: 1000000")
+        if total_cells > max_cells:
+            raise ValueError(f"Viewport demasiado grande: {total_cells} celdas. Máximo: {max_cells}")
         return True
 
 
+Visibility = Literal['all', 'surface']
+
+
 class ParticlesResponse(BaseModel):
     """Response con lista de partículas."""
     bloque_id: UUID
     particles: List[ParticleResponse]
     total: int
     viewport: ParticleViewportQuery
+    visibility: Visibility = Field(default='all', description="'surface' = solo partículas con alguna cara expuesta")
+    lod: int = Field(default=0, ge=0, description="Nivel de detalle: cada partícula representa un cubo de 2^lod celdas")
+
+
+class ParticleTombstone(BaseModel):
+    """Partícula que dejó de existir en el viewport (extraída o borrada) desde la versión pedida."""
+    id: UUID
+    celda_x: int
+    celda_y: int
+    celda_z: int
+
+
+class ParticleChangesResponse(BaseModel):
+    """
+    Cambios de partículas en el viewport desde una versión del mundo. Los de solo temperatura no cuentan (no cambian
+    particulas.version): la temperatura al día se lee con GET /particles.
+    """
+    bloque_id: UUID
+    since: int = Field(..., description="Versión pedida (exclusiva)")
+    version: int = Field(..., description="Versión hasta la que incluye cambios; usar como próximo since")
+    particles: List[ParticleResponse] = Field(
+        default_factory=list,
+        description="Partículas insertadas o modificadas (sin los cambios de solo temperatura)",
+    )
+    removed: List[ParticleTombstone] = Field(default_factory=list, description="Partículas extraídas o borradas")
+    viewport: ParticleViewportQuery
+
+
+class ParticleChunkCoord(BaseModel):
+    """Chunk del bloque por coordenadas de chunk (celda // PARTICLES_CHUNK_SIZE)."""
+    chunk_x: int = Field(..., ge=0)
+    chunk_y: int = Field(..., ge=0)
+    chunk_z: int
+
+
+class ParticleBatchRequest(BaseModel):
+    """Body del batch: regiones (AABB en celdas) y/o chunks; se responden en ese orden (primero regions, luego chunks)."""
+    regions: List[ParticleViewportQuery] = Field(default_factory=list)
+    chunks: List[ParticleChunkCoord] = Field(default_factory=list)
+
+
+class ParticleRegionResult(BaseModel):
+    """Partículas de una región del batch."""
+    viewport: ParticleViewportQuery
+    particles: List[ParticleResponse]
+    total: int
+
+
+class ParticleBatchResponse(BaseModel):
+    """Response del batch: un resultado por región pedida, en el mismo orden."""
+    bloque_id: UUID
+    regions: List[ParticleRegionResult]
 
 
 class ParticleTypeResponse(BaseModel):
@@ -249,3 +304,18 @@ class ParticleTypeResponse(BaseModel):
 class ParticleTypesResponse(BaseModel):
     """Response con lista de tipos de partículas con estilos."""
     types: List[ParticleTypeResponse] = Field(default_factory=list)
+
+
+class MatterStateResponse(BaseModel):
+    """Estado de materia (estados_materia) en el catálogo."""
+    id: str
+    nombre: str
+    tipo_fisica: Optional[str] = None
+
+
+class ParticleCatalogueResponse(BaseModel):
+    """Catálogo completo de tipos (con estilos) y estados; hash identifica el contenido (ETag)."""
+    version: int = Field(..., description="Versión del catálogo (catalogo_version)")
+    hash: str = Field(..., description="Hash del contenido de types y states")
+    types: List[ParticleTypeResponse] = Field(default_factory=list)
+    states: List[MatterStateResponse] = Field(default_factory=list)
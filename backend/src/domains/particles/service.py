@@ -1,9 +1,11 @@
 """
 Servicio de partículas: consultas y lógica de inercia.
+Tipos y transiciones salen del catálogo en memoria (ParticleCatalogue); se devuelven copias de las filas.
 """
 from typing import Optional, List, Dict, Any
 import math
 from src.database.connection import get_connection
+from src.domains.particles.infrastructure.particle_catalogue import particle_catalogue
 
 
 async def get_particula(particula_id: str) -> Optional[Dict[str, Any]]:
@@ -49,7 +51,9 @@ async def get_particulas_vecinas(
             FROM juego_dioses.particulas p
             JOIN juego_dioses.tipos_particulas tp ON p.tipo_particula_id = tp.id
             WHERE p.bloque_id = $1
-            AND ABS(p.celda_x - $2) <= $5 AND ABS(p.celda_y - $3) <= $5 AND ABS(p.celda_z - $4) <= $5
+            AND p.celda_x BETWEEN $2::int - $5::int AND $2::int + $5::int
+            AND p.celda_y BETWEEN $3::int - $5::int AND $3::int + $5::int
+            AND p.celda_z BETWEEN $4::int - $5::int AND $4::int + $5::int
             AND (POWER(p.celda_x - $2, 2) + POWER(p.celda_y - $3, 2) + POWER(p.celda_z - $4, 2)) <= POWER($5, 2)
             ORDER BY POWER(p.celda_x - $2, 2) + POWER(p.celda_y - $3, 2) + POWER(p.celda_z - $4, 2)
             """,
@@ -65,19 +69,13 @@ async def get_particulas_cercanas(
 
 
 async def get_tipo_particula(tipo_id: str) -> Optional[Dict[str, Any]]:
-    async with get_connection() as conn:
-        row = await conn.fetchrow(
-            "SELECT * FROM juego_dioses.tipos_particulas WHERE id = $1", tipo_id
-        )
-        return dict(row) if row else None
+    tipo = (await particle_catalogue.get()).type_by_id(tipo_id)
+    return dict(tipo) if tipo else None
 
 
 async def get_tipo_particula_por_nombre(nombre: str) -> Optional[Dict[str, Any]]:
-    async with get_connection() as conn:
-        row = await conn.fetchrow(
-            "SELECT * FROM juego_dioses.tipos_particulas WHERE nombre = $1", nombre
-        )
-        return dict(row) if row else None
+    tipo = (await particle_catalogue.get()).type_by_name(nombre)
+    return dict(tipo) if tipo else None
 
 
 def calcular_distancia(
@@ -117,13 +115,5 @@ def evaluar_temperatura(
 
 
 async def get_transiciones(tipo_particula_id: str) -> List[Dict[str, Any]]:
-    async with get_connection() as conn:
-        rows = await conn.fetch(
-            """
-            SELECT * FROM juego_dioses.transiciones_particulas
-            WHERE tipo_origen_id = $1 AND activa = true
-            ORDER BY prioridad DESC
-            """,
-            tipo_particula_id
-        )
-        return [dict(row) for row in rows]
+    transiciones = (await particle_catalogue.get()).transitions_from(tipo_particula_id)
+    return [dict(row) for row in transiciones]
@@ -0,0 +1,74 @@
+"""
+Framing de respuestas en streaming para partículas de un viewport.
+
+Dos formatos, negociados por Accept en GET /bloques/{bloque_id}/particles:
+
+- application/x-ndjson: una línea JSON por frame.
+    {"frame": "header", "bloque_id": ..., "viewport": {...}, "lod": N}
+    {"frame": "particles", "particles": [ParticleResponse, ...]}   (uno por lote)
+    {"frame": "trailer", "total": N}
+
+- application/x-jdd-columnar-stream: frames binarios [uint8 tipo][uint32 LE longitud][payload].
+    tipo 1: lote en formato columnar (columnar.py; su header trae count/total del lote)
+    tipo 2: trailer JSON {"total": N}
+
+El total va al final porque recién se conoce al terminar de leer el cursor. Los frames JSON se serializan con
+orjson_dumps (mismos valores que la respuesta JSON sin streaming).
+"""
+import struct
+from typing import AsyncIterator, List, Optional
+
+from src.domains.particles.columnar import encode_particles_columnar
+from src.domains.particles.schemas import ParticleResponse, ParticleViewportQuery
+from src.domains.shared.orjson_response import orjson_dumps
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+COLUMNAR_STREAM_MEDIA_TYPE = "application/x-jdd-columnar-stream"
+
+FRAME_COLUMNAR = 1
+FRAME_TRAILER = 2
+
+
+def negotiate_stream_media_type(accept_header: Optional[str]) -> Optional[str]:
+    """Media type de streaming pedido en Accept, o None si el cliente no pidió streaming."""
+    if not accept_header:
+        return None
+    requested = {part.split(";")[0].strip().lower() for part in accept_header.split(",")}
+    if COLUMNAR_STREAM_MEDIA_TYPE in requested:
+        return COLUMNAR_STREAM_MEDIA_TYPE
+    if NDJSON_MEDIA_TYPE in requested:
+        return NDJSON_MEDIA_TYPE
+    return None
+
+
+async def ndjson_frames(
+    bloque_id,
+    viewport: ParticleViewportQuery,
+    batches: AsyncIterator[List[ParticleResponse]],
+    lod: int = 0,
+) -> AsyncIterator[bytes]:
+    """Header, un frame por lote y trailer con el total, en NDJSON."""
+    yield orjson_dumps({"frame": "header", "bloque_id": bloque_id, "viewport": viewport, "lod": lod}) + b"\n"
+    total = 0
+    async for batch in batches:
+        total += len(batch)
+        yield orjson_dumps({"frame": "particles", "particles": batch}) + b"\n"
+    yield orjson_dumps({"frame": "trailer", "total": total}) + b"\n"
+
+
+def _frame(frame_type: int, payload: bytes) -> bytes:
+    return struct.pack("<BI", frame_type, len(payload)) + payload
+
+
+async def columnar_frames(
+    bloque_id,
+    viewport: ParticleViewportQuery,
+    batches: AsyncIterator[List[ParticleResponse]],
+    lod: int = 0,
+) -> AsyncIterator[bytes]:
+    """Un frame columnar por lote y un frame trailer con el total."""
+    total = 0
+    async for batch in batches:
+        total += len(batch)
+        yield _frame(FRAME_COLUMNAR, encode_particles_columnar(bloque_id, batch, len(batch), viewport, lod=lod))
+    yield _frame(FRAME_TRAILER, orjson_dumps({"total": total}))
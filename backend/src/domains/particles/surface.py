@@ -0,0 +1,60 @@
+"""
+Superficie expuesta: una partícula es visible si al menos uno de sus 6 vecinos de cara está vacío
+o lo ocupa una partícula no opaca (tipos_particulas.opacidad < umbral) de otro tipo.
+Las caras entre partículas del mismo tipo (ej. el interior de un lago) son internas y no cuentan.
+Las partículas totalmente transparentes (opacidad 0, ej. 'límite') no se devuelven: no hay nada que dibujar.
+"""
+from typing import Tuple
+
+import numpy as np
+
+# Desplazamientos a los 6 vecinos de cara (x, y, z)
+FACE_OFFSETS = np.array([
+    (1, 0, 0), (-1, 0, 0),
+    (0, 1, 0), (0, -1, 0),
+    (0, 0, 1), (0, 0, -1),
+], dtype=np.int64)
+
+
+def exposed_mask(
+    coords: np.ndarray,
+    tipos: np.ndarray,
+    origin: Tuple[int, int, int],
+    size: int,
+    halo_coords: np.ndarray,
+    halo_tipos: np.ndarray,
+    halo_opacas: np.ndarray,
+) -> np.ndarray:
+    """
+    Máscara de partículas con al menos una cara expuesta.
+
+    Args:
+        coords: (N, 3) coordenadas de las partículas a evaluar; todas dentro del cubo [origin, origin + size)
+        tipos: (N,) índice entero del tipo de cada partícula
+        origin: Esquina mínima del cubo (en celdas)
+        size: Lado del cubo (en celdas)
+        halo_coords: (M, 3) partículas del cubo y de su halo de 1 celda (las de fuera se ignoran)
+        halo_tipos: (M,) índice del tipo de cada partícula del halo
+        halo_opacas: (M,) si la partícula tapa caras (opacidad >= umbral)
+
+    Returns:
+        Array bool de largo N
+    """
+    if len(coords) == 0:
+        return np.zeros(0, dtype=bool)
+    base = np.asarray(origin, dtype=np.int64) - 1
+    shape = (size + 2, size + 2, size + 2)
+    grid_tipo = np.full(shape, -1, dtype=np.int32)
+    grid_opaca = np.zeros(shape, dtype=bool)
+    if len(halo_coords):
+        rel = halo_coords.astype(np.int64) - base
+        inside = np.all((rel >= 0) & (rel < size + 2), axis=1)
+        rel = rel[inside]
+        grid_tipo[rel[:, 0], rel[:, 1], rel[:, 2]] = halo_tipos[inside]
+        grid_opaca[rel[:, 0], rel[:, 1], rel[:, 2]] = halo_opacas[inside]
+    rel = coords.astype(np.int64) - base
+    exposed = np.zeros(len(coords), dtype=bool)
+    for offset in FACE_OFFSETS:
+        nx, ny, nz = (rel + offset).T
+        exposed |= ~grid_opaca[nx, ny, nz] & (grid_tipo[nx, ny, nz] != tipos)
+    return exposed
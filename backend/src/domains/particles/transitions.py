@@ -0,0 +1,193 @@
+"""
+Transiciones de tipo por lotes (transiciones_particulas): tablas por tipo de origen y evaluación vectorizada.
+
+compile_transitions arma, desde las transiciones activas del catálogo, una TransitionTable: por tipo de origen sus
+reglas en orden de prioridad (mayor primero) como arrays (origen, regla) de condición y valor de temperatura e
+integridad y destino. Una partícula toma la primera regla que cumple; sin ninguna se queda como está.
+
+- Condiciones ('mayor', 'menor', 'igual'): 'igual' admite TOLERANCIA_TEMPERATURA / TOLERANCIA_INTEGRIDAD, como
+  evaluar_temperatura en service.py. Una fila sin condiciones no se aplica (convertiría todo el tipo de una vez).
+- Reversibles con condición de temperatura 'mayor' o 'menor': la fila (y su inversa explícita, si la hay) corre el
+  umbral en la histéresis como evaluar_temperatura ('mayor' hacia arriba, 'menor' hacia abajo); si no hay una fila
+  explícita destino -> origen se agrega la inversa con el umbral corrido hacia el otro lado (ej. hielo -> agua si
+  > 0 con histéresis 5 queda en > 5 y agrega agua -> hielo si < -5), así una partícula cerca del umbral no oscila
+  entre los dos tipos.
+- El estado de materia pasa al de ESTADO_POR_TIPO_FISICO del tipo destino cuando cambia tipo_fisico; si no cambia,
+  la partícula conserva su estado (ej. liquido_viscoso).
+"""
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Condiciones de transiciones_particulas (0 = sin condición)
+SIN_CONDICION, MAYOR, MENOR, IGUAL = 0, 1, 2, 3
+_CONDICIONES = {"mayor": MAYOR, "menor": MENOR, "igual": IGUAL}
+_INVERSA = {MAYOR: MENOR, MENOR: MAYOR}
+
+TOLERANCIA_TEMPERATURA = 0.1
+TOLERANCIA_INTEGRIDAD = 0.005
+
+# Estado de materia (estados_materia.nombre) de una partícula que pasa a un tipo de este tipo_fisico
+ESTADO_POR_TIPO_FISICO = {
+    "solido": "solido",
+    "liquido": "liquido",
+    "gas": "gaseoso",
+    "energia": "poder",
+}
+
+
+class TransitionTable:
+    """
+    Reglas compiladas. origen_ids[i] es el tipo de origen de la fila i de los arrays (T, R) (R = máximo de reglas
+    de un origen; las que sobran tienen destino -1). destino indexa destino_ids y estado indexa estado_ids (-1: la
+    partícula conserva su estado).
+    """
+
+    __slots__ = (
+        "version", "origen_ids", "destino_ids", "estado_ids", "destino", "estado",
+        "temp_condicion", "temp_valor", "int_condicion", "int_valor",
+    )
+
+    def __init__(
+        self,
+        version: int,
+        origen_ids: List[str],
+        destino_ids: List[str],
+        estado_ids: List[str],
+        destino: np.ndarray,
+        estado: np.ndarray,
+        temp_condicion: np.ndarray,
+        temp_valor: np.ndarray,
+        int_condicion: np.ndarray,
+        int_valor: np.ndarray,
+    ):
+        self.version = version
+        self.origen_ids = origen_ids
+        self.destino_ids = destino_ids
+        self.estado_ids = estado_ids
+        self.destino = destino
+        self.estado = estado
+        self.temp_condicion = temp_condicion
+        self.temp_valor = temp_valor
+        self.int_condicion = int_condicion
+        self.int_valor = int_valor
+
+    @property
+    def empty(self) -> bool:
+        return not self.origen_ids
+
+    def evaluate(
+        self, origen: np.ndarray, temperatura: np.ndarray, integridad: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Regla aplicada a cada partícula: origen (N,) índice en origen_ids, temperatura e integridad (N,).
+        Devuelve destino (N,) int32 (índice en destino_ids, -1 si no cambia) y estado (N,) int32 (índice en
+        estado_ids, -1 si conserva el suyo).
+        """
+        origen = np.asarray(origen, dtype=np.int64)
+        resultado = np.full(len(origen), -1, dtype=np.int32)
+        estado = np.full(len(origen), -1, dtype=np.int32)
+        pendientes = np.ones(len(origen), dtype=bool)
+        for regla in range(self.destino.shape[1]):
+            destino = self.destino[origen, regla]
+            cumple = pendientes & (destino >= 0)
+            cumple &= condition_mask(self.temp_condicion[origen, regla], self.temp_valor[origen, regla], temperatura,
+                                     TOLERANCIA_TEMPERATURA)
+            cumple &= condition_mask(self.int_condicion[origen, regla], self.int_valor[origen, regla], integridad,
+                                     TOLERANCIA_INTEGRIDAD)
+            resultado[cumple] = destino[cumple]
+            estado[cumple] = self.estado[origen[cumple], regla]
+            pendientes &= ~cumple
+            if not pendientes.any():
+                break
+        return resultado, estado
+
+
+def condition_mask(condicion: np.ndarray, valor: np.ndarray, medida: np.ndarray, tolerancia: float) -> np.ndarray:
+    """Máscara de la condición por elemento (SIN_CONDICION siempre cumple)."""
+    return (
+        (condicion == SIN_CONDICION)
+        | ((condicion == MAYOR) & (medida > valor))
+        | ((condicion == MENOR) & (medida < valor))
+        | ((condicion == IGUAL) & (np.abs(medida - valor) < tolerancia))
+    )
+
+
+def _float(value, default: float = 0.0) -> float:
+    return float(value) if value is not None else default
+
+
+def compile_transitions(snapshot) -> TransitionTable:
+    """TransitionTable de las transiciones activas de un CatalogueSnapshot (particle_catalogue)."""
+    # (prioridad, orden de la fila) -> regla; las inversas van después de las explícitas de igual prioridad
+    reglas: Dict[str, List[Tuple[int, int, str, int, float, int, float]]] = {}
+    explicitas = {(str(row["tipo_origen_id"]), str(row["tipo_destino_id"])) for row in snapshot.transiciones}
+    reversibles = {
+        (str(row["tipo_origen_id"]), str(row["tipo_destino_id"])): _float(row.get("histeresis"))
+        for row in snapshot.transiciones if row.get("reversible")
+    }
+    for orden, row in enumerate(snapshot.transiciones):
+        origen, destino = str(row["tipo_origen_id"]), str(row["tipo_destino_id"])
+        temp_condicion = _CONDICIONES.get(row.get("condicion_temperatura") or "", SIN_CONDICION)
+        int_condicion = _CONDICIONES.get(row.get("condicion_integridad") or "", SIN_CONDICION)
+        if origen == destino or (temp_condicion == SIN_CONDICION and int_condicion == SIN_CONDICION):
+            continue
+        prioridad = int(row.get("prioridad") or 0)
+        temp_valor = _float(row.get("valor_temperatura"))
+        histeresis = _float(row.get("histeresis")) or reversibles.get((destino, origen), 0.0)
+        umbral = temp_valor
+        if temp_condicion in _INVERSA and ((origen, destino) in reversibles or (destino, origen) in reversibles):
+            # Como evaluar_temperatura: 'menor' baja y 'mayor' sube la histéresis
+            umbral = temp_valor - histeresis if temp_condicion == MENOR else temp_valor + histeresis
+        reglas.setdefault(origen, []).append((
+            -prioridad, orden, destino, temp_condicion, umbral, int_condicion, _float(row.get("valor_integridad")),
+        ))
+        if row.get("reversible") and temp_condicion in _INVERSA and (destino, origen) not in explicitas:
+            umbral = temp_valor + histeresis if temp_condicion == MENOR else temp_valor - histeresis
+            reglas.setdefault(destino, []).append((
+                -prioridad, len(snapshot.transiciones) + orden, origen, _INVERSA[temp_condicion], umbral,
+                SIN_CONDICION, 0.0,
+            ))
+
+    origen_ids = sorted(reglas)
+    destino_ids = sorted({regla[2] for lista in reglas.values() for regla in lista})
+    destino_index = {tipo_id: index for index, tipo_id in enumerate(destino_ids)}
+    estados = {row["nombre"]: str(row["id"]) for row in snapshot.estados}
+    estado_ids: List[str] = []
+    estado_index: Dict[str, int] = {}
+
+    def estado_de(origen: str, destino: str) -> int:
+        """Índice en estado_ids del estado que toma la partícula (-1 si conserva el suyo)."""
+        tipo_fisico = (snapshot.type_by_id(destino) or {}).get("tipo_fisico")
+        if tipo_fisico == (snapshot.type_by_id(origen) or {}).get("tipo_fisico"):
+            return -1
+        estado_id = estados.get(ESTADO_POR_TIPO_FISICO.get(tipo_fisico, ""))
+        if estado_id is None:
+            return -1
+        if estado_id not in estado_index:
+            estado_index[estado_id] = len(estado_ids)
+            estado_ids.append(estado_id)
+        return estado_index[estado_id]
+
+    shape = (len(origen_ids), max((len(lista) for lista in reglas.values()), default=0))
+    destino = np.full(shape, -1, dtype=np.int32)
+    estado = np.full(shape, -1, dtype=np.int32)
+    temp_condicion = np.zeros(shape, dtype=np.int8)
+    temp_valor = np.zeros(shape)
+    int_condicion = np.zeros(shape, dtype=np.int8)
+    int_valor = np.zeros(shape)
+    for fila, origen in enumerate(origen_ids):
+        for columna, regla in enumerate(sorted(reglas[origen])):
+            destino[fila, columna] = destino_index[regla[2]]
+            estado[fila, columna] = estado_de(origen, regla[2])
+            temp_condicion[fila, columna], temp_valor[fila, columna] = regla[3], regla[4]
+            int_condicion[fila, columna], int_valor[fila, columna] = regla[5], regla[6]
+    return TransitionTable(
+        snapshot.version, origen_ids, destino_ids, estado_ids,
+        destino, estado, temp_condicion, temp_valor, int_condicion, int_valor,
+    )
+
+
+def transition_table(snapshot) -> TransitionTable:
+    """TransitionTable del snapshot; se compila una vez por versión del catálogo (CatalogueSnapshot.compiled)."""
+    return snapshot.compiled("transiciones", compile_transitions)
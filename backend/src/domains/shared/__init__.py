@@ -3,12 +3,15 @@ Schemas, helpers y servicios cross-cutting compartidos entre dominios.
 """
 from .schemas import (
     parse_jsonb_field,
+    trusted_model,
     MaterialProperties,
     GeometriaParametros,
     GeometriaVisual,
     VisualProperties,
     EstilosParticula,
 )
+from .etag import build_etag, etag_matches, not_modified
+from .orjson_response import orjson_dumps, orjson_response
 from .performance_monitor import PerformanceMonitorService
 from .world_bloque import WorldBloque
 from .world_bloque_manager import WorldBloqueManager
@@ -16,11 +19,17 @@ from .ports import IBloqueConfigProvider, ITemperatureCalculator
 
 __all__ = [
     "parse_jsonb_field",
+    "trusted_model",
     "MaterialProperties",
     "GeometriaParametros",
     "GeometriaVisual",
     "VisualProperties",
     "EstilosParticula",
+    "build_etag",
+    "etag_matches",
+    "not_modified",
+    "orjson_dumps",
+    "orjson_response",
     "PerformanceMonitorService",
     "WorldBloque",
     "WorldBloqueManager",
@@ -0,0 +1,34 @@
+"""
+ETag y respuestas 304 para los GET de lectura.
+
+Los ETag son débiles (W/"...") y se arman con la versión de los datos que cubre la respuesta (chunk_versiones /
+bloque_versiones / bloques.version) más los parámetros que cambian su representación (viewport, formato, etc.).
+Así la ruta puede comparar If-None-Match y responder 304 antes de correr las consultas pesadas.
+"""
+import hashlib
+from typing import Dict, Optional
+
+from fastapi.responses import Response
+
+
+def build_etag(*parts) -> str:
+    """ETag débil a partir de las partes (versión, ids, parámetros de la representación)."""
+    digest = hashlib.blake2b("|".join(str(part) for part in parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True si el header If-None-Match incluye el ETag (comparación débil) o es '*'."""
+    if not if_none_match:
+        return False
+    opaque = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque:
+            return True
+    return False
+
+
+def not_modified(etag: str, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Respuesta 304 sin cuerpo con el ETag (y headers extra como Vary)."""
+    return Response(status_code=304, headers={"ETag": etag, **(headers or {})})
@@ -0,0 +1,40 @@
+"""
+Respuestas JSON con orjson para DTOs armados desde filas de BD confiables.
+
+Los repositorios construyen los DTOs con model_construct o trusted_model (sin validar: los tipos ya vienen de
+asyncpg) y las rutas los devuelven con orjson_response. Al devolver un Response, FastAPI no vuelve a validar contra
+response_model ni pasa por jsonable_encoder; response_model queda solo para la documentación OpenAPI.
+orjson serializa datetime de forma nativa; los modelos se serializan por sus campos (__dict__).
+"""
+from decimal import Decimal
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+import orjson
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.__dict__
+    if isinstance(obj, UUID):
+        # asyncpg devuelve su propia subclase de UUID, que orjson no serializa de forma nativa
+        return str(obj)
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Tipo no serializable: {type(obj).__name__}")
+
+
+def orjson_dumps(content: Any) -> bytes:
+    """JSON (bytes) de modelos, listas y dicts; mismo formato que la respuesta por defecto de FastAPI."""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def orjson_response(
+    content: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """Response application/json serializada con orjson_dumps."""
+    return Response(
+        content=orjson_dumps(content), status_code=status_code, headers=headers, media_type="application/json"
+    )
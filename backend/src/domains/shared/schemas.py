@@ -3,9 +3,33 @@ Schemas compartidos entre dominios (geometría, estilos, helpers).
 No importar desde ningún dominio para evitar ciclos.
 """
 from pydantic import BaseModel, Field, validator
-from typing import Optional, List, Literal
+from typing import Any, Dict, Optional, List, Literal, Type, TypeVar
 import json
 
+import orjson
+
+M = TypeVar("M", bound=BaseModel)
+
+
+_FIELDS_SET: Dict[type, set] = {}
+
+
+def trusted_model(cls: Type[M], fields: Dict[str, Any]) -> M:
+    """
+    Instancia de cls a partir de una fila de BD confiable, sin validar ni completar defaults.
+    `fields` debe traer todos los campos del modelo con sus tipos finales. Es ~3x más rápido que model_construct
+    (que en pydantic 2 recorre los campos en Python); usar solo en caminos calientes (ej. ParticleResponse.from_row).
+    """
+    fields_set = _FIELDS_SET.get(cls)
+    if fields_set is None:
+        fields_set = _FIELDS_SET[cls] = set(cls.model_fields)
+    obj = cls.__new__(cls)
+    object.__setattr__(obj, "__dict__", fields)
+    object.__setattr__(obj, "__pydantic_fields_set__", fields_set)
+    object.__setattr__(obj, "__pydantic_extra__", None)
+    object.__setattr__(obj, "__pydantic_private__", None)
+    return obj
+
 
 def parse_jsonb_field(value):
     """
@@ -16,7 +40,7 @@ def parse_jsonb_field(value):
     """
     if isinstance(value, str):
         try:
-            return json.loads(value) if value else {}
+            return orjson.loads(value) if value else {}
         except json.JSONDecodeError:
             return {}
     elif isinstance(value, dict):
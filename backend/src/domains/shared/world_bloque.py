@@ -33,6 +33,11 @@ class WorldBloque:
         self.eventos_activos: Set[str] = set()
         self.jugadores: Set[str] = set()
         self.needs_rerender = False
+        # Tarea de temperatura: tramo de intensidad solar, celdas (códigos locales ordenados) y temperatura ambiente
+        # de cada una en el último recálculo
+        self.tramo_sol: Optional[int] = None
+        self.celdas_temperatura: Optional[Any] = None
+        self.temperatura_ambiente: Optional[Any] = None
 
     async def calcular_temperatura(
         self,
@@ -92,6 +97,28 @@ class WorldBloque:
         self.particulas.discard(particula_id)
         self.necesita_recalcular_temperatura = True
 
+    def motivo_recalculo_temperatura(self, tramo_sol: int) -> Optional[str]:
+        """
+        Por qué recalcular la temperatura ambiente de la región ("sucio": partículas agregadas/quitadas o nunca
+        calculada, "sol": cambió el tramo de intensidad solar, "jugadores": hay jugadores) o None si sirve la guardada.
+        """
+        if self.necesita_recalcular_temperatura or self.temperatura_ambiente is None:
+            return "sucio"
+        if tramo_sol != self.tramo_sol:
+            return "sol"
+        if self.jugadores:
+            return "jugadores"
+        return None
+
+    def guardar_temperatura_ambiente(self, celdas: Any, ambiente: Any, tramo_sol: int, temperatura_media: float) -> None:
+        """Guarda el recálculo de la tarea de temperatura: ambiente por celda y la media como temperatura_base."""
+        self.celdas_temperatura = celdas
+        self.temperatura_ambiente = ambiente
+        self.tramo_sol = tramo_sol
+        self.temperatura_base = temperatura_media
+        self.ultima_actualizacion_temperatura = datetime.now()
+        self.necesita_recalcular_temperatura = False
+
     def agregar_jugador(self, jugador_id: str) -> None:
         self.jugadores.add(jugador_id)
 
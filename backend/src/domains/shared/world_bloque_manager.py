@@ -94,6 +94,22 @@ class WorldBloqueManager:
                         bloques.append(bloque)
         return bloques
 
+    async def mover_jugador(
+        self,
+        bloque_id: str,
+        jugador_id: str,
+        celda_x: int,
+        celda_y: int,
+        celda_z: int,
+    ) -> WorldBloque:
+        """Deja al jugador solo en la región de la posición (la tarea de temperatura recalcula esas regiones)."""
+        destino = await self.get_bloque_for_position(bloque_id, celda_x, celda_y, celda_z)
+        for bloque in self.bloques.values():
+            if bloque is not destino:
+                bloque.remover_jugador(jugador_id)
+        destino.agregar_jugador(jugador_id)
+        return destino
+
     def clear_cache(self) -> None:
         self.bloques.clear()
         self.bloque_configs.clear()
@@ -62,6 +62,25 @@ async def lifespan(app: FastAPI):
         health = await db_health_check()
         print(f"Base de datos: {health['message']}")
         
+        # Caché compartida entre workers (Redis); sin ella cada worker usa solo su caché en proceso
+        from src.cache import start_shared_cache
+        from src.config import CACHE_CONFIG
+        shared_cache = await start_shared_cache()
+        if shared_cache is not None:
+            from src.domains.particles.infrastructure.shared_particle_chunks import connect_shared_particle_chunks
+            connect_shared_particle_chunks(shared_cache)
+            print(f"Caché compartida conectada ({CACHE_CONFIG['BACKEND']}).")
+        
+        # Estado del mundo en memoria (temperatura y vecindad): descarta chunks con las invalidaciones de la caché
+        from src.config import PARTICLES_CONFIG
+        if PARTICLES_CONFIG["VOXEL_STORE_ENABLED"]:
+            from src.domains.particles.infrastructure.voxel_store import connect_voxel_store
+            connect_voxel_store(shared_cache)
+        
+        # Catálogo de tipos/estados/transiciones en memoria; LISTEN para recargarlo cuando cambia
+        from src.domains.particles.infrastructure.particle_catalogue import start_particle_catalogue
+        app.state.catalogue_listener = start_particle_catalogue()
+        
         # Ejecutar seeds en segundo plano para no bloquear el inicio de la aplicación
         import asyncio
         from src.database.connection import get_connection
@@ -115,6 +134,18 @@ async def lifespan(app: FastAPI):
         # Iniciar background task de temperatura de partículas (no bloquea)
         asyncio.create_task(start_particle_temperature_update_task())
         print("Background task de temperatura de partículas iniciado.")
+
+        # Iniciar background task de flujo de líquidos (no bloquea)
+        if PARTICLES_CONFIG["LIQUID_ENABLED"]:
+            from src.domains.particles.routes import start_liquid_flow_task
+            asyncio.create_task(start_liquid_flow_task())
+            print("Background task de flujo de líquidos iniciado.")
+
+        # Iniciar background task de propagación de fuego y energía (no bloquea)
+        if PARTICLES_CONFIG["PROPAGATION_ENABLED"]:
+            from src.domains.particles.routes import start_propagation_task
+            asyncio.create_task(start_propagation_task())
+            print("Background task de propagación iniciado.")
         
         # Iniciar monitoreo de rendimiento
         from src.domains.shared.performance_monitor import PerformanceMonitorService
@@ -135,6 +166,19 @@ async def lifespan(app: FastAPI):
         app.state.performance_monitor.stop()
         print("Monitoreo de rendimiento detenido.")
     
+    if hasattr(app.state, 'catalogue_listener'):
+        app.state.catalogue_listener.cancel()
+    
+    # Temperaturas del store que todavía no están en Postgres
+    from src.domains.particles.infrastructure.voxel_store import voxel_store
+    try:
+        await voxel_store.flush()
+    except Exception as e:
+        print(f"Error guardando el estado en memoria: {e}")
+    
+    from src.cache import close_shared_cache
+    await close_shared_cache()
+    
     await close_pool()
 
 # Crear aplicación FastAPI
@@ -169,13 +213,14 @@ async def health_check():
 
 # API Routes (estructura por dominio)
 from src.domains.bloques.routes import router as bloques_router
-from src.domains.particles.routes import router as particles_router
+from src.domains.particles.routes import router as particles_router, catalogue_router as particle_catalogue_router
 from src.domains.agrupaciones.routes import router as agrupaciones_router
 from src.domains.characters.routes import router as characters_router
 from src.domains.celestial.routes import router as celestial_router
 
 app.include_router(bloques_router, prefix="/api/v1")
 app.include_router(particles_router, prefix="/api/v1")
+app.include_router(particle_catalogue_router, prefix="/api/v1")
 app.include_router(agrupaciones_router, prefix="/api/v1")
 app.include_router(characters_router, prefix="/api/v1")
 app.include_router(celestial_router, prefix="/api/v1")
@@ -5,6 +5,8 @@ from src.world_creation_engine.templates.base import BaseTemplate
 from src.world_creation_engine.builders.base import BaseBuilder
 from src.world_creation_engine.builders.tree_builder import TreeBuilder
 from src.world_creation_engine.builders.biped_builder import BipedBuilder
+from src.domains.particles.infrastructure.particle_catalogue import particle_catalogue
+from src.domains.particles.infrastructure.particle_chunk_cache import particle_chunk_cache
 
 
 class EntityCreator:
@@ -18,7 +20,7 @@ class EntityCreator:
     
     async def _get_particle_type_id(self, nombre: str) -> str:
         """
-        Obtener ID de tipo de partícula (con cache)
+        Obtener ID de tipo de partícula (catálogo en memoria, con cache)
         
         Args:
             nombre: Nombre del tipo de partícula (ej: 'madera', 'hojas')
@@ -30,10 +32,14 @@ class EntityCreator:
             ValueError: Si el tipo de partícula no existe
         """
         if nombre not in self._particle_type_cache:
-            tipo_id = await self.conn.fetchval(
-                "SELECT id FROM juego_dioses.tipos_particulas WHERE nombre = $1",
-                nombre
-            )
+            tipo = (await particle_catalogue.get()).type_by_name(nombre)
+            tipo_id = tipo["id"] if tipo else None
+            if not tipo_id:
+                # Tipo creado en esta transacción o todavía no recargado en el catálogo
+                tipo_id = await self.conn.fetchval(
+                    "SELECT id FROM juego_dioses.tipos_particulas WHERE nombre = $1",
+                    nombre
+                )
             if not tipo_id:
                 raise ValueError(f"Tipo de partícula '{nombre}' no encontrado")
             self._particle_type_cache[nombre] = tipo_id
@@ -41,7 +47,7 @@ class EntityCreator:
     
     async def _get_state_id(self, nombre: str) -> str:
         """
-        Obtener ID de estado de materia (con cache)
+        Obtener ID de estado de materia (catálogo en memoria, con cache)
         
         Args:
             nombre: Nombre del estado de materia (ej: 'solido', 'liquido')
@@ -53,10 +59,13 @@ class EntityCreator:
             ValueError: Si el estado de materia no existe
         """
         if nombre not in self._state_cache:
-            state_id = await self.conn.fetchval(
-                "SELECT id FROM juego_dioses.estados_materia WHERE nombre = $1",
-                nombre
-            )
+            estado = (await particle_catalogue.get()).state_by_name(nombre)
+            state_id = estado["id"] if estado else None
+            if not state_id:
+                state_id = await self.conn.fetchval(
+                    "SELECT id FROM juego_dioses.estados_materia WHERE nombre = $1",
+                    nombre
+                )
             if not state_id:
                 raise ValueError(f"Estado de materia '{nombre}' no encontrado")
             self._state_cache[nombre] = state_id
@@ -154,6 +163,7 @@ class EntityCreator:
                     propiedades = EXCLUDED.propiedades,
                     agrupacion_id = EXCLUDED.agrupacion_id
             """, particles)
+            particle_chunk_cache.invalidate_cells(self.bloque_id, ((p[1], p[2], p[3]) for p in particles))
         
         return len(particles)
 
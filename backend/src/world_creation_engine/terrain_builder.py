@@ -7,6 +7,8 @@ import json
 from uuid import UUID
 from typing import Dict
 
+from src.domains.particles.infrastructure.particle_chunk_cache import particle_chunk_cache
+
 
 async def create_boundary_layer(conn: asyncpg.Connection, dimension_id: UUID, dimension_data: Dict) -> int:
     """
@@ -69,5 +71,6 @@ async def create_boundary_layer(conn: asyncpg.Connection, dimension_id: UUID, di
         VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13::jsonb)
         ON CONFLICT (bloque_id, celda_x, celda_y, celda_z) DO NOTHING
     """, particulas)
+    particle_chunk_cache.invalidate_cells(dimension_id, ((p[1], p[2], p[3]) for p in particulas))
 
     return len(particulas)
@@ -0,0 +1,101 @@
+"""
+Conducción entre vecinas (src/domains/celestial/heat_diffusion.py) contra un stencil ingenuo por pares de celdas:
+mismas temperaturas y subpasos, conservación de Σ inercia·T y las celdas sin vecinas.
+"""
+import math
+from typing import Tuple
+
+import numpy as np
+import pytest
+
+from src.domains.celestial.heat_diffusion import LADO_CUBO, diffuse_temperatures
+
+
+def _naive(
+    coords: np.ndarray, temperatura: np.ndarray, conductividad: np.ndarray, inercia: np.ndarray,
+    coeficiente: float, max_subpasos: int,
+) -> Tuple[np.ndarray, int]:
+    """El tick de diffuse_temperatures recorriendo los pares de vecinas (+x, +y, +z) de a uno."""
+    indice = {celda: i for i, celda in enumerate(map(tuple, coords.tolist()))}
+    pares = []
+    for (x, y, z), i in indice.items():
+        for vecina in ((x + 1, y, z), (x, y + 1, z), (x, y, z + 1)):
+            j = indice.get(vecina)
+            if j is not None:
+                suma = conductividad[i] + conductividad[j]
+                g = 2.0 * conductividad[i] * conductividad[j] / suma if suma > 0 else 0.0
+                pares.append((i, j, coeficiente * g))
+    salida = np.zeros(len(coords))
+    for i, j, g in pares:
+        salida[i] += g
+        salida[j] += g
+    t = np.asarray(temperatura, dtype=np.float64).copy()
+    rapidez = float((salida / inercia).max()) if len(coords) else 0.0
+    if coeficiente <= 0 or rapidez <= 0:
+        return t, 0
+    subpasos = max(1, min(max_subpasos, math.ceil(rapidez)))
+    capacidad = np.maximum(inercia, salida / subpasos)
+    for _ in range(subpasos):
+        calor = np.zeros(len(coords))
+        for i, j, g in pares:
+            flujo = g / subpasos * (t[j] - t[i])
+            calor[i] += flujo
+            calor[j] -= flujo
+        t += calor / capacidad
+    return t, subpasos
+
+
+def _terrain(seed: int, n: int = 20000):
+    """Celdas sueltas y en bloques que cruzan cubos de LADO_CUBO, con huecos; conductividad 0 en algunas."""
+    rng = np.random.default_rng(seed)
+    lado = 2 * LADO_CUBO + 5
+    todas = np.stack(np.meshgrid(*(np.arange(-3, lado) for _ in range(3)), indexing="ij"), axis=-1).reshape(-1, 3)
+    coords = todas[rng.choice(len(todas), n, replace=False)]
+    temperatura = rng.uniform(-20.0, 120.0, n)
+    conductividad = rng.uniform(0.05, 3.0, n)
+    conductividad[rng.random(n) < 0.05] = 0.0
+    inercia = rng.uniform(1.0, 8.0, n)
+    return coords.astype(np.int32), temperatura, conductividad, inercia
+
+
+@pytest.mark.parametrize("seed,coeficiente,max_subpasos", [(1, 0.1, 16), (2, 0.9, 16), (3, 2.5, 4)])
+def test_matches_the_naive_stencil(seed, coeficiente, max_subpasos):
+    coords, temperatura, conductividad, inercia = _terrain(seed)
+
+    nuevas, subpasos = diffuse_temperatures(coords, temperatura, conductividad, inercia, coeficiente, max_subpasos)
+    esperadas, subpasos_esperados = _naive(coords, temperatura, conductividad, inercia, coeficiente, max_subpasos)
+
+    assert subpasos == subpasos_esperados
+    np.testing.assert_allclose(nuevas, esperadas, rtol=1e-14, atol=1e-14)
+
+
+@pytest.mark.parametrize("seed", [4, 5])
+def test_conserves_inertia_weighted_heat(seed):
+    coords, temperatura, conductividad, inercia = _terrain(seed, n=40000)
+    # Más una copia lejana de 200 celdas: cubos sin vecinos entre los dos grupos
+    coords = np.concatenate([coords, coords[:200] + 40 * LADO_CUBO])
+    temperatura = np.concatenate([temperatura, temperatura[:200]])
+    conductividad = np.concatenate([conductividad, conductividad[:200]])
+    inercia = np.concatenate([inercia, inercia[:200]])
+
+    nuevas, subpasos = diffuse_temperatures(coords, temperatura, conductividad, inercia, 0.4, 64)
+
+    assert subpasos > 1
+    assert (inercia * nuevas).sum() == pytest.approx((inercia * temperatura).sum(), rel=1e-14)
+    # Principio del máximo: conducir no crea extremos
+    assert nuevas.min() >= temperatura.min() and nuevas.max() <= temperatura.max()
+
+
+def test_isolated_cells_and_zero_coefficient_keep_their_temperature():
+    coords = np.array([[0, 0, 0], [2, 0, 0], [0, 0, 5 * LADO_CUBO]], dtype=np.int32)
+    temperatura = np.array([10.0, 50.0, 90.0])
+    uno = np.ones(3)
+
+    nuevas, subpasos = diffuse_temperatures(coords, temperatura, uno, uno, 0.2)
+    np.testing.assert_array_equal(nuevas, temperatura)
+    assert subpasos == 0
+
+    juntas = np.array([[0, 0, 0], [1, 0, 0]], dtype=np.int32)
+    nuevas, subpasos = diffuse_temperatures(juntas, temperatura[:2], uno[:2], uno[:2], 0.0)
+    np.testing.assert_array_equal(nuevas, temperatura[:2])
+    assert subpasos == 0
@@ -0,0 +1,97 @@
+"""
+Autómata de líquidos (src/domains/particles/liquid_flow.py) sobre grillas chicas: conservación de cantidad y energía,
+límites de cantidad y temperatura, y el resto de las celdas que quedan vacías.
+"""
+import numpy as np
+import pytest
+
+from src.domains.particles.liquid_flow import (
+    CANTIDAD_MINIMA, OBSTACULO, VACIO, fluidity, liquid_temperatures, settle_liquids, step_liquids,
+)
+
+
+def _random_world(seed: int):
+    """Grilla [z, y, x] con suelo, obstáculos sueltos y dos líquidos con cantidades y temperaturas al azar."""
+    rng = np.random.default_rng(seed)
+    shape = (8, 10, 12)
+    tipo = np.full(shape, VACIO, dtype=np.int16)
+    tipo[0] = OBSTACULO
+    tipo[rng.random(shape) < 0.08] = OBSTACULO
+    liquido = (tipo == VACIO) & (rng.random(shape) < 0.35)
+    tipo[liquido] = rng.integers(0, 2, size=int(liquido.sum()))
+    cantidad = np.where(liquido, np.round(rng.uniform(CANTIDAD_MINIMA, 1.0, shape), 4), 0.0)
+    energia = cantidad * np.where(liquido, rng.uniform(-5.0, 80.0, shape), 0.0)
+    return tipo, cantidad, energia
+
+
+def _totales(tipo, cantidad, energia):
+    return [(cantidad[tipo == t].sum(), energia[tipo == t].sum()) for t in (0, 1)]
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_steps_conserve_quantity_and_energy_within_bounds(seed):
+    tipo, cantidad, energia = _random_world(seed)
+    fluidez = fluidity(np.array([0.0, 3.0]))
+    obstaculos = tipo == OBSTACULO
+    temperatura = liquid_temperatures(cantidad, energia)
+    t_min, t_max = temperatura[tipo >= 0].min(), temperatura[tipo >= 0].max()
+    antes = _totales(tipo, cantidad, energia)
+
+    for _ in range(60):
+        step_liquids(tipo, cantidad, energia, fluidez, diferencia_minima=0.001)
+
+        assert cantidad.min() >= 0.0 and cantidad.max() <= 1.0
+        assert np.all(cantidad[tipo < 0] == 0.0) and np.all(energia[tipo < 0] == 0.0)
+        # Los obstáculos no se mueven ni se mojan
+        np.testing.assert_array_equal(tipo == OBSTACULO, obstaculos)
+
+    # Cada líquido se mueve por su cuenta (un tipo no pasa a otro) y conserva cantidad y energía
+    np.testing.assert_allclose(_totales(tipo, cantidad, energia), antes, rtol=1e-12)
+    # La temperatura se mezcla: queda entre la mínima y la máxima del principio
+    temperatura = liquid_temperatures(cantidad, energia)[tipo >= 0]
+    assert temperatura.min() >= t_min - 1e-9 and temperatura.max() <= t_max + 1e-9
+
+
+def test_column_falls_and_settles_on_the_floor():
+    tipo = np.full((4, 1, 3), VACIO, dtype=np.int16)
+    tipo[0] = OBSTACULO
+    cantidad = np.zeros(tipo.shape)
+    energia = np.zeros(tipo.shape)
+    tipo[3, 0, 1], cantidad[3, 0, 1], energia[3, 0, 1] = 0, 0.9, 0.9 * 40.0
+
+    pasos, estable = settle_liquids(tipo, cantidad, energia, fluidity(np.array([0.0])), 500, diferencia_minima=0.001)
+
+    assert estable and pasos < 500
+    # Todo en la fila del suelo, repartido entre las tres celdas, a la misma temperatura
+    assert cantidad[2:].sum() == 0.0
+    assert cantidad[1].sum() == pytest.approx(0.9, rel=1e-12)
+    assert np.all(tipo[1] == 0)
+    np.testing.assert_allclose(liquid_temperatures(cantidad, energia)[1], 40.0)
+
+
+def test_dry_cell_hands_its_rest_to_a_neighbour():
+    # Una celda casi seca al lado de otra del mismo líquido apoyadas en el suelo: no hay flujo lateral (diferencia
+    # por debajo del mínimo) pero la seca desaparece y su resto pasa a la vecina
+    tipo = np.array([[[OBSTACULO, OBSTACULO]], [[0, 0]]], dtype=np.int16)
+    cantidad = np.array([[[0.0, 0.0]], [[0.00004, 0.5]]])
+    energia = cantidad * np.array([[[0.0, 0.0]], [[90.0, 10.0]]])
+
+    step_liquids(tipo, cantidad, energia, fluidity(np.array([0.0])), diferencia_minima=1.0)
+
+    assert tipo[1, 0, 0] == VACIO and cantidad[1, 0, 0] == 0.0 and energia[1, 0, 0] == 0.0
+    assert cantidad[1, 0, 1] == pytest.approx(0.50004, rel=1e-12)
+    assert energia[1, 0, 1] == pytest.approx(0.00004 * 90.0 + 0.5 * 10.0, rel=1e-12)
+
+
+def test_dry_cell_without_room_around_keeps_its_rest():
+    # Sola entre obstáculos: nadie recibe el resto, la celda lo conserva
+    tipo = np.full((3, 3, 3), OBSTACULO, dtype=np.int16)
+    tipo[1, 1, 1] = 0
+    cantidad = np.zeros(tipo.shape)
+    cantidad[1, 1, 1] = 0.00003
+    energia = cantidad * 12.0
+
+    step_liquids(tipo, cantidad, energia, fluidity(np.array([0.0])), diferencia_minima=0.001)
+
+    assert tipo[1, 1, 1] == 0 and cantidad[1, 1, 1] == 0.00003
+    assert energia[1, 1, 1] == pytest.approx(0.00003 * 12.0)
@@ -0,0 +1,149 @@
+"""
+Versiones de partículas contra PostgreSQL (triggers de 03-functions.sql): ETag de viewport y feed de cambios.
+
+Necesitan la base de datos de desarrollo (variables POSTGRES_* de src/database/connection.py); sin ella se saltan.
+Cada prueba restaura lo que escribe.
+"""
+import asyncpg
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+
+from src.database.connection import close_pool, create_pool, get_connection
+from src.domains.particles.infrastructure.cached_particle_repository import CachedParticleRepository
+from src.domains.particles.infrastructure.particle_chunk_cache import ParticleChunkCache
+from src.domains.particles.infrastructure.postgres_particle_repository import PostgresParticleRepository
+from src.domains.particles.routes import get_particle_repository, router
+
+
+@pytest_asyncio.fixture
+async def pool():
+    """Pool de conexiones del backend; sin base de datos se salta la prueba."""
+    try:
+        await create_pool()
+    except (OSError, asyncpg.PostgresError) as e:
+        pytest.skip(f"PostgreSQL no disponible: {e}")
+    yield
+    await close_pool()
+
+
+@pytest_asyncio.fixture
+async def particula(pool):
+    """Una partícula no extraída del mundo (bloque, celda y temperatura)."""
+    async with get_connection() as conn:
+        row = await conn.fetchrow("""
+            SELECT bloque_id, celda_x, celda_y, celda_z, COALESCE(temperatura, 20.0)::float8 AS temperatura
+            FROM juego_dioses.particulas
+            WHERE NOT extraida AND celda_x >= 0 AND celda_y >= 0
+            LIMIT 1
+        """)
+    if row is None:
+        pytest.skip("Sin partículas en la base de datos")
+    return dict(row)
+
+
+def _viewport(p: dict) -> dict:
+    return {
+        "x_min": p["celda_x"], "x_max": p["celda_x"] + 3, "y_min": p["celda_y"], "y_max": p["celda_y"] + 3,
+        "z_min": p["celda_z"] - 2, "z_max": p["celda_z"] + 2,
+    }
+
+
+@pytest.mark.asyncio
+async def test_temperature_only_write_changes_viewport_etag(particula):
+    repository = CachedParticleRepository(PostgresParticleRepository(), cache=ParticleChunkCache())
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_particle_repository] = lambda: repository
+    url = f"/bloques/{particula['bloque_id']}/particles"
+    celda = (particula["celda_x"], particula["celda_y"], particula["celda_z"])
+    nueva = round(particula["temperatura"] + 7.25, 2)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        antes = await client.get(url, params=_viewport(particula))
+        assert antes.status_code == 200
+        etag = antes.headers["ETag"]
+        try:
+            await repository.update_particle_temperature_at(str(particula["bloque_id"]), *celda, nueva)
+
+            despues = await client.get(url, params=_viewport(particula), headers={"If-None-Match": etag})
+            assert despues.status_code == 200
+            assert despues.headers["ETag"] != etag
+            temperaturas = {
+                (p["celda_x"], p["celda_y"], p["celda_z"]): p["temperatura"] for p in despues.json()["particles"]
+            }
+            assert temperaturas[celda] == nueva
+        finally:
+            await repository.update_particle_temperature_at(
+                str(particula["bloque_id"]), *celda, particula["temperatura"]
+            )
+
+
+@pytest.mark.asyncio
+async def test_changes_feed_excludes_temperature_only_writes(particula):
+    repository = PostgresParticleRepository()
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_particle_repository] = lambda: repository
+    url = f"/bloques/{particula['bloque_id']}/particles/changes"
+    celda = (particula["celda_x"], particula["celda_y"], particula["celda_z"])
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        since = (await client.get(url, params={"since": 0, **_viewport(particula)})).json()["version"]
+        try:
+            await repository.update_particle_temperature_at(
+                str(particula["bloque_id"]), *celda, round(particula["temperatura"] + 7.25, 2)
+            )
+
+            cambios = (await client.get(url, params={"since": since, **_viewport(particula)})).json()
+            assert cambios["version"] == since
+            assert cambios["particles"] == [] and cambios["removed"] == []
+        finally:
+            await repository.update_particle_temperature_at(
+                str(particula["bloque_id"]), *celda, particula["temperatura"]
+            )
+
+
+@pytest.mark.asyncio
+async def test_surface_etag_covers_the_neighbours_outside_the_viewport(pool):
+    async with get_connection() as conn:
+        vecina = await conn.fetchrow("""
+            SELECT bloque_id, celda_x, celda_y, celda_z, COALESCE(temperatura, 20.0)::float8 AS temperatura
+            FROM juego_dioses.particulas
+            WHERE NOT extraida AND celda_x >= 40 AND celda_x % 40 = 0 AND celda_y >= 0
+            LIMIT 1
+        """)
+    if vecina is None:
+        pytest.skip("Sin partículas en el borde de un chunk")
+    repository = PostgresParticleRepository()
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_particle_repository] = lambda: repository
+    url = f"/bloques/{vecina['bloque_id']}/particles"
+    celda = (vecina["celda_x"], vecina["celda_y"], vecina["celda_z"])
+    # Viewport que termina justo antes de la celda: la vecina está en el chunk siguiente
+    viewport = {
+        "x_min": vecina["celda_x"] - 10, "x_max": vecina["celda_x"] - 1,
+        "y_min": vecina["celda_y"], "y_max": vecina["celda_y"],
+        "z_min": vecina["celda_z"] - 1, "z_max": vecina["celda_z"] + 1,
+    }
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        async def etags():
+            return [
+                (await client.get(url, params={**viewport, "visibility": visibility})).headers["ETag"]
+                for visibility in ("all", "surface")
+            ]
+
+        antes = await etags()
+        try:
+            await repository.update_particle_temperature_at(
+                str(vecina["bloque_id"]), *celda, round(vecina["temperatura"] + 7.25, 2)
+            )
+            despues = await etags()
+        finally:
+            await repository.update_particle_temperature_at(str(vecina["bloque_id"]), *celda, vecina["temperatura"])
+
+    assert despues[0] == antes[0]
+    assert despues[1] != antes[1]
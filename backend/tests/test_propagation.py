@@ -0,0 +1,179 @@
+"""
+Propagación de fuego y energía (src/domains/particles/propagation.py y application/propagate_particles.py) sobre un
+catálogo fijo y un repositorio de prueba en memoria.
+"""
+from typing import Dict, Optional, Sequence, Tuple
+from uuid import NAMESPACE_DNS, UUID, uuid5
+
+import numpy as np
+import pytest
+
+from src.domains.particles.application.propagate_particles import propagate_particles
+from src.domains.particles.infrastructure.particle_catalogue import CatalogueSnapshot
+from src.domains.particles.neighbours import build_neighbours, neighbour_pairs
+from src.domains.particles.propagation import compile_propagation, propagation_table
+from src.domains.particles.transitions import compile_transitions, transition_table
+
+BLOQUE = "bloque-prueba"
+
+# nombre -> (tipo_fisico, propagacion)
+TIPOS = {
+    "energia_fuego": ("energia", 1.5),
+    "humo": ("gas", 0.0),
+    "madera": ("solido", None),
+    "hierba": ("solido", None),
+    "ceniza": ("solido", None),
+    "piedra": ("solido", None),
+    "carbon": ("solido", None),
+}
+ESTADOS = {"solido": "solido", "poder": "energia"}
+
+
+def _id(nombre: str) -> UUID:
+    return uuid5(NAMESPACE_DNS, nombre)
+
+
+def _transicion(origen: str, destino: str, condicion: Optional[str], valor: Optional[float], **extra) -> dict:
+    row = {
+        "tipo_origen_id": _id(origen), "tipo_destino_id": _id(destino),
+        "condicion_temperatura": condicion, "valor_temperatura": valor,
+        "condicion_integridad": None, "valor_integridad": None,
+        "prioridad": 0, "reversible": False, "histeresis": None,
+    }
+    row.update(extra)
+    return row
+
+
+def _snapshot() -> CatalogueSnapshot:
+    tipos = [
+        {"id": _id(nombre), "nombre": nombre, "tipo_fisico": tipo_fisico, "propagacion": propagacion,
+         "color": None, "geometria": None, "opacidad": None}
+        for nombre, (tipo_fisico, propagacion) in TIPOS.items()
+    ]
+    estados = [{"id": _id(nombre), "nombre": nombre, "tipo_fisica": tipo} for nombre, tipo in ESTADOS.items()]
+    transiciones = [
+        _transicion("madera", "energia_fuego", "mayor", 300.0, prioridad=10),
+        _transicion("madera", "carbon", "mayor", 150.0, prioridad=5),
+        _transicion("hierba", "energia_fuego", "mayor", 200.0),
+        # La inversa generada (ceniza -> fuego si > 50) también prende
+        _transicion("energia_fuego", "ceniza", "menor", 50.0, reversible=True),
+        # Con condición de integridad queda para la tarea de transiciones
+        _transicion("piedra", "energia_fuego", "mayor", 900.0, condicion_integridad="menor", valor_integridad=0.1),
+        _transicion("humo", "energia_fuego", "mayor", 100.0),
+    ]
+    return CatalogueSnapshot(1, tipos, estados, transiciones)
+
+
+class FixtureCatalogue:
+    def __init__(self):
+        self._snapshot = _snapshot()
+
+    async def get(self) -> CatalogueSnapshot:
+        return self._snapshot
+
+
+class FixtureParticleRepository:
+    """Lo que usa propagate_particles de IParticleRepository, sobre celdas fijas (celda -> tipo, temperatura)."""
+
+    def __init__(self, particulas: Dict[Tuple[int, int, int], Tuple[str, float]]):
+        self.particulas = dict(particulas)
+        self.estados: Dict[Tuple[int, int, int], Optional[str]] = {}
+        self.lecturas = 0
+
+    async def get_particles_near_many(
+        self, bloque_id: str, puntos: Sequence[Tuple[float, float, float]], radio: float,
+        tipos: Optional[Sequence[str]] = None,
+    ):
+        self.lecturas += 1
+        celdas = [celda for celda, (tipo, _) in self.particulas.items() if tipos is None or tipo in tipos]
+        tipo_ids = sorted({_id(self.particulas[celda][0]) for celda in celdas}, key=str)
+        coords = np.array(celdas, dtype=np.int64).reshape(-1, 3)
+        point_idx, cand_idx, d2 = neighbour_pairs(np.asarray(puntos, dtype=np.float64), radio, coords)
+        return build_neighbours(
+            len(puntos), point_idx, cand_idx, d2, coords,
+            np.array([tipo_ids.index(_id(self.particulas[celda][0])) for celda in celdas], dtype=np.uint16),
+            np.array([self.particulas[celda][1] for celda in celdas]),
+            tipo_ids,
+        )
+
+    async def update_particle_types_at(
+        self, bloque_id: str, coords: np.ndarray, origenes: Sequence[str], destinos: Sequence[str],
+        estados: Sequence[Optional[str]],
+    ) -> int:
+        nombres = {str(_id(nombre)): nombre for nombre in list(TIPOS) + list(ESTADOS)}
+        cambiadas = 0
+        for celda, origen, destino, estado in zip(map(tuple, np.asarray(coords).tolist()), origenes, destinos, estados):
+            tipo, temperatura = self.particulas[celda]
+            if _id(tipo) == UUID(str(origen)):
+                self.particulas[celda] = (nombres[str(destino)], temperatura)
+                self.estados[celda] = nombres[str(estado)] if estado is not None else None
+                cambiadas += 1
+        return cambiadas
+
+    async def update_particle_temperatures_at(
+        self, bloque_id: str, coords: np.ndarray, temperaturas: np.ndarray, anteriores: Optional[np.ndarray] = None
+    ) -> int:
+        for celda, temperatura in zip(map(tuple, np.asarray(coords).tolist()), np.asarray(temperaturas).tolist()):
+            self.particulas[celda] = (self.particulas[celda][0], temperatura)
+        return len(coords)
+
+
+def test_compile_propagation_takes_flammables_from_the_transitions():
+    snapshot = _snapshot()
+    table = compile_propagation(snapshot, compile_transitions(snapshot))
+
+    # Solo el fuego es fuente (el humo no propaga); la piedra necesita integridad y queda fuera
+    assert table.fuente_nombres == ["energia_fuego"]
+    assert table.radio.tolist() == [1.5]
+    assert sorted(table.inflamables(0)) == ["ceniza", "hierba", "humo", "madera"]
+
+    origen = np.array([table.origen_nombres.index(nombre) for nombre in ("madera", "madera", "hierba", "ceniza")] + [-1])
+    prende = table.evaluate(0, origen, np.array([350.0, 250.0, 250.0, 60.0, 5000.0]))
+    assert prende.tolist() == [True, False, True, True, False]
+
+
+def test_propagation_table_is_compiled_once_per_snapshot():
+    snapshot = _snapshot()
+
+    table = propagation_table(snapshot, transition_table(snapshot))
+
+    assert propagation_table(snapshot, transition_table(snapshot)) is table
+    assert propagation_table(_snapshot(), transition_table(snapshot)) is not table
+
+
+@pytest.mark.asyncio
+async def test_neighbours_take_the_nearest_source_that_ignites_them():
+    repo = FixtureParticleRepository({
+        (4, 5, 5): ("madera", 20.0),    # solo la alcanza la fuente a 600
+        (6, 6, 5): ("hierba", 20.0),    # más cerca de la fuente a 250 (sqrt(2) de la otra)
+        (8, 6, 5): ("madera", 20.0),    # solo la alcanza la fuente a 250: no llega a 300
+        (5, 5, 7): ("madera", 20.0),    # a distancia 2, fuera del radio
+        (5, 4, 5): ("piedra", 20.0),    # no inflamable
+    })
+    coords = np.array([[5, 5, 5], [7, 6, 5]], dtype=np.int32)
+
+    result = await propagate_particles(
+        BLOQUE, repo, coords, np.zeros(2, dtype=np.int64), np.array([600.0, 250.0]), catalogue=FixtureCatalogue()
+    )
+
+    assert result.prendidas == 2
+    assert sorted(map(tuple, result.celdas.tolist())) == [(4, 5, 5), (6, 6, 5)]
+    assert repo.particulas[(4, 5, 5)] == ("energia_fuego", 600.0)
+    assert repo.particulas[(6, 6, 5)] == ("energia_fuego", 250.0)
+    assert repo.estados[(4, 5, 5)] == "poder"
+    for celda in ((8, 6, 5), (5, 5, 7), (5, 4, 5)):
+        assert repo.particulas[celda][1] == 20.0 and repo.particulas[celda][0] != "energia_fuego"
+    # Una lectura de vecinas por tipo fuente
+    assert repo.lecturas == 1
+
+
+@pytest.mark.asyncio
+async def test_front_without_flammable_neighbours_writes_nothing():
+    repo = FixtureParticleRepository({(6, 5, 5): ("piedra", 20.0)})
+
+    result = await propagate_particles(
+        BLOQUE, repo, np.array([[5, 5, 5]]), np.zeros(1, dtype=np.int64), np.array([900.0]),
+        catalogue=FixtureCatalogue(),
+    )
+
+    assert (result.vecinas, result.prendidas, len(result.celdas)) == (0, 0, 0)
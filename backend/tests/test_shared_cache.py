@@ -0,0 +1,169 @@
+"""
+Invalidación entre workers de la caché compartida (src/cache) sobre MemoryCache.
+
+Cada SharedCache sobre el mismo MemoryBroker hace de worker conectado al mismo Redis.
+"""
+import asyncio
+
+import pytest
+
+from src.cache import MemoryBroker, MemoryCache, SharedCache
+from src.domains.particles.infrastructure.particle_chunk_cache import ParticleChunkCache
+from src.domains.particles.infrastructure.shared_particle_chunks import connect_shared_particle_chunks
+
+
+async def _workers(n: int, broker: MemoryBroker, **kwargs) -> list:
+    workers = [SharedCache(MemoryCache(broker), prefix="test", **kwargs) for _ in range(n)]
+    for worker in workers:
+        await worker.start()
+    return workers
+
+
+async def _deliver() -> None:
+    """Deja correr la entrega del broker (call_soon) y las publicaciones agendadas con publish_soon."""
+    for _ in range(3):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_publish_fans_out_to_other_workers_only():
+    a, b, c = await _workers(3, MemoryBroker())
+    received = {name: [] for name in "abc"}
+    for name, worker in zip("abc", (a, b, c)):
+        worker.on("particle_chunks", received[name].append)
+
+    await a.publish({"tipo": "particle_chunks", "bloque_id": "x", "chunks": [[1, 2, 3]]})
+    await _deliver()
+
+    assert received["a"] == []
+    assert [m["chunks"] for m in received["b"]] == [[[1, 2, 3]]]
+    assert [m["chunks"] for m in received["c"]] == [[[1, 2, 3]]]
+
+
+@pytest.mark.asyncio
+async def test_closed_worker_stops_receiving():
+    broker = MemoryBroker()
+    a, b = await _workers(2, broker)
+    received = []
+    b.on("particle_bloque", received.append)
+    await b.close()
+
+    await a.publish({"tipo": "particle_bloque", "bloque_id": "x"})
+    await _deliver()
+
+    assert received == []
+    assert broker.handlers[a.channel] == [a._dispatch]
+
+
+@pytest.mark.asyncio
+async def test_bump_moves_every_worker_to_the_new_key():
+    broker = MemoryBroker()
+    # Sin relectura por tiempo: la versión nueva solo puede llegar por el mensaje
+    a, b = await _workers(2, broker, version_refresh_seconds=3600)
+    assert await a.namespace_version("bloques") == 0
+    assert await b.namespace_version("bloques") == 0
+    viejo = b.key("bloques", "lista", version=0)
+    await b.set_many({viejo: b"lista vieja"})
+    avisos = []
+    b.on("namespace", avisos.append)
+
+    await a.bump("bloques")
+    # El propio worker cambia de versión sin esperar al canal
+    assert await a.namespace_version("bloques") == 1
+    await _deliver()
+
+    assert await b.namespace_version("bloques") == 1
+    assert [m["version"] for m in avisos] == [1]
+    nuevo = b.key("bloques", "lista", version=await b.namespace_version("bloques"))
+    assert nuevo != viejo
+    assert await b.get_many([nuevo, viejo]) == [None, b"lista vieja"]
+
+
+@pytest.mark.asyncio
+async def test_late_namespace_message_does_not_roll_back():
+    a, b = await _workers(2, MemoryBroker(), version_refresh_seconds=3600)
+    await a.bump("bloques")
+    await a.bump("bloques")
+    await _deliver()
+    assert await b.namespace_version("bloques") == 2
+
+    # Un aviso viejo que llega tarde (p. ej. reordenado en la reconexión) no baja la versión
+    await a.publish({"tipo": "namespace", "namespace": "bloques", "version": 1})
+    await _deliver()
+
+    assert await b.namespace_version("bloques") == 2
+
+
+@pytest.mark.asyncio
+async def test_missed_bump_is_picked_up_on_refresh():
+    broker = MemoryBroker()
+    a = SharedCache(MemoryCache(broker), prefix="test", version_refresh_seconds=0)
+    b = SharedCache(MemoryCache(broker), prefix="test", version_refresh_seconds=0)
+    await b.start()
+    # a no está suscrito: se pierde el aviso, pero relee el contador al vencer su copia
+    assert await a.namespace_version("bloques") == 0
+
+    await b.bump("bloques")
+    await _deliver()
+
+    assert await a.namespace_version("bloques") == 1
+
+
+@pytest.mark.asyncio
+async def test_backend_failure_never_matches_a_stored_version():
+    class Broken(MemoryCache):
+        async def get_counter(self, key: str) -> int:
+            raise ConnectionError("sin redis")
+
+    shared = SharedCache(Broken(MemoryBroker()), prefix="test")
+
+    assert await shared.namespace_version("bloques") == -1
+
+
+@pytest.mark.asyncio
+async def test_particle_chunk_invalidations_reach_other_workers():
+    broker = MemoryBroker()
+    a, b = await _workers(2, broker)
+    cache_a, cache_b = ParticleChunkCache(chunk_size=40), ParticleChunkCache(chunk_size=40)
+    connect_shared_particle_chunks(a, cache_a)
+    connect_shared_particle_chunks(b, cache_b)
+    bloque = "bloque-1"
+    tocado, otro = (bloque, 1, 0, 0), (bloque, 2, 0, 0)
+    for cache in (cache_a, cache_b):
+        for key in (tocado, otro):
+            cache.put(key, [], cache.generation(bloque))
+
+    cache_a.invalidate_cells(bloque, [(45, 3, 7)])
+    await _deliver()
+
+    assert cache_b.get(tocado) is None
+    assert cache_b.get(otro) is not None
+    # Una carga de b que empezó antes de la invalidación no se guarda
+    assert cache_b.generation(bloque) == 1
+
+    cache_b.invalidate_bloque(bloque)
+    await _deliver()
+
+    assert cache_a.get(otro) is None
+
+
+@pytest.mark.asyncio
+async def test_temperature_writes_drop_the_chunk_in_other_workers():
+    broker = MemoryBroker()
+    a, b = await _workers(2, broker)
+    cache_a, cache_b = ParticleChunkCache(chunk_size=40), ParticleChunkCache(chunk_size=40)
+    connect_shared_particle_chunks(a, cache_a)
+    connect_shared_particle_chunks(b, cache_b)
+    bloque = "bloque-1"
+    tocado, otro = (bloque, 1, 0, 0), (bloque, 2, 0, 0)
+    for cache in (cache_a, cache_b):
+        for key in (tocado, otro):
+            cache.put(key, [], cache.generation(bloque))
+
+    # El worker que escribe actualiza su copia en el lugar; los demás la descartan (su versión ya no es la de la BD)
+    cache_a.update_temperatures_at(bloque, [(45, 3, 7)], [31.5])
+    await _deliver()
+
+    assert cache_a.get(tocado) is not None
+    assert cache_b.get(tocado) is None
+    assert cache_b.get(otro) is not None
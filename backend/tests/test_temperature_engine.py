@@ -0,0 +1,182 @@
+"""
+Paridad de TemperatureEngine.ambient_temperatures (vectorizado, tarea periódica) con calculate_cell_temperature
+(escalar, POST /celestial/temperature) sobre un repositorio de prueba en memoria.
+"""
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+from uuid import UUID, uuid5, NAMESPACE_DNS
+
+import numpy as np
+import pytest
+
+from src.domains.celestial.service import CelestialTimeService, calculate_cell_temperature
+from src.domains.celestial.temperature_engine import TemperatureEngine, compute_new_temperatures
+from src.domains.particles.infrastructure.particle_catalogue import CatalogueSnapshot
+
+BLOQUE = "bloque-prueba"
+RADIO_MUNDO = 60.0
+
+# nombre -> (albedo, conductividad_termica); None = NULL en la BD
+TIPOS = {
+    "tierra": (0.3, 0.5),
+    "piedra": (None, 2.0),
+    "hierba": (0.25, None),
+    "agua": (0.06, 0.6),
+    "hielo": (0.8, 2.2),
+}
+
+
+def _tipo_id(nombre: str) -> UUID:
+    return uuid5(NAMESPACE_DNS, nombre)
+
+
+def _tipo_row(nombre: str) -> dict:
+    albedo, conductividad = TIPOS[nombre]
+    return {
+        "id": _tipo_id(nombre), "nombre": nombre, "albedo": albedo, "conductividad_termica": conductividad,
+        "color": None, "geometria": None, "opacidad": None,
+    }
+
+
+class FixtureCatalogue:
+    """Catálogo fijo con los TIPOS (lo que TemperatureEngine lee de ParticleCatalogue)."""
+
+    def __init__(self):
+        self._snapshot = CatalogueSnapshot(1, [_tipo_row(nombre) for nombre in TIPOS], [], [])
+
+    async def get(self) -> CatalogueSnapshot:
+        return self._snapshot
+
+
+class FixtureParticleRepository:
+    """Lo que usan calculate_cell_temperature y TemperatureEngine de IParticleRepository, sobre una lista fija."""
+
+    def __init__(self, particulas: List[Tuple[int, int, int, str, float]]):
+        self.coords = np.array([p[:3] for p in particulas], dtype=np.int32)
+        self.tipos = [p[3] for p in particulas]
+        self.temperaturas = np.array([p[4] for p in particulas], dtype=np.float64)
+        # Mapa de alturas: tipo de la partícula más alta de cada columna
+        cima: Dict[Tuple[int, int], Tuple[int, str]] = {}
+        for (x, y, z), tipo in zip(self.coords.tolist(), self.tipos):
+            if (x, y) not in cima or z > cima[(x, y)][0]:
+                cima[(x, y)] = (z, tipo)
+        self.cima = {columna: tipo for columna, (_, tipo) in cima.items()}
+
+    async def get_particles_near(
+        self, bloque_id: str, celda_x: float, celda_y: float, celda_z: float, radio: int = 1
+    ) -> List[dict]:
+        distancia = np.sqrt(((self.coords - np.array([celda_x, celda_y, celda_z])) ** 2).sum(axis=1))
+        return [
+            {
+                "celda_x": int(self.coords[i, 0]), "celda_y": int(self.coords[i, 1]), "celda_z": int(self.coords[i, 2]),
+                "tipo_nombre": self.tipos[i], "temperatura": float(self.temperaturas[i]),
+            }
+            for i in np.flatnonzero(distancia <= radio)
+        ]
+
+    async def get_particle_arrays_by_type(
+        self, bloque_id: str, tipos: Sequence[str]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        buscados = {tipo.lower() for tipo in tipos}
+        filas = [i for i, tipo in enumerate(self.tipos) if tipo in buscados]
+        conductividad = [TIPOS[self.tipos[i]][1] for i in filas]
+        return (
+            self.coords[filas].reshape(-1, 3),
+            self.temperaturas[filas],
+            np.array([1.0 if c is None else c for c in conductividad], dtype=np.float64),
+        )
+
+    async def get_surface_type_name(self, bloque_id: str, celda_x: int, celda_y: int) -> Optional[str]:
+        return self.cima.get((celda_x, celda_y))
+
+    async def get_surface_types(self, bloque_id: str) -> Tuple[np.ndarray, List[UUID]]:
+        columnas = list(self.cima)
+        return (
+            np.array(columnas, dtype=np.int32).reshape(-1, 2),
+            [_tipo_id(self.cima[columna]) for columna in columnas],
+        )
+
+    async def get_particle_type_by_name(self, nombre: str) -> Optional[dict]:
+        return _tipo_row(nombre) if nombre in TIPOS else None
+
+
+def _fixture_world(seed: int = 7) -> List[Tuple[int, int, int, str, float]]:
+    """Terreno de 48x48 columnas con alturas variables, un lago con hielo, columnas de piedra y hierba."""
+    rng = np.random.default_rng(seed)
+    particulas = []
+    for x in range(48):
+        for y in range(48):
+            altura = 2 + int(3 * math.sin(x / 7.0) + 2 * math.cos(y / 5.0)) + int(rng.integers(0, 2))
+            lago = (x - 30) ** 2 + (y - 14) ** 2 < 40
+            for z in range(-2, altura + 1):
+                tipo = "piedra" if z < 0 or (x + y) % 11 == 0 else "tierra"
+                particulas.append((x, y, z, tipo, float(rng.uniform(5.0, 25.0))))
+            if lago:
+                for z in range(altura + 1, altura + 3):
+                    particulas.append((x, y, z, "agua", float(rng.uniform(2.0, 18.0))))
+                if (x + y) % 3 == 0:
+                    particulas.append((x, y, altura + 3, "hielo", float(rng.uniform(-15.0, -1.0))))
+            elif (x * y) % 13 == 0:
+                particulas.append((x, y, altura + 1, "hierba", float(rng.uniform(10.0, 30.0))))
+    return particulas
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("tiempo", [0.0, 37.0, 211.0])
+async def test_ambient_temperatures_match_calculate_cell_temperature(tiempo):
+    repo = FixtureParticleRepository(_fixture_world())
+    engine = TemperatureEngine(catalogue=FixtureCatalogue())
+    celestial = CelestialTimeService(tiempo_inicial=tiempo, velocidad_tiempo=1.0)
+    rng = np.random.default_rng(int(tiempo))
+    # 200 partículas cualquiera y 100 alrededor del lago (donde pesa el término del agua)
+    cerca = np.flatnonzero((repo.coords[:, 0] - 30) ** 2 + (repo.coords[:, 1] - 14) ** 2 < 120)
+    muestra = np.concatenate([
+        repo.coords[rng.choice(len(repo.coords), 200, replace=False)],
+        repo.coords[rng.choice(cerca, 100, replace=False)],
+    ])
+    # Además de partículas: aire sobre el lago y columnas sin mapa de alturas (albedo por defecto)
+    extra = np.array([[30, 14, 9], [28, 12, 6], [60, 60, 0], [0, 0, 40]], dtype=np.int32)
+    coords = np.concatenate([muestra, extra])
+
+    vectorizado = await engine.ambient_temperatures(BLOQUE, coords, celestial, repo, radio_maximo=RADIO_MUNDO)
+
+    escalar = np.array([
+        await calculate_cell_temperature(
+            float(x), float(y), float(z), BLOQUE, celestial, repo, radio_maximo=RADIO_MUNDO
+        )
+        for x, y, z in coords.tolist()
+    ])
+    # El campo del agua se calcula por FFT: diferencias del orden de 1e-7
+    np.testing.assert_allclose(vectorizado, escalar, rtol=0, atol=1e-5)
+
+
+@pytest.mark.asyncio
+async def test_water_field_is_reused_until_the_water_changes():
+    repo = FixtureParticleRepository(_fixture_world())
+    engine = TemperatureEngine(catalogue=FixtureCatalogue())
+    celestial = CelestialTimeService(tiempo_inicial=0.0, velocidad_tiempo=1.0)
+    coords = np.array([[30, 14, 5], [31, 15, 4]], dtype=np.int32)
+    await engine.ambient_temperatures(BLOQUE, coords, celestial, repo, radio_maximo=RADIO_MUNDO)
+    campo = await engine.water_influence(BLOQUE, repo)
+    assert await engine.water_influence(BLOQUE, repo) is campo
+
+    agua = [i for i, tipo in enumerate(repo.tipos) if tipo == "agua"]
+    repo.temperaturas[agua[0]] += 10.0
+    assert await engine.water_influence(BLOQUE, repo) is not campo
+
+    vectorizado = await engine.ambient_temperatures(BLOQUE, coords, celestial, repo, radio_maximo=RADIO_MUNDO)
+    escalar = [
+        await calculate_cell_temperature(float(x), float(y), float(z), BLOQUE, celestial, repo, radio_maximo=RADIO_MUNDO)
+        for x, y, z in coords.tolist()
+    ]
+    np.testing.assert_allclose(vectorizado, escalar, rtol=0, atol=1e-5)
+
+
+def test_compute_new_temperatures():
+    actual = np.array([10.0, 10.0, 10.0, 900.0, -40.0])
+    ambiente = np.array([20.0, 20.0, 20.0, 5000.0, -500.0])
+    inercia = np.array([2.0, 0.0, 1.0, 1.0, 1.0])
+
+    nueva = compute_new_temperatures(actual, ambiente, inercia)
+
+    np.testing.assert_allclose(nueva, [15.0, 10.0, 20.0, 1000.0, -50.0])
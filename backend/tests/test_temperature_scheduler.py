@@ -0,0 +1,186 @@
+"""
+TemperatureScheduler (src/domains/celestial/temperature_scheduler.py) sobre un repositorio de prueba en memoria:
+qué regiones recalculan la temperatura ambiente (sucias, tramo de sol, jugadores) y qué se escribe.
+"""
+import math
+from typing import List, Optional
+
+import numpy as np
+import pytest
+
+from src.domains.celestial import temperature_scheduler as scheduler_module
+from src.domains.celestial.heat_diffusion import diffuse_temperatures
+from src.domains.celestial.temperature_engine import compute_new_temperatures
+from src.domains.celestial.temperature_scheduler import TemperatureScheduler
+from src.domains.shared.world_bloque_manager import WorldBloqueManager
+
+BLOQUE = "bloque-prueba"
+SIZE = 8
+
+
+class FixtureConfigProvider:
+    async def get_config(self, bloque_id: str) -> Optional[dict]:
+        return {"tamano_bloque": SIZE} if bloque_id == BLOQUE else None
+
+
+class FixtureEngine:
+    """Temperatura ambiente fija por celda; guarda cuántas celdas se pidieron en cada llamada."""
+
+    def __init__(self):
+        self.llamadas: List[np.ndarray] = []
+
+    @staticmethod
+    def ambiente(coords: np.ndarray) -> np.ndarray:
+        return 10.0 + 0.5 * coords[:, 0] - 0.25 * coords[:, 2]
+
+    async def ambient_temperatures(self, bloque_id, coords, celestial_time_service, particle_repo) -> np.ndarray:
+        self.llamadas.append(np.asarray(coords).copy())
+        return self.ambiente(np.asarray(coords, dtype=np.float64))
+
+
+class FixtureCelestial:
+    def __init__(self, angulo: float):
+        self.angulo = angulo
+
+    def get_sun_angle(self) -> float:
+        return self.angulo
+
+
+class FixtureParticleRepository:
+    """Partículas con inercia del bloque; update_particle_temperatures_at guarda lo escrito."""
+
+    def __init__(self, coords: np.ndarray, temperatura: np.ndarray):
+        self.coords = np.asarray(coords, dtype=np.int32)
+        self.temperatura = np.asarray(temperatura, dtype=np.float64)
+        self.escrito: Optional[np.ndarray] = None
+
+    def agregar(self, celda, temperatura: float) -> None:
+        self.coords = np.concatenate([self.coords, np.array([celda], dtype=np.int32)])
+        self.temperatura = np.append(self.temperatura, temperatura)
+
+    async def get_thermal_particle_arrays(self, bloque_id: str):
+        n = len(self.coords)
+        return self.coords.copy(), self.temperatura.copy(), np.full(n, 4.0), np.full(n, 0.5)
+
+    async def update_particle_temperatures_at(self, bloque_id, coords, temperaturas, anteriores=None) -> int:
+        np.testing.assert_array_equal(coords, self.coords)
+        self.escrito = np.asarray(temperaturas, dtype=np.float64)
+        cambian = int((np.abs(self.escrito - self.temperatura) >= 0.01).sum())
+        self.temperatura = self.escrito.copy()
+        return cambian
+
+
+@pytest.fixture
+def transiciones(monkeypatch) -> list:
+    """Celdas (N, 3) que devuelve cada llamada a apply_particle_transitions (por defecto, ninguna)."""
+    pendientes: list = []
+
+    async def apply(bloque_id, repository):
+        celdas = pendientes.pop(0) if pendientes else np.empty((0, 3), dtype=np.int32)
+        return len(celdas), celdas
+
+    monkeypatch.setattr(scheduler_module, "apply_particle_transitions", apply)
+    return pendientes
+
+
+def _repo() -> FixtureParticleRepository:
+    # Tres regiones: (0, 0, 0), (1, 0, 0) y (0, 1, 0)
+    celdas = [(x, y, z) for x in range(2 * SIZE) for y in range(2) for z in range(2)]
+    celdas += [(x, SIZE + 1, 0) for x in range(3)]
+    rng = np.random.default_rng(5)
+    return FixtureParticleRepository(np.array(celdas), rng.uniform(0.0, 30.0, len(celdas)))
+
+
+def _scheduler(engine: FixtureEngine, **kwargs) -> TemperatureScheduler:
+    return TemperatureScheduler(WorldBloqueManager(FixtureConfigProvider()), engine=engine, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_clean_regions_reuse_their_ambient_temperature(transiciones):
+    repo, engine = _repo(), FixtureEngine()
+    scheduler = _scheduler(engine, difusion=0.1)
+    celestial = FixtureCelestial(0.8)
+
+    antes = repo.temperatura.copy()
+    primero = await scheduler.update_bloque(BLOQUE, celestial, repo)
+
+    assert (primero.regiones, primero.recalculadas, primero.motivos["sucio"]) == (3, 3, 3)
+    assert len(engine.llamadas) == 1 and len(engine.llamadas[0]) == len(repo.coords)
+    ambiente = engine.ambiente(repo.coords.astype(np.float64))
+    esperado, subpasos = diffuse_temperatures(
+        repo.coords, compute_new_temperatures(antes, ambiente, np.full(len(antes), 4.0)), np.full(len(antes), 0.5),
+        np.full(len(antes), 4.0), 0.1,
+    )
+    np.testing.assert_array_equal(repo.escrito, esperado)
+    assert primero.subpasos == subpasos
+
+    antes = repo.temperatura.copy()
+    segundo = await scheduler.update_bloque(BLOQUE, celestial, repo)
+
+    # Nada cambió: ninguna región se recalcula y se usa la temperatura ambiente guardada
+    assert (segundo.recalculadas, segundo.omitidas) == (0, 3)
+    assert len(engine.llamadas) == 1
+    esperado, _ = diffuse_temperatures(
+        repo.coords, compute_new_temperatures(antes, ambiente, np.full(len(antes), 4.0)), np.full(len(antes), 0.5),
+        np.full(len(antes), 4.0), 0.1,
+    )
+    np.testing.assert_allclose(repo.escrito, esperado, rtol=0, atol=1e-12)
+
+
+@pytest.mark.asyncio
+async def test_new_particles_and_players_recalculate_only_their_region(transiciones):
+    repo, engine = _repo(), FixtureEngine()
+    scheduler = _scheduler(engine, difusion=0.0)
+    celestial = FixtureCelestial(0.8)
+    await scheduler.update_bloque(BLOQUE, celestial, repo)
+
+    repo.agregar((SIZE + 3, 1, 3), 12.0)
+    region = await scheduler.manager.get_bloque_for_position(BLOQUE, 0, SIZE, 0)
+    region.agregar_jugador("jugador-1")
+    stats = await scheduler.update_bloque(BLOQUE, celestial, repo)
+
+    assert (stats.recalculadas, stats.omitidas) == (2, 1)
+    assert stats.motivos == {"sucio": 1, "sol": 0, "jugadores": 1}
+    recalculadas = engine.llamadas[-1]
+    assert set(map(tuple, (recalculadas // SIZE).tolist())) == {(1, 0, 0), (0, 1, 0)}
+    # La partícula nueva toma su ambiente (sin difusión: un paso de inercia)
+    assert repo.escrito[-1] == pytest.approx(12.0 + (engine.ambiente(np.array([[SIZE + 3, 1, 3.0]]))[0] - 12.0) / 4.0)
+
+
+@pytest.mark.asyncio
+async def test_sun_bucket_change_recalculates(transiciones):
+    repo, engine = _repo(), FixtureEngine()
+    scheduler = _scheduler(engine, difusion=0.0, tramos_sol=20)
+    celestial = FixtureCelestial(0.8)
+    await scheduler.update_bloque(BLOQUE, celestial, repo)
+
+    # Un cambio chico no sale del tramo; de noche todas las regiones pasan al tramo 0
+    celestial.angulo = 0.8 + 1e-4
+    assert (await scheduler.update_bloque(BLOQUE, celestial, repo)).recalculadas == 0
+    celestial.angulo = 0.8 + math.pi
+    stats = await scheduler.update_bloque(BLOQUE, celestial, repo)
+
+    assert stats.recalculadas == 3 and stats.motivos["sol"] == 3
+
+
+@pytest.mark.asyncio
+async def test_transitions_dirty_their_regions_for_the_next_tick(transiciones):
+    repo, engine = _repo(), FixtureEngine()
+    scheduler = _scheduler(engine, difusion=0.0)
+    celestial = FixtureCelestial(0.8)
+    transiciones.append(np.array([[1, 1, 1]], dtype=np.int32))
+
+    primero = await scheduler.update_bloque(BLOQUE, celestial, repo)
+    segundo = await scheduler.update_bloque(BLOQUE, celestial, repo)
+
+    assert primero.transiciones == 1
+    assert (segundo.recalculadas, segundo.motivos["sucio"]) == (1, 1)
+    assert set(map(tuple, (engine.llamadas[-1] // SIZE).tolist())) == {(0, 0, 0)}
+
+
+@pytest.mark.asyncio
+async def test_unknown_bloque_is_an_error(transiciones):
+    scheduler = _scheduler(FixtureEngine())
+
+    with pytest.raises(ValueError, match="no existe"):
+        await scheduler.update_bloque("otro", FixtureCelestial(0.0), _repo())
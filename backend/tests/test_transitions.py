@@ -0,0 +1,130 @@
+"""
+TransitionTable (src/domains/particles/transitions.py) sobre un catálogo fijo: prioridad, histéresis de las
+reversibles, inversas generadas y explícitas, condiciones de integridad y estado de materia.
+"""
+from typing import List, Optional
+from uuid import NAMESPACE_DNS, uuid5
+
+import numpy as np
+
+from src.domains.particles.infrastructure.particle_catalogue import CatalogueSnapshot
+from src.domains.particles.transitions import compile_transitions, transition_table
+
+# nombre -> tipo_fisico
+TIPOS = {
+    "hielo": "solido",
+    "agua": "liquido",
+    "vapor": "gas",
+    "madera": "solido",
+    "carbon": "solido",
+    "energia_fuego": "energia",
+    "piedra": "solido",
+}
+ESTADOS = {"solido": "solido", "liquido": "liquido", "gaseoso": "gas", "poder": "energia"}
+
+
+def _id(nombre: str) -> str:
+    return str(uuid5(NAMESPACE_DNS, nombre))
+
+
+def _transicion(
+    origen: str,
+    destino: str,
+    condicion_temperatura: Optional[str] = None,
+    valor_temperatura: Optional[float] = None,
+    prioridad: int = 0,
+    reversible: bool = False,
+    histeresis: Optional[float] = None,
+    condicion_integridad: Optional[str] = None,
+    valor_integridad: Optional[float] = None,
+) -> dict:
+    return {
+        "tipo_origen_id": _id(origen), "tipo_destino_id": _id(destino),
+        "condicion_temperatura": condicion_temperatura, "valor_temperatura": valor_temperatura,
+        "condicion_integridad": condicion_integridad, "valor_integridad": valor_integridad,
+        "prioridad": prioridad, "reversible": reversible, "histeresis": histeresis,
+    }
+
+
+def _snapshot(transiciones: List[dict], version: int = 1) -> CatalogueSnapshot:
+    tipos = [
+        {"id": _id(nombre), "nombre": nombre, "tipo_fisico": tipo_fisico, "color": None, "geometria": None,
+         "opacidad": None}
+        for nombre, tipo_fisico in TIPOS.items()
+    ]
+    estados = [{"id": _id(nombre), "nombre": nombre, "tipo_fisica": tipo} for nombre, tipo in ESTADOS.items()]
+    return CatalogueSnapshot(version, tipos, estados, transiciones)
+
+
+def _evaluate(snapshot: CatalogueSnapshot, origen: str, temperaturas, integridad: float = 1.0):
+    """Nombres de tipo destino y de estado (None: no cambia / conserva el suyo) de partículas del tipo origen."""
+    table = compile_transitions(snapshot)
+    temperaturas = np.asarray(temperaturas, dtype=np.float64)
+    destino, estado = table.evaluate(
+        np.full(len(temperaturas), table.origen_ids.index(_id(origen))),
+        temperaturas,
+        np.full(len(temperaturas), integridad),
+    )
+    nombres = {_id(nombre): nombre for nombre in list(TIPOS) + list(ESTADOS)}
+    return (
+        [nombres[table.destino_ids[d]] if d >= 0 else None for d in destino.tolist()],
+        [nombres[table.estado_ids[e]] if e >= 0 else None for e in estado.tolist()],
+    )
+
+
+def test_reversible_rule_gets_hysteresis_and_a_generated_inverse():
+    snapshot = _snapshot([_transicion("hielo", "agua", "mayor", 0.0, reversible=True, histeresis=5.0)])
+
+    # hielo -> agua si > 0 + 5; la inversa agua -> hielo si < 0 - 5
+    assert _evaluate(snapshot, "hielo", [3.0, 5.0, 6.0]) == ([None, None, "agua"], [None, None, "liquido"])
+    assert _evaluate(snapshot, "agua", [-3.0, -5.0, -6.0]) == ([None, None, "hielo"], [None, None, "solido"])
+
+
+def test_explicit_inverse_is_shifted_and_not_duplicated():
+    snapshot = _snapshot([
+        _transicion("agua", "vapor", "mayor", 100.0, reversible=True, histeresis=2.0),
+        _transicion("vapor", "agua", "menor", 100.0),
+    ])
+    table = compile_transitions(snapshot)
+
+    # Una sola regla para vapor: la explícita, con el umbral corrido por la histéresis de la reversible
+    assert int((table.destino[table.origen_ids.index(_id("vapor"))] >= 0).sum()) == 1
+    assert _evaluate(snapshot, "agua", [101.0, 103.0])[0] == [None, "vapor"]
+    assert _evaluate(snapshot, "vapor", [99.0, 97.0]) == ([None, "agua"], [None, "liquido"])
+
+
+def test_first_rule_by_priority_wins():
+    # En orden inverso a la prioridad: cuenta la prioridad, no el orden de las filas
+    snapshot = _snapshot([
+        _transicion("madera", "carbon", "mayor", 200.0, prioridad=5),
+        _transicion("madera", "energia_fuego", "mayor", 300.0, prioridad=10),
+    ])
+
+    destino, estado = _evaluate(snapshot, "madera", [100.0, 250.0, 400.0])
+
+    assert destino == [None, "carbon", "energia_fuego"]
+    # madera y carbón son sólidos: la partícula conserva su estado
+    assert estado == [None, None, "poder"]
+
+
+def test_integrity_conditions_and_rows_without_conditions():
+    snapshot = _snapshot([
+        _transicion("piedra", "carbon"),
+        _transicion("piedra", "agua", condicion_integridad="igual", valor_integridad=0.5),
+    ])
+    table = compile_transitions(snapshot)
+
+    assert table.destino.shape == (1, 1)
+    assert _evaluate(snapshot, "piedra", [20.0], integridad=0.503)[0] == ["agua"]
+    assert _evaluate(snapshot, "piedra", [20.0], integridad=0.51)[0] == [None]
+
+
+def test_transition_table_is_compiled_once_per_snapshot():
+    filas = [_transicion("hielo", "agua", "mayor", 0.0)]
+    snapshot = _snapshot(filas)
+
+    assert transition_table(snapshot) is transition_table(snapshot)
+    # Otra versión del catálogo es otro snapshot y se compila de nuevo
+    otro = _snapshot(filas, version=2)
+    assert transition_table(otro) is not transition_table(snapshot)
+    assert transition_table(otro).version == 2
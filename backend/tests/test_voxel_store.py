@@ -0,0 +1,230 @@
+"""
+VoxelStore (src/domains/particles/infrastructure/voxel_store.py) sobre una base de datos en memoria: carga, evicción
+con celdas sucias, flush y descarte de lo calculado sobre chunks que cambiaron, invalidaciones.
+"""
+import importlib
+from contextlib import asynccontextmanager
+from typing import Dict, Tuple
+from uuid import UUID, uuid4
+
+import numpy as np
+import pytest
+
+from src.domains.particles.infrastructure.particle_chunk_cache import ParticleChunkCache
+from src.domains.particles.infrastructure.voxel_store import VoxelStore, connect_voxel_store
+
+# El paquete exporta la instancia voxel_store con el nombre del módulo
+voxel_store_module = importlib.import_module("src.domains.particles.infrastructure.voxel_store")
+
+SIZE = 4
+BLOQUE = str(uuid4())
+TIPO = uuid4()
+ESTADO = uuid4()
+
+Cell = Tuple[int, int, int]
+
+
+class FakeDatabase:
+    """particulas (celda -> temperatura) y chunk_versiones como los mantienen los triggers de 03-functions.sql."""
+
+    def __init__(self, temperaturas: Dict[Cell, float]):
+        self.temperaturas = dict(temperaturas)
+        self.ultima_version = 1
+        self.versiones = {self.chunk(cell): 1 for cell in temperaturas}
+        self.sentencias = 0
+
+    @staticmethod
+    def chunk(cell: Cell) -> Cell:
+        return tuple(v // SIZE for v in cell)
+
+    def escribir(self, cells: Dict[Cell, float]) -> int:
+        """Otra transacción: cambia celdas (temperatura o partícula nueva) y la versión de sus chunks."""
+        self.ultima_version += 1
+        for cell, temperatura in cells.items():
+            self.temperaturas[cell] = temperatura
+            self.versiones[self.chunk(cell)] = self.ultima_version
+        return len(cells)
+
+    @asynccontextmanager
+    async def connection(self):
+        yield FakeConnection(self)
+
+
+class FakeConnection:
+    def __init__(self, db: FakeDatabase):
+        self.db = db
+
+    @asynccontextmanager
+    async def transaction(self, **kwargs):
+        yield
+
+    async def fetch(self, sql: str, bloque: UUID, *args):
+        assert str(bloque) == BLOQUE
+        db = self.db
+        if sql is voxel_store_module._VERSIONS_SQL:
+            cx0, cx1, cy0, cy1, cz0, cz1 = args
+            return [
+                {"chunk_x": cx, "chunk_y": cy, "chunk_z": cz, "version": version}
+                for (cx, cy, cz), version in db.versiones.items()
+                if cx0 <= cx <= cx1 and cy0 <= cy <= cy1 and cz0 <= cz <= cz1
+            ]
+        if sql is voxel_store_module._ROWS_SQL:
+            x0, x1, y0, y1, z0, z1 = args
+            return [
+                (x, y, z, TIPO, ESTADO, temperatura, False, False)
+                for (x, y, z), temperatura in db.temperaturas.items()
+                if x0 <= x <= x1 and y0 <= y <= y1 and z0 <= z <= z1
+            ]
+        assert sql is voxel_store_module._LOCK_VERSIONS_SQL
+        return [
+            {"chunk_x": cx, "chunk_y": cy, "chunk_z": cz, "version": db.versiones[(cx, cy, cz)]}
+            for cx, cy, cz in zip(*args)
+            if (cx, cy, cz) in db.versiones
+        ]
+
+    async def execute(self, sql: str, bloque: UUID, xs, ys, zs, temperaturas, epsilon):
+        """UPDATE ... FROM unnest de write_temperatures (por posición)."""
+        self.db.sentencias += 1
+        cells = {
+            (x, y, z): round(t, 2)
+            for x, y, z, t in zip(xs, ys, zs, temperaturas)
+            if (x, y, z) in self.db.temperaturas
+        }
+        return f"UPDATE {self.db.escribir(cells)}"
+
+
+@pytest.fixture
+def db(monkeypatch) -> FakeDatabase:
+    # Dos chunks con partículas: (0, 0, 0) y (1, 0, 0)
+    cells = {(x, y, 0): 10.0 for x in range(2 * SIZE) for y in range(SIZE)}
+    database = FakeDatabase(cells)
+    monkeypatch.setattr(voxel_store_module, "get_connection", database.connection)
+    return database
+
+
+def _store(**kwargs) -> VoxelStore:
+    return VoxelStore(chunk_size=SIZE, flush_batch=5, cache=ParticleChunkCache(chunk_size=SIZE), **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_flush_writes_dirty_cells_and_takes_the_new_version(db):
+    store = _store()
+    chunks = await store.load(BLOQUE, store.chunk_keys_for_box(BLOQUE, 0, 2 * SIZE - 1, 0, SIZE - 1, 0, 0))
+    assert [chunk.version for chunk in chunks.values()] == [1, 1]
+
+    assert store.set_temperature(BLOQUE, 1, 2, 0, 25.126)
+    assert store.set_temperature(BLOQUE, 5, 0, 0, -3.0)
+    assert not store.set_temperature(BLOQUE, 1, 2, 1, 50.0)  # aire
+
+    assert await store.flush() == 2
+    assert db.temperaturas[(1, 2, 0)] == 25.13 and db.temperaturas[(5, 0, 0)] == -3.0
+    # La escritura cambió la versión de los chunks y el store la tomó: no se descartan en load_bloque
+    assert all(chunk.version == db.ultima_version and chunk.sucias is None for chunk in chunks.values())
+    reloaded = await store.load_bloque(BLOQUE)
+    assert all(reloaded[key] is chunk for key, chunk in chunks.items())
+    assert await store.flush() == 0
+
+
+@pytest.mark.asyncio
+async def test_evicted_dirty_cells_are_flushed(db):
+    store = _store()
+    primero, segundo = (BLOQUE, 0, 0, 0), (BLOQUE, 1, 0, 0)
+    chunk = (await store.load(BLOQUE, [primero]))[primero]
+    store.max_bytes = chunk.nbytes + 1
+    store.set_temperature(BLOQUE, 2, 3, 0, 33.0)
+
+    await store.load(BLOQUE, [segundo])
+
+    assert store.get(primero) is None and store.get(segundo) is not None
+    assert await store.flush() == 1
+    assert db.temperaturas[(2, 3, 0)] == 33.0
+
+
+@pytest.mark.asyncio
+async def test_flush_discards_cells_of_chunks_changed_since_they_were_computed(db):
+    store = _store()
+    primero, segundo = (BLOQUE, 0, 0, 0), (BLOQUE, 1, 0, 0)
+    await store.load(BLOQUE, [primero, segundo])
+    store.set_temperature(BLOQUE, 1, 1, 0, 40.0)
+    store.set_temperature(BLOQUE, 6, 1, 0, 41.0)
+    # Otra partícula ocupa la celda (otro proceso) y cambia la versión del primer chunk
+    db.escribir({(1, 1, 0): 99.0})
+
+    assert await store.flush() == 1
+
+    assert db.temperaturas[(1, 1, 0)] == 99.0
+    assert db.temperaturas[(6, 1, 0)] == 41.0
+    # El chunk cambiado se descarta; el otro sigue con la versión de su escritura
+    assert store.get(primero) is None
+    assert store.get(segundo).version == db.versiones[(1, 0, 0)]
+
+
+@pytest.mark.asyncio
+async def test_pending_cells_keep_the_version_they_were_computed_on(db):
+    store = _store()
+    primero = (BLOQUE, 0, 0, 0)
+    await store.load(BLOQUE, [primero])
+    store.set_temperature(BLOQUE, 0, 0, 0, 50.0)
+    store.invalidate_chunks(BLOQUE, [(0, 0, 0)])
+    assert store.get(primero) is None
+    db.escribir({(0, 0, 0): 7.0})
+
+    assert await store.flush() == 0
+    assert db.temperaturas[(0, 0, 0)] == 7.0 and db.sentencias == 0
+
+
+@pytest.mark.asyncio
+async def test_resident_value_wins_over_an_older_pending_one(db):
+    store = _store()
+    primero = (BLOQUE, 0, 0, 0)
+    await store.load(BLOQUE, [primero])
+    store.set_temperature(BLOQUE, 3, 3, 0, 11.0)
+    store.set_temperature(BLOQUE, 2, 0, 0, 12.0)
+    store.invalidate_chunks(BLOQUE, [(0, 0, 0)])
+    chunk = (await store.load(BLOQUE, [primero]))[primero]
+    store.set_temperature(BLOQUE, 3, 3, 0, 21.0)
+
+    assert await store.flush() == 2
+
+    assert db.temperaturas[(3, 3, 0)] == 21.0 and db.temperaturas[(2, 0, 0)] == 12.0
+    # Lo pendiente de la copia anterior también queda en la copia residente
+    np.testing.assert_array_equal(chunk.temperatura[0, [3, 0], [3, 2]], [21.0, 12.0])
+    assert chunk.version == db.versiones[(0, 0, 0)]
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_the_cells_pending(db, monkeypatch):
+    store = _store()
+    await store.load(BLOQUE, [(BLOQUE, 0, 0, 0)])
+    store.set_temperature(BLOQUE, 1, 0, 0, 15.0)
+
+    async def caida(*args, **kwargs):
+        raise ConnectionError("sin base de datos")
+
+    monkeypatch.setattr(FakeConnection, "execute", caida)
+    with pytest.raises(ConnectionError):
+        await store.flush()
+    monkeypatch.undo()
+    monkeypatch.setattr(voxel_store_module, "get_connection", db.connection)
+
+    assert await store.flush() == 1
+    assert db.temperaturas[(1, 0, 0)] == 15.0
+
+
+@pytest.mark.asyncio
+async def test_temperature_messages_drop_chunks_only_from_other_workers(db):
+    cache = ParticleChunkCache(chunk_size=SIZE)
+    store = connect_voxel_store(store=VoxelStore(chunk_size=SIZE, cache=cache), cache=cache)
+    primero = (BLOQUE, 0, 0, 0)
+    await store.load(BLOQUE, [primero])
+
+    # Escritura de este proceso (p. ej. el flush del propio store): el chunk sigue residente
+    cache.update_temperatures_at(BLOQUE, [(1, 1, 0)], [30.0])
+    assert store.get(primero) is not None
+    # El mismo aviso llegado de otro worker lo descarta
+    store.apply_invalidation({"tipo": "particle_temperatures", "bloque_id": BLOQUE, "chunks": [[0, 0, 0]]})
+    assert store.get(primero) is None
+    # Las demás invalidaciones del proceso también
+    await store.load(BLOQUE, [primero])
+    cache.invalidate_cells(BLOQUE, [(1, 1, 0)])
+    assert store.get(primero) is None
@@ -11,6 +11,26 @@ CREATE SCHEMA IF NOT EXISTS juego_dioses;
 -- Cambiar al esquema
 SET search_path TO juego_dioses, public;
 
+-- Versión global del mundo: cada escritura de bloques y de las tablas de versiones (chunk_versiones,
+-- bloque_versiones) toma el siguiente valor (asignado por triggers en 03-functions.sql). Identifica un estado, no
+-- lo ordena: las partículas usan version_escritura() para el feed de cambios.
+CREATE SEQUENCE IF NOT EXISTS world_version_seq;
+
+-- Versión de las escrituras de partículas (particulas.version y las lápidas): el xid8 de la
+-- transacción, el mismo para todas sus filas. nextval ordena por el momento de la escritura y no por el commit:
+-- con una secuencia, una transacción que toma 100 y confirma después de otra que tomó 101 deja su fila fuera de
+-- "desde 101". Con el xid hay un horizonte seguro: toda transacción con xid menor que el xmin del snapshot actual ya
+-- terminó, así que lo que esté por debajo de version_segura() no cambia más y se puede entregar como versión.
+CREATE OR REPLACE FUNCTION version_escritura()
+RETURNS BIGINT AS $$
+    SELECT pg_current_xact_id()::TEXT::BIGINT;
+$$ LANGUAGE sql VOLATILE;
+
+CREATE OR REPLACE FUNCTION version_segura()
+RETURNS BIGINT AS $$
+    SELECT pg_snapshot_xmin(pg_current_snapshot())::TEXT::BIGINT - 1;
+$$ LANGUAGE sql STABLE;
+
 -- Tabla de Bloques (configuración de mundos/dimensiones)
 CREATE TABLE IF NOT EXISTS bloques (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
@@ -37,7 +57,8 @@ CREATE TABLE IF NOT EXISTS bloques (
     
     -- Metadatos
     creado_por UUID,
-    creado_en TIMESTAMP DEFAULT NOW()
+    creado_en TIMESTAMP DEFAULT NOW(),
+    version BIGINT NOT NULL DEFAULT nextval('juego_dioses.world_version_seq')  -- Versión de la última escritura del bloque
 );
 
 CREATE INDEX IF NOT EXISTS idx_bloques_creado ON bloques(creado_en);
@@ -173,6 +194,26 @@ CREATE TABLE IF NOT EXISTS estados_materia (
 CREATE INDEX IF NOT EXISTS idx_estados_materia_nombre ON estados_materia(nombre);
 CREATE INDEX IF NOT EXISTS idx_estados_materia_tipo ON estados_materia(tipo_fisica);
 
+-- Clave Z-order (Morton) de una celda: bits de x, y, z intercalados (x en el bit menos significativo), 21 bits por
+-- eje con desplazamiento 2^20 (celdas en [-1048576, 1048575]). Se define aquí porque la usa la columna generada
+-- particulas.morton; debe coincidir con backend/src/domains/particles/morton.py.
+CREATE OR REPLACE FUNCTION morton_expandir(v BIGINT)
+RETURNS BIGINT AS $$
+    SELECT (v5 | (v5 << 2)) & 0x1249249249249249
+    FROM (SELECT (v4 | (v4 << 4)) & 0x10c30c30c30c30c3 AS v5
+    FROM (SELECT (v3 | (v3 << 8)) & 0x100f00f00f00f00f AS v4
+    FROM (SELECT (v2 | (v2 << 16)) & 0x1f0000ff0000ff AS v3
+    FROM (SELECT (v1 | (v1 << 32)) & 0x1f00000000ffff AS v2
+    FROM (SELECT v & 0x1fffff AS v1) p1) p2) p3) p4) p5;
+$$ LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE;
+
+CREATE OR REPLACE FUNCTION morton3(x INTEGER, y INTEGER, z INTEGER)
+RETURNS BIGINT AS $$
+    SELECT juego_dioses.morton_expandir(x::BIGINT + 1048576)
+        | (juego_dioses.morton_expandir(y::BIGINT + 1048576) << 1)
+        | (juego_dioses.morton_expandir(z::BIGINT + 1048576) << 2);
+$$ LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE;
+
 -- Tabla de Partículas
 CREATE TABLE IF NOT EXISTS particulas (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
@@ -182,6 +223,7 @@ CREATE TABLE IF NOT EXISTS particulas (
     celda_x INTEGER NOT NULL,
     celda_y INTEGER NOT NULL,
     celda_z INTEGER NOT NULL,
+    morton BIGINT GENERATED ALWAYS AS (juego_dioses.morton3(celda_x, celda_y, celda_z)) STORED,  -- Clave Z-order
     
     -- Tipo y estado
     tipo_particula_id UUID NOT NULL REFERENCES tipos_particulas(id),
@@ -208,6 +250,8 @@ CREATE TABLE IF NOT EXISTS particulas (
     creado_por UUID,
     creado_en TIMESTAMP DEFAULT NOW(),
     modificado_en TIMESTAMP DEFAULT NOW(),
+    version BIGINT NOT NULL DEFAULT juego_dioses.version_escritura(),  -- Última escritura salvo las de solo temperatura
+    version_tipo BIGINT NOT NULL DEFAULT juego_dioses.version_escritura(),  -- Inserción o último cambio de tipo/posición
     
     UNIQUE(bloque_id, celda_x, celda_y, celda_z)
 );
@@ -225,6 +269,87 @@ CREATE INDEX IF NOT EXISTS idx_particulas_integridad
 ON particulas(integridad) WHERE integridad < 1.0;
 CREATE INDEX IF NOT EXISTS idx_particulas_carga_electrica 
 ON particulas(carga_electrica) WHERE ABS(carga_electrica) > 0;
+CREATE INDEX IF NOT EXISTS idx_particulas_version ON particulas(bloque_id, version);
+-- Frente de la propagación (get_retyped_particle_arrays): solo inserciones y cambios de tipo o posición
+CREATE INDEX IF NOT EXISTS idx_particulas_version_tipo ON particulas(bloque_id, version_tipo);
+-- Viewports por rangos de morton (ver morton.py). La tabla se agrupa físicamente por este índice: CLUSTER
+-- (sin argumentos) lo usa. Se ejecuta fuera de línea (backend/src/database/cluster_particulas.py) porque bloquea la
+-- tabla; así un viewport lee páginas contiguas.
+CREATE INDEX IF NOT EXISTS idx_particulas_morton ON particulas(bloque_id, morton);
+ALTER TABLE particulas CLUSTER ON idx_particulas_morton;
+
+-- Lápidas de partículas borradas (DELETE físico) para GET /bloques/{id}/particles/changes.
+-- Las extracciones (extraida = true) no pasan por aquí: son UPDATE y ya cambian la versión de la fila.
+CREATE TABLE IF NOT EXISTS particulas_eliminadas (
+    id UUID NOT NULL,
+    bloque_id UUID NOT NULL REFERENCES bloques(id) ON DELETE CASCADE,
+    celda_x INTEGER NOT NULL,
+    celda_y INTEGER NOT NULL,
+    celda_z INTEGER NOT NULL,
+    version BIGINT NOT NULL,
+    eliminado_en TIMESTAMP DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_particulas_eliminadas_version ON particulas_eliminadas(bloque_id, version);
+
+-- Versiones para ETag/304 en los GET de lectura (mantenidas por triggers en 03-functions.sql).
+-- chunk_versiones: una fila por chunk de 40x40x40 celdas con partículas; cambia con cada escritura de partículas
+-- del chunk, también las de solo temperatura (o del catálogo de tipos/estados). bloque_versiones: cambia con
+-- cualquier escritura del bloque (fila del bloque, partículas o agrupaciones) salvo las de solo temperatura.
+CREATE TABLE IF NOT EXISTS bloque_versiones (
+    bloque_id UUID PRIMARY KEY REFERENCES bloques(id) ON DELETE CASCADE,
+    version BIGINT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS chunk_versiones (
+    bloque_id UUID NOT NULL REFERENCES bloques(id) ON DELETE CASCADE,
+    chunk_x INTEGER NOT NULL,
+    chunk_y INTEGER NOT NULL,
+    chunk_z INTEGER NOT NULL,
+    version BIGINT NOT NULL,
+    PRIMARY KEY (bloque_id, chunk_x, chunk_y, chunk_z)
+);
+
+-- Resumen por chunk (mismos chunks de 40x40x40 que chunk_versiones): partículas no extraídas por tipo.
+-- Lo mantiene el trigger particulas_resumir_chunks (03-functions.sql). Sirve para contar y listar tipos de un
+-- viewport sin recorrer particulas en los chunks enteros, y para estimar el costo de un viewport.
+-- Las filas con cantidad = 0 (tipo que ya no está en el chunk) se conservan; las consultas filtran cantidad > 0.
+CREATE TABLE IF NOT EXISTS chunk_resumen (
+    bloque_id UUID NOT NULL REFERENCES bloques(id) ON DELETE CASCADE,
+    chunk_x INTEGER NOT NULL,
+    chunk_y INTEGER NOT NULL,
+    chunk_z INTEGER NOT NULL,
+    tipo_particula_id UUID NOT NULL REFERENCES tipos_particulas(id) ON DELETE CASCADE,
+    cantidad INTEGER NOT NULL,
+    PRIMARY KEY (bloque_id, chunk_x, chunk_y, chunk_z, tipo_particula_id)
+);
+
+-- Mapa de alturas por bloque: para cada columna (x, y) con partículas no extraídas, la celda_z más alta y su tipo.
+-- Lo mantiene el trigger particulas_actualizar_alturas (03-functions.sql) al insertar, mover, extraer o borrar.
+-- Altura del terreno en O(1) para colocar entidades, spawns, la superficie de la temperatura y GET /heightmap.
+-- alturas_versiones cambia solo cuando cambia alguna columna del mapa (ETag del heightmap; las escrituras de
+-- temperatura no lo invalidan).
+CREATE TABLE IF NOT EXISTS alturas_terreno (
+    bloque_id UUID NOT NULL REFERENCES bloques(id) ON DELETE CASCADE,
+    celda_x INTEGER NOT NULL,
+    celda_y INTEGER NOT NULL,
+    altura_z INTEGER NOT NULL,
+    tipo_particula_id UUID NOT NULL REFERENCES tipos_particulas(id) ON DELETE CASCADE,
+    PRIMARY KEY (bloque_id, celda_x, celda_y)
+);
+
+CREATE TABLE IF NOT EXISTS alturas_versiones (
+    bloque_id UUID PRIMARY KEY REFERENCES bloques(id) ON DELETE CASCADE,
+    version BIGINT NOT NULL
+);
+
+-- Versión del catálogo (tipos_particulas, estados_materia, transiciones_particulas): una sola fila.
+-- La mantiene versionar_catalogo() (03-functions.sql), que además avisa con NOTIFY juego_dioses_catalogo;
+-- cada proceso del backend guarda el catálogo en memoria y lo recarga cuando cambia (ParticleCatalogue).
+CREATE TABLE IF NOT EXISTS catalogo_version (
+    id BOOLEAN PRIMARY KEY DEFAULT true CHECK (id),
+    version BIGINT NOT NULL
+);
 
 -- Tabla de Agrupaciones
 CREATE TABLE IF NOT EXISTS agrupaciones (
@@ -100,6 +100,504 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- True si b cambia algo de a además de la temperatura. La tarea periódica reescribe la temperatura de casi todas
+-- las partículas en cada tick: esas escrituras no cambian particulas.version (no entran en el feed de cambios ni
+-- tocan idx_particulas_version) ni bloque_versiones; sí cambian chunk_versiones (particulas_versionar_chunks), que
+-- cubre las respuestas de viewport con temperatura.
+CREATE OR REPLACE FUNCTION particulas_cambio_versionado(a juego_dioses.particulas, b juego_dioses.particulas)
+RETURNS BOOLEAN AS $$
+    SELECT (a.bloque_id, a.celda_x, a.celda_y, a.celda_z, a.tipo_particula_id, a.estado_materia_id, a.integridad,
+            a.carga_electrica, a.cantidad, a.energia, a.extraida, a.agrupacion_id, a.es_nucleo, a.propiedades,
+            a.creado_por)
+        IS DISTINCT FROM
+           (b.bloque_id, b.celda_x, b.celda_y, b.celda_z, b.tipo_particula_id, b.estado_materia_id, b.integridad,
+            b.carga_electrica, b.cantidad, b.energia, b.extraida, b.agrupacion_id, b.es_nucleo, b.propiedades,
+            b.creado_por);
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Versión de partículas (version_escritura, 01-init-schema.sql): cada UPDATE que cambia algo más que la temperatura
+-- toma la de su transacción (INSERT la toma por DEFAULT); las de solo temperatura conservan la anterior.
+-- version_tipo cambia solo con el tipo, la posición o extraida (frente de la propagación)
+CREATE OR REPLACE FUNCTION particulas_asignar_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF juego_dioses.particulas_cambio_versionado(OLD, NEW) THEN
+        NEW.version := juego_dioses.version_escritura();
+    ELSE
+        NEW.version := OLD.version;
+    END IF;
+    IF (NEW.bloque_id, NEW.celda_x, NEW.celda_y, NEW.celda_z, NEW.tipo_particula_id, NEW.extraida)
+        IS DISTINCT FROM (OLD.bloque_id, OLD.celda_x, OLD.celda_y, OLD.celda_z, OLD.tipo_particula_id, OLD.extraida) THEN
+        NEW.version_tipo := juego_dioses.version_escritura();
+    ELSE
+        NEW.version_tipo := OLD.version_tipo;
+    END IF;
+    NEW.modificado_en := NOW();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_particulas_version ON particulas;
+CREATE TRIGGER trg_particulas_version
+    BEFORE UPDATE ON particulas
+    FOR EACH ROW
+    EXECUTE FUNCTION particulas_asignar_version();
+
+-- Lápidas para DELETE físico de partículas (a nivel sentencia, con tabla de transición)
+CREATE OR REPLACE FUNCTION particulas_registrar_eliminadas()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO juego_dioses.particulas_eliminadas (id, bloque_id, celda_x, celda_y, celda_z, version)
+    SELECT e.id, e.bloque_id, e.celda_x, e.celda_y, e.celda_z, juego_dioses.version_escritura()
+    FROM eliminadas e
+    WHERE EXISTS (SELECT 1 FROM juego_dioses.bloques b WHERE b.id = e.bloque_id);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_particulas_eliminadas ON particulas;
+CREATE TRIGGER trg_particulas_eliminadas
+    AFTER DELETE ON particulas
+    REFERENCING OLD TABLE AS eliminadas
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION particulas_registrar_eliminadas();
+
+-- Chunk (40 celdas por lado) de una coordenada de celda; debe coincidir con VERSION_CHUNK_SIZE del backend
+CREATE OR REPLACE FUNCTION chunk_de(celda INTEGER)
+RETURNS INTEGER AS $$
+    SELECT floor(celda / 40.0)::INTEGER;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Versión de la transacción actual: todas sus escrituras comparten un valor de world_version_seq, así
+-- un lote (executemany dispara los triggers de sentencia una vez por fila) actualiza cada fila de versión una sola vez.
+-- No es monótona entre transacciones concurrentes (se toma en la primera escritura y se confirma al final):
+-- las versiones identifican un estado, no lo ordenan; los ETag se arman con el conjunto (ver backend).
+CREATE OR REPLACE FUNCTION version_transaccion()
+RETURNS BIGINT AS $$
+DECLARE
+    v TEXT := current_setting('juego_dioses.version_transaccion', true);
+BEGIN
+    IF v IS NULL OR v = '' THEN
+        v := nextval('juego_dioses.world_version_seq')::TEXT;
+        PERFORM set_config('juego_dioses.version_transaccion', v, true);
+    END IF;
+    RETURN v::BIGINT;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Versiones de chunk y de bloque tras escribir partículas (a nivel sentencia, con tablas de transición).
+-- Una sola sentencia por disparo: el bloque solo se toca si algún chunk cambió de versión. Los UPDATE de solo
+-- temperatura cambian la versión de sus chunks (una vez por transacción: un tick de temperatura es un solo salto por
+-- chunk) pero no la del bloque, que no cubre temperaturas (particulas_cambio_versionado).
+CREATE OR REPLACE FUNCTION particulas_versionar_chunks()
+RETURNS TRIGGER AS $$
+DECLARE
+    v BIGINT := juego_dioses.version_transaccion();
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        WITH chunks AS (
+            INSERT INTO juego_dioses.chunk_versiones (bloque_id, chunk_x, chunk_y, chunk_z, version)
+            SELECT DISTINCT c.bloque_id, juego_dioses.chunk_de(c.celda_x), juego_dioses.chunk_de(c.celda_y),
+                   juego_dioses.chunk_de(c.celda_z), v
+            FROM nuevas c
+            ON CONFLICT (bloque_id, chunk_x, chunk_y, chunk_z) DO UPDATE SET version = EXCLUDED.version
+            WHERE chunk_versiones.version <> EXCLUDED.version
+            RETURNING bloque_id
+        )
+        INSERT INTO juego_dioses.bloque_versiones (bloque_id, version)
+        SELECT DISTINCT bloque_id, v FROM chunks
+        ON CONFLICT (bloque_id) DO UPDATE SET version = EXCLUDED.version
+        WHERE bloque_versiones.version <> EXCLUDED.version;
+    ELSIF TG_OP = 'UPDATE' THEN
+        WITH chunks AS (
+            INSERT INTO juego_dioses.chunk_versiones (bloque_id, chunk_x, chunk_y, chunk_z, version)
+            SELECT DISTINCT c.bloque_id, juego_dioses.chunk_de(c.celda_x), juego_dioses.chunk_de(c.celda_y),
+                   juego_dioses.chunk_de(c.celda_z), v
+            FROM nuevas n
+            JOIN viejas o ON o.id = n.id
+            CROSS JOIN LATERAL (VALUES
+                (n.bloque_id, n.celda_x, n.celda_y, n.celda_z),
+                (o.bloque_id, o.celda_x, o.celda_y, o.celda_z)
+            ) AS c(bloque_id, celda_x, celda_y, celda_z)
+            WHERE o.temperatura IS DISTINCT FROM n.temperatura OR juego_dioses.particulas_cambio_versionado(o, n)
+            ON CONFLICT (bloque_id, chunk_x, chunk_y, chunk_z) DO UPDATE SET version = EXCLUDED.version
+            WHERE chunk_versiones.version <> EXCLUDED.version
+            RETURNING bloque_id
+        )
+        INSERT INTO juego_dioses.bloque_versiones (bloque_id, version)
+        SELECT DISTINCT bloque_id, v FROM chunks
+        WHERE EXISTS (
+            SELECT 1 FROM nuevas n JOIN viejas o ON o.id = n.id WHERE juego_dioses.particulas_cambio_versionado(o, n)
+        )
+        ON CONFLICT (bloque_id) DO UPDATE SET version = EXCLUDED.version
+        WHERE bloque_versiones.version <> EXCLUDED.version;
+    ELSE
+        -- Las filas de un bloque borrado (ON DELETE CASCADE) no dejan versión
+        WITH chunks AS (
+            INSERT INTO juego_dioses.chunk_versiones (bloque_id, chunk_x, chunk_y, chunk_z, version)
+            SELECT DISTINCT c.bloque_id, juego_dioses.chunk_de(c.celda_x), juego_dioses.chunk_de(c.celda_y),
+                   juego_dioses.chunk_de(c.celda_z), v
+            FROM viejas c
+            WHERE EXISTS (SELECT 1 FROM juego_dioses.bloques b WHERE b.id = c.bloque_id)
+            ON CONFLICT (bloque_id, chunk_x, chunk_y, chunk_z) DO UPDATE SET version = EXCLUDED.version
+            WHERE chunk_versiones.version <> EXCLUDED.version
+            RETURNING bloque_id
+        )
+        INSERT INTO juego_dioses.bloque_versiones (bloque_id, version)
+        SELECT DISTINCT bloque_id, v FROM chunks
+        ON CONFLICT (bloque_id) DO UPDATE SET version = EXCLUDED.version
+        WHERE bloque_versiones.version <> EXCLUDED.version;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_particulas_chunks_insert ON particulas;
+CREATE TRIGGER trg_particulas_chunks_insert
+    AFTER INSERT ON particulas
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION particulas_versionar_chunks();
+
+DROP TRIGGER IF EXISTS trg_particulas_chunks_update ON particulas;
+CREATE TRIGGER trg_particulas_chunks_update
+    AFTER UPDATE ON particulas
+    REFERENCING OLD TABLE AS viejas NEW TABLE AS nuevas
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION particulas_versionar_chunks();
+
+DROP TRIGGER IF EXISTS trg_particulas_chunks_delete ON particulas;
+CREATE TRIGGER trg_particulas_chunks_delete
+    AFTER DELETE ON particulas
+    REFERENCING OLD TABLE AS viejas
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION particulas_versionar_chunks();
+
+-- Resumen por chunk (chunk_resumen) tras escribir partículas: suma +1 por fila nueva no extraída y -1 por fila
+-- vieja no extraída, agrupado por (chunk, tipo). En UPDATE solo cuentan las filas que cambiaron de posición, tipo,
+-- bloque o extraida (las escrituras de temperatura no tocan el resumen).
+CREATE OR REPLACE FUNCTION particulas_resumir_chunks()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO juego_dioses.chunk_resumen AS r (bloque_id, chunk_x, chunk_y, chunk_z, tipo_particula_id, cantidad)
+        SELECT n.bloque_id, juego_dioses.chunk_de(n.celda_x), juego_dioses.chunk_de(n.celda_y),
+               juego_dioses.chunk_de(n.celda_z), n.tipo_particula_id, COUNT(*)
+        FROM nuevas n
+        WHERE NOT n.extraida
+        GROUP BY 1, 2, 3, 4, 5
+        ON CONFLICT (bloque_id, chunk_x, chunk_y, chunk_z, tipo_particula_id)
+        DO UPDATE SET cantidad = r.cantidad + EXCLUDED.cantidad;
+    ELSIF TG_OP = 'UPDATE' THEN
+        INSERT INTO juego_dioses.chunk_resumen AS r (bloque_id, chunk_x, chunk_y, chunk_z, tipo_particula_id, cantidad)
+        SELECT d.bloque_id, juego_dioses.chunk_de(d.celda_x), juego_dioses.chunk_de(d.celda_y),
+               juego_dioses.chunk_de(d.celda_z), d.tipo_particula_id, SUM(d.delta)
+        FROM (
+            SELECT n.bloque_id, n.celda_x, n.celda_y, n.celda_z, n.tipo_particula_id, 1 AS delta
+            FROM nuevas n JOIN viejas o ON o.id = n.id
+            WHERE NOT n.extraida
+              AND (n.bloque_id, n.celda_x, n.celda_y, n.celda_z, n.tipo_particula_id, n.extraida)
+                  IS DISTINCT FROM (o.bloque_id, o.celda_x, o.celda_y, o.celda_z, o.tipo_particula_id, o.extraida)
+            UNION ALL
+            SELECT o.bloque_id, o.celda_x, o.celda_y, o.celda_z, o.tipo_particula_id, -1
+            FROM viejas o JOIN nuevas n ON n.id = o.id
+            WHERE NOT o.extraida
+              AND (n.bloque_id, n.celda_x, n.celda_y, n.celda_z, n.tipo_particula_id, n.extraida)
+                  IS DISTINCT FROM (o.bloque_id, o.celda_x, o.celda_y, o.celda_z, o.tipo_particula_id, o.extraida)
+        ) d
+        GROUP BY 1, 2, 3, 4, 5
+        HAVING SUM(d.delta) <> 0
+        ON CONFLICT (bloque_id, chunk_x, chunk_y, chunk_z, tipo_particula_id)
+        DO UPDATE SET cantidad = r.cantidad + EXCLUDED.cantidad;
+    ELSE
+        -- Las filas de un bloque borrado (ON DELETE CASCADE) ya no tienen resumen
+        UPDATE juego_dioses.chunk_resumen r
+        SET cantidad = r.cantidad - d.cantidad
+        FROM (
+            SELECT o.bloque_id, juego_dioses.chunk_de(o.celda_x) AS chunk_x, juego_dioses.chunk_de(o.celda_y) AS chunk_y,
+                   juego_dioses.chunk_de(o.celda_z) AS chunk_z, o.tipo_particula_id, COUNT(*) AS cantidad
+            FROM viejas o
+            WHERE NOT o.extraida
+            GROUP BY 1, 2, 3, 4, 5
+        ) d
+        WHERE r.bloque_id = d.bloque_id
+          AND r.chunk_x = d.chunk_x AND r.chunk_y = d.chunk_y AND r.chunk_z = d.chunk_z
+          AND r.tipo_particula_id = d.tipo_particula_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_particulas_resumen_insert ON particulas;
+CREATE TRIGGER trg_particulas_resumen_insert
+    AFTER INSERT ON particulas
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION particulas_resumir_chunks();
+
+DROP TRIGGER IF EXISTS trg_particulas_resumen_update ON particulas;
+CREATE TRIGGER trg_particulas_resumen_update
+    AFTER UPDATE ON particulas
+    REFERENCING OLD TABLE AS viejas NEW TABLE AS nuevas
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION particulas_resumir_chunks();
+
+DROP TRIGGER IF EXISTS trg_particulas_resumen_delete ON particulas;
+CREATE TRIGGER trg_particulas_resumen_delete
+    AFTER DELETE ON particulas
+    REFERENCING OLD TABLE AS viejas
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION particulas_resumir_chunks();
+
+-- Recalcula las columnas (x, y) dadas del mapa de alturas desde particulas (idx_particulas_posicion): borra las
+-- que quedaron sin partículas no extraídas, escribe las que cambiaron y versiona sus bloques en alturas_versiones
+CREATE OR REPLACE FUNCTION recalcular_alturas(p_bloques UUID[], p_xs INTEGER[], p_ys INTEGER[])
+RETURNS VOID AS $$
+BEGIN
+    WITH columnas AS (
+        SELECT DISTINCT c.bloque_id, c.celda_x, c.celda_y
+        FROM unnest(p_bloques, p_xs, p_ys) AS c(bloque_id, celda_x, celda_y)
+    ),
+    cimas AS (
+        SELECT c.bloque_id, c.celda_x, c.celda_y, t.celda_z, t.tipo_particula_id
+        FROM columnas c
+        LEFT JOIN LATERAL (
+            SELECT p.celda_z, p.tipo_particula_id
+            FROM juego_dioses.particulas p
+            WHERE p.bloque_id = c.bloque_id AND p.celda_x = c.celda_x AND p.celda_y = c.celda_y
+              AND NOT p.extraida
+            ORDER BY p.celda_z DESC
+            LIMIT 1
+        ) t ON true
+    ),
+    borradas AS (
+        DELETE FROM juego_dioses.alturas_terreno a
+        USING cimas c
+        WHERE c.celda_z IS NULL
+          AND a.bloque_id = c.bloque_id AND a.celda_x = c.celda_x AND a.celda_y = c.celda_y
+        RETURNING a.bloque_id
+    ),
+    escritas AS (
+        INSERT INTO juego_dioses.alturas_terreno AS a (bloque_id, celda_x, celda_y, altura_z, tipo_particula_id)
+        SELECT c.bloque_id, c.celda_x, c.celda_y, c.celda_z, c.tipo_particula_id
+        FROM cimas c
+        WHERE c.celda_z IS NOT NULL
+        ON CONFLICT (bloque_id, celda_x, celda_y) DO UPDATE
+            SET altura_z = EXCLUDED.altura_z, tipo_particula_id = EXCLUDED.tipo_particula_id
+            WHERE (a.altura_z, a.tipo_particula_id) IS DISTINCT FROM (EXCLUDED.altura_z, EXCLUDED.tipo_particula_id)
+        RETURNING a.bloque_id
+    )
+    INSERT INTO juego_dioses.alturas_versiones (bloque_id, version)
+    SELECT DISTINCT x.bloque_id, juego_dioses.version_transaccion()
+    FROM (SELECT bloque_id FROM borradas UNION ALL SELECT bloque_id FROM escritas) x
+    JOIN juego_dioses.bloques b ON b.id = x.bloque_id
+    ON CONFLICT (bloque_id) DO UPDATE SET version = EXCLUDED.version
+        WHERE alturas_versiones.version <> EXCLUDED.version;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Mapa de alturas tras escribir partículas (a nivel sentencia). Un INSERT solo puede subir la cima de una columna:
+-- se compara con la guardada sin leer particulas. Mover, cambiar de tipo, extraer o borrar recalcula las columnas
+-- afectadas. Las actualizaciones que no tocan posición, tipo ni extraida (temperatura) no hacen nada.
+CREATE OR REPLACE FUNCTION particulas_actualizar_alturas()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_bloques UUID[];
+    v_xs INTEGER[];
+    v_ys INTEGER[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        WITH escritas AS (
+            INSERT INTO juego_dioses.alturas_terreno AS a (bloque_id, celda_x, celda_y, altura_z, tipo_particula_id)
+            SELECT DISTINCT ON (n.bloque_id, n.celda_x, n.celda_y)
+                   n.bloque_id, n.celda_x, n.celda_y, n.celda_z, n.tipo_particula_id
+            FROM nuevas n
+            WHERE NOT n.extraida
+            ORDER BY n.bloque_id, n.celda_x, n.celda_y, n.celda_z DESC
+            ON CONFLICT (bloque_id, celda_x, celda_y) DO UPDATE
+                SET altura_z = EXCLUDED.altura_z, tipo_particula_id = EXCLUDED.tipo_particula_id
+                WHERE EXCLUDED.altura_z >= a.altura_z
+                  AND (a.altura_z, a.tipo_particula_id) IS DISTINCT FROM (EXCLUDED.altura_z, EXCLUDED.tipo_particula_id)
+            RETURNING a.bloque_id
+        )
+        INSERT INTO juego_dioses.alturas_versiones (bloque_id, version)
+        SELECT DISTINCT e.bloque_id, juego_dioses.version_transaccion()
+        FROM escritas e
+        ON CONFLICT (bloque_id) DO UPDATE SET version = EXCLUDED.version
+            WHERE alturas_versiones.version <> EXCLUDED.version;
+        RETURN NULL;
+    ELSIF TG_OP = 'UPDATE' THEN
+        SELECT array_agg(c.bloque_id), array_agg(c.celda_x), array_agg(c.celda_y)
+        INTO v_bloques, v_xs, v_ys
+        FROM (
+            SELECT o.bloque_id, o.celda_x, o.celda_y, n.bloque_id AS n_bloque_id, n.celda_x AS n_celda_x,
+                   n.celda_y AS n_celda_y
+            FROM viejas o JOIN nuevas n ON n.id = o.id
+            WHERE (n.bloque_id, n.celda_x, n.celda_y, n.celda_z, n.tipo_particula_id, n.extraida)
+                  IS DISTINCT FROM (o.bloque_id, o.celda_x, o.celda_y, o.celda_z, o.tipo_particula_id, o.extraida)
+        ) d
+        CROSS JOIN LATERAL (
+            VALUES (d.bloque_id, d.celda_x, d.celda_y), (d.n_bloque_id, d.n_celda_x, d.n_celda_y)
+        ) AS c(bloque_id, celda_x, celda_y);
+    ELSE
+        -- Las filas de un bloque borrado (ON DELETE CASCADE) ya no tienen mapa
+        SELECT array_agg(o.bloque_id), array_agg(o.celda_x), array_agg(o.celda_y)
+        INTO v_bloques, v_xs, v_ys
+        FROM viejas o
+        WHERE NOT o.extraida;
+    END IF;
+    IF v_bloques IS NOT NULL THEN
+        PERFORM juego_dioses.recalcular_alturas(v_bloques, v_xs, v_ys);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_particulas_alturas_insert ON particulas;
+CREATE TRIGGER trg_particulas_alturas_insert
+    AFTER INSERT ON particulas
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION particulas_actualizar_alturas();
+
+DROP TRIGGER IF EXISTS trg_particulas_alturas_update ON particulas;
+CREATE TRIGGER trg_particulas_alturas_update
+    AFTER UPDATE ON particulas
+    REFERENCING OLD TABLE AS viejas NEW TABLE AS nuevas
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION particulas_actualizar_alturas();
+
+DROP TRIGGER IF EXISTS trg_particulas_alturas_delete ON particulas;
+CREATE TRIGGER trg_particulas_alturas_delete
+    AFTER DELETE ON particulas
+    REFERENCING OLD TABLE AS viejas
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION particulas_actualizar_alturas();
+
+-- Versión de bloque tras escribir la fila del bloque o sus agrupaciones
+CREATE OR REPLACE FUNCTION versionar_bloque()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_bloque_id UUID;
+BEGIN
+    IF TG_TABLE_NAME = 'bloques' THEN
+        v_bloque_id := NEW.id;
+    ELSIF TG_OP = 'DELETE' THEN
+        v_bloque_id := OLD.bloque_id;
+    ELSE
+        v_bloque_id := NEW.bloque_id;
+    END IF;
+    INSERT INTO juego_dioses.bloque_versiones (bloque_id, version)
+    SELECT b.id, juego_dioses.version_transaccion()
+    FROM juego_dioses.bloques b
+    WHERE b.id = v_bloque_id
+    ON CONFLICT (bloque_id) DO UPDATE SET version = EXCLUDED.version
+        WHERE bloque_versiones.version <> EXCLUDED.version;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- bloques.version: el INSERT la toma por DEFAULT, cada UPDATE una nueva
+CREATE OR REPLACE FUNCTION bloques_asignar_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.version := nextval('juego_dioses.world_version_seq');
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_bloques_version ON bloques;
+CREATE TRIGGER trg_bloques_version
+    BEFORE UPDATE ON bloques
+    FOR EACH ROW
+    EXECUTE FUNCTION bloques_asignar_version();
+
+DROP TRIGGER IF EXISTS trg_bloques_versionar ON bloques;
+CREATE TRIGGER trg_bloques_versionar
+    AFTER INSERT OR UPDATE ON bloques
+    FOR EACH ROW
+    EXECUTE FUNCTION versionar_bloque();
+
+DROP TRIGGER IF EXISTS trg_agrupaciones_versionar ON agrupaciones;
+CREATE TRIGGER trg_agrupaciones_versionar
+    AFTER INSERT OR UPDATE OR DELETE ON agrupaciones
+    FOR EACH ROW
+    EXECUTE FUNCTION versionar_bloque();
+
+-- El catálogo (nombres, colores, geometrías) aparece en todas las respuestas: invalida todas las versiones.
+-- Las transiciones no aparecen en las respuestas de partículas: solo cambian la versión del catálogo.
+-- NOTIFY juego_dioses_catalogo (payload = versión) avisa a los procesos que guardan el catálogo en memoria;
+-- se entrega al confirmar la transacción.
+CREATE OR REPLACE FUNCTION versionar_catalogo()
+RETURNS TRIGGER AS $$
+DECLARE
+    v BIGINT := juego_dioses.version_transaccion();
+BEGIN
+    IF TG_TABLE_NAME <> 'transiciones_particulas' THEN
+        UPDATE juego_dioses.chunk_versiones SET version = v WHERE version <> v;
+        UPDATE juego_dioses.bloque_versiones SET version = v WHERE version <> v;
+    END IF;
+    INSERT INTO juego_dioses.catalogo_version (id, version) VALUES (true, v)
+    ON CONFLICT (id) DO UPDATE SET version = EXCLUDED.version
+        WHERE catalogo_version.version <> EXCLUDED.version;
+    PERFORM pg_notify('juego_dioses_catalogo', v::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_tipos_particulas_versionar ON tipos_particulas;
+CREATE TRIGGER trg_tipos_particulas_versionar
+    AFTER INSERT OR UPDATE OR DELETE ON tipos_particulas
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION versionar_catalogo();
+
+DROP TRIGGER IF EXISTS trg_estados_materia_versionar ON estados_materia;
+CREATE TRIGGER trg_estados_materia_versionar
+    AFTER INSERT OR UPDATE OR DELETE ON estados_materia
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION versionar_catalogo();
+
+DROP TRIGGER IF EXISTS trg_transiciones_particulas_versionar ON transiciones_particulas;
+CREATE TRIGGER trg_transiciones_particulas_versionar
+    AFTER INSERT OR UPDATE OR DELETE ON transiciones_particulas
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION versionar_catalogo();
+
+-- Versiones iniciales de lo cargado antes de crear los triggers (02-seed-data.sql)
+INSERT INTO bloque_versiones (bloque_id, version)
+SELECT id, nextval('juego_dioses.world_version_seq') FROM bloques
+ON CONFLICT (bloque_id) DO NOTHING;
+
+INSERT INTO chunk_versiones (bloque_id, chunk_x, chunk_y, chunk_z, version)
+SELECT c.bloque_id, c.chunk_x, c.chunk_y, c.chunk_z, nextval('juego_dioses.world_version_seq')
+FROM (
+    SELECT DISTINCT bloque_id, chunk_de(celda_x) AS chunk_x, chunk_de(celda_y) AS chunk_y, chunk_de(celda_z) AS chunk_z
+    FROM particulas
+) c
+ON CONFLICT (bloque_id, chunk_x, chunk_y, chunk_z) DO NOTHING;
+
+INSERT INTO chunk_resumen (bloque_id, chunk_x, chunk_y, chunk_z, tipo_particula_id, cantidad)
+SELECT bloque_id, chunk_de(celda_x), chunk_de(celda_y), chunk_de(celda_z), tipo_particula_id, COUNT(*)
+FROM particulas
+WHERE NOT extraida
+GROUP BY 1, 2, 3, 4, 5
+ON CONFLICT (bloque_id, chunk_x, chunk_y, chunk_z, tipo_particula_id) DO NOTHING;
+
+INSERT INTO alturas_terreno (bloque_id, celda_x, celda_y, altura_z, tipo_particula_id)
+SELECT DISTINCT ON (bloque_id, celda_x, celda_y) bloque_id, celda_x, celda_y, celda_z, tipo_particula_id
+FROM particulas
+WHERE NOT extraida
+ORDER BY bloque_id, celda_x, celda_y, celda_z DESC
+ON CONFLICT (bloque_id, celda_x, celda_y) DO NOTHING;
+
+INSERT INTO alturas_versiones (bloque_id, version)
+SELECT id, nextval('juego_dioses.world_version_seq') FROM bloques
+ON CONFLICT (bloque_id) DO NOTHING;
+
+INSERT INTO catalogo_version (id, version)
+VALUES (true, nextval('juego_dioses.world_version_seq'))
+ON CONFLICT (id) DO NOTHING;
+
 -- Mensaje de confirmación
 DO $$
 BEGIN
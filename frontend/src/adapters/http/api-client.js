@@ -29,6 +29,48 @@ export class ApiClient {
         return await response.json();
     }
 
+    /**
+     * GET que devuelve el cuerpo como ArrayBuffer (formatos binarios negociados por Accept)
+     * @param {string} endpoint
+     * @param {string} accept - Media type a pedir
+     * @returns {Promise<ArrayBuffer>}
+     */
+    async getArrayBuffer(endpoint, accept) {
+        const url = `${this.baseUrl}${endpoint}`;
+        const response = await fetch(url, {
+            method: 'GET',
+            headers: { 'Accept': accept }
+        });
+
+        if (!response.ok) {
+            throw new Error(`Error: ${response.statusText}`);
+        }
+
+        return await response.arrayBuffer();
+    }
+
+    /**
+     * POST con cuerpo JSON que devuelve la respuesta como ArrayBuffer (formatos binarios)
+     * @param {string} endpoint
+     * @param {Object} body
+     * @param {string} accept - Media type a pedir
+     * @returns {Promise<ArrayBuffer>}
+     */
+    async postArrayBuffer(endpoint, body, accept) {
+        const url = `${this.baseUrl}${endpoint}`;
+        const response = await fetch(url, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json', 'Accept': accept },
+            body: JSON.stringify(body)
+        });
+
+        if (!response.ok) {
+            throw new Error(`Error: ${response.statusText}`);
+        }
+
+        return await response.arrayBuffer();
+    }
+
     async get(endpoint) {
         return this.request(endpoint, { method: 'GET' });
     }
@@ -0,0 +1,56 @@
+/**
+ * Decoder del formato binario columnar de partículas (application/x-jdd-columnar).
+ * Layout: magic "JDDC" | uint32 LE longitud del header | header JSON | padding a 8 | columnas alineadas a 8.
+ * Las columnas se devuelven como vistas (sin copia) sobre el ArrayBuffer recibido.
+ */
+
+export const COLUMNAR_MEDIA_TYPE = 'application/x-jdd-columnar';
+
+const MAGIC = 'JDDC';
+const ALIGNMENT = 8;
+
+const TYPED_ARRAYS = {
+    i2: Int16Array,
+    i4: Int32Array,
+    u1: Uint8Array,
+    u2: Uint16Array,
+    f4: Float32Array
+};
+
+/**
+ * @param {ArrayBuffer} buffer
+ * @returns {{bloque_id: string, count: number, total: number, viewport: Object, lod: number, palette: Array, agrupaciones: Array<string>, columns: Object<string, TypedArray>}}
+ */
+export function decodeColumnarParticles(buffer) {
+    const view = new DataView(buffer);
+    const magic = String.fromCharCode(
+        view.getUint8(0), view.getUint8(1), view.getUint8(2), view.getUint8(3)
+    );
+    if (magic !== MAGIC) {
+        throw new Error('Formato columnar inválido');
+    }
+    const headerLength = view.getUint32(4, true);
+    const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 8, headerLength)));
+    const headerEnd = 8 + headerLength;
+    const dataStart = headerEnd + ((ALIGNMENT - (headerEnd % ALIGNMENT)) % ALIGNMENT);
+
+    const columns = {};
+    for (const spec of header.columns) {
+        const ArrayType = TYPED_ARRAYS[spec.dtype];
+        if (!ArrayType) {
+            throw new Error(`dtype columnar no soportado: ${spec.dtype}`);
+        }
+        columns[spec.name] = new ArrayType(buffer, dataStart + spec.offset, spec.length);
+    }
+
+    return {
+        bloque_id: header.bloque_id,
+        count: header.count,
+        total: header.total,
+        viewport: header.viewport,
+        lod: header.lod ?? 0,
+        palette: header.palette,
+        agrupaciones: header.agrupaciones,
+        columns
+    };
+}
@@ -0,0 +1,83 @@
+/**
+ * Decoder del mapa de alturas de un bloque (application/x-jdd-heightmap).
+ * Layout: magic "JDHM" | uint32 LE longitud del header | header JSON | padding a 8 | columnas alineadas a 8.
+ * Grilla densa width x height: la columna (x, y) está en (y - y_min) * width + (x - x_min).
+ */
+
+export const HEIGHTMAP_MEDIA_TYPE = 'application/x-jdd-heightmap';
+
+const MAGIC = 'JDHM';
+const ALIGNMENT = 8;
+const EMPTY_TIPO = 0xFFFF;
+
+const TYPED_ARRAYS = {
+    i2: Int16Array,
+    i4: Int32Array,
+    u2: Uint16Array
+};
+
+/**
+ * @param {ArrayBuffer} buffer
+ * @returns {{bloque_id: string, version: number, x_min: number, y_min: number, width: number, height: number, empty: number, palette: Array, altura: Int16Array|Int32Array, tipo: Uint16Array, heightAt: function(number, number): (number|null), typeAt: function(number, number): (Object|null)}}
+ */
+export function decodeHeightmap(buffer) {
+    const view = new DataView(buffer);
+    const magic = String.fromCharCode(
+        view.getUint8(0), view.getUint8(1), view.getUint8(2), view.getUint8(3)
+    );
+    if (magic !== MAGIC) {
+        throw new Error('Formato de mapa de alturas inválido');
+    }
+    const headerLength = view.getUint32(4, true);
+    const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 8, headerLength)));
+    const headerEnd = 8 + headerLength;
+    const dataStart = headerEnd + ((ALIGNMENT - (headerEnd % ALIGNMENT)) % ALIGNMENT);
+
+    const columns = {};
+    for (const spec of header.columns) {
+        const ArrayType = TYPED_ARRAYS[spec.dtype];
+        if (!ArrayType) {
+            throw new Error(`dtype de mapa de alturas no soportado: ${spec.dtype}`);
+        }
+        columns[spec.name] = new ArrayType(buffer, dataStart + spec.offset, spec.length);
+    }
+
+    const { x_min, y_min, width, height, empty, palette } = header;
+    const indexOf = (x, y) => {
+        const dx = Math.floor(x) - x_min;
+        const dy = Math.floor(y) - y_min;
+        if (dx < 0 || dy < 0 || dx >= width || dy >= height) {
+            return -1;
+        }
+        return dy * width + dx;
+    };
+
+    return {
+        bloque_id: header.bloque_id,
+        version: header.heightmap_version,
+        x_min,
+        y_min,
+        width,
+        height,
+        empty,
+        palette,
+        altura: columns.altura,
+        tipo: columns.tipo,
+        /** celda_z más alta no extraída en la columna, o null si no hay partículas */
+        heightAt(x, y) {
+            const i = indexOf(x, y);
+            if (i < 0 || columns.altura[i] === empty) {
+                return null;
+            }
+            return columns.altura[i];
+        },
+        /** Entrada de palette ({tipo_particula_id, tipo}) de la cima de la columna, o null */
+        typeAt(x, y) {
+            const i = indexOf(x, y);
+            if (i < 0 || columns.tipo[i] === EMPTY_TIPO) {
+                return null;
+            }
+            return palette[columns.tipo[i]];
+        }
+    };
+}
@@ -1,6 +1,7 @@
 /**
  * Adapter HTTP: World/Blocs API (port worldApi)
  */
+import { HEIGHTMAP_MEDIA_TYPE, decodeHeightmap } from './heightmap-decoder.js';
 
 /**
  * @implements {import('../../ports/contracts.js').BloquesPort}
@@ -33,4 +34,16 @@ export class HttpBloquesApi {
             throw new Error(`Error al obtener tamaño del mundo: ${error.message}`);
         }
     }
+
+    /**
+     * Mapa de alturas del bloque (altura y tipo de la cima de cada columna; ver heightmap-decoder.js)
+     */
+    async getHeightmap(bloqueId) {
+        try {
+            const buffer = await this.client.getArrayBuffer(`/bloques/${bloqueId}/heightmap`, HEIGHTMAP_MEDIA_TYPE);
+            return decodeHeightmap(buffer);
+        } catch (error) {
+            throw new Error(`Error al obtener mapa de alturas: ${error.message}`);
+        }
+    }
 }
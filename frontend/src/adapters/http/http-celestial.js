@@ -1,6 +1,7 @@
 /**
  * Adapter HTTP: Celestial API (port celestialApi)
  */
+import { TEMPERATURE_GRID_MEDIA_TYPE, decodeTemperatureGrid } from './temperature-grid-decoder.js';
 
 /**
  * @implements {import('../../ports/contracts.js').CelestialPort}
@@ -34,4 +35,22 @@ export class HttpCelestialApi {
             throw new Error(`Error al calcular temperatura: ${error.message}`);
         }
     }
+
+    /**
+     * Temperaturas de muchas celdas en una petición (ver temperature-grid-decoder.js)
+     * @param {string} bloqueId
+     * @param {{puntos?: Array<Array<number>>, grilla?: {x_min: number, x_max: number, y_min: number, y_max: number, z_min: number, z_max: number, paso?: number}}} consulta
+     */
+    async getTemperatureGrid(bloqueId, consulta) {
+        try {
+            const buffer = await this.client.postArrayBuffer(
+                '/celestial/temperature/batch',
+                { bloque_id: bloqueId, ...consulta },
+                TEMPERATURE_GRID_MEDIA_TYPE
+            );
+            return decodeTemperatureGrid(buffer);
+        } catch (error) {
+            throw new Error(`Error al calcular temperaturas: ${error.message}`);
+        }
+    }
 }
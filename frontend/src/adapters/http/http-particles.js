@@ -1,6 +1,7 @@
 /**
  * Adapter HTTP: Particles API (port particlesApi)
  */
+import { COLUMNAR_MEDIA_TYPE, decodeColumnarParticles } from './columnar-decoder.js';
 
 /**
  * @implements {import('../../ports/contracts.js').ParticlesPort}
@@ -21,6 +22,48 @@ export class HttpParticlesApi {
         }
     }
 
+    /**
+     * Partículas del viewport en formato columnar (typed arrays listos para subir a GPU)
+     * @returns {Promise<{bloque_id: string, count: number, total: number, viewport: Object, lod: number, palette: Array, agrupaciones: Array<string>, columns: Object<string, TypedArray>}>}
+     */
+    async getParticlesColumnar(bloqueId, viewport) {
+        const { x_min, x_max, y_min, y_max, z_min, z_max } = viewport;
+        const endpoint = `/bloques/${bloqueId}/particles?` +
+            `x_min=${x_min}&x_max=${x_max}&y_min=${y_min}&y_max=${y_max}&z_min=${z_min}&z_max=${z_max}`;
+        try {
+            const buffer = await this.client.getArrayBuffer(endpoint, COLUMNAR_MEDIA_TYPE);
+            return decodeColumnarParticles(buffer);
+        } catch (error) {
+            throw new Error(`Error al obtener partículas (columnar): ${error.message}`);
+        }
+    }
+
+    /**
+     * Partículas de varias regiones en un solo pedido (una consulta por bloque en el backend)
+     * @param {{regions?: Array<Object>, chunks?: Array<{chunk_x: number, chunk_y: number, chunk_z: number}>}} batch
+     * @returns {Promise<{bloque_id: string, regions: Array<{viewport: Object, particles: Array, total: number}>}>}
+     */
+    async getParticlesBatch(bloqueId, batch) {
+        const { regions = [], chunks = [] } = batch;
+        try {
+            return await this.client.post(`/bloques/${bloqueId}/particles/batch`, { regions, chunks });
+        } catch (error) {
+            throw new Error(`Error al obtener partículas (batch): ${error.message}`);
+        }
+    }
+
+    /**
+     * Catálogo completo de tipos (estilos) y estados; cacheable (Cache-Control + ETag), el navegador lo revalida
+     * @returns {Promise<{version: number, hash: string, types: Array<Object>, states: Array<Object>}>}
+     */
+    async getParticleCatalogue() {
+        try {
+            return await this.client.get('/particle-types/catalogue');
+        } catch (error) {
+            throw new Error(`Error al obtener catálogo de partículas: ${error.message}`);
+        }
+    }
+
     async getParticleTypes(bloqueId, viewport) {
         const { x_min, x_max, y_min, y_max, z_min, z_max } = viewport;
         const endpoint = `/bloques/${bloqueId}/particle-types?` +
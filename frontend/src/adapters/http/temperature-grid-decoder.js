@@ -0,0 +1,59 @@
+/**
+ * Decoder de temperaturas por lotes (application/x-jdd-temperature).
+ * Layout: magic "JDTG" | uint32 LE longitud del header | header JSON | padding a 8 | columnas alineadas a 8.
+ * Grilla: shape [nz, ny, nx], la muestra (i, j, k) está en (k * ny + j) * nx + i. Puntos: shape [n], en orden.
+ */
+
+export const TEMPERATURE_GRID_MEDIA_TYPE = 'application/x-jdd-temperature';
+
+const MAGIC = 'JDTG';
+const ALIGNMENT = 8;
+
+/**
+ * @param {ArrayBuffer} buffer
+ * @returns {{bloque_id: string, tiempo: number, tramo: number, shape: Array<number>, origin: (Array<number>|null), paso: number, temperatura: Float32Array, temperatureAt: function(number, number, number): (number|null)}}
+ */
+export function decodeTemperatureGrid(buffer) {
+    const view = new DataView(buffer);
+    const magic = String.fromCharCode(
+        view.getUint8(0), view.getUint8(1), view.getUint8(2), view.getUint8(3)
+    );
+    if (magic !== MAGIC) {
+        throw new Error('Formato de temperaturas inválido');
+    }
+    const headerLength = view.getUint32(4, true);
+    const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 8, headerLength)));
+    const headerEnd = 8 + headerLength;
+    const dataStart = headerEnd + ((ALIGNMENT - (headerEnd % ALIGNMENT)) % ALIGNMENT);
+
+    const spec = header.columns.find((column) => column.name === 'temperatura');
+    if (!spec || spec.dtype !== 'f4') {
+        throw new Error('Columna de temperatura no soportada');
+    }
+    const temperatura = new Float32Array(buffer, dataStart + spec.offset, spec.length);
+    const { shape, origin, paso } = header;
+
+    return {
+        bloque_id: header.bloque_id,
+        tiempo: header.tiempo,
+        tramo: header.tramo,
+        shape,
+        origin,
+        paso,
+        temperatura,
+        /** Temperatura de la muestra de la grilla que contiene la celda (x, y, z), o null si está fuera */
+        temperatureAt(x, y, z) {
+            if (!origin) {
+                return null;
+            }
+            const [nz, ny, nx] = shape;
+            const i = Math.floor((Math.floor(x) - origin[0]) / paso);
+            const j = Math.floor((Math.floor(y) - origin[1]) / paso);
+            const k = Math.floor((Math.floor(z) - origin[2]) / paso);
+            if (i < 0 || j < 0 || k < 0 || i >= nx || j >= ny || k >= nz) {
+                return null;
+            }
+            return temperatura[(k * ny + j) * nx + i];
+        }
+    };
+}
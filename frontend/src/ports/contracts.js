@@ -10,8 +10,12 @@
  * @typedef {Object} ParticlesPort
  * @property {function(string, Object): Promise<{particles: Array<Object>}>} getParticles
  *   - getParticles(dimensionId, viewport) => Promise con { particles: [...] }
+ * @property {function(string, Object): Promise<{regions: Array<Object>}>} getParticlesBatch
+ *   - getParticlesBatch(dimensionId, { regions, chunks }) => Promise con { regions: [{ viewport, particles, total }] }
  * @property {function(string, Object): Promise<{types: Array<Object>}>} getParticleTypes
  *   - getParticleTypes(dimensionId, viewport) => Promise con { types: [...] }
+ * @property {function(): Promise<{version: number, hash: string, types: Array<Object>, states: Array<Object>}>} getParticleCatalogue
+ *   - getParticleCatalogue() => Promise con el catálogo completo { version, hash, types, states } (cacheable)
  */
 
 /**
@@ -20,6 +24,8 @@
  *   - Devuelve lista de dimensiones/metadatos
  * @property {function(string): Promise<Object>} getDimension
  *   - getDimension(dimensionId) => Promise con datos de la dimensión
+ * @property {function(string): Promise<Object>} [getHeightmap]
+ *   - getHeightmap(bloqueId) => Promise con el mapa de alturas decodificado (heightAt(x, y), typeAt(x, y))
  */
 
 /**
@@ -38,6 +44,8 @@
  * @typedef {Object} CelestialPort
  * @property {function(): Promise<Object>} getState
  * @property {function(Object): Promise<number>} calculateTemperature
+ * @property {function(string, Object): Promise<Object>} [getTemperatureGrid]
+ *   - getTemperatureGrid(bloqueId, { puntos } | { grilla }) => Promise con las temperaturas decodificadas (temperatureAt(x, y, z))
  */
 
 /**
@@ -34,7 +34,7 @@ export class TerrainManager {
      * Tipos/contratos esperados (documentación del port)
      * @typedef {Object} ParticlesPort
      * @property {function(string, Object): Promise<{particles: Array}>} getParticles
-     * @property {function(string, Object): Promise<Object>} getParticleTypes
+     * @property {function(): Promise<Object>} getParticleCatalogue
      *
      * @typedef {Object} BloquesPort
      * @property {function(): Promise<Array>} getDimensions
@@ -42,7 +42,7 @@ export class TerrainManager {
      *
      * Constructor
      * @param {THREE.Scene} scene - Escena Three.js
-     * @param {ParticlesPort} particlesApi - Port de partículas (inyectado). Debe implementar getParticles/getParticleTypes.
+     * @param {ParticlesPort} particlesApi - Port de partículas (inyectado). Debe implementar getParticles/getParticleCatalogue.
      * @param {BloquesPort} bloquesApi - Port de bloques/dimensiones (inyectado).
      * @param {GeometryRegistry} geometryRegistry - Registry de geometrías
      * @param {PerformanceManager} performanceManager - Performance Manager (opcional)
@@ -102,10 +102,10 @@ export class TerrainManager {
         // 1. Calcular viewport
         const viewport = this.viewportSystem.calculateViewport(dimension);
         
-        // 2. Cargar partículas y estilos en paralelo
+        // 2. Cargar partículas y estilos en paralelo (catálogo completo: el navegador lo cachea por ETag)
         const [particlesData, typesData] = await Promise.all([
             this.particlesApi.getParticles(dimension.id, viewport),
-            this.particlesApi.getParticleTypes(dimension.id, viewport)
+            this.particlesApi.getParticleCatalogue()
         ]);
         
         // 3. Cachear estilos y partículas
@@ -584,11 +584,11 @@ export class TerrainManager {
         });
         
         try {
-            // Cargar partículas y tipos del área alrededor del jugador
+            // Cargar partículas del área alrededor del jugador y el catálogo de estilos (cacheado por el navegador)
             const loadStartTime = performance.now();
             const [particlesData, typesData] = await Promise.all([
                 this.particlesApi.getParticles(this.currentDimension.id, viewport),
-                this.particlesApi.getParticleTypes(this.currentDimension.id, viewport)
+                this.particlesApi.getParticleCatalogue()
             ]);
             const loadDuration = performance.now() - loadStartTime;
             